@@ -0,0 +1,320 @@
+"""Initial schema for the TODO 1.3 tables
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-11-03
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from app.models.partitions import (
+    PARTITIONED_TABLES,
+    create_default_partition_sql,
+    ensure_monthly_partitions,
+)
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+CATEGORIES = "'food', 'person', 'place', 'thing', 'action', 'feeling'"
+FEEDBACK_TYPES = "'thumbs_up', 'thumbs_down', 'spoken', 'dismissed', 'constructed'"
+# Months of partitions provisioned before and after the migration date
+PARTITION_MONTHS_BACK = 1
+PARTITION_MONTHS_AHEAD = 12
+
+
+def _created_at() -> sa.Column:
+    return sa.Column(
+        "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("display_name", sa.String(100)),
+        sa.Column("is_active", sa.Boolean(), server_default=sa.text("true"), nullable=False),
+        sa.Column(
+            "settings",
+            postgresql.JSONB(),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+        sa.Column("last_login_at", sa.DateTime(timezone=True)),
+        _created_at(),
+        sa.PrimaryKeyConstraint("id", name="pk_users"),
+        sa.UniqueConstraint("email", name="uq_users_email"),
+    )
+
+    op.create_table(
+        "object_library",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("category", sa.String(20), nullable=False),
+        sa.Column("icon_url", sa.String(500)),
+        sa.Column(
+            "common_verbs",
+            postgresql.ARRAY(sa.Integer()),
+            server_default=sa.text("'{}'::integer[]"),
+            nullable=False,
+        ),
+        sa.Column("usage_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("user_id", sa.Integer()),
+        _created_at(),
+        sa.PrimaryKeyConstraint("id", name="pk_object_library"),
+        sa.CheckConstraint(f"category IN ({CATEGORIES})", name=op.f("ck_object_library_category")),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="fk_object_library_user_id_users",
+            ondelete="CASCADE",
+        ),
+    )
+    op.create_index(
+        "ix_object_library_category_usage",
+        "object_library",
+        ["category", sa.text("usage_count DESC")],
+        postgresql_include=["id", "name", "icon_url"],
+        postgresql_where=sa.text("user_id IS NULL"),
+    )
+    op.create_index(
+        "ix_object_library_custom",
+        "object_library",
+        ["user_id", "category"],
+        postgresql_include=["id", "name", "icon_url", "usage_count"],
+        postgresql_where=sa.text("user_id IS NOT NULL"),
+    )
+    op.create_index(
+        "uq_object_library_shared_name",
+        "object_library",
+        ["name"],
+        unique=True,
+        postgresql_where=sa.text("user_id IS NULL"),
+    )
+
+    op.create_table(
+        "verb_library",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("verb_text", sa.String(50), nullable=False),
+        sa.Column("emoji", sa.String(16)),
+        sa.Column(
+            "compatible_object_categories",
+            postgresql.ARRAY(sa.String(20)),
+            server_default=sa.text("'{}'::varchar[]"),
+            nullable=False,
+        ),
+        sa.Column("base_score", sa.Float(), server_default=sa.text("0"), nullable=False),
+        _created_at(),
+        sa.PrimaryKeyConstraint("id", name="pk_verb_library"),
+        sa.UniqueConstraint("verb_text", name="uq_verb_library_verb_text"),
+    )
+    op.create_index(
+        "ix_verb_library_categories",
+        "verb_library",
+        ["compatible_object_categories"],
+        postgresql_using="gin",
+    )
+
+    op.create_table(
+        "modifier_library",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("modifier_text", sa.String(50), nullable=False),
+        sa.Column("modifier_type", sa.String(20), nullable=False),
+        sa.Column("emoji", sa.String(16)),
+        sa.Column("base_score", sa.Float(), server_default=sa.text("0"), nullable=False),
+        _created_at(),
+        sa.PrimaryKeyConstraint("id", name="pk_modifier_library"),
+        sa.UniqueConstraint("modifier_text", name="uq_modifier_library_modifier_text"),
+    )
+    op.create_index(
+        "ix_modifier_library_type_score",
+        "modifier_library",
+        ["modifier_type", sa.text("base_score DESC")],
+        postgresql_include=["modifier_text", "emoji"],
+    )
+
+    op.create_table(
+        "detected_objects",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("image_id", sa.String(64), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("object_id", sa.Integer()),
+        sa.Column("label", sa.String(100), nullable=False),
+        sa.Column("bbox_x", sa.Float(), nullable=False),
+        sa.Column("bbox_y", sa.Float(), nullable=False),
+        sa.Column("bbox_width", sa.Float(), nullable=False),
+        sa.Column("bbox_height", sa.Float(), nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("custom_label", sa.String(100)),
+        _created_at(),
+        sa.PrimaryKeyConstraint("id", name="pk_detected_objects"),
+        sa.CheckConstraint(
+            "confidence BETWEEN 0 AND 1", name=op.f("ck_detected_objects_confidence")
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="fk_detected_objects_user_id_users",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["object_id"],
+            ["object_library.id"],
+            name="fk_detected_objects_object_id_object_library",
+            ondelete="SET NULL",
+        ),
+    )
+    op.create_index("ix_detected_objects_image_id", "detected_objects", ["image_id"])
+    op.create_index("ix_detected_objects_user_id", "detected_objects", ["user_id"])
+
+    op.create_table(
+        "sentence_templates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("structure", sa.String(100), nullable=False),
+        sa.Column("usage_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("success_rate", sa.Float(), server_default=sa.text("0"), nullable=False),
+        _created_at(),
+        sa.PrimaryKeyConstraint("id", name="pk_sentence_templates"),
+        sa.UniqueConstraint("structure", name="uq_sentence_templates_structure"),
+    )
+
+    op.create_table(
+        "constructed_sentences",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        _created_at(),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("sentence_text", sa.String(500), nullable=False),
+        sa.Column("object_id", sa.Integer()),
+        sa.Column("verb_id", sa.Integer()),
+        sa.Column("modifier_id", sa.Integer()),
+        sa.Column("template_id", sa.Integer()),
+        sa.Column("spoken", sa.Boolean(), server_default=sa.text("false"), nullable=False),
+        sa.PrimaryKeyConstraint("id", "created_at", name="pk_constructed_sentences"),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="fk_constructed_sentences_user_id_users",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["object_id"],
+            ["object_library.id"],
+            name="fk_constructed_sentences_object_id_object_library",
+        ),
+        sa.ForeignKeyConstraint(
+            ["verb_id"], ["verb_library.id"], name="fk_constructed_sentences_verb_id_verb_library"
+        ),
+        sa.ForeignKeyConstraint(
+            ["modifier_id"],
+            ["modifier_library.id"],
+            name="fk_constructed_sentences_modifier_id_modifier_library",
+        ),
+        sa.ForeignKeyConstraint(
+            ["template_id"],
+            ["sentence_templates.id"],
+            name="fk_constructed_sentences_template_id_sentence_templates",
+        ),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "ix_constructed_sentences_user_created",
+        "constructed_sentences",
+        ["user_id", sa.text("created_at DESC")],
+        postgresql_include=["id", "sentence_text", "object_id", "verb_id", "modifier_id", "spoken"],
+    )
+
+    op.create_table(
+        "feedback_records",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        _created_at(),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("session_id", sa.String(64)),
+        sa.Column("sentence_id", sa.BigInteger()),
+        sa.Column("constructed_sentence", sa.String(500), nullable=False),
+        sa.Column("object_id", sa.Integer()),
+        sa.Column("verb_id", sa.Integer()),
+        sa.Column("modifier_id", sa.Integer()),
+        sa.Column(
+            "context",
+            postgresql.JSONB(),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+        sa.Column("feedback_type", sa.String(16), nullable=False),
+        sa.PrimaryKeyConstraint("id", "created_at", name="pk_feedback_records"),
+        sa.CheckConstraint(
+            f"feedback_type IN ({FEEDBACK_TYPES})",
+            name=op.f("ck_feedback_records_feedback_type"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="fk_feedback_records_user_id_users",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["object_id"],
+            ["object_library.id"],
+            name="fk_feedback_records_object_id_object_library",
+        ),
+        sa.ForeignKeyConstraint(
+            ["verb_id"], ["verb_library.id"], name="fk_feedback_records_verb_id_verb_library"
+        ),
+        sa.ForeignKeyConstraint(
+            ["modifier_id"],
+            ["modifier_library.id"],
+            name="fk_feedback_records_modifier_id_modifier_library",
+        ),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "ix_feedback_records_combination",
+        "feedback_records",
+        ["object_id", "verb_id", "modifier_id"],
+        postgresql_include=["feedback_type", "created_at"],
+    )
+    op.create_index(
+        "ix_feedback_records_explicit",
+        "feedback_records",
+        ["user_id", sa.text("created_at DESC")],
+        postgresql_include=["object_id", "verb_id", "modifier_id", "feedback_type"],
+        postgresql_where=sa.text("feedback_type IN ('thumbs_up', 'thumbs_down')"),
+    )
+    op.create_index("ix_feedback_records_user_id", "feedback_records", ["user_id"])
+
+    for table in PARTITIONED_TABLES:
+        op.execute(create_default_partition_sql(table))
+    today = date.today()
+    ensure_monthly_partitions(
+        op.get_bind(),
+        _add_months(today, -PARTITION_MONTHS_BACK),
+        _add_months(today, PARTITION_MONTHS_AHEAD),
+    )
+
+
+def downgrade() -> None:
+    # Dropping a partitioned parent drops all of its partitions
+    op.drop_table("feedback_records")
+    op.drop_table("constructed_sentences")
+    op.drop_table("sentence_templates")
+    op.drop_table("detected_objects")
+    op.drop_table("modifier_library")
+    op.drop_table("verb_library")
+    op.drop_table("object_library")
+    op.drop_table("users")
@@ -0,0 +1,47 @@
+"""Seed the FR-5 sentence templates
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-11-10
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.services.sentence_service.DEFAULT_TEMPLATES at this revision
+TEMPLATES = (
+    "I [verb] [object]",
+    "I [verb] [object] [modifier]",
+    "[Object] please",
+    "I [verb] [modifier]",
+)
+
+sentence_templates = sa.table(
+    "sentence_templates",
+    sa.column("id", sa.Integer()),
+    sa.column("structure", sa.String()),
+)
+
+
+def upgrade() -> None:
+    op.bulk_insert(
+        sentence_templates,
+        [{"id": i, "structure": s} for i, s in enumerate(TEMPLATES, start=1)],
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('sentence_templates', 'id'), "
+        "(SELECT max(id) FROM sentence_templates))"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        sentence_templates.delete().where(sentence_templates.c.id.in_(range(1, len(TEMPLATES) + 1)))
+    )
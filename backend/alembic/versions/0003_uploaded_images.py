@@ -0,0 +1,45 @@
+"""Uploaded images with a time-bucketed expiry index (NFR-5)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-11-17
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "uploaded_images",
+        sa.Column("id", sa.String(64), nullable=False),
+        sa.Column("user_id", sa.Integer()),
+        sa.Column("blob_name", sa.String(255), nullable=False),
+        sa.Column("content_type", sa.String(50), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expiry_hour", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_uploaded_images"),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="fk_uploaded_images_user_id_users",
+            ondelete="SET NULL",
+        ),
+    )
+    op.create_index("ix_uploaded_images_expiry_hour", "uploaded_images", ["expiry_hour"])
+    op.create_index("ix_uploaded_images_user_id", "uploaded_images", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("uploaded_images")
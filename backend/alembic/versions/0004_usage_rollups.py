@@ -0,0 +1,239 @@
+"""Usage rollups maintained by triggers (TODO 3.5)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-11-24
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Statement-level triggers see each INSERT's rows as one transition table, so
+# a bulk insert costs one upsert per touched (user, bucket) rather than one
+# per row. Buckets are UTC regardless of the session's TimeZone.
+ROLLUP_SENTENCES = """
+CREATE FUNCTION usage_rollup_sentences() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO usage_analytics AS u (user_id, hour, constructed, spoken)
+    SELECT user_id, date_trunc('hour', created_at, 'UTC'), count(*),
+           count(*) FILTER (WHERE spoken)
+    FROM new_rows GROUP BY 1, 2
+    ON CONFLICT (user_id, hour) DO UPDATE
+    SET constructed = u.constructed + excluded.constructed,
+        spoken = u.spoken + excluded.spoken;
+
+    INSERT INTO usage_daily_items AS u (user_id, day, dimension, item_id, uses, spoken)
+    SELECT n.user_id, (n.created_at AT TIME ZONE 'UTC')::date, d.dimension, d.item_id,
+           count(*), count(*) FILTER (WHERE n.spoken)
+    FROM new_rows n
+    CROSS JOIN LATERAL (
+        VALUES ('object', n.object_id), ('verb', n.verb_id), ('modifier', n.modifier_id)
+    ) AS d (dimension, item_id)
+    WHERE d.item_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (user_id, day, dimension, item_id) DO UPDATE
+    SET uses = u.uses + excluded.uses, spoken = u.spoken + excluded.spoken;
+
+    INSERT INTO usage_daily_phrases AS u (user_id, day, phrase, uses, spoken)
+    SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, sentence_text, count(*),
+           count(*) FILTER (WHERE spoken)
+    FROM new_rows GROUP BY 1, 2, 3
+    ON CONFLICT (user_id, day, phrase) DO UPDATE
+    SET uses = u.uses + excluded.uses, spoken = u.spoken + excluded.spoken;
+    RETURN NULL;
+END $$
+"""
+
+# Marking a sentence spoken (POST /api/sentences/speak) is an UPDATE; only
+# the spoken counters move. Transition tables rule out ``UPDATE OF spoken``,
+# so unrelated updates are filtered here instead.
+ROLLUP_SPOKEN = """
+CREATE FUNCTION usage_rollup_spoken() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM new_rows n JOIN old_rows o USING (id, created_at)
+        WHERE n.spoken IS DISTINCT FROM o.spoken
+    ) THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE usage_analytics u SET spoken = u.spoken + d.delta
+    FROM (
+        SELECT n.user_id, date_trunc('hour', n.created_at, 'UTC') AS hour,
+               sum(n.spoken::int - o.spoken::int) AS delta
+        FROM new_rows n JOIN old_rows o USING (id, created_at)
+        WHERE n.spoken IS DISTINCT FROM o.spoken
+        GROUP BY 1, 2
+    ) d
+    WHERE u.user_id = d.user_id AND u.hour = d.hour;
+
+    UPDATE usage_daily_items u SET spoken = u.spoken + d.delta
+    FROM (
+        SELECT n.user_id, (n.created_at AT TIME ZONE 'UTC')::date AS day, i.dimension,
+               i.item_id, sum(n.spoken::int - o.spoken::int) AS delta
+        FROM new_rows n JOIN old_rows o USING (id, created_at)
+        CROSS JOIN LATERAL (
+            VALUES ('object', n.object_id), ('verb', n.verb_id), ('modifier', n.modifier_id)
+        ) AS i (dimension, item_id)
+        WHERE n.spoken IS DISTINCT FROM o.spoken AND i.item_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    ) d
+    WHERE u.user_id = d.user_id AND u.day = d.day AND u.dimension = d.dimension
+      AND u.item_id = d.item_id;
+
+    UPDATE usage_daily_phrases u SET spoken = u.spoken + d.delta
+    FROM (
+        SELECT n.user_id, (n.created_at AT TIME ZONE 'UTC')::date AS day,
+               n.sentence_text AS phrase, sum(n.spoken::int - o.spoken::int) AS delta
+        FROM new_rows n JOIN old_rows o USING (id, created_at)
+        WHERE n.spoken IS DISTINCT FROM o.spoken
+        GROUP BY 1, 2, 3
+    ) d
+    WHERE u.user_id = d.user_id AND u.day = d.day AND u.phrase = d.phrase;
+    RETURN NULL;
+END $$
+"""
+
+ROLLUP_FEEDBACK = """
+CREATE FUNCTION usage_rollup_feedback() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO usage_analytics AS u (user_id, hour, thumbs_up, thumbs_down)
+    SELECT user_id, date_trunc('hour', created_at, 'UTC'),
+           count(*) FILTER (WHERE feedback_type = 'thumbs_up'),
+           count(*) FILTER (WHERE feedback_type = 'thumbs_down')
+    FROM new_rows
+    WHERE feedback_type IN ('thumbs_up', 'thumbs_down')
+    GROUP BY 1, 2
+    ON CONFLICT (user_id, hour) DO UPDATE
+    SET thumbs_up = u.thumbs_up + excluded.thumbs_up,
+        thumbs_down = u.thumbs_down + excluded.thumbs_down;
+    RETURN NULL;
+END $$
+"""
+
+TRIGGERS = (
+    "CREATE TRIGGER usage_rollup_sentences AFTER INSERT ON constructed_sentences "
+    "REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION usage_rollup_sentences()",
+    "CREATE TRIGGER usage_rollup_spoken AFTER UPDATE ON constructed_sentences "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION usage_rollup_spoken()",
+    "CREATE TRIGGER usage_rollup_feedback AFTER INSERT ON feedback_records "
+    "REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION usage_rollup_feedback()",
+)
+
+# Existing history, aggregated once
+BACKFILL = (
+    """
+    INSERT INTO usage_analytics (user_id, hour, constructed, spoken)
+    SELECT user_id, date_trunc('hour', created_at, 'UTC'), count(*),
+           count(*) FILTER (WHERE spoken)
+    FROM constructed_sentences GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO usage_analytics AS u (user_id, hour, thumbs_up, thumbs_down)
+    SELECT user_id, date_trunc('hour', created_at, 'UTC'),
+           count(*) FILTER (WHERE feedback_type = 'thumbs_up'),
+           count(*) FILTER (WHERE feedback_type = 'thumbs_down')
+    FROM feedback_records
+    WHERE feedback_type IN ('thumbs_up', 'thumbs_down')
+    GROUP BY 1, 2
+    ON CONFLICT (user_id, hour) DO UPDATE
+    SET thumbs_up = excluded.thumbs_up, thumbs_down = excluded.thumbs_down
+    """,
+    """
+    INSERT INTO usage_daily_items (user_id, day, dimension, item_id, uses, spoken)
+    SELECT n.user_id, (n.created_at AT TIME ZONE 'UTC')::date, d.dimension, d.item_id,
+           count(*), count(*) FILTER (WHERE n.spoken)
+    FROM constructed_sentences n
+    CROSS JOIN LATERAL (
+        VALUES ('object', n.object_id), ('verb', n.verb_id), ('modifier', n.modifier_id)
+    ) AS d (dimension, item_id)
+    WHERE d.item_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+    """,
+    """
+    INSERT INTO usage_daily_phrases (user_id, day, phrase, uses, spoken)
+    SELECT user_id, (created_at AT TIME ZONE 'UTC')::date, sentence_text, count(*),
+           count(*) FILTER (WHERE spoken)
+    FROM constructed_sentences GROUP BY 1, 2, 3
+    """,
+)
+
+
+def _counter(name: str) -> sa.Column:
+    return sa.Column(name, sa.Integer(), server_default=sa.text("0"), nullable=False)
+
+
+def _user_fk(table: str) -> sa.ForeignKeyConstraint:
+    return sa.ForeignKeyConstraint(
+        ["user_id"], ["users.id"], name=f"fk_{table}_user_id_users", ondelete="CASCADE"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "usage_analytics",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("hour", sa.DateTime(timezone=True), nullable=False),
+        _counter("constructed"),
+        _counter("spoken"),
+        _counter("thumbs_up"),
+        _counter("thumbs_down"),
+        sa.PrimaryKeyConstraint("user_id", "hour", name="pk_usage_analytics"),
+        _user_fk("usage_analytics"),
+    )
+    op.create_table(
+        "usage_daily_items",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("dimension", sa.String(8), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        _counter("uses"),
+        _counter("spoken"),
+        sa.PrimaryKeyConstraint(
+            "user_id", "day", "dimension", "item_id", name="pk_usage_daily_items"
+        ),
+        sa.CheckConstraint(
+            "dimension IN ('object', 'verb', 'modifier')",
+            name=op.f("ck_usage_daily_items_dimension"),
+        ),
+        _user_fk("usage_daily_items"),
+    )
+    op.create_table(
+        "usage_daily_phrases",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("phrase", sa.String(500), nullable=False),
+        _counter("uses"),
+        _counter("spoken"),
+        sa.PrimaryKeyConstraint("user_id", "day", "phrase", name="pk_usage_daily_phrases"),
+        _user_fk("usage_daily_phrases"),
+    )
+    # Triggers first: creating them locks out writers until this migration
+    # commits, so no row lands between the backfill and the first trigger run
+    for function in (ROLLUP_SENTENCES, ROLLUP_SPOKEN, ROLLUP_FEEDBACK):
+        op.execute(function)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+    for statement in BACKFILL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER usage_rollup_feedback ON feedback_records")
+    op.execute("DROP TRIGGER usage_rollup_spoken ON constructed_sentences")
+    op.execute("DROP TRIGGER usage_rollup_sentences ON constructed_sentences")
+    for function in ("usage_rollup_feedback", "usage_rollup_spoken", "usage_rollup_sentences"):
+        op.execute(f"DROP FUNCTION {function}()")
+    op.drop_table("usage_daily_phrases")
+    op.drop_table("usage_daily_items")
+    op.drop_table("usage_analytics")
@@ -0,0 +1,51 @@
+"""Conversation room members for the Family Communication Bridge
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-12-01
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "conversation_members",
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("member_id", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(20), server_default=sa.text("'family'"), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("owner_id", "member_id", name="pk_conversation_members"),
+        sa.CheckConstraint(
+            "role IN ('family', 'caregiver', 'therapist')",
+            name="ck_conversation_members_role",
+        ),
+        sa.CheckConstraint("member_id <> owner_id", name="ck_conversation_members_not_owner"),
+        sa.ForeignKeyConstraint(
+            ["owner_id"],
+            ["users.id"],
+            name="fk_conversation_members_owner_id_users",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["member_id"],
+            ["users.id"],
+            name="fk_conversation_members_member_id_users",
+            ondelete="CASCADE",
+        ),
+    )
+    op.create_index("ix_conversation_members_member_id", "conversation_members", ["member_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("conversation_members")
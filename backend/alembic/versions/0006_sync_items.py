@@ -0,0 +1,55 @@
+"""Offline delta sync: sync_items and users.sync_seq
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-12-08
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("sync_seq", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+    )
+    op.create_table(
+        "sync_items",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("collection", sa.String(20), nullable=False),
+        sa.Column("key", sa.String(100), nullable=False),
+        sa.Column("seq", sa.BigInteger(), nullable=False),
+        sa.Column("value", postgresql.JSONB(), nullable=True),
+        sa.Column("deleted", sa.Boolean(), server_default=sa.text("false"), nullable=False),
+        sa.Column("stamp", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("node", sa.String(36), server_default=sa.text("''"), nullable=False),
+        sa.Column(
+            "counts",
+            postgresql.JSONB(),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("user_id", "collection", "key", name="pk_sync_items"),
+        sa.CheckConstraint(
+            "collection IN ('settings', 'favorites', 'recents', 'usage', 'custom_objects')",
+            name="ck_sync_items_collection",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_sync_items_user_id_users", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_sync_items_user_id_seq", "sync_items", ["user_id", "seq"])
+
+
+def downgrade() -> None:
+    op.drop_table("sync_items")
+    op.drop_column("users", "sync_seq")
@@ -0,0 +1,64 @@
+"""Known people and face embeddings
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-12-15
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "people",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("relationship", sa.String(50), nullable=True),
+        sa.Column("consent_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_people"),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_people_user_id_users", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_people_user_id", "people", ["user_id"])
+    op.create_table(
+        "face_embeddings",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("person_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("model", sa.String(64), nullable=False),
+        sa.Column("dim", sa.SmallInteger(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_face_embeddings"),
+        sa.ForeignKeyConstraint(
+            ["person_id"],
+            ["people.id"],
+            name="fk_face_embeddings_person_id_people",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_face_embeddings_user_id_users", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_face_embeddings_user_id", "face_embeddings", ["user_id"])
+    op.create_index("ix_face_embeddings_person_id", "face_embeddings", ["person_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("face_embeddings")
+    op.drop_table("people")
@@ -0,0 +1,47 @@
+"""Custom object reference embeddings
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-12-22
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "object_embeddings",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("object_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("model", sa.String(64), nullable=False),
+        sa.Column("dim", sa.SmallInteger(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_object_embeddings"),
+        sa.ForeignKeyConstraint(
+            ["object_id"],
+            ["object_library.id"],
+            name="fk_object_embeddings_object_id_object_library",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_object_embeddings_user_id_users", ondelete="CASCADE"
+        ),
+    )
+    op.create_index("ix_object_embeddings_user_id", "object_embeddings", ["user_id"])
+    op.create_index("ix_object_embeddings_object_id", "object_embeddings", ["object_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("object_embeddings")
@@ -0,0 +1,35 @@
+"""Keep sentence history when a custom object is deleted
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-12-29
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# History tables whose object_id outlives the object, as detected_objects already does
+TABLES = ("constructed_sentences", "feedback_records")
+
+
+def _replace_object_fk(ondelete: str | None) -> None:
+    for table in TABLES:
+        name = f"fk_{table}_object_id_object_library"
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(
+            name, table, "object_library", ["object_id"], ["id"], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    _replace_object_fk("SET NULL")
+
+
+def downgrade() -> None:
+    _replace_object_fk(None)
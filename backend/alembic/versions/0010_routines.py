@@ -0,0 +1,52 @@
+"""Routines
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-01-05
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "routines",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("rrule", sa.String(500), nullable=False),
+        sa.Column("starts_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("timezone", sa.String(64), server_default=sa.text("'UTC'"), nullable=False),
+        sa.Column("duration_minutes", sa.SmallInteger(), nullable=False),
+        sa.Column(
+            "categories",
+            postgresql.ARRAY(sa.String(20)),
+            server_default=sa.text("'{}'::varchar[]"),
+            nullable=False,
+        ),
+        sa.Column("enabled", sa.Boolean(), server_default=sa.text("true"), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id", name="pk_routines"),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_routines_user_id_users", ondelete="CASCADE"
+        ),
+        sa.CheckConstraint(
+            "duration_minutes BETWEEN 1 AND 1440", name=op.f("ck_routines_duration")
+        ),
+    )
+    op.create_index("ix_routines_user_id", "routines", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("routines")
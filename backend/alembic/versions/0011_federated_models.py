@@ -0,0 +1,39 @@
+"""Federated models
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-01-12
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "federated_models",
+        sa.Column("ranker", sa.String(20), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updates", sa.Integer(), nullable=False),
+        sa.Column("weight", sa.Float(), nullable=False),
+        sa.Column("entries", sa.Integer(), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("ranker", "version", name="pk_federated_models"),
+        sa.CheckConstraint(
+            "ranker IN ('qlearning', 'bandit')", name=op.f("ck_federated_models_ranker")
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("federated_models")
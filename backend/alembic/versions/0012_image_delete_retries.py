@@ -0,0 +1,31 @@
+"""Back off uploaded images whose blob delete keeps failing
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-01-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "uploaded_images",
+        sa.Column("delete_attempts", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+    op.add_column(
+        "uploaded_images", sa.Column("retry_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("uploaded_images", "retry_at")
+    op.drop_column("uploaded_images", "delete_attempts")
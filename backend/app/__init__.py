@@ -0,0 +1 @@
+"""SpeakOut AAC backend application package."""
@@ -0,0 +1,12 @@
+"""Columnar archive of the history tables for heavy ad-hoc analytics (TODO 3.5).
+
+Dashboard reads use the PostgreSQL rollups; questions over the whole raw
+history go to Parquet files queried with DuckDB::
+
+    python -m app.analytics export data/archive --since 2025-01-01
+    python -m app.analytics query data/archive "SELECT count(*) FROM feedback_records"
+"""
+
+from app.analytics.store import COLUMNS, ColumnarStore
+
+__all__ = ["COLUMNS", "ColumnarStore"]
@@ -0,0 +1,50 @@
+"""Command-line entry point: ``python -m app.analytics {export,query}``."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+from pathlib import Path
+
+from app.analytics.store import ColumnarStore
+from app.config import get_settings
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.analytics")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Archive ended months to Parquet")
+    export.add_argument("root", type=Path)
+    export.add_argument("--since", type=date.fromisoformat, required=True)
+    export.add_argument(
+        "--database-url", default=None, help="Defaults to DATABASE_REPLICA_URL or DATABASE_URL"
+    )
+
+    query = commands.add_parser("query", help="Run SQL against the archive")
+    query.add_argument("root", type=Path)
+    query.add_argument("sql")
+
+    args = parser.parse_args(argv)
+    store = ColumnarStore(args.root)
+    if args.command == "export":
+        import psycopg2
+
+        settings = get_settings()
+        url = args.database_url or settings.database_replica_url or settings.database_url
+        began = time.perf_counter()
+        with psycopg2.connect(url.replace("postgresql+psycopg2://", "postgresql://")) as conn:
+            written = store.export_closed(conn, args.since)
+        for path in written:
+            print(f"Wrote {path}")
+        print(f"Archived {len(written)} table-months in {time.perf_counter() - began:.1f}s")
+    else:
+        names, rows = store.query(args.sql)
+        print("\t".join(names))
+        for row in rows:
+            print("\t".join("" if value is None else str(value) for value in row))
+
+
+if __name__ == "__main__":
+    main()
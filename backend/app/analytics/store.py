@@ -0,0 +1,163 @@
+"""Parquet archive of closed history partitions, queried with DuckDB.
+
+Monthly partitions of the history tables stop changing once their month is
+over. :meth:`ColumnarStore.export_month` copies one closed month out of
+PostgreSQL as CSV and rewrites it as a zstd-compressed Parquet file. The
+file is written to a temporary name and renamed, and months already
+exported are skipped, so a rerun after a crash is safe.
+
+Heavy ad-hoc questions (cohort funnels, all-user phrase mining) then scan
+compressed columns on the analyst's machine or a job worker instead of
+loading the production primary. DuckDB is an optional dependency, imported
+only when the store is used.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from app.models.partitions import PARTITIONED_TABLES, month_starts, next_month
+
+# Column types for reading the CSV exports back; keep in step with the models
+COLUMNS: dict[str, dict[str, str]] = {
+    "constructed_sentences": {
+        "id": "BIGINT",
+        "created_at": "TIMESTAMPTZ",
+        "user_id": "INTEGER",
+        "sentence_text": "VARCHAR",
+        "object_id": "INTEGER",
+        "verb_id": "INTEGER",
+        "modifier_id": "INTEGER",
+        "template_id": "INTEGER",
+        "spoken": "BOOLEAN",
+    },
+    "feedback_records": {
+        "id": "BIGINT",
+        "created_at": "TIMESTAMPTZ",
+        "user_id": "INTEGER",
+        "session_id": "VARCHAR",
+        "sentence_id": "BIGINT",
+        "constructed_sentence": "VARCHAR",
+        "object_id": "INTEGER",
+        "verb_id": "INTEGER",
+        "modifier_id": "INTEGER",
+        "context": "JSON",
+        "feedback_type": "VARCHAR",
+    },
+}
+
+
+def _duckdb() -> Any:
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise RuntimeError("The columnar store needs DuckDB: pip install duckdb") from exc
+    return duckdb
+
+
+class ColumnarStore:
+    """Directory of ``<table>/<YYYY-MM>.parquet`` files.
+
+    Args:
+        root: Archive directory (created if missing)
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, table: str, month: date) -> Path:
+        return self.root / table / f"{month:%Y-%m}.parquet"
+
+    def exported(self, table: str) -> list[date]:
+        return sorted(
+            date.fromisoformat(f"{p.stem}-01") for p in (self.root / table).glob("*.parquet")
+        )
+
+    def export_month(self, connection: Any, table: str, month: date) -> Path | None:
+        """Archive one monthly partition; return the file, or None if already done.
+
+        Args:
+            connection: psycopg2 connection to the primary or a replica
+            table: Partitioned history table
+            month: First day of a month that has ended
+        """
+        if table not in COLUMNS:
+            raise ValueError(f"{table} is not an archived table")
+        if month >= date.today().replace(day=1):
+            raise ValueError("Only months that have ended can be archived")
+        target = self.path(table, month)
+        if target.exists():
+            return None
+        target.parent.mkdir(parents=True, exist_ok=True)
+        duckdb = _duckdb()
+        with tempfile.TemporaryDirectory(dir=self.root) as scratch:
+            csv_path = Path(scratch) / "rows.csv"
+            columns = ", ".join(COLUMNS[table])
+            with csv_path.open("w", encoding="utf-8") as out, connection.cursor() as cursor:
+                cursor.copy_expert(
+                    # Range on the parent rather than the partition by name, so
+                    # rows that landed in the default partition are included
+                    f"COPY (SELECT {columns} FROM {table} "
+                    f"WHERE created_at >= '{month}' AND created_at < '{next_month(month)}' "
+                    f"ORDER BY user_id, created_at) TO STDOUT WITH (FORMAT csv, HEADER)",
+                    out,
+                )
+            tmp = Path(scratch) / target.name
+            db = duckdb.connect()
+            try:
+                db.execute(
+                    f"COPY (SELECT * FROM read_csv({_literal(csv_path)}, header = true, "
+                    f"columns = {_struct(COLUMNS[table])})) "
+                    f"TO {_literal(tmp)} (FORMAT parquet, COMPRESSION zstd)"
+                )
+            finally:
+                db.close()
+            os.replace(tmp, target)
+        return target
+
+    def export_closed(self, connection: Any, since: date) -> list[Path]:
+        """Archive every ended month from ``since`` that is not exported yet."""
+        this_month = date.today().replace(day=1)
+        written = []
+        for table in PARTITIONED_TABLES:
+            for month in month_starts(since, this_month):
+                if month < this_month:
+                    path = self.export_month(connection, table, month)
+                    if path is not None:
+                        written.append(path)
+        return written
+
+    def connect(self) -> Any:
+        """In-memory DuckDB connection with one view per archived table."""
+        db = _duckdb().connect()
+        for table in COLUMNS:
+            files = self.root / table
+            if any(files.glob("*.parquet")):
+                db.execute(
+                    f"CREATE VIEW {table} AS "
+                    f"SELECT * FROM read_parquet({_literal(files / '*.parquet')})"
+                )
+        return db
+
+    def query(self, sql: str) -> tuple[list[str], list[tuple[Any, ...]]]:
+        """Run ``sql`` against the archive; return column names and rows."""
+        db = self.connect()
+        try:
+            result = db.execute(sql)
+            names = [column[0] for column in result.description]
+            return names, result.fetchall()
+        finally:
+            db.close()
+
+
+def _literal(path: Path) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _struct(columns: dict[str, str]) -> str:
+    return "{" + ", ".join(f"'{name}': '{kind}'" for name, kind in columns.items()) + "}"
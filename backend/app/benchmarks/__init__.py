@@ -0,0 +1 @@
+"""Database and query benchmarks (run against a throwaway database)."""
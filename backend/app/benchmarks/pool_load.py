@@ -0,0 +1,202 @@
+"""Connection-pool load test: many concurrent users through one worker's pool.
+
+Run against a database seeded by :mod:`app.benchmarks.query_plans`::
+
+    python -m app.benchmarks.pool_load --database-url postgresql://... --users 1000
+
+Every virtual user loops over requests the way the API serves them: one
+session per request from :class:`app.database.Database`, a history query on
+the read path and, for a fraction of requests, a feedback insert on the write
+path (rolled back, so the dataset is left unchanged). Users pause for a random
+think time between requests (default up to 5 s, a brisk tapping pace for
+an AAC user).
+
+The pool is sized from the same settings as the app (``DB_POOL_SIZE`` etc.),
+so the run shows whether one worker survives the load without pool timeouts
+or growing past its connection budget. The process exits non-zero on any pool
+timeout or failed request.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from sqlalchemy import insert, select, text
+
+from app.config import Settings, get_settings
+from app.database import (
+    POOL_CHECKOUTS,
+    POOL_PEAK,
+    POOL_TIMEOUTS,
+    POOL_WAIT,
+    QUERY_LATENCY,
+    Database,
+)
+from app.models import ConstructedSentence, FeedbackRecord
+from app.utils.metrics import Histogram
+
+
+@dataclass
+class LoadResult:
+    """Outcome of one load-test run."""
+
+    users: int
+    requests: int = 0
+    errors: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+    latency: Histogram = field(
+        default_factory=lambda: Histogram("request_seconds", "End-to-end request time")
+    )
+
+    @property
+    def passed(self) -> bool:
+        return not self.errors and POOL_TIMEOUTS.value("primary") == 0
+
+
+async def _history(database: Database, user_id: int, since_days: int) -> None:
+    async with database.session(read_only=True) as session:
+        newest = await session.scalar(
+            select(ConstructedSentence.created_at)
+            .where(ConstructedSentence.user_id == user_id)
+            .order_by(ConstructedSentence.created_at.desc())
+            .limit(1)
+        )
+        if newest is None:
+            return
+        await session.execute(
+            select(
+                ConstructedSentence.id,
+                ConstructedSentence.created_at,
+                ConstructedSentence.sentence_text,
+                ConstructedSentence.verb_id,
+            )
+            .where(
+                ConstructedSentence.user_id == user_id,
+                ConstructedSentence.created_at >= newest - timedelta(days=since_days),
+            )
+            .order_by(ConstructedSentence.created_at.desc())
+            .limit(50)
+        )
+
+
+async def _feedback(database: Database, user_id: int) -> None:
+    async with database.session() as session:
+        await session.execute(
+            insert(FeedbackRecord).values(
+                user_id=user_id,
+                constructed_sentence="I want water",
+                feedback_type="constructed",
+            )
+        )
+        await session.rollback()
+
+
+async def _virtual_user(
+    database: Database,
+    result: LoadResult,
+    user_id: int,
+    requests: int,
+    write_ratio: float,
+    think: float,
+    rng: random.Random,
+) -> None:
+    for _ in range(requests):
+        await asyncio.sleep(rng.uniform(0, think))
+        began = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                await _feedback(database, user_id)
+            else:
+                await _history(database, user_id, since_days=30)
+        except Exception as exc:  # noqa: BLE001 - every failure is a finding
+            result.errors.append(f"user {user_id}: {type(exc).__name__}: {exc}")
+        result.latency.observe(time.perf_counter() - began)
+        result.requests += 1
+
+
+async def run(
+    settings: Settings,
+    users: int = 1000,
+    requests: int = 20,
+    write_ratio: float = 0.1,
+    think: float = 5.0,
+    seed: int = 0,
+) -> LoadResult:
+    """Drive ``users`` concurrent virtual users through one ``Database``."""
+    database = Database(settings)
+    result = LoadResult(users=users)
+    try:
+        async with database.session() as session:
+            user_ids = list((await session.scalars(text("SELECT id FROM users"))).all())
+        if not user_ids:
+            raise SystemExit("No users found; seed with app.benchmarks.query_plans first")
+        rng = random.Random(seed)
+        began = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _virtual_user(
+                    database,
+                    result,
+                    rng.choice(user_ids),
+                    requests,
+                    write_ratio,
+                    think,
+                    random.Random(seed + i),
+                )
+                for i in range(users)
+            )
+        )
+        result.seconds = time.perf_counter() - began
+    finally:
+        await database.dispose()
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.benchmarks.pool_load")
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per user")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--think", type=float, default=5.0, help="Max think time (s)")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    if args.database_url:
+        settings = settings.model_copy(update={"database_url": args.database_url})
+    result = asyncio.run(run(settings, args.users, args.requests, args.write_ratio, args.think))
+
+    budget = settings.db_pool_size + settings.db_max_overflow
+    print(
+        f"{result.requests:,} requests from {result.users:,} users in {result.seconds:.1f}s "
+        f"({result.requests / result.seconds:,.0f} req/s)"
+    )
+    print(
+        f"request p50<={result.latency.quantile(0.5) * 1000:.1f}ms "
+        f"p95<={result.latency.quantile(0.95) * 1000:.1f}ms "
+        f"p99<={result.latency.quantile(0.99) * 1000:.1f}ms"
+    )
+    print(
+        f"pool wait p50<={POOL_WAIT.quantile(0.5, 'primary') * 1000:.1f}ms "
+        f"p95<={POOL_WAIT.quantile(0.95, 'primary') * 1000:.1f}ms "
+        f"p99<={POOL_WAIT.quantile(0.99, 'primary') * 1000:.1f}ms"
+    )
+    print(
+        f"query p95<={QUERY_LATENCY.quantile(0.95, 'primary', 'select') * 1000:.1f}ms "
+        f"checkouts={POOL_CHECKOUTS.value('primary'):,.0f} "
+        f"peak connections={POOL_PEAK.value('primary'):.0f}/{budget} "
+        f"timeouts={POOL_TIMEOUTS.value('primary'):.0f} errors={len(result.errors)}"
+    )
+    for error in result.errors[:10]:
+        print(f"  - {error}")
+    return 0 if result.passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,468 @@
+"""Hot-query benchmark: seeds a migrated database and asserts index usage.
+
+Run against a throwaway PostgreSQL database that has been migrated with
+``alembic upgrade head``::
+
+    python -m app.benchmarks.query_plans --database-url postgresql+psycopg2://... --seed
+
+Seeding reuses the synthetic feedback-log generator from :mod:`app.simulation`
+and bulk-loads it with ``COPY``. Each hot query is then checked with
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)``: every scan of the target table
+must use the expected index (or one of its per-partition children), without
+sequential scans, and time-bounded history queries must prune partitions.
+The process exits non-zero when any assertion fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Select, create_engine, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection, Engine
+
+from app.models import ConstructedSentence, FeedbackRecord, ObjectLibrary
+from app.models.partitions import ensure_monthly_partitions
+from app.models.sentence import FEEDBACK_TYPES
+from app.services.learning_service import FeedbackType, TimeOfDay
+from app.services.sentence_service import DEFAULT_TEMPLATES
+from app.services.verb_service import (
+    CATEGORY_VERBS,
+    MODIFIER_GROUPS,
+    MODIFIERS,
+    OBJECT_CATEGORIES,
+    VERBS,
+)
+from app.simulation.logs import NO_MODIFIER, FeedbackLog, generate_feedback_log
+
+SEEDED_TABLES = (
+    "feedback_records",
+    "constructed_sentences",
+    "detected_objects",
+    "object_library",
+    "modifier_library",
+    "verb_library",
+    "sentence_templates",
+    "users",
+)
+COPY_CHUNK_ROWS = 200_000
+SECONDS_PER_DAY = 86_400
+_TIME_OF_DAY_NAMES = tuple(t.name.lower() for t in TimeOfDay)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """A hot query and the index it must be served from."""
+
+    name: str
+    statement: Select[Any]
+    table: str
+    index: str
+    expect_pruning: bool = False
+
+
+@dataclass
+class QueryResult:
+    name: str
+    index: str
+    passed: bool
+    problems: list[str] = field(default_factory=list)
+    node_types: list[str] = field(default_factory=list)
+    partitions_scanned: int = 0
+    heap_fetches: int = 0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+
+
+def _verb_categories() -> dict[str, list[str]]:
+    categories: dict[str, list[str]] = {verb: [] for verb in VERBS}
+    for category, verbs in CATEGORY_VERBS.items():
+        for verb in verbs:
+            categories[verb].append(category)
+    return categories
+
+
+def _copy(connection: Connection, table: str, columns: str, rows: Iterator[str]) -> None:
+    cursor = connection.connection.cursor()
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write(row)
+        count += 1
+        if count % COPY_CHUNK_ROWS == 0:
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+            buffer = io.StringIO()
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buffer)
+
+
+def seed(
+    engine: Engine,
+    n_events: int,
+    n_users: int,
+    n_objects: int = 120,
+    custom_per_user: int = 10,
+    force: bool = False,
+    seed_value: int = 0,
+) -> FeedbackLog:
+    """Load users, libraries, feedback and sentence history.
+
+    Database ids are the simulation ids plus one. Each user's history is
+    shifted by ``user_id % 365`` days so rows spread across a year of monthly
+    partitions.
+    """
+    with engine.begin() as connection:
+        existing = connection.execute(text("SELECT count(*) FROM users")).scalar_one()
+        if existing and not force:
+            raise SystemExit("users table is not empty; pass --force to truncate and reseed")
+        connection.execute(text(f"TRUNCATE {', '.join(SEEDED_TABLES)} RESTART IDENTITY CASCADE"))
+
+    log = generate_feedback_log(
+        tempfile.mkdtemp(prefix="aac-bench-"), n_events, n_users, n_objects, seed=seed_value
+    )
+    users = log.column("user_id")
+    stamps = log.column("timestamp") + (users.astype(np.int64) % 365) * SECONDS_PER_DAY
+    lo = datetime.fromtimestamp(int(stamps.min()), tz=timezone.utc)
+    hi = datetime.fromtimestamp(int(stamps.max()), tz=timezone.utc)
+
+    verb_categories = _verb_categories()
+    with engine.begin() as connection:
+        ensure_monthly_partitions(connection, lo.date(), hi.date())
+        connection.execute(
+            text(
+                "INSERT INTO users (id, email, hashed_password) "
+                "SELECT g, 'user' || g || '@example.com', 'x' FROM generate_series(1, :n) g"
+            ),
+            {"n": n_users},
+        )
+        _copy(
+            connection,
+            "verb_library",
+            "id, verb_text, compatible_object_categories, base_score",
+            (
+                f"{i + 1}\t{verb}\t{{{','.join(verb_categories[verb])}}}\t{len(VERBS) - i}\n"
+                for i, verb in enumerate(VERBS)
+            ),
+        )
+        modifier_types = {m: group for group, items in MODIFIER_GROUPS.items() for m in items}
+        _copy(
+            connection,
+            "modifier_library",
+            "id, modifier_text, modifier_type",
+            (f"{i + 1}\t{m}\t{modifier_types[m]}\n" for i, m in enumerate(MODIFIERS)),
+        )
+        _copy(
+            connection,
+            "sentence_templates",
+            "id, structure",
+            (f"{i + 1}\t{structure}\n" for i, structure in enumerate(DEFAULT_TEMPLATES)),
+        )
+        rng = np.random.default_rng(seed_value)
+        _copy(
+            connection,
+            "object_library",
+            "id, name, category, usage_count",
+            (
+                f"{i + 1}\tobject {i}\t{OBJECT_CATEGORIES[i % len(OBJECT_CATEGORIES)]}\t"
+                f"{int(rng.integers(0, 10_000))}\n"
+                for i in range(n_objects)
+            ),
+        )
+        connection.execute(
+            text(
+                "INSERT INTO object_library (id, name, category, user_id) "
+                "SELECT :base + (u - 1) * :per + k, 'custom ' || u || '-' || k, "
+                "(ARRAY['food','person','place','thing','action','feeling'])[1 + k % 6], u "
+                "FROM generate_series(1, :users) u, generate_series(1, :per) k"
+            ),
+            {"base": n_objects, "per": custom_per_user, "users": n_users},
+        )
+        for table in ("object_library", "verb_library", "modifier_library", "sentence_templates"):
+            connection.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), max(id)) FROM {table}"
+                )
+            )
+
+        for start in range(0, len(log), COPY_CHUNK_ROWS):
+            stop = min(start + COPY_CHUNK_ROWS, len(log))
+            cols = {
+                name: log.column(name)[start:stop].tolist()
+                for name in ("user_id", "session_id", "object_id", "verb_id", "modifier_id")
+            }
+            feedback = log.column("feedback_type")[start:stop].tolist()
+            tods = log.column("time_of_day")[start:stop].tolist()
+            shifted = stamps[start:stop].tolist()
+            feedback_rows = []
+            sentence_rows = []
+            for i in range(stop - start):
+                verb = VERBS[cols["verb_id"][i]]
+                modifier = cols["modifier_id"][i]
+                sentence = f"I {verb} object {cols['object_id'][i]}"
+                modifier_ref = "\\N"
+                if modifier != NO_MODIFIER:
+                    sentence += f" {MODIFIERS[modifier]}"
+                    modifier_ref = str(modifier + 1)
+                created = datetime.fromtimestamp(shifted[i], tz=timezone.utc).isoformat()
+                refs = (
+                    f"{cols['user_id'][i] + 1}\t{cols['object_id'][i] + 1}\t"
+                    f"{cols['verb_id'][i] + 1}\t{modifier_ref}"
+                )
+                context = f'{{"time_of_day": "{_TIME_OF_DAY_NAMES[tods[i]]}"}}'
+                feedback_rows.append(
+                    f"{created}\t{refs}\t{cols['session_id'][i]}\t{sentence}\t"
+                    f"{context}\t{FEEDBACK_TYPES[feedback[i]]}\n"
+                )
+                spoken = "t" if feedback[i] == FeedbackType.SPOKEN else "f"
+                sentence_rows.append(f"{created}\t{refs}\t{sentence}\t{spoken}\n")
+            _copy(
+                connection,
+                "feedback_records",
+                "created_at, user_id, object_id, verb_id, modifier_id, session_id, "
+                "constructed_sentence, context, feedback_type",
+                iter(feedback_rows),
+            )
+            _copy(
+                connection,
+                "constructed_sentences",
+                "created_at, user_id, object_id, verb_id, modifier_id, sentence_text, spoken",
+                iter(sentence_rows),
+            )
+
+    # Index-only scans need an up-to-date visibility map
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE"))
+    return log
+
+
+def hot_queries(connection: Connection) -> list[HotQuery]:
+    """Build the hot queries with parameters drawn from the seeded data."""
+    # Ties broken by id, so every run plans for the same user
+    user_id = connection.execute(
+        text(
+            "SELECT user_id FROM constructed_sentences "
+            "GROUP BY user_id ORDER BY count(*) DESC, user_id OFFSET 10 LIMIT 1"
+        )
+    ).scalar_one()
+    # The window ends at the newest row of either table, not the sampled
+    # user's, so the partitions it covers do not depend on who was picked
+    newest = connection.execute(
+        text(
+            "SELECT greatest((SELECT max(created_at) FROM constructed_sentences), "
+            "(SELECT max(created_at) FROM feedback_records))"
+        )
+    ).scalar_one()
+    object_id, verb_id, modifier_id = connection.execute(
+        text(
+            "SELECT object_id, verb_id, modifier_id FROM feedback_records "
+            "WHERE modifier_id IS NOT NULL "
+            "GROUP BY 1, 2, 3 ORDER BY count(*) DESC OFFSET 50 LIMIT 1"
+        )
+    ).one()
+    since = newest - timedelta(days=30)
+
+    history = (
+        select(
+            ConstructedSentence.id,
+            ConstructedSentence.created_at,
+            ConstructedSentence.sentence_text,
+            ConstructedSentence.object_id,
+            ConstructedSentence.verb_id,
+            ConstructedSentence.modifier_id,
+            ConstructedSentence.spoken,
+        )
+        .where(
+            ConstructedSentence.user_id == user_id,
+            ConstructedSentence.created_at.between(since, newest),
+        )
+        .order_by(ConstructedSentence.created_at.desc())
+        .limit(50)
+    )
+    library = (
+        select(ObjectLibrary.id, ObjectLibrary.name, ObjectLibrary.icon_url)
+        .where(ObjectLibrary.category == "food", ObjectLibrary.user_id.is_(None))
+        .order_by(ObjectLibrary.usage_count.desc())
+        .limit(20)
+    )
+    custom = select(
+        ObjectLibrary.id, ObjectLibrary.name, ObjectLibrary.icon_url, ObjectLibrary.usage_count
+    ).where(ObjectLibrary.user_id == user_id, ObjectLibrary.category == "food")
+    combination = (
+        select(FeedbackRecord.feedback_type, func.count(), func.max(FeedbackRecord.created_at))
+        .where(
+            FeedbackRecord.object_id == object_id,
+            FeedbackRecord.verb_id == verb_id,
+            FeedbackRecord.modifier_id == modifier_id,
+        )
+        .group_by(FeedbackRecord.feedback_type)
+    )
+    explicit = (
+        select(
+            FeedbackRecord.created_at,
+            FeedbackRecord.object_id,
+            FeedbackRecord.verb_id,
+            FeedbackRecord.modifier_id,
+            FeedbackRecord.feedback_type,
+        )
+        .where(
+            FeedbackRecord.user_id == user_id,
+            FeedbackRecord.feedback_type.in_(["thumbs_up", "thumbs_down"]),
+            FeedbackRecord.created_at.between(since, newest),
+        )
+        .order_by(FeedbackRecord.created_at.desc())
+        .limit(100)
+    )
+    return [
+        HotQuery(
+            "history_by_user_time",
+            history,
+            "constructed_sentences",
+            "ix_constructed_sentences_user_created",
+            expect_pruning=True,
+        ),
+        HotQuery(
+            "objects_by_category",
+            library,
+            "object_library",
+            "ix_object_library_category_usage",
+        ),
+        HotQuery("custom_objects_by_user", custom, "object_library", "ix_object_library_custom"),
+        HotQuery(
+            "feedback_by_combination",
+            combination,
+            "feedback_records",
+            "ix_feedback_records_combination",
+        ),
+        HotQuery(
+            "explicit_feedback_by_user",
+            explicit,
+            "feedback_records",
+            "ix_feedback_records_explicit",
+            expect_pruning=True,
+        ),
+    ]
+
+
+def _plan_nodes(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _index_family(connection: Connection, index: str) -> set[str]:
+    """The index plus the per-partition indexes attached to it."""
+    children = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:index)"
+        ),
+        {"index": index},
+    ).scalars()
+    return {index, *children}
+
+
+def _partitions(connection: Connection, table: str) -> tuple[set[str], set[str]]:
+    """All relations holding ``table``'s rows, and the subset that is empty.
+
+    Empty partitions (months provisioned ahead of time) are cheapest to seq
+    scan, so their plans are not held against the index assertions.
+    """
+    rows = connection.execute(
+        text(
+            "SELECT c.relname, c.relpages = 0 FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).all()
+    if not rows:
+        return {table}, set()
+    return {name for name, _ in rows}, {name for name, empty in rows if empty}
+
+
+def check_query(connection: Connection, query: HotQuery, repeat: int) -> QueryResult:
+    """EXPLAIN one hot query, assert its plan, and time it."""
+    sql = str(
+        query.statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    plan = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar_one()
+    nodes = list(_plan_nodes(plan[0]["Plan"]))
+    relations, empty = _partitions(connection, query.table)
+    populated = relations - empty
+    indexes = _index_family(connection, query.index)
+
+    result = QueryResult(query.name, query.index, passed=True)
+    result.node_types = sorted({node["Node Type"] for node in nodes})
+    scans = [node for node in nodes if node.get("Relation Name") in populated]
+    for node in scans:
+        result.heap_fetches += int(node.get("Heap Fetches", 0))
+        if node["Node Type"] == "Seq Scan":
+            result.problems.append(f"sequential scan on {node['Relation Name']}")
+        elif node.get("Index Name") not in indexes:
+            result.problems.append(
+                f"{node['Relation Name']} scanned via {node.get('Index Name', node['Node Type'])}"
+            )
+    result.partitions_scanned = len({node["Relation Name"] for node in scans})
+    if not scans:
+        result.problems.append(f"no scan of {query.table} found")
+    if query.expect_pruning and len(populated) > 1 and result.partitions_scanned >= len(populated):
+        result.problems.append("no partition pruning")
+
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        connection.execute(text(sql)).fetchall()
+        timings.append((time.perf_counter() - began) * 1000)
+    result.p50_ms = statistics.median(timings)
+    result.p95_ms = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+    result.passed = not result.problems
+    return result
+
+
+def run(engine: Engine, repeat: int = 20) -> list[QueryResult]:
+    with engine.connect() as connection:
+        return [check_query(connection, q, repeat) for q in hot_queries(connection)]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.benchmarks.query_plans")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--seed", action="store_true", help="Truncate and load synthetic data")
+    parser.add_argument("--force", action="store_true", help="Allow seeding a non-empty database")
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    if args.seed:
+        began = time.perf_counter()
+        seed(engine, args.events, args.users, force=args.force)
+        print(f"Seeded {args.events:,} events in {time.perf_counter() - began:.1f}s")
+
+    results = run(engine, args.repeat)
+    for r in results:
+        status = "PASS" if r.passed else "FAIL"
+        print(
+            f"{status} {r.name:<28} {r.index:<40} p50={r.p50_ms:6.2f}ms p95={r.p95_ms:6.2f}ms "
+            f"partitions={r.partitions_scanned} heap_fetches={r.heap_fetches}"
+        )
+        for problem in r.problems:
+            print(f"     - {problem}")
+    return 0 if all(r.passed for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
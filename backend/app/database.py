@@ -0,0 +1,273 @@
+"""Async database access: pooled engines, per-request sessions, replica routing.
+
+One :class:`Database` per worker process owns an asyncpg engine for the primary
+and, when ``database_replica_url`` is set, one for a read replica. Endpoints
+get their session from the :func:`get_session` dependency; FastAPI caches
+dependencies per request, so every dependency in a request that asks for a
+session shares the same one, and its pooled connection goes back to the pool
+as soon as the response is produced.
+
+Sessions acquire a connection lazily on first query and return it on commit,
+rollback or close. Endpoints that await Azure Computer Vision or TTS after
+querying should commit first so the connection is not pinned while they wait.
+
+Pool wait time, checkouts and query latency are recorded in
+:data:`app.utils.metrics.REGISTRY`.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import URL, Connection, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql import ClauseElement
+
+from app.config import Settings, get_settings
+from app.utils.metrics import REGISTRY
+
+POOL_WAIT = REGISTRY.histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection", ["role"]
+)
+POOL_CHECKOUTS = REGISTRY.counter(
+    "db_pool_checkouts_total", "Pooled connection checkouts", ["role"]
+)
+POOL_TIMEOUTS = REGISTRY.counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after db_pool_timeout", ["role"]
+)
+POOL_IN_USE = REGISTRY.gauge("db_pool_connections_in_use", "Connections checked out", ["role"])
+POOL_PEAK = REGISTRY.gauge(
+    "db_pool_connections_peak", "Most connections checked out at once", ["role"]
+)
+QUERY_LATENCY = REGISTRY.histogram(
+    "db_query_duration_seconds", "Statement execution time", ["role", "statement"]
+)
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+# Decides whether a statement may run on the replica: (session, clause) -> bool
+ReplicaRouter = Callable[["RoutingSession", "ClauseElement | None"], bool]
+
+
+def async_url(url: str | URL) -> URL:
+    """Convert a sync PostgreSQL URL (as used by Alembic) to its asyncpg form.
+
+    libpq's ``sslmode`` query argument becomes asyncpg's ``ssl``.
+    """
+    parsed = make_url(url).set(drivername="postgresql+asyncpg")
+    query = dict(parsed.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return parsed.set(query=query)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    role = PRIMARY
+
+    def _do_get(self) -> Any:
+        began = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc(1, self.role)
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - began, self.role)
+
+
+def _statement_kind(statement: str) -> str:
+    head = statement.lstrip()[:6].lower()
+    return head if head in ("select", "insert", "update", "delete") else "other"
+
+
+def _instrument(engine: AsyncEngine, role: str) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def _on_checkout(dbapi_connection: Any, record: Any, proxy: Any) -> None:
+        POOL_CHECKOUTS.inc(1, role)
+        POOL_IN_USE.inc(1, role)
+        in_use = POOL_IN_USE.value(role)
+        if in_use > POOL_PEAK.value(role):
+            POOL_PEAK.set(in_use, role)
+
+    @event.listens_for(sync_engine.pool, "checkin")
+    def _on_checkin(dbapi_connection: Any, record: Any) -> None:
+        POOL_IN_USE.inc(-1, role)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_execute(
+        conn: Connection, cursor: Any, statement: str, params: Any, context: Any, many: bool
+    ) -> None:
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_execute(
+        conn: Connection, cursor: Any, statement: str, params: Any, context: Any, many: bool
+    ) -> None:
+        began = conn.info.pop("query_started", None)
+        if began is not None:
+            QUERY_LATENCY.observe(time.perf_counter() - began, role, _statement_kind(statement))
+
+
+def create_engine(url: str | URL, settings: Settings, role: str = PRIMARY) -> AsyncEngine:
+    """Create an instrumented asyncpg engine sized from ``settings``."""
+    pool_class = type(f"InstrumentedPool_{role}", (InstrumentedPool,), {"role": role})
+    connect_args: dict[str, Any] = {
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "command_timeout": settings.db_command_timeout,
+        "server_settings": {"application_name": f"speakout-{role}"},
+    }
+    if settings.db_statement_cache_size == 0:
+        # Also disable asyncpg's own cache so no named statements are created
+        connect_args["statement_cache_size"] = 0
+    engine = create_async_engine(
+        async_url(url),
+        poolclass=pool_class,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args,
+    )
+    _instrument(engine, role)
+    return engine
+
+
+def _default_router(session: RoutingSession, clause: ClauseElement | None) -> bool:
+    # Once a session has written, read your own writes from the primary
+    if not session.info.get("read_only") or session.info.get("wrote"):
+        return False
+    return not isinstance(clause, (Insert, Update, Delete))
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica when the router allows it.
+
+    Flushes and DML always go to the primary. Without a replica every
+    statement goes to the primary.
+
+    Args:
+        primary: Primary engine (sync facade of the async engine)
+        replica: Optional replica engine
+        router: Replica routing hook, see :data:`ReplicaRouter`
+    """
+
+    def __init__(
+        self,
+        primary: Any,
+        replica: Any = None,
+        router: ReplicaRouter = _default_router,
+        **kw: Any,
+    ) -> None:
+        super().__init__(**kw)
+        self._primary = primary
+        self._replica = replica
+        self._router = router
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Any:
+        if self._flushing:
+            self.info["wrote"] = True
+            return self._primary
+        if self._replica is not None and self._router(self, clause):
+            return self._replica
+        if isinstance(clause, (Insert, Update, Delete)):
+            self.info["wrote"] = True
+        return self._primary
+
+
+class Database:
+    """Engines and session factory for one worker process.
+
+    Args:
+        settings: Application settings; defaults to :func:`get_settings`
+        router: Replica routing hook for sessions from this database
+    """
+
+    def __init__(
+        self, settings: Settings | None = None, router: ReplicaRouter = _default_router
+    ) -> None:
+        settings = settings or get_settings()
+        self.primary = create_engine(settings.database_url, settings, PRIMARY)
+        self.replica = (
+            create_engine(settings.database_replica_url, settings, REPLICA)
+            if settings.database_replica_url
+            else None
+        )
+        self.sessionmaker = async_sessionmaker(
+            sync_session_class=RoutingSession,
+            expire_on_commit=False,
+            primary=self.primary.sync_engine,
+            replica=self.replica.sync_engine if self.replica else None,
+            router=router,
+        )
+
+    @asynccontextmanager
+    async def session(self, read_only: bool = False) -> AsyncIterator[AsyncSession]:
+        """Open a session that commits on success and rolls back on error.
+
+        Args:
+            read_only: Allow the router to send this session's reads to the
+                replica
+        """
+        async with self.sessionmaker() as session:
+            session.info["read_only"] = read_only
+            try:
+                yield session
+                if session.in_transaction():
+                    await session.commit()
+            except BaseException:
+                await session.rollback()
+                raise
+
+    async def dispose(self) -> None:
+        await self.primary.dispose()
+        if self.replica is not None:
+            await self.replica.dispose()
+
+
+_database: Database | None = None
+
+
+def init_database(settings: Settings | None = None) -> Database:
+    """Create the process-wide :class:`Database` (called from the app lifespan)."""
+    global _database
+    if _database is None:
+        _database = Database(settings)
+    return _database
+
+
+def get_database() -> Database:
+    if _database is None:
+        raise RuntimeError("Database not initialised; call init_database() first")
+    return _database
+
+
+async def close_database() -> None:
+    global _database
+    if _database is not None:
+        await _database.dispose()
+        _database = None
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency: one read-write session per request."""
+    async with get_database().session() as session:
+        yield session
+
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency: a session whose reads may be served by the replica."""
+    async with get_database().session(read_only=True) as session:
+        yield session
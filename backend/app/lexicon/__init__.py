@@ -0,0 +1,40 @@
+"""Multi-language lexicons for sentence construction (TODO 5.4).
+
+English sentences are built by :mod:`app.services.sentence_service`
+directly; other locales map the English library words through a compiled,
+memory-mapped morphology table and a grammar module per locale::
+
+    python -m app.lexicon build es
+    python -m app.lexicon lookup es "don't want"
+"""
+
+from app.lexicon.lexicon import (
+    Adjective,
+    Clause,
+    Lexicon,
+    Noun,
+    ObjectWord,
+    Verb,
+    available_locales,
+    build_table,
+    close_lexicons,
+    get_lexicon,
+    init_lexicons,
+)
+from app.lexicon.table import LexiconError, MorphologyTable
+
+__all__ = [
+    "Adjective",
+    "Clause",
+    "Lexicon",
+    "LexiconError",
+    "MorphologyTable",
+    "Noun",
+    "ObjectWord",
+    "Verb",
+    "available_locales",
+    "build_table",
+    "close_lexicons",
+    "get_lexicon",
+    "init_lexicons",
+]
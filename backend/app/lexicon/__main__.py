@@ -0,0 +1,52 @@
+"""Command-line entry point: ``python -m app.lexicon {build,lookup}``."""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.config import get_settings
+from app.lexicon.lexicon import Lexicon, available_locales, build_table
+from app.lexicon.table import MorphologyTable
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.lexicon")
+    parser.add_argument(
+        "--dir", default=None, help="Compiled tables; defaults to LEXICON_DIR (.lexicon)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Compile lexicon sources into tables")
+    build.add_argument("locales", nargs="*", help="Defaults to every locale with a source")
+
+    lookup = commands.add_parser("lookup", help="Show the entries for an English word")
+    lookup.add_argument("locale")
+    lookup.add_argument("word")
+
+    args = parser.parse_args(argv)
+    directory = args.dir or get_settings().lexicon_dir
+    if args.command == "build":
+        for locale in args.locales or available_locales():
+            began = time.perf_counter()
+            path = build_table(locale, directory)
+            records = len(MorphologyTable(path))
+            elapsed = time.perf_counter() - began
+            print(f"Wrote {path}: {records} entries in {elapsed * 1000:.0f} ms")
+    else:
+        lexicon = Lexicon.open(args.locale, directory)
+        entries = (
+            ("noun", lexicon.noun(args.word)),
+            ("verb", lexicon.verb(args.word)),
+            ("adjective", lexicon.adjective(args.word)),
+            ("word", lexicon.word(args.word)),
+        )
+        found = [(pos, entry) for pos, entry in entries if entry is not None]
+        for pos, entry in found:
+            print(f"{pos}\t{entry}")
+        if not found:
+            print(f"No {args.locale} entry for {args.word!r}")
+
+
+if __name__ == "__main__":
+    main()
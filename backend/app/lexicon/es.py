@@ -0,0 +1,217 @@
+"""Spanish morphology and agreement.
+
+Build time: regular noun plurals, adjective gender and number forms, and
+present-tense conjugation, with the common irregular verbs listed. The
+lexicon source only spells out what these rules get wrong.
+
+Realization: articles and possessives agree with the noun ("una manzana",
+"unas galletas", "el agua", "mis zapatos"), "a"/"de" contract with "el"
+("voy al parque"), people take the personal "a" after most verbs ("veo a
+mamá"), adjectives agree with the object ("agua fría"), and
+gustar-type verbs agree with the object instead of the speaker ("me
+gustan las uvas"). The speaker is first person singular and the subject
+pronoun is dropped, as Spanish does.
+"""
+
+from __future__ import annotations
+
+from app.lexicon.lexicon import Clause, Lexicon, Noun, ObjectWord, Verb
+
+# Present indicative, yo/tú/él/nosotros/vosotros/ellos
+IRREGULAR_PRESENT: dict[str, tuple[str, ...]] = {
+    "coger": ("cojo", "coges", "coge", "cogemos", "cogéis", "cogen"),
+    "conocer": ("conozco", "conoces", "conoce", "conocemos", "conocéis", "conocen"),
+    "conseguir": ("consigo", "consigues", "consigue", "conseguimos", "conseguís", "consiguen"),
+    "dar": ("doy", "das", "da", "damos", "dais", "dan"),
+    "decir": ("digo", "dices", "dice", "decimos", "decís", "dicen"),
+    "dormir": ("duermo", "duermes", "duerme", "dormimos", "dormís", "duermen"),
+    "empezar": ("empiezo", "empiezas", "empieza", "empezamos", "empezáis", "empiezan"),
+    "encontrar": (
+        "encuentro",
+        "encuentras",
+        "encuentra",
+        "encontramos",
+        "encontráis",
+        "encuentran",
+    ),
+    "entender": ("entiendo", "entiendes", "entiende", "entendemos", "entendéis", "entienden"),
+    "estar": ("estoy", "estás", "está", "estamos", "estáis", "están"),
+    "hacer": ("hago", "haces", "hace", "hacemos", "hacéis", "hacen"),
+    "ir": ("voy", "vas", "va", "vamos", "vais", "van"),
+    "jugar": ("juego", "juegas", "juega", "jugamos", "jugáis", "juegan"),
+    "mostrar": ("muestro", "muestras", "muestra", "mostramos", "mostráis", "muestran"),
+    "oír": ("oigo", "oyes", "oye", "oímos", "oís", "oyen"),
+    "pedir": ("pido", "pides", "pide", "pedimos", "pedís", "piden"),
+    "pensar": ("pienso", "piensas", "piensa", "pensamos", "pensáis", "piensan"),
+    "poder": ("puedo", "puedes", "puede", "podemos", "podéis", "pueden"),
+    "poner": ("pongo", "pones", "pone", "ponemos", "ponéis", "ponen"),
+    "preferir": ("prefiero", "prefieres", "prefiere", "preferimos", "preferís", "prefieren"),
+    "querer": ("quiero", "quieres", "quiere", "queremos", "queréis", "quieren"),
+    "saber": ("sé", "sabes", "sabe", "sabemos", "sabéis", "saben"),
+    "salir": ("salgo", "sales", "sale", "salimos", "salís", "salen"),
+    "seguir": ("sigo", "sigues", "sigue", "seguimos", "seguís", "siguen"),
+    "sentir": ("siento", "sientes", "siente", "sentimos", "sentís", "sienten"),
+    "ser": ("soy", "eres", "es", "somos", "sois", "son"),
+    "tener": ("tengo", "tienes", "tiene", "tenemos", "tenéis", "tienen"),
+    "traer": ("traigo", "traes", "trae", "traemos", "traéis", "traen"),
+    "venir": ("vengo", "vienes", "viene", "venimos", "venís", "vienen"),
+    "ver": ("veo", "ves", "ve", "vemos", "veis", "ven"),
+    "volver": ("vuelvo", "vuelves", "vuelve", "volvemos", "volvéis", "vuelven"),
+}
+ENDINGS = {
+    "ar": ("o", "as", "a", "amos", "áis", "an"),
+    "er": ("o", "es", "e", "emos", "éis", "en"),
+    "ir": ("o", "es", "e", "imos", "ís", "en"),
+}
+REFLEXIVE = ("me", "te", "se", "nos", "os", "se")
+# Adjectives in -or that do not take a feminine -a
+INVARIABLE_OR = frozenset({"mayor", "mejor", "menor", "peor", "exterior", "interior"})
+_UNACCENTED = str.maketrans("áéíóú", "aeiou")
+_ACCENTED = "áéíóú"
+
+# The speaker: first person singular, dative "me" for gustar-type verbs
+PERSON = 0
+DATIVE = "me"
+
+
+def _unaccent_last(word: str) -> str:
+    # camión -> camion(es): the accent moves off once a syllable is added
+    if len(word) > 1 and word[-2] in _ACCENTED:
+        return word[:-2] + word[-2].translate(_UNACCENTED) + word[-1]
+    return word
+
+
+def pluralize(word: str) -> str:
+    """Regular plural of a noun or adjective (multi-word: "cepillo de dientes")."""
+    if " de " in word:
+        head, rest = word.split(" ", 1)
+        return f"{pluralize(head)} {rest}"
+    if " " in word:
+        return " ".join(pluralize(part) for part in word.split())
+    last = word[-1]
+    if last in "aeiouáéóíú":
+        return word + "s"
+    if last == "z":
+        return word[:-1] + "ces"
+    if last in "sx" and not any(c in _ACCENTED for c in word[-3:]):
+        return word  # Unstressed final syllable: el lunes, los lunes
+    return _unaccent_last(word) + "es"
+
+
+def adjective_forms(lemma: str) -> tuple[str, str, str, str]:
+    """Masculine and feminine, singular and plural forms of an adjective."""
+    if lemma.endswith("o"):
+        stem = lemma[:-1]
+        return lemma, stem + "a", stem + "os", stem + "as"
+    if lemma.endswith(("or", "ón", "án", "ín")) and lemma not in INVARIABLE_OR:
+        feminine = _unaccent_last(lemma) + "a"
+        return lemma, feminine, pluralize(lemma), feminine + "s"
+    plural = pluralize(lemma)
+    return lemma, lemma, plural, plural
+
+
+def conjugate(infinitive: str) -> tuple[str, ...]:
+    """Present indicative of a verb, reflexive ones ("sentirse") included."""
+    reflexive = infinitive.endswith("se") and infinitive[-4:-2] in ENDINGS
+    base = infinitive[:-2] if reflexive else infinitive
+    forms = IRREGULAR_PRESENT.get(base)
+    if forms is None:
+        ending = ENDINGS.get(base[-2:])
+        if ending is None:
+            raise ValueError(f"Not a Spanish infinitive: {infinitive!r}")
+        forms = tuple(base[:-2] + suffix for suffix in ending)
+    if reflexive:
+        forms = tuple(f"{pronoun} {form}" for pronoun, form in zip(REFLEXIVE, forms))
+    return forms
+
+
+def article(noun: Noun, definite: bool) -> str:
+    masculine = noun.gender == "m"
+    if noun.plural_use:
+        if definite:
+            return "los" if masculine else "las"
+        return "unos" if masculine else "unas"
+    # Feminine nouns with a stressed initial a take el/un: el agua, un hada
+    if masculine or noun.el:
+        return "el" if definite else "un"
+    return "la" if definite else "una"
+
+
+def with_preposition(preposition: str, phrase: str) -> str:
+    """``preposition`` before ``phrase``, contracting a/de + el to al/del."""
+    if preposition in ("a", "de") and phrase.startswith("el "):
+        return f"{preposition}l {phrase[3:]}"
+    return f"{preposition} {phrase}"
+
+
+def _object_phrase(noun: Noun, word: ObjectWord, verb: Verb | None) -> str:
+    form = noun.form
+    if word.custom:
+        return f"{'mis' if noun.plural_use else 'mi'} {form}"
+    if word.category in ("person", "feeling") or noun.bare or noun.adverb:
+        return form
+    if verb is not None and verb.dative:
+        # "Me gusta el agua": the object is the subject, with a definite article
+        return f"{article(noun, True)} {form}"
+    if word.category == "place":
+        return f"{article(noun, True)} {form}"
+    if noun.mass or noun.plural_use:
+        return form
+    return f"{article(noun, False)} {form}"
+
+
+def _preposition(verb: Verb, word: ObjectWord, noun: Noun | None) -> str:
+    if noun is not None and noun.adverb:
+        return ""
+    if verb.particle:
+        return verb.particle
+    if word.category == "place":
+        return verb.place
+    if word.category == "person" and verb.personal_a:
+        return "a"
+    return ""
+
+
+def realize(
+    lexicon: Lexicon, verb_text: str | None, word: ObjectWord | None, modifier_text: str | None
+) -> Clause:
+    verb = lexicon.verb(verb_text) if verb_text is not None else None
+    noun = lexicon.noun(word.name) if word is not None else None
+    clause = Clause()
+    if word is not None:
+        if noun is not None:
+            clause.object = _object_phrase(noun, word, verb)
+            clause.object_bare = noun.form
+        else:
+            # Feelings are adjectives ("me siento cansado") and actions are
+            # infinitives ("quiero jugar")
+            state = lexicon.adjective(word.name)
+            action = lexicon.verb(word.name) if state is None else None
+            if state is not None:
+                name = state.forms[0]
+            elif action is not None:
+                name = action.infinitive
+            else:
+                name = lexicon.untranslated(word.name)
+            clause.object = f"mi {name}" if word.custom else name
+            clause.object_bare = name
+        if verb is not None:
+            preposition = _preposition(verb, word, noun)
+            if preposition:
+                clause.object = with_preposition(preposition, clause.object)
+    if verb is not None:
+        if verb.dative:
+            plural = noun is not None and noun.plural_use
+            phrase = f"{DATIVE} {verb.present[5 if plural else 2]}"
+        else:
+            phrase = verb.present[PERSON]
+        clause.verb = f"no {phrase}" if verb.negated else phrase
+    elif verb_text is not None:
+        clause.verb = lexicon.untranslated(verb_text)
+    if modifier_text is not None:
+        adjective = lexicon.adjective(modifier_text)
+        if adjective is not None:
+            clause.modifier = adjective.agree(noun)
+        else:
+            clause.modifier = lexicon.word(modifier_text) or lexicon.untranslated(modifier_text)
+    return clause
@@ -0,0 +1,370 @@
+"""Per-locale lexicons: English library words to inflected target-language forms.
+
+Each locale has a hand-written source, ``data/<locale>.tsv``, and a grammar
+module, ``app.lexicon.<locale>``. Source lines are tab-separated::
+
+    pos  english  target  [feature ...]
+
+with ``pos`` one of ``n`` (noun), ``v`` (verb), ``a`` (adjective), ``w``
+(invariable word) or ``t`` (sentence template). Features mark gender and
+usage (``m``, ``f``, ``pl``, ``mass``, ``bare``, ``adverb``, ``el``), verb
+frames (``particle=con``, ``place=a``, ``neg``, ``personal``, ``dative``)
+and irregular forms the grammar's rules get wrong (``plural=...``,
+``present=a,b,c,d,e,f``, ``forms=a,b,c,d``).
+
+The build expands every entry into its full paradigm with the grammar
+module and compiles the result into a :class:`MorphologyTable`. At run time
+a locale is loaded on first use: its table is rebuilt if the source or
+grammar changed, then memory-mapped, so an inflection is one hash probe and
+locales nobody asks for cost nothing.
+"""
+
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+from types import ModuleType
+from typing import Protocol, cast
+
+from app.config import get_settings
+from app.lexicon.table import LexiconError, MorphologyTable, write_table
+from app.services.object_service import normalize_label, singular_forms
+from app.utils.metrics import REGISTRY
+
+DATA_DIR = Path(__file__).parent / "data"
+TABLE_SUFFIX = ".lex"
+PERSONS = 6
+
+LEXICON_MISSES = REGISTRY.counter(
+    "lexicon_misses_total", "Words realized untranslated for want of a lexicon entry", ["locale"]
+)
+
+_NOUN_FLAGS = (("pl", "p"), ("mass", "m"), ("bare", "b"), ("adverb", "a"), ("el", "e"))
+_VERB_FLAGS = (("neg", "n"), ("personal", "a"), ("dative", "d"))
+
+
+@dataclass(frozen=True, slots=True)
+class Noun:
+    """A noun and how it is used.
+
+    Attributes:
+        singular: Singular form
+        plural: Plural form
+        gender: ``"m"`` or ``"f"``
+        plural_use: The library word is plural ("grapes"), so is the target
+        mass: Uncountable; takes no indefinite article
+        bare: Takes no article ("casa" in "voy a casa")
+        adverb: Takes neither article nor preposition ("afuera")
+        el: Feminine but takes "el"/"un" (Spanish "el agua")
+    """
+
+    singular: str
+    plural: str
+    gender: str
+    plural_use: bool = False
+    mass: bool = False
+    bare: bool = False
+    adverb: bool = False
+    el: bool = False
+
+    @property
+    def form(self) -> str:
+        return self.plural if self.plural_use else self.singular
+
+    @classmethod
+    def from_fields(cls, fields: tuple[str, ...]) -> Noun:
+        singular, plural, gender, flags = fields
+        return cls(
+            singular,
+            plural,
+            gender,
+            plural_use="p" in flags,
+            mass="m" in flags,
+            bare="b" in flags,
+            adverb="a" in flags,
+            el="e" in flags,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Verb:
+    """A verb frame.
+
+    Attributes:
+        infinitive: Dictionary form
+        present: Present tense, first to third person plural
+        particle: Preposition before any object ("hablar con")
+        place: Preposition before places only ("ir a")
+        negated: The library verb is negative ("don't want")
+        personal_a: People as objects take "a" (Spanish "veo a mamá")
+        dative: The object is the grammatical subject (Spanish "me gusta")
+    """
+
+    infinitive: str
+    present: tuple[str, ...]
+    particle: str = ""
+    place: str = ""
+    negated: bool = False
+    personal_a: bool = False
+    dative: bool = False
+
+    @classmethod
+    def from_fields(cls, fields: tuple[str, ...]) -> Verb:
+        end = 1 + PERSONS
+        particle, place, flags = fields[end:]
+        return cls(
+            fields[0],
+            fields[1:end],
+            particle,
+            place,
+            negated="n" in flags,
+            personal_a="a" in flags,
+            dative="d" in flags,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Adjective:
+    """An adjective: masculine and feminine, singular and plural."""
+
+    forms: tuple[str, str, str, str]
+
+    def agree(self, noun: Noun | None) -> str:
+        """The form agreeing with ``noun`` (masculine singular without one)."""
+        if noun is None:
+            return self.forms[0]
+        return self.forms[(noun.gender == "f") + 2 * noun.plural_use]
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectWord:
+    """A library object as the grammar sees it."""
+
+    name: str
+    category: str
+    custom: bool = False
+
+
+@dataclass(slots=True)
+class Clause:
+    """Realized slot fillers; the localized template decides their order."""
+
+    verb: str = ""
+    object: str = ""
+    object_bare: str = ""
+    modifier: str = ""
+
+
+class Grammar(Protocol):
+    """What a locale module (``app.lexicon.<locale>``) provides."""
+
+    def pluralize(self, word: str) -> str: ...
+
+    def adjective_forms(self, lemma: str) -> tuple[str, str, str, str]: ...
+
+    def conjugate(self, infinitive: str) -> tuple[str, ...]: ...
+
+    def realize(
+        self,
+        lexicon: Lexicon,
+        verb_text: str | None,
+        word: ObjectWord | None,
+        modifier_text: str | None,
+    ) -> Clause: ...
+
+
+def _features(values: list[str]) -> tuple[set[str], dict[str, str]]:
+    flags: set[str] = set()
+    options: dict[str, str] = {}
+    for value in values:
+        name, equals, option = value.partition("=")
+        if equals:
+            options[name] = option
+        elif value:
+            flags.add(value)
+    return flags, options
+
+
+def _paradigm(
+    grammar: Grammar, pos: str, target: str, flags: set[str], options: dict[str, str]
+) -> tuple[str, ...]:
+    if pos == "n":
+        gender = "f" if "f" in flags else "m" if "m" in flags else ""
+        if not gender:
+            raise LexiconError("noun needs a gender (m or f)")
+        plural = options.get("plural") or grammar.pluralize(target)
+        return (target, plural, gender, "".join(c for f, c in _NOUN_FLAGS if f in flags))
+    if pos == "v":
+        present = tuple(options["present"].split(",")) if "present" in options else None
+        if present is None:
+            present = grammar.conjugate(target)
+        if len(present) != PERSONS:
+            raise LexiconError(f"present needs {PERSONS} forms")
+        flags_field = "".join(c for f, c in _VERB_FLAGS if f in flags)
+        return (
+            target,
+            *present,
+            options.get("particle", ""),
+            options.get("place", ""),
+            flags_field,
+        )
+    if pos == "a":
+        forms = tuple(options["forms"].split(",")) if "forms" in options else None
+        if forms is None:
+            forms = grammar.adjective_forms(target)
+        if len(forms) != 4:
+            raise LexiconError("forms needs 4 forms")
+        return forms
+    if pos in ("w", "t"):
+        return (target,)
+    raise LexiconError(f"unknown part of speech {pos!r}")
+
+
+def compile_source(path: Path, grammar: Grammar) -> dict[str, tuple[str, ...]]:
+    """Expand a lexicon source into table records.
+
+    Raises:
+        LexiconError: A line is malformed; the message names it
+    """
+    records: dict[str, tuple[str, ...]] = {}
+    lines = path.read_text(encoding="utf-8").splitlines()
+    for number, line in enumerate(lines, start=1):
+        if not line.strip() or line.startswith("#"):
+            continue
+        pos, english, target, *rest = [*line.split("\t"), "", ""]
+        # Templates keep their brackets and case; words are looked up normalized
+        key = f"t:{english.strip()}" if pos == "t" else f"{pos}:{normalize_label(english)}"
+        if key in records:
+            raise LexiconError(f"{path.name}:{number}: {english!r} is defined twice")
+        try:
+            if not target.strip():
+                raise LexiconError(f"no translation for {english!r}")
+            records[key] = _paradigm(grammar, pos, target.strip(), *_features(rest))
+        except (LexiconError, ValueError, KeyError) as exc:
+            raise LexiconError(f"{path.name}:{number}: {exc}") from exc
+    return records
+
+
+def _grammar(locale: str) -> ModuleType:
+    if not (DATA_DIR / f"{locale}.tsv").is_file():
+        raise LexiconError(f"Unsupported locale {locale!r}")
+    return importlib.import_module(f"app.lexicon.{locale}")
+
+
+def available_locales() -> list[str]:
+    """Locales with a lexicon source, besides English."""
+    return sorted(path.stem for path in DATA_DIR.glob("*.tsv"))
+
+
+def build_table(locale: str, directory: str | Path) -> Path:
+    """Compile ``locale``'s source into ``<directory>/<locale>.lex``.
+
+    Raises:
+        LexiconError: Unsupported locale or invalid source
+    """
+    grammar = cast(Grammar, _grammar(locale))
+    target = Path(directory) / f"{locale}{TABLE_SUFFIX}"
+    write_table(target, compile_source(DATA_DIR / f"{locale}.tsv", grammar))
+    return target
+
+
+class Lexicon:
+    """One locale's compiled table and grammar.
+
+    Args:
+        locale: Language code, e.g. ``"es"``
+        table: The locale's memory-mapped table
+        grammar: The locale's grammar module
+    """
+
+    def __init__(self, locale: str, table: MorphologyTable, grammar: Grammar) -> None:
+        self.locale = locale
+        self.table = table
+        self.grammar = grammar
+
+    @classmethod
+    def open(cls, locale: str, directory: str | Path) -> Lexicon:
+        """Map ``locale``'s table, rebuilding it first if it is missing or stale."""
+        module = _grammar(locale)
+        path = Path(directory) / f"{locale}{TABLE_SUFFIX}"
+        sources = (DATA_DIR / f"{locale}.tsv", Path(str(module.__file__)))
+        newest = max(source.stat().st_mtime for source in sources)
+        if not path.is_file() or path.stat().st_mtime < newest:
+            build_table(locale, directory)
+        grammar = cast(Grammar, module)
+        return cls(locale, MorphologyTable(path), grammar)
+
+    def noun(self, english: str) -> Noun | None:
+        key = normalize_label(english)
+        fields = self.table.get(f"n:{key}")
+        if fields is not None:
+            return Noun.from_fields(fields)
+        for singular in singular_forms(key):
+            fields = self.table.get(f"n:{singular}")
+            if fields is not None:
+                return replace(Noun.from_fields(fields), plural_use=True)
+        return None
+
+    def verb(self, english: str) -> Verb | None:
+        fields = self.table.get(f"v:{normalize_label(english)}")
+        return Verb.from_fields(fields) if fields is not None else None
+
+    def adjective(self, english: str) -> Adjective | None:
+        fields = self.table.get(f"a:{normalize_label(english)}")
+        if fields is None:
+            return None
+        masculine, feminine, masculine_plural, feminine_plural = fields
+        return Adjective((masculine, feminine, masculine_plural, feminine_plural))
+
+    def word(self, english: str) -> str | None:
+        fields = self.table.get(f"w:{normalize_label(english)}")
+        return fields[0] if fields is not None else None
+
+    def template(self, structure: str) -> str | None:
+        """The localized form of an English template such as ``"I [verb] [object]"``."""
+        fields = self.table.get(f"t:{structure.strip()}")
+        return fields[0] if fields is not None else None
+
+    def untranslated(self, english: str) -> str:
+        """``english`` as is, counted so gaps in the lexicon show up in /metrics."""
+        LEXICON_MISSES.inc(1, self.locale)
+        return english
+
+    def realize(
+        self, verb_text: str | None, word: ObjectWord | None, modifier_text: str | None
+    ) -> Clause:
+        """Inflected slot fillers for these words."""
+        return self.grammar.realize(self, verb_text, word, modifier_text)
+
+    def close(self) -> None:
+        self.table.close()
+
+
+_directory: Path | None = None
+_lexicons: dict[str, Lexicon] = {}
+
+
+def init_lexicons(directory: str | Path) -> None:
+    """Set where compiled tables live; locales are loaded on first use."""
+    global _directory
+    _directory = Path(directory)
+
+
+def get_lexicon(locale: str) -> Lexicon:
+    """The lexicon for ``locale``, mapping its table on first use.
+
+    Raises:
+        LexiconError: Unsupported locale or invalid source
+    """
+    lexicon = _lexicons.get(locale)
+    if lexicon is None:
+        directory = _directory or Path(get_settings().lexicon_dir)
+        lexicon = _lexicons[locale] = Lexicon.open(locale, directory)
+    return lexicon
+
+
+def close_lexicons() -> None:
+    for lexicon in _lexicons.values():
+        lexicon.close()
+    _lexicons.clear()
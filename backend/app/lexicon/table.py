@@ -0,0 +1,122 @@
+"""Compiled morphology tables: an open-addressing hash table in one file.
+
+Layout (little-endian)::
+
+    header   magic (8 bytes), slot count (u32), record count (u32)
+    slots    slot count x (key hash u64, record offset u32, record length u32)
+    records  UTF-8 "key<US>field<US>field...", <US> being U+001F
+
+The slot count is a power of two at least twice the record count, so a
+lookup hashes the key and probes a few adjacent slots: O(1) and no
+decoding of anything but the one record. Records repeat their key, so a
+64-bit hash collision cannot return the wrong word.
+
+Readers map the file instead of loading it. Every worker on a machine
+shares the same pages through the OS page cache, and only the pages that
+lookups touch are ever read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+MAGIC = b"AACLEX01"
+SEPARATOR = "\x1f"
+HEADER = struct.Struct("<8sII")
+SLOT = struct.Struct("<QII")
+
+
+class LexiconError(ValueError):
+    """A lexicon source or compiled table is invalid."""
+
+
+def key_hash(key: str) -> int:
+    """Stable 64-bit hash of ``key``; never 0, which marks an empty slot."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def write_table(path: str | Path, records: Mapping[str, Sequence[str]]) -> None:
+    """Compile ``records`` (key -> fields) into a table file at ``path``.
+
+    The file is written beside the target and renamed over it, so readers
+    that have the old table mapped keep working.
+
+    Raises:
+        LexiconError: A key or field contains the record separator
+    """
+    slots = 2
+    while slots < 2 * len(records):
+        slots *= 2
+    table = [(0, 0, 0)] * slots
+    pool = bytearray()
+    base = HEADER.size + slots * SLOT.size
+    for key, fields in records.items():
+        if any(SEPARATOR in value for value in (key, *fields)):
+            raise LexiconError(f"Record {key!r} contains the separator")
+        data = SEPARATOR.join((key, *fields)).encode()
+        digest = key_hash(key)
+        index = digest & (slots - 1)
+        while table[index][0]:
+            index = (index + 1) & (slots - 1)
+        table[index] = (digest, base + len(pool), len(data))
+        pool += data
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(HEADER.pack(MAGIC, slots, len(records)))
+            for entry in table:
+                out.write(SLOT.pack(*entry))
+            out.write(pool)
+        os.replace(temp, target)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class MorphologyTable:
+    """Read-only, memory-mapped view of a compiled table.
+
+    Raises:
+        LexiconError: The file is not a compiled table
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise LexiconError(f"{self.path} is not a lexicon table")
+        magic, slots, self.records = HEADER.unpack_from(self._map)
+        if magic != MAGIC or slots & (slots - 1):
+            raise LexiconError(f"{self.path} is not a lexicon table")
+        self._mask = slots - 1
+
+    def __len__(self) -> int:
+        return self.records
+
+    def get(self, key: str) -> tuple[str, ...] | None:
+        """The fields stored under ``key``, or ``None``."""
+        digest = key_hash(key)
+        index = digest & self._mask
+        while True:
+            stored, offset, length = SLOT.unpack_from(self._map, HEADER.size + index * SLOT.size)
+            if not stored:
+                return None
+            if stored == digest:
+                end = offset + length
+                fields = self._map[offset:end].decode().split(SEPARATOR)
+                if fields[0] == key:
+                    return tuple(fields[1:])
+            index = (index + 1) & self._mask
+
+    def close(self) -> None:
+        self._map.close()
@@ -0,0 +1,246 @@
+"""FastAPI application entry point."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Coroutine, Sequence
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import close_database, get_database, get_session, init_database
+from app.lexicon import close_lexicons, init_lexicons
+from app.routers import (
+    caregiver,
+    conversations,
+    events,
+    export,
+    federated,
+    objects,
+    people,
+    routines,
+    scanning,
+    search,
+    sentences,
+    sync,
+    telemetry,
+    tts,
+    verbs,
+)
+from app.services.blob_store import close_blob_store, init_blob_store
+from app.services.events import close_events, init_events
+from app.services.export_service import close_export_jobs, init_export_jobs
+from app.services.face_service import (
+    FACES_TAG_PREFIX,
+    close_face_index,
+    get_face_index,
+    init_face_index,
+)
+from app.services.federated_service import close_federated, init_federated
+from app.services.image_lifecycle import ImageExpiryScheduler
+from app.services.jobs import close_jobs, init_jobs
+from app.services.llm_service import close_composer, init_composer
+from app.services.object_service import CUSTOM_TAG_PREFIX, get_object_index, init_object_index
+from app.services.partition_service import PartitionProvisioner
+from app.services.prediction_service import (
+    SENTENCES_TAG_PREFIX,
+    get_prediction_index,
+    init_prediction_index,
+)
+from app.services.recognition_service import close_recognizer, get_recognizer, init_recognizer
+from app.services.routine_service import (
+    ROUTINES_TAG_PREFIX,
+    close_routine_scheduler,
+    get_routine_scheduler,
+    init_routine_scheduler,
+)
+from app.services.search_service import get_search_index, init_search_index
+from app.services.sentence_service import init_sentence_engine
+from app.services.tts_service import PreSynthesizer, close_tts, init_tts
+from app.utils.cache import close_cache, get_cache, init_cache
+from app.utils.metrics import REGISTRY
+from app.utils.rate_limit import RateLimitMiddleware, close_rate_limiter, init_rate_limiter
+from app.utils.telemetry import close_telemetry, init_telemetry, slo_report
+
+_background: set[asyncio.Task[None]] = set()
+
+
+async def _refresh_custom_objects(user_id: int) -> None:
+    async with get_database().session(read_only=True) as session:
+        await get_object_index().refresh_user(session, user_id)
+
+
+async def _refresh_routines(user_id: int) -> None:
+    # From the primary, which has the edit that triggered this for certain
+    async with get_database().session() as session:
+        await get_routine_scheduler().refresh_user(session, user_id)
+
+
+def _spawn(refresh: Coroutine[Any, Any, None]) -> None:
+    task = asyncio.create_task(refresh)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def _on_invalidate(tags: Sequence[str]) -> None:
+    # Another worker changed a user's data: bring this worker's copies up to date
+    for tag in tags:
+        if tag.startswith(CUSTOM_TAG_PREFIX):
+            user_id = int(tag.removeprefix(CUSTOM_TAG_PREFIX))
+            _spawn(_refresh_custom_objects(user_id))
+            if (recognizer := get_recognizer()) is not None:
+                recognizer.evict(user_id)
+        elif tag.startswith(SENTENCES_TAG_PREFIX):
+            user_id = int(tag.removeprefix(SENTENCES_TAG_PREFIX))
+            get_prediction_index().mark_stale(user_id)
+            get_search_index().mark_stale(user_id)
+        elif tag.startswith(ROUTINES_TAG_PREFIX):
+            _spawn(_refresh_routines(int(tag.removeprefix(ROUTINES_TAG_PREFIX))))
+        elif tag.startswith(FACES_TAG_PREFIX) and (faces := get_face_index()) is not None:
+            faces.evict(int(tag.removeprefix(FACES_TAG_PREFIX)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    init_telemetry(
+        settings.otel_exporter_otlp_endpoint, settings.applicationinsights_connection_string
+    )
+    database = init_database(settings)
+    init_lexicons(settings.lexicon_dir)
+    async with database.session(read_only=True) as session:
+        object_index = await init_object_index(session)
+        engine = await init_sentence_engine(session, object_index)
+    search_index = init_search_index(object_index, engine)
+    prediction_index = init_prediction_index()
+    cache = await init_cache(settings.redis_url)
+    cache.add_listener(_on_invalidate)
+    init_rate_limiter(settings.rate_limit_per_minute, cache.redis)
+    init_composer(
+        settings.llm_backend,
+        cache.redis,
+        settings.llm_timeout,
+        settings.llm_base_url,
+        settings.llm_model,
+        settings.llm_api_key,
+        settings.llm_model_path,
+    )
+    store = init_blob_store(
+        settings.azure_storage_connection_string,
+        settings.azure_storage_container,
+        settings.blob_local_root,
+    )
+    expiry = ImageExpiryScheduler(database, store, interval=settings.image_expiry_interval)
+    expiry.start()
+    presynth = None
+    if settings.tts_engine:
+        audio = init_tts(
+            settings.tts_engine,
+            settings.tts_cache_dir,
+            settings.tts_default_voice,
+            settings.tts_cache_max_mb * 1024 * 1024,
+            settings.tts_binary,
+            settings.tts_model_dir,
+        )
+        presynth = PreSynthesizer(
+            database,
+            audio,
+            top_n=settings.tts_presynth_top_n,
+            interval=settings.tts_presynth_interval,
+        )
+        presynth.start()
+    if settings.face_model_path:
+        init_face_index(settings.face_model_path, settings.face_match_threshold)
+    if settings.object_model_path:
+        init_recognizer(settings.object_model_path, settings.object_match_threshold)
+    hub = await init_events(cache.redis)
+    jobs = init_jobs(cache.redis, settings.job_poll_interval)
+    partitions = PartitionProvisioner(database, jobs, settings.partition_months_ahead)
+    await partitions.run_once()
+    init_export_jobs(database, settings.export_dir, jobs, hub)
+    init_federated(
+        database,
+        jobs,
+        cache.redis,
+        settings.federated_round_updates,
+        settings.federated_min_updates,
+        settings.federated_round_seconds,
+        settings.federated_max_staleness,
+        settings.secret_key.encode(),
+    )
+    jobs.start()
+    await init_routine_scheduler(
+        database,
+        cache,
+        object_index,
+        prediction_index,
+        search_index,
+        settings.routine_prewarm_lead,
+    )
+    yield
+    await close_routine_scheduler()
+    await close_jobs()
+    close_federated()
+    close_export_jobs()
+    await close_events()
+    if presynth is not None:
+        await presynth.close()
+    close_tts()
+    close_face_index()
+    close_recognizer()
+    close_lexicons()
+    await expiry.close()
+    await close_blob_store()
+    await close_composer()
+    await close_rate_limiter()
+    await close_cache()
+    await close_database()
+    close_telemetry()
+
+
+app = FastAPI(title="SpeakOut AAC API", version="0.1.0", lifespan=lifespan)
+app.add_middleware(RateLimitMiddleware)
+app.include_router(objects.router)
+app.include_router(sentences.router)
+app.include_router(search.router)
+app.include_router(routines.router)
+app.include_router(scanning.router)
+app.include_router(federated.router)
+app.include_router(verbs.router)
+app.include_router(verbs.modifiers_router)
+app.include_router(tts.router)
+app.include_router(caregiver.router)
+app.include_router(export.router)
+app.include_router(events.router)
+app.include_router(conversations.router)
+app.include_router(people.router)
+app.include_router(sync.router)
+app.include_router(telemetry.router)
+
+
+@app.get("/health")
+async def health(session: AsyncSession = Depends(get_session)) -> dict[str, str]:
+    await session.execute(text("SELECT 1"))
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    return REGISTRY.render()
+
+
+@app.get("/metrics/cache")
+async def cache_metrics() -> dict[str, dict[str, float]]:
+    """Per-endpoint cache hit ratio and estimated latency saved."""
+    return get_cache().stats()
+
+
+@app.get("/metrics/slo")
+async def slo_metrics() -> dict[str, dict[str, float | None]]:
+    """Per-stage latency percentiles and SLO burn rates against the NFR-1 budgets."""
+    return slo_report()
@@ -0,0 +1,37 @@
+"""SQLAlchemy models. Importing this package registers every table on ``Base.metadata``."""
+
+from app.models.analytics import UsageAnalytics, UsageDailyItem, UsageDailyPhrase
+from app.models.base import Base
+from app.models.conversation import ConversationMember
+from app.models.federated import FederatedModel
+from app.models.image import UploadedImage
+from app.models.object import DetectedObject, ObjectEmbedding, ObjectLibrary
+from app.models.person import FaceEmbedding, Person
+from app.models.routine import Routine
+from app.models.sentence import ConstructedSentence, FeedbackRecord, SentenceTemplate
+from app.models.sync import SyncItem
+from app.models.user import User
+from app.models.verb import ModifierLibrary, VerbLibrary
+
+__all__ = [
+    "Base",
+    "ConstructedSentence",
+    "ConversationMember",
+    "DetectedObject",
+    "FaceEmbedding",
+    "FederatedModel",
+    "FeedbackRecord",
+    "ModifierLibrary",
+    "ObjectEmbedding",
+    "ObjectLibrary",
+    "Person",
+    "Routine",
+    "SentenceTemplate",
+    "SyncItem",
+    "UploadedImage",
+    "UsageAnalytics",
+    "UsageDailyItem",
+    "UsageDailyPhrase",
+    "User",
+    "VerbLibrary",
+]
@@ -0,0 +1,70 @@
+"""Usage rollups for the caregiver dashboard (TODO 2.4, 3.5).
+
+The tables are maintained by statement-level triggers on
+``constructed_sentences`` and ``feedback_records`` (migration ``0004``), so
+every writer keeps them current in the same transaction as the raw rows.
+Dashboard reads then touch at most a few hundred rollup rows per user,
+whatever the length of the history. Buckets are UTC; the dashboard shifts
+hourly buckets into the caregiver's time zone when it groups them by day.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import CheckConstraint, Date, DateTime, ForeignKey, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+ITEM_DIMENSIONS: tuple[str, ...] = ("object", "verb", "modifier")
+
+
+class UsageAnalytics(Base):
+    """Hourly activity counters per user."""
+
+    __tablename__ = "usage_analytics"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    constructed: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    spoken: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    thumbs_up: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    thumbs_down: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+
+
+class UsageDailyItem(Base):
+    """Daily uses of each object, verb and modifier per user."""
+
+    __tablename__ = "usage_daily_items"
+    __table_args__ = (
+        CheckConstraint(
+            "dimension IN ({})".format(", ".join(f"'{d}'" for d in ITEM_DIMENSIONS)),
+            name="dimension",
+        ),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    dimension: Mapped[str] = mapped_column(String(8), primary_key=True)
+    item_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    uses: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    spoken: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+
+
+class UsageDailyPhrase(Base):
+    """Daily uses of each sentence per user."""
+
+    __tablename__ = "usage_daily_phrases"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    phrase: Mapped[str] = mapped_column(String(500), primary_key=True)
+    uses: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    spoken: Mapped[int] = mapped_column(Integer, server_default=text("0"))
@@ -0,0 +1,36 @@
+"""Family Communication Bridge membership (create_future_md, "Multi-User Conversations")."""
+
+from __future__ import annotations
+
+from sqlalchemy import CheckConstraint, ForeignKey, Index, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+
+MEMBER_ROLES: tuple[str, ...] = ("family", "caregiver", "therapist")
+
+
+class ConversationMember(CreatedAtMixin, Base):
+    """A user allowed into another user's conversation room.
+
+    Every AAC user owns one room, keyed by their user id. The owner is
+    always a member and has no row here.
+    """
+
+    __tablename__ = "conversation_members"
+    __table_args__ = (
+        CheckConstraint(
+            "role IN ('family', 'caregiver', 'therapist')",
+            name="role",
+        ),
+        CheckConstraint("member_id <> owner_id", name="not_owner"),
+        Index("ix_conversation_members_member_id", "member_id"),
+    )
+
+    owner_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    member_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    role: Mapped[str] = mapped_column(String(20), server_default=text("'family'"))
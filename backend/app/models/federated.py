@@ -0,0 +1,29 @@
+"""Federated model versions (create_future_md, "Federated Learning")."""
+
+from __future__ import annotations
+
+from sqlalchemy import CheckConstraint, Float, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+
+
+class FederatedModel(CreatedAtMixin, Base):
+    """One published version of a shared ranker model.
+
+    ``payload`` is the compact diff from the previous version, encoded by
+    :func:`app.services.federated_service.encode_diff`: the new values of the
+    entries that changed. Replaying a ranker's diffs in version order gives
+    its current model. The other columns describe the round that produced
+    it; nothing records which devices or users took part.
+    """
+
+    __tablename__ = "federated_models"
+    __table_args__ = (CheckConstraint("ranker IN ('qlearning', 'bandit')", name="ranker"),)
+
+    ranker: Mapped[str] = mapped_column(String(20), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    updates: Mapped[int] = mapped_column(Integer)
+    weight: Mapped[float] = mapped_column(Float)
+    entries: Mapped[int] = mapped_column(Integer)
+    payload: Mapped[bytes] = mapped_column(LargeBinary)
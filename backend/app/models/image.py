@@ -0,0 +1,38 @@
+"""Uploaded images awaiting their 24-hour deletion (NFR-5, TODO 1.6)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+
+
+class UploadedImage(CreatedAtMixin, Base):
+    """An image blob and when it must be gone.
+
+    ``expiry_hour`` (hours since the Unix epoch of ``expires_at``) is the
+    time-bucketed expiry index the deletion scheduler walks oldest bucket
+    first. The user reference is ``SET NULL`` rather than ``CASCADE`` so that
+    deleting an account leaves the row behind until the scheduler has removed
+    the blob it points to. ``retry_at`` is set after a failed blob delete so
+    the row backs off instead of holding the head of the expiry index.
+    """
+
+    __tablename__ = "uploaded_images"
+    __table_args__ = (
+        Index("ix_uploaded_images_expiry_hour", "expiry_hour"),
+        Index("ix_uploaded_images_user_id", "user_id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"))
+    blob_name: Mapped[str] = mapped_column(String(255))
+    content_type: Mapped[str] = mapped_column(String(50))
+    size_bytes: Mapped[int] = mapped_column(Integer)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    expiry_hour: Mapped[int] = mapped_column(Integer)
+    delete_attempts: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    retry_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
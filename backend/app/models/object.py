@@ -0,0 +1,114 @@
+"""Object library and per-image detections."""
+
+from __future__ import annotations
+
+from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    Float,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    LargeBinary,
+    SmallInteger,
+    String,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+from app.services.verb_service import OBJECT_CATEGORIES
+
+CATEGORY_CHECK = "category IN ({})".format(", ".join(f"'{c}'" for c in OBJECT_CATEGORIES))
+
+
+class ObjectLibrary(CreatedAtMixin, Base):
+    """Library object. ``user_id`` is NULL for the shared library and set for
+    caregiver-added custom objects (TODO 3.4)."""
+
+    __tablename__ = "object_library"
+    __table_args__ = (
+        CheckConstraint(CATEGORY_CHECK, name="category"),
+        # Shared library browsed by category, most used first (index-only scan)
+        Index(
+            "ix_object_library_category_usage",
+            "category",
+            text("usage_count DESC"),
+            postgresql_include=["id", "name", "icon_url"],
+            postgresql_where=text("user_id IS NULL"),
+        ),
+        # A user's custom objects, kept out of the shared-library index
+        Index(
+            "ix_object_library_custom",
+            "user_id",
+            "category",
+            postgresql_include=["id", "name", "icon_url", "usage_count"],
+            postgresql_where=text("user_id IS NOT NULL"),
+        ),
+        Index(
+            "uq_object_library_shared_name",
+            "name",
+            unique=True,
+            postgresql_where=text("user_id IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100))
+    category: Mapped[str] = mapped_column(String(20))
+    icon_url: Mapped[str | None] = mapped_column(String(500))
+    common_verbs: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer), server_default=text("'{}'::integer[]")
+    )
+    usage_count: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+
+
+class DetectedObject(CreatedAtMixin, Base):
+    """Object detected in an uploaded image, with its normalized bounding box."""
+
+    __tablename__ = "detected_objects"
+    __table_args__ = (
+        CheckConstraint("confidence BETWEEN 0 AND 1", name="confidence"),
+        Index("ix_detected_objects_image_id", "image_id"),
+        Index("ix_detected_objects_user_id", "user_id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    image_id: Mapped[str] = mapped_column(String(64))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    object_id: Mapped[int | None] = mapped_column(
+        ForeignKey("object_library.id", ondelete="SET NULL")
+    )
+    label: Mapped[str] = mapped_column(String(100))
+    bbox_x: Mapped[float] = mapped_column(Float)
+    bbox_y: Mapped[float] = mapped_column(Float)
+    bbox_width: Mapped[float] = mapped_column(Float)
+    bbox_height: Mapped[float] = mapped_column(Float)
+    confidence: Mapped[float] = mapped_column(Float)
+    custom_label: Mapped[str | None] = mapped_column(String(100))
+
+
+class ObjectEmbedding(CreatedAtMixin, Base):
+    """One reference photo of a custom object, as an L2-normalised float32 vector.
+
+    Only the embedding is kept, not the photo. ``model`` names the
+    embedding model, because vectors from different models are not
+    comparable.
+    """
+
+    __tablename__ = "object_embeddings"
+    __table_args__ = (
+        Index("ix_object_embeddings_user_id", "user_id"),
+        Index("ix_object_embeddings_object_id", "object_id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    object_id: Mapped[int] = mapped_column(ForeignKey("object_library.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    model: Mapped[str] = mapped_column(String(64))
+    dim: Mapped[int] = mapped_column(SmallInteger)
+    # float32, little-endian, ``dim`` values
+    vector: Mapped[bytes] = mapped_column(LargeBinary)
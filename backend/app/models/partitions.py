@@ -0,0 +1,130 @@
+"""Monthly range partitions for the high-volume history tables.
+
+Partitions are named ``<table>_yYYYYmMM`` and cover ``[first of month, first of
+next month)``. Each table also has a ``<table>_default`` partition that catches
+rows outside the provisioned range; keep it empty by provisioning ahead with
+:func:`ensure_monthly_partitions` (Postgres refuses to attach a month whose
+rows already sit in the default partition).
+
+Migration 0001 provisions the first year. After that the app's
+``partitions.provision`` job (see :mod:`app.services.partition_service`) runs
+:func:`provision_ahead` at startup and daily, and ``python -m
+app.models.partitions`` does the same from the command line.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterator
+from datetime import date
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+
+PARTITIONED_TABLES: tuple[str, ...] = ("constructed_sentences", "feedback_records")
+# Advisory lock held while provisioning, so workers starting together do not
+# race on the same CREATE TABLE
+PROVISION_LOCK = 0x70617274
+
+
+def month_starts(start: date, end: date) -> Iterator[date]:
+    """Yield the first day of every month from ``start``'s month through ``end``'s."""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    """The first day of the month ``months`` after ``day``'s (negative goes back)."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+
+
+def create_default_partition_sql(table: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+def ensure_monthly_partitions(
+    connection: Connection,
+    start: date,
+    end: date,
+    tables: tuple[str, ...] = PARTITIONED_TABLES,
+) -> list[str]:
+    """Create any missing monthly partitions covering ``start`` through ``end``.
+
+    Idempotent; run it from a scheduled job a few months ahead of time.
+
+    Args:
+        connection: Open connection (the caller owns the transaction)
+        start: Any day in the first month to provision
+        end: Any day in the last month to provision
+        tables: Partitioned parent tables
+
+    Returns:
+        Names of the partitions that were created
+    """
+    created = []
+    for table in tables:
+        for month in month_starts(start, end):
+            name = partition_name(table, month)
+            exists = connection.execute(text("SELECT to_regclass(:name)"), {"name": name})
+            if exists.scalar() is None:
+                connection.execute(text(create_partition_sql(table, month)))
+                created.append(name)
+    return created
+
+
+def provision_ahead(connection: Connection, today: date, months_ahead: int) -> list[str]:
+    """Create the partitions for ``today``'s month and the next ``months_ahead``.
+
+    Takes a transaction-scoped advisory lock first, so concurrent callers
+    wait for each other instead of failing on duplicate tables.
+
+    Returns:
+        Names of the partitions that were created
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PROVISION_LOCK})
+    return ensure_monthly_partitions(connection, today, add_months(today, months_ahead))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.models.partitions")
+    parser.add_argument("--months-ahead", type=int, default=None)
+    parser.add_argument("--database-url", default=None, help="Defaults to DATABASE_URL")
+    args = parser.parse_args(argv)
+    settings = get_settings()
+    months_ahead = args.months_ahead
+    if months_ahead is None:
+        months_ahead = settings.partition_months_ahead
+    engine = create_engine(args.database_url or settings.database_url)
+    try:
+        with engine.begin() as connection:
+            created = provision_ahead(connection, date.today(), months_ahead)
+    finally:
+        engine.dispose()
+    for name in created:
+        print(f"Created {name}")
+    print(f"Partitions provisioned {months_ahead} months ahead ({len(created)} new)")
+
+
+if __name__ == "__main__":
+    main()
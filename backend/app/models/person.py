@@ -0,0 +1,56 @@
+"""Known people and their face embeddings (TODO 3.3)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    LargeBinary,
+    SmallInteger,
+    String,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+
+
+class Person(CreatedAtMixin, Base):
+    """Someone the user knows, shown by name when their face is recognised."""
+
+    __tablename__ = "people"
+    __table_args__ = (Index("ix_people_user_id", "user_id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(100))
+    relationship: Mapped[str | None] = mapped_column(String(50))
+    # When the person (or their guardian) consented to face matching
+    consent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class FaceEmbedding(CreatedAtMixin, Base):
+    """One enrolled face as an L2-normalised float32 vector.
+
+    Only the embedding is kept; the photo it came from is not stored.
+    ``model`` names the embedding model, because vectors from different
+    models are not comparable.
+    """
+
+    __tablename__ = "face_embeddings"
+    __table_args__ = (
+        Index("ix_face_embeddings_user_id", "user_id"),
+        Index("ix_face_embeddings_person_id", "person_id"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    person_id: Mapped[int] = mapped_column(ForeignKey("people.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    model: Mapped[str] = mapped_column(String(64))
+    dim: Mapped[int] = mapped_column(SmallInteger)
+    # float32, little-endian, ``dim`` values
+    vector: Mapped[bytes] = mapped_column(LargeBinary)
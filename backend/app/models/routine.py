@@ -0,0 +1,47 @@
+"""Daily routines that drive schedule-based suggestions (TODO 5.3)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    String,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+
+
+class Routine(CreatedAtMixin, Base):
+    """A recurring window ("breakfast, daily at 07:30 for 45 minutes") and
+    the object categories the user tends to talk about in it.
+
+    ``rrule`` is an RFC 5545 recurrence rule expanded in ``timezone`` from
+    ``starts_at``, which also supplies any time of day the rule leaves out.
+    """
+
+    __tablename__ = "routines"
+    __table_args__ = (
+        CheckConstraint("duration_minutes BETWEEN 1 AND 1440", name="duration"),
+        Index("ix_routines_user_id", "user_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    name: Mapped[str] = mapped_column(String(100))
+    rrule: Mapped[str] = mapped_column(String(500))
+    starts_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    timezone: Mapped[str] = mapped_column(String(64), server_default=text("'UTC'"))
+    duration_minutes: Mapped[int] = mapped_column(SmallInteger)
+    categories: Mapped[list[str]] = mapped_column(
+        ARRAY(String(20)), server_default=text("'{}'::varchar[]")
+    )
+    enabled: Mapped[bool] = mapped_column(Boolean, server_default=text("true"))
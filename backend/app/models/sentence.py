@@ -0,0 +1,127 @@
+"""Sentence templates, constructed sentences and feedback.
+
+``constructed_sentences`` and ``feedback_records`` grow with every tap and are
+range-partitioned by month on ``created_at`` (see :mod:`app.models.partitions`).
+Partitioned tables need the partition key in their primary key, so both use
+``(id, created_at)``; for the same reason ``feedback_records.sentence_id`` is a
+plain column rather than a foreign key.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    DateTime,
+    Float,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+from app.services.learning_service import FeedbackType
+
+FEEDBACK_TYPES: tuple[str, ...] = tuple(f.name.lower() for f in FeedbackType)
+EXPLICIT_FEEDBACK = "feedback_type IN ('thumbs_up', 'thumbs_down')"
+
+
+class SentenceTemplate(CreatedAtMixin, Base):
+    __tablename__ = "sentence_templates"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # e.g. "I [verb] [object]", "[object] [modifier]"
+    structure: Mapped[str] = mapped_column(String(100), unique=True)
+    usage_count: Mapped[int] = mapped_column(Integer, server_default=text("0"))
+    success_rate: Mapped[float] = mapped_column(Float, server_default=text("0"))
+
+
+class ConstructedSentence(Base):
+    __tablename__ = "constructed_sentences"
+    __table_args__ = (
+        # History by user and time: index-only scan per pruned partition
+        Index(
+            "ix_constructed_sentences_user_created",
+            "user_id",
+            text("created_at DESC"),
+            postgresql_include=[
+                "id",
+                "sentence_text",
+                "object_id",
+                "verb_id",
+                "modifier_id",
+                "spoken",
+            ],
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    sentence_text: Mapped[str] = mapped_column(String(500))
+    object_id: Mapped[int | None] = mapped_column(
+        ForeignKey("object_library.id", ondelete="SET NULL")
+    )
+    verb_id: Mapped[int | None] = mapped_column(ForeignKey("verb_library.id"))
+    modifier_id: Mapped[int | None] = mapped_column(ForeignKey("modifier_library.id"))
+    template_id: Mapped[int | None] = mapped_column(ForeignKey("sentence_templates.id"))
+    spoken: Mapped[bool] = mapped_column(Boolean, server_default=text("false"))
+
+
+class FeedbackRecord(Base):
+    __tablename__ = "feedback_records"
+    __table_args__ = (
+        CheckConstraint(
+            "feedback_type IN ({})".format(", ".join(f"'{t}'" for t in FEEDBACK_TYPES)),
+            name="feedback_type",
+        ),
+        # Success rate per (object, verb, modifier), time-weighted (TODO 2.3)
+        Index(
+            "ix_feedback_records_combination",
+            "object_id",
+            "verb_id",
+            "modifier_id",
+            postgresql_include=["feedback_type", "created_at"],
+        ),
+        # Recent explicit ratings for a user; implicit events are most rows
+        Index(
+            "ix_feedback_records_explicit",
+            "user_id",
+            text("created_at DESC"),
+            postgresql_include=["object_id", "verb_id", "modifier_id", "feedback_type"],
+            postgresql_where=text(EXPLICIT_FEEDBACK),
+        ),
+        # Supports ON DELETE CASCADE from users (data deletion, NFR-5)
+        Index("ix_feedback_records_user_id", "user_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    session_id: Mapped[str | None] = mapped_column(String(64))
+    sentence_id: Mapped[int | None] = mapped_column(BigInteger)
+    constructed_sentence: Mapped[str] = mapped_column(String(500))
+    object_id: Mapped[int | None] = mapped_column(
+        ForeignKey("object_library.id", ondelete="SET NULL")
+    )
+    verb_id: Mapped[int | None] = mapped_column(ForeignKey("verb_library.id"))
+    modifier_id: Mapped[int | None] = mapped_column(ForeignKey("modifier_library.id"))
+    # time_of_day, previous_sentences
+    context: Mapped[dict[str, Any]] = mapped_column(JSONB, server_default=text("'{}'::jsonb"))
+    feedback_type: Mapped[str] = mapped_column(String(16))
@@ -0,0 +1,47 @@
+"""Offline-sync state per user (TODO 4.2 / 4.5)."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import BigInteger, Boolean, CheckConstraint, ForeignKey, Index, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+SYNC_COLLECTIONS: tuple[str, ...] = ("settings", "favorites", "recents", "usage", "custom_objects")
+
+
+class SyncItem(Base):
+    """The merged state of one synced entry, and when it last changed.
+
+    ``seq`` is the user's change sequence number (``users.sync_seq``) at the
+    last change, so a client's cursor selects everything it has not seen.
+    Register collections resolve conflicts by (``stamp``, ``node``), last
+    writer wins, and keep deletions as tombstones so they sync too.
+    ``usage`` entries are grow-only counters with one count per node in
+    ``counts``.
+    """
+
+    __tablename__ = "sync_items"
+    __table_args__ = (
+        CheckConstraint(
+            "collection IN ('settings', 'favorites', 'recents', 'usage', 'custom_objects')",
+            name="collection",
+        ),
+        Index("ix_sync_items_user_id_seq", "user_id", "seq"),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    collection: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    seq: Mapped[int] = mapped_column(BigInteger)
+    value: Mapped[Any] = mapped_column(JSONB, nullable=True)
+    deleted: Mapped[bool] = mapped_column(Boolean, server_default=text("false"))
+    # Writer's clock (Unix milliseconds) and replica id; the larger pair wins
+    stamp: Mapped[int] = mapped_column(BigInteger, server_default=text("0"))
+    node: Mapped[str] = mapped_column(String(36), server_default=text("''"))
+    counts: Mapped[dict[str, int]] = mapped_column(JSONB, server_default=text("'{}'::jsonb"))
@@ -0,0 +1,48 @@
+"""Verb and modifier libraries."""
+
+from __future__ import annotations
+
+from sqlalchemy import Float, Index, String, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, CreatedAtMixin
+
+
+class VerbLibrary(CreatedAtMixin, Base):
+    __tablename__ = "verb_library"
+    __table_args__ = (
+        # Suggestions by category: compatible_object_categories @> ARRAY[:category]
+        Index(
+            "ix_verb_library_categories",
+            "compatible_object_categories",
+            postgresql_using="gin",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    verb_text: Mapped[str] = mapped_column(String(50), unique=True)
+    emoji: Mapped[str | None] = mapped_column(String(16))
+    compatible_object_categories: Mapped[list[str]] = mapped_column(
+        ARRAY(String(20)), server_default=text("'{}'::varchar[]")
+    )
+    base_score: Mapped[float] = mapped_column(Float, server_default=text("0"))
+
+
+class ModifierLibrary(CreatedAtMixin, Base):
+    __tablename__ = "modifier_library"
+    __table_args__ = (
+        Index(
+            "ix_modifier_library_type_score",
+            "modifier_type",
+            text("base_score DESC"),
+            postgresql_include=["modifier_text", "emoji"],
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    modifier_text: Mapped[str] = mapped_column(String(50), unique=True)
+    # intensity, quantity, location, assistance, negation
+    modifier_type: Mapped[str] = mapped_column(String(20))
+    emoji: Mapped[str | None] = mapped_column(String(16))
+    base_score: Mapped[float] = mapped_column(Float, server_default=text("0"))
@@ -0,0 +1,126 @@
+"""Caregiver dashboard endpoints (TODO 2.4).
+
+Reads come from the usage rollups (see :mod:`app.services.analytics_service`)
+through replica-eligible sessions. Until caregiver accounts exist (TODO 2.4,
+``caregiver_users``), a caregiver sees the account they are signed in as.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session
+from app.routers.export import job_out
+from app.schemas.analytics import (
+    AnalyticsOut,
+    DailyUsage,
+    PhraseOut,
+    TimelineEntry,
+    TimelinePage,
+    TopItem,
+    UsageCounts,
+)
+from app.schemas.export import ExportJobOut, ReportRequest
+from app.services.analytics_service import (
+    MAX_WINDOW_DAYS,
+    Window,
+    timeline,
+    top_phrases,
+    usage_report,
+)
+from app.services.export_service import ExportJobs, get_export_jobs
+from app.utils.auth import require_user_id
+
+router = APIRouter(prefix="/api/caregiver", tags=["caregiver"])
+
+
+def _zone(tz: str = Query(default="UTC", max_length=64)) -> ZoneInfo:
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY, f"Unknown time zone {tz}"
+        ) from exc
+
+
+def _window(
+    days: int = Query(default=30, ge=1, le=MAX_WINDOW_DAYS), zone: ZoneInfo = Depends(_zone)
+) -> Window:
+    return Window.last_days(days, zone, datetime.now(timezone.utc))
+
+
+@router.get("/analytics", response_model=AnalyticsOut)
+async def get_analytics(
+    top: int = Query(default=10, ge=1, le=50),
+    zone: ZoneInfo = Depends(_zone),
+    window: Window = Depends(_window),
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> AnalyticsOut:
+    """Usage totals, daily series, time-of-day pattern and most used words."""
+    report = await usage_report(session, user_id, window, zone, top)
+    daily = [DailyUsage.model_validate(row) for row in report.daily]
+    totals = UsageCounts(
+        constructed=sum(d.constructed for d in daily),
+        spoken=sum(d.spoken for d in daily),
+        thumbs_up=sum(d.thumbs_up for d in daily),
+        thumbs_down=sum(d.thumbs_down for d in daily),
+    )
+    return AnalyticsOut(
+        start=window.first_day,
+        end=window.last_day,
+        timezone=zone.key,
+        totals=totals,
+        daily=daily,
+        hourly=report.hourly,
+        top_objects=[TopItem.model_validate(r) for r in report.top_items["object"]],
+        top_verbs=[TopItem.model_validate(r) for r in report.top_items["verb"]],
+        top_modifiers=[TopItem.model_validate(r) for r in report.top_items["modifier"]],
+    )
+
+
+@router.get("/phrases", response_model=list[PhraseOut])
+async def get_phrases(
+    top: int = Query(default=20, ge=1, le=100),
+    window: Window = Depends(_window),
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> list[PhraseOut]:
+    """The user's most common sentences."""
+    rows = await top_phrases(session, user_id, window, top)
+    return [PhraseOut.model_validate(row) for row in rows]
+
+
+@router.get("/timeline", response_model=TimelinePage)
+async def get_timeline(
+    before: datetime | None = None,
+    before_id: int | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> TimelinePage:
+    """Communication history, newest first, paged by ``before`` and ``before_id``."""
+    rows = await timeline(session, user_id, before, limit, before_id)
+    entries = [TimelineEntry.model_validate(row) for row in rows]
+    if len(entries) < limit:
+        return TimelinePage(entries=entries)
+    return TimelinePage(
+        entries=entries, next_before=entries[-1].created_at, next_before_id=entries[-1].id
+    )
+
+
+@router.post("/export", response_model=ExportJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def export_report(
+    payload: ReportRequest,
+    response: Response,
+    user_id: int = Depends(require_user_id),
+    jobs: ExportJobs = Depends(get_export_jobs),
+) -> ExportJobOut:
+    """Start a PDF report of the history; poll it under ``/api/export/jobs``."""
+    job = await jobs.submit_report(user_id, payload.since)
+    response.headers["Location"] = f"/api/export/jobs/{job.id}"
+    return job_out(job)
@@ -0,0 +1,134 @@
+"""Family Communication Bridge endpoints (create_future_md, "Multi-User Conversations").
+
+The room of user ``owner_id`` is streamed at ``GET /{owner_id}/stream`` as
+server-sent events: recent messages first, then live batches. Owners manage
+who may join under ``/members``.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session, get_session
+from app.models import User
+from app.routers.events import SSE_HEADERS, last_event_id
+from app.schemas.conversation import MemberIn, MemberOut, MessageIn, MessageOut, RoomOut
+from app.services.conversations import (
+    BATCH_LINGER,
+    add_member,
+    list_members,
+    member_role,
+    member_tag,
+    post_message,
+    remove_member,
+    room_channel,
+    rooms_for,
+)
+from app.services.events import EventHub, get_event_hub
+from app.utils.auth import require_user_id
+
+router = APIRouter(prefix="/api/conversations", tags=["conversations"])
+
+
+async def _role(session: AsyncSession, owner_id: int, user_id: int) -> str:
+    role = await member_role(session, owner_id, user_id)
+    if role is None:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Not a member of this conversation")
+    return role
+
+
+@router.get("", response_model=list[RoomOut])
+async def get_rooms(
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> list[RoomOut]:
+    """Rooms the caller can join, their own first."""
+    return [RoomOut(owner_id=owner, role=role) for owner, role in await rooms_for(session, user_id)]
+
+
+@router.get("/members", response_model=list[MemberOut])
+async def get_members(
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> list[MemberOut]:
+    """Members of the caller's room."""
+    return [MemberOut.model_validate(m) for m in await list_members(session, user_id)]
+
+
+@router.put("/members/{member_id}", response_model=MemberOut)
+async def put_member(
+    member_id: int,
+    payload: MemberIn,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+) -> MemberOut:
+    """Let ``member_id`` join the caller's room, or change their role."""
+    if member_id == user_id:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Owners are always members")
+    if await session.get(User, member_id) is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+    member = await add_member(session, user_id, member_id, payload.role)
+    await session.commit()
+    return MemberOut.model_validate(member)
+
+
+@router.delete("/members/{member_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_member(
+    member_id: int,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    hub: EventHub = Depends(get_event_hub),
+) -> Response:
+    """Remove a member; their open streams on the room end."""
+    if not await remove_member(session, user_id, member_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Not a member")
+    await session.commit()
+    await hub.disconnect(room_channel(user_id), member_tag(member_id))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/{owner_id}/stream")
+async def stream_room(
+    owner_id: int,
+    after: int = Depends(last_event_id),
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+    hub: EventHub = Depends(get_event_hub),
+) -> StreamingResponse:
+    """Recent messages, then live ones, as ``text/event-stream``."""
+    await _role(session, owner_id, user_id)
+    # Return the connection now; the stream may stay open for hours
+    await session.commit()
+    return StreamingResponse(
+        hub.sse(
+            room_channel(owner_id),
+            after,
+            history=True,
+            linger=BATCH_LINGER,
+            tag=member_tag(user_id),
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post(
+    "/{owner_id}/messages", response_model=MessageOut, status_code=status.HTTP_202_ACCEPTED
+)
+async def send_message(
+    owner_id: int,
+    payload: MessageIn,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+    hub: EventHub = Depends(get_event_hub),
+) -> MessageOut:
+    """Send a message (or typing indicator) to everyone in the room."""
+    role = await _role(session, owner_id, user_id)
+    if payload.kind == "sentence" and role != "owner":
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Only the owner shares sentences")
+    if payload.kind != "typing" and not payload.text.strip():
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Message text is empty")
+    event = await post_message(hub, owner_id, user_id, role, payload.kind, payload.text)
+    return MessageOut(id=event.id)
@@ -0,0 +1,38 @@
+"""Server-sent events stream (FR-2, NFR-1).
+
+``GET /api/events`` stays open and pushes the caller's events (export
+progress) as they happen. Browsers reconnect on their own
+after a drop and send ``Last-Event-ID``, and missed events still in the
+replay buffer are sent first. Idle streams get a keepalive comment so that
+proxies do not close them.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+
+from app.services.events import EventHub, get_event_hub, user_channel
+from app.utils.auth import require_user_id
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def last_event_id(last_event_id: str | None = Header(default=None)) -> int:
+    return int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+
+@router.get("")
+async def stream_events(
+    after: int = Depends(last_event_id),
+    user_id: int = Depends(require_user_id),
+    hub: EventHub = Depends(get_event_hub),
+) -> StreamingResponse:
+    """Stream the caller's events as ``text/event-stream``."""
+    return StreamingResponse(
+        hub.sse(user_channel(user_id), after),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,156 @@
+"""Export endpoints (TODO 5.5).
+
+CSV and JSON exports stream from a server-side cursor, so they start at
+once and use constant memory. PDF reports are background jobs: ``POST``
+returns ``202`` with a job to poll, and the file is downloaded once it is
+done. The report uses ``POST`` rather than the ``GET`` listed in TODO 5.5
+because it creates a job.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.database import get_database
+from app.schemas.export import ExportJobOut, ReportRequest
+from app.services.export_service import (
+    STREAMS,
+    Dataset,
+    ExportBusyError,
+    ExportJob,
+    ExportJobs,
+    csv_chunks,
+    dataset_columns,
+    dataset_query,
+    get_export_jobs,
+    json_chunks,
+    stream_rows,
+)
+from app.utils.auth import require_user_id
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+
+class _ExportResponse(StreamingResponse):
+    """Streams an export and releases its slot when the response ends.
+
+    Released here rather than in the body generator, which never runs (and
+    so never cleans up) if the client goes away before the first chunk.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            STREAMS.release()
+
+
+def _stream(chunks: AsyncIterator[bytes], media_type: str, filename: str) -> StreamingResponse:
+    try:
+        STREAMS.reserve()
+    except ExportBusyError as exc:
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE, str(exc), headers={"Retry-After": "5"}
+        ) from exc
+    return _ExportResponse(
+        chunks,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@router.get("/csv")
+async def export_csv(
+    dataset: Dataset = "sentences",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    user_id: int = Depends(require_user_id),
+) -> StreamingResponse:
+    """Stream the caller's history as CSV."""
+    rows = stream_rows(get_database(), dataset_query(dataset, user_id, since, until))
+    chunks = csv_chunks(rows, dataset_columns(dataset))
+    return _stream(chunks, "text/csv; charset=utf-8", f"speakout-{dataset}.csv")
+
+
+@router.get("/json")
+async def export_json(
+    dataset: Dataset = "sentences",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    lines: bool = False,
+    user_id: int = Depends(require_user_id),
+) -> StreamingResponse:
+    """Stream the caller's history as a JSON array, or NDJSON with ``lines=true``."""
+    rows = stream_rows(get_database(), dataset_query(dataset, user_id, since, until))
+    chunks = json_chunks(rows, dataset_columns(dataset), lines=lines)
+    if lines:
+        return _stream(chunks, "application/x-ndjson", f"speakout-{dataset}.ndjson")
+    return _stream(chunks, "application/json", f"speakout-{dataset}.json")
+
+
+def job_out(job: ExportJob) -> ExportJobOut:
+    return ExportJobOut(
+        id=job.id,
+        format=job.format,
+        status=job.status,
+        progress=round(job.progress, 3),
+        rows=job.rows,
+        error=job.error,
+        download_url=f"{router.prefix}/jobs/{job.id}/file" if job.status == "done" else None,
+    )
+
+
+@router.post("/pdf", response_model=ExportJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def export_pdf(
+    payload: ReportRequest,
+    response: Response,
+    user_id: int = Depends(require_user_id),
+    jobs: ExportJobs = Depends(get_export_jobs),
+) -> ExportJobOut:
+    """Start a PDF report; poll the ``Location`` until it is done."""
+    job = await jobs.submit_report(user_id, payload.since)
+    response.headers["Location"] = f"{router.prefix}/jobs/{job.id}"
+    return job_out(job)
+
+
+def _own_job(job_id: str, user_id: int, jobs: ExportJobs) -> ExportJob:
+    job = jobs.get(job_id) if job_id.isalnum() else None
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Export job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobOut)
+async def get_export_job(
+    job_id: str,
+    user_id: int = Depends(require_user_id),
+    jobs: ExportJobs = Depends(get_export_jobs),
+) -> ExportJobOut:
+    """Job status and progress (0-1)."""
+    return job_out(_own_job(job_id, user_id, jobs))
+
+
+@router.get("/jobs/{job_id}/file")
+async def download_export(
+    job_id: str,
+    user_id: int = Depends(require_user_id),
+    jobs: ExportJobs = Depends(get_export_jobs),
+) -> FileResponse:
+    """Download a finished job's output."""
+    job = _own_job(job_id, user_id, jobs)
+    if job.status != "done":
+        raise HTTPException(status.HTTP_409_CONFLICT, f"Export job is {job.status}")
+    return FileResponse(
+        jobs.output_path(job),
+        media_type="application/pdf",
+        filename=job.filename,
+        headers={"Cache-Control": "no-store"},
+    )
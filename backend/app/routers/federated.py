@@ -0,0 +1,141 @@
+"""Federated learning endpoints (create_future_md, "Federated Learning").
+
+Devices pull the global ranker model with ``GET /api/federated/{ranker}/model``
+(the whole model, or the diff since the version they hold), train it on their
+own feedback and send back only the change with
+``POST /api/federated/{ranker}/updates``. Updates may be sent gzipped with
+``Content-Encoding: gzip``. Diffs are binary; see
+:func:`app.services.federated_service.encode_diff` for the layout.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+from app.schemas.federated import (
+    FederatedStatusOut,
+    ModelUpdateIn,
+    ModelUpdateOut,
+    RankerName,
+)
+from app.services.federated_service import (
+    DIFF_HEADER,
+    RANKERS,
+    FederatedAggregator,
+    UpdateConflictError,
+    get_federated,
+)
+from app.utils.auth import require_user_id
+from app.utils.body import read_body
+from app.utils.cache import TieredCache, get_cache
+
+router = APIRouter(prefix="/api/federated", tags=["federated"])
+
+# Decompressed size limit of an update; 20k bandit rows are about 1.5 MiB
+MAX_UPDATE_BYTES = 2 * 1024 * 1024
+# Published versions never change, so neither does a diff between two
+DIFF_TTL = 3600.0
+
+
+async def _read_update(request: Request) -> ModelUpdateIn:
+    body = await read_body(request, MAX_UPDATE_BYTES, "Update too large")
+    try:
+        return ModelUpdateIn.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors()) from exc
+
+
+@router.get("/{ranker}", response_model=FederatedStatusOut)
+async def federated_status(
+    ranker: RankerName, aggregator: FederatedAggregator = Depends(get_federated)
+) -> FederatedStatusOut:
+    """The latest version and how far the open round has got."""
+    model = await aggregator.model(ranker)
+    pending = await aggregator.pending(ranker)
+    spec = RANKERS[ranker]
+    return FederatedStatusOut(
+        ranker=ranker,
+        version=model.version,
+        channels=spec.channels,
+        clip_norm=spec.clip_norm,
+        max_staleness=aggregator.max_staleness,
+        round_updates=pending.updates,
+        round_size=aggregator.round_updates,
+        min_updates=aggregator.min_updates,
+        round_opened_at=pending.opened_at,
+    )
+
+
+@router.get(
+    "/{ranker}/model",
+    responses={
+        200: {"content": {"application/octet-stream": {}}, "description": "Model diff"},
+        204: {"description": "Already at the latest version"},
+    },
+)
+async def model_diff(
+    ranker: RankerName,
+    since: int = Query(default=0, ge=0),
+    if_none_match: str | None = Header(default=None),
+    aggregator: FederatedAggregator = Depends(get_federated),
+    cache: TieredCache = Depends(get_cache),
+) -> Response:
+    """The diff from version ``since`` to the latest; ``since=0`` is the whole model."""
+    model = await aggregator.model(ranker)
+    headers = {"X-Model-Version": str(model.version), "Cache-Control": "no-cache"}
+    if since == model.version:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    if since > model.version:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Version {since} is not published yet")
+    etag = f'"{ranker}-{since}-{model.version}"'
+    headers["ETag"] = etag
+    if if_none_match is not None and etag in (t.strip() for t in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    async def load() -> bytes:
+        body = await aggregator.diff(ranker, since)
+        return body or b""
+
+    key = f"federated.model:{ranker}:{since}:{model.version}"
+    body = await cache.get_or_load("federated.model", key, load, ttl=DIFF_TTL, stale_ttl=0.0)
+    # A version published meanwhile is fine: the diff names its own version
+    headers["X-Model-Version"] = str(DIFF_HEADER.unpack_from(body)[3])
+    return Response(body, media_type="application/octet-stream", headers=headers)
+
+
+@router.post(
+    "/{ranker}/updates",
+    response_model=ModelUpdateOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": ModelUpdateIn.model_json_schema()}},
+        }
+    },
+)
+async def submit_update(
+    ranker: RankerName,
+    request: Request,
+    user_id: int = Depends(require_user_id),
+    aggregator: FederatedAggregator = Depends(get_federated),
+) -> ModelUpdateOut:
+    """Add a device's model change to the open round.
+
+    409 means the update cannot count: its base is too many versions behind
+    (pull the latest, retrain and send again) or the user already
+    contributed to this round from some device (send it after the next
+    version).
+    """
+    update = await _read_update(request)
+    try:
+        version, updates = await aggregator.submit(
+            ranker, user_id, update.base_version, update.samples, update.entries
+        )
+    except UpdateConflictError as exc:
+        raise HTTPException(status.HTTP_409_CONFLICT, str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    return ModelUpdateOut(version=version, round_updates=updates)
@@ -0,0 +1,288 @@
+"""Object library endpoints (FR-8, TODO 1.7 / 3.4).
+
+Library reads are served from the in-memory index, with rendered responses
+in the tiered cache keyed by the index version, and revalidate with
+``ETag``/``If-None-Match``. Only custom-object writes reach the database; they
+invalidate the caller's cache tag so every worker refreshes that user.
+
+Custom objects can carry reference photos, sent as raw image bytes. They
+let ``POST /api/objects/recognize`` tell the user's own things apart from
+generic detections when ``OBJECT_MODEL_PATH`` is configured. Without a model,
+recognition only maps detector labels onto the library.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session, get_session
+from app.models import ObjectEmbedding, ObjectLibrary
+from app.schemas.object import (
+    Category,
+    CustomObjectCreate,
+    ObjectLibraryResponse,
+    ObjectOut,
+    ObjectPhotoOut,
+    RecognizedObject,
+    RecognizeOut,
+    RecognizeRequest,
+)
+from app.services.embeddings import vector_bytes
+from app.services.object_service import (
+    ObjectEntry,
+    ObjectLibraryIndex,
+    custom_objects_tag,
+    get_object_index,
+)
+from app.services.recognition_service import Box, ObjectRecognizer, get_recognizer
+from app.services.sync_service import record_server_change
+from app.utils.auth import get_current_user_id, require_user_id
+from app.utils.body import read_body
+from app.utils.cache import TieredCache, get_cache
+
+router = APIRouter(prefix="/api/objects", tags=["objects"])
+
+MAX_PHOTO_BYTES = 4 * 1024 * 1024
+_IMAGE_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            media_type: {"schema": {"type": "string", "format": "binary"}}
+            for media_type in ("image/jpeg", "image/png")
+        },
+    }
+}
+
+
+def _out(entry: ObjectEntry) -> ObjectOut:
+    return ObjectOut(
+        id=entry.id,
+        name=entry.name,
+        category=entry.category,
+        icon_url=entry.icon_url,
+        usage_count=entry.usage_count,
+        is_custom=entry.is_custom,
+    )
+
+
+def require_recognizer() -> ObjectRecognizer:
+    recognizer = get_recognizer()
+    if recognizer is None:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Object recognition is disabled")
+    return recognizer
+
+
+def _custom_entry(index: ObjectLibraryIndex, user_id: int, object_id: int) -> ObjectEntry:
+    entry = index.get(object_id)
+    if entry is None or entry.user_id != user_id:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Custom object not found")
+    return entry
+
+
+@router.get("/library", response_model=ObjectLibraryResponse)
+async def get_library(
+    category: Category | None = None,
+    prefix: str | None = Query(default=None, max_length=100),
+    limit: int = Query(default=20, ge=1, le=200),
+    if_none_match: str | None = Header(default=None),
+    user_id: int | None = Depends(get_current_user_id),
+    index: ObjectLibraryIndex = Depends(get_object_index),
+    cache: TieredCache = Depends(get_cache),
+) -> Response:
+    """Browse (by category) or search (by label prefix) the object library."""
+    version = index.version(user_id)
+    etag = f'"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match is not None and etag in (t.strip() for t in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    async def render() -> bytes:
+        if prefix:
+            entries = index.search(prefix, user_id, category, limit)
+        else:
+            entries = index.objects(user_id, category)
+        body = ObjectLibraryResponse(version=version, objects=[_out(e) for e in entries])
+        return body.model_dump_json().encode()
+
+    # The version is a content digest, so users seeing the same library share entries
+    tags = ["objects"]
+    if user_id is not None and index.has_custom(user_id):
+        tags.append(custom_objects_tag(user_id))
+    body = await cache.get_or_load(
+        "objects.library",
+        f"objects.library:{version}:{category}:{prefix}:{limit}",
+        render,
+        ttl=300,
+        tags=tags,
+    )
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.post("/custom", response_model=ObjectOut, status_code=status.HTTP_201_CREATED)
+async def create_custom_object(
+    payload: CustomObjectCreate,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    index: ObjectLibraryIndex = Depends(get_object_index),
+    cache: TieredCache = Depends(get_cache),
+) -> ObjectOut:
+    """Add a caregiver-defined object to the user's library."""
+    row = ObjectLibrary(
+        name=payload.name,
+        category=payload.category,
+        icon_url=payload.icon_url,
+        user_id=user_id,
+        usage_count=0,
+    )
+    session.add(row)
+    await session.flush()
+    await record_server_change(
+        session,
+        user_id,
+        "custom_objects",
+        str(row.id),
+        {"name": row.name, "category": row.category, "icon_url": row.icon_url},
+    )
+    await session.commit()
+    entry = ObjectEntry(row.id, row.name, row.category, row.icon_url, 0, user_id)
+    index.add_custom(entry)
+    await cache.invalidate(custom_objects_tag(user_id))
+    return _out(entry)
+
+
+@router.delete("/custom/{object_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_custom_object(
+    object_id: int,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    index: ObjectLibraryIndex = Depends(get_object_index),
+    cache: TieredCache = Depends(get_cache),
+) -> Response:
+    _custom_entry(index, user_id, object_id)
+    await session.execute(
+        delete(ObjectLibrary).where(ObjectLibrary.id == object_id, ObjectLibrary.user_id == user_id)
+    )
+    await record_server_change(session, user_id, "custom_objects", str(object_id), deleted=True)
+    await session.commit()
+    index.remove_custom(object_id)
+    await cache.invalidate(custom_objects_tag(user_id))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/custom/{object_id}/photos",
+    response_model=ObjectPhotoOut,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_IMAGE_BODY,
+)
+async def add_custom_object_photo(
+    object_id: int,
+    request: Request,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    index: ObjectLibraryIndex = Depends(get_object_index),
+    recognizer: ObjectRecognizer = Depends(require_recognizer),
+    cache: TieredCache = Depends(get_cache),
+) -> ObjectPhotoOut:
+    """Add a reference photo of a custom object; only its embedding is stored."""
+    _custom_entry(index, user_id, object_id)
+    if not request.headers.get("content-type", "").startswith("image/"):
+        raise HTTPException(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, "Send one photo")
+    image = await read_body(request, MAX_PHOTO_BYTES, "Photo too large")
+    if not image:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Empty image")
+    try:
+        (vector,) = await recognizer.embed([image])
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    photo = ObjectEmbedding(
+        object_id=object_id,
+        user_id=user_id,
+        model=recognizer.embedder.name,
+        dim=recognizer.embedder.dim,
+        vector=vector_bytes(vector),
+    )
+    session.add(photo)
+    await session.commit()
+    # Every worker reloads the user's gallery, new photo included
+    await cache.invalidate(custom_objects_tag(user_id))
+    return ObjectPhotoOut(id=photo.id, object_id=object_id)
+
+
+@router.delete("/custom/{object_id}/photos", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_custom_object_photos(
+    object_id: int,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    index: ObjectLibraryIndex = Depends(get_object_index),
+    cache: TieredCache = Depends(get_cache),
+) -> Response:
+    """Delete a custom object's reference photos, keeping the object."""
+    _custom_entry(index, user_id, object_id)
+    await session.execute(delete(ObjectEmbedding).where(ObjectEmbedding.object_id == object_id))
+    await session.commit()
+    if (recognizer := get_recognizer()) is not None:
+        recognizer.forget(user_id, [object_id])
+    await cache.invalidate(custom_objects_tag(user_id))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/recognize", response_model=RecognizeOut)
+async def recognize_objects(
+    payload: RecognizeRequest,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+    index: ObjectLibraryIndex = Depends(get_object_index),
+) -> RecognizeOut:
+    """Name what the detector found, preferring the user's own custom objects.
+
+    Each detection's crop is compared with the user's reference photos, all
+    crops of the image in one model call. Detections that match nothing keep
+    their generic label, mapped onto the library where it has the object.
+    """
+    if len(payload.image) > MAX_PHOTO_BYTES:
+        raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "Image too large")
+    detections = payload.detections
+    boxes = [Box(d.bbox.x, d.bbox.y, d.bbox.width, d.bbox.height) for d in detections]
+    recognizer = get_recognizer()
+    matches: list[tuple[int, float] | None] = [None] * (len(boxes) or 1)
+    if recognizer is not None:
+        try:
+            matches = await recognizer.recognize(session, user_id, payload.image, boxes)
+        except ValueError as exc:
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+
+    objects = []
+    for i, match in enumerate(matches):
+        detection = detections[i] if detections else None
+        if (
+            match is not None
+            and (own := index.get(match[0])) is not None
+            and own.user_id == user_id
+        ):
+            objects.append(
+                RecognizedObject(
+                    label=detection.label if detection else own.name,
+                    confidence=detection.confidence if detection else 1.0,
+                    bbox=detection.bbox if detection else None,
+                    object_id=own.id,
+                    name=own.name,
+                    custom=True,
+                    score=round(match[1], 4),
+                )
+            )
+        elif detection is not None:
+            object_id = index.resolve_label(detection.label, user_id)
+            entry = index.get(object_id) if object_id is not None else None
+            objects.append(
+                RecognizedObject(
+                    label=detection.label,
+                    confidence=detection.confidence,
+                    bbox=detection.bbox,
+                    object_id=object_id if entry else None,
+                    name=entry.name if entry else detection.label,
+                )
+            )
+    return RecognizeOut(objects=objects)
@@ -0,0 +1,206 @@
+"""Known people and face matching endpoints (TODO 3.3).
+
+Faces are sent as the raw bytes of one face crop per request
+(``Content-Type: image/jpeg`` or ``image/png``), cropped by the detector
+that found the face. Enrolment and matching return 503 unless
+``FACE_MODEL_PATH`` is configured. Deleting a person or their face data
+always works, and removes the vectors from every worker before it returns.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session, get_session
+from app.models import FaceEmbedding, Person
+from app.schemas.person import FaceOut, MatchOut, PersonCreate, PersonMatch, PersonOut
+from app.services.embeddings import vector_bytes
+from app.services.face_service import FaceIndex, faces_tag, get_face_index
+from app.utils.auth import require_user_id
+from app.utils.body import read_body
+from app.utils.cache import TieredCache, get_cache
+
+router = APIRouter(prefix="/api/people", tags=["people"])
+
+MAX_FACE_BYTES = 2 * 1024 * 1024
+_IMAGE_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            media_type: {"schema": {"type": "string", "format": "binary"}}
+            for media_type in ("image/jpeg", "image/png")
+        },
+    }
+}
+
+
+def require_face_index() -> FaceIndex:
+    index = get_face_index()
+    if index is None:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Face matching is disabled")
+    return index
+
+
+async def _face_image(request: Request) -> bytes:
+    if not request.headers.get("content-type", "").startswith("image/"):
+        raise HTTPException(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, "Send one face crop image")
+    body = await read_body(request, MAX_FACE_BYTES, "Face image too large")
+    if not body:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Empty image")
+    return body
+
+
+async def _person(session: AsyncSession, user_id: int, person_id: int) -> Person:
+    person = await session.get(Person, person_id)
+    if person is None or person.user_id != user_id:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Person not found")
+    return person
+
+
+async def _forget_faces(cache: TieredCache, user_id: int, person_id: int) -> None:
+    # This worker drops the vectors now; the others evict the user's gallery
+    index = get_face_index()
+    if index is not None:
+        index.forget(user_id, [person_id])
+    await cache.invalidate(faces_tag(user_id))
+
+
+@router.get("", response_model=list[PersonOut])
+async def list_people(
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> list[PersonOut]:
+    faces = (
+        select(FaceEmbedding.person_id, func.count().label("faces"))
+        .where(FaceEmbedding.user_id == user_id)
+        .group_by(FaceEmbedding.person_id)
+        .subquery()
+    )
+    rows = await session.execute(
+        select(Person, func.coalesce(faces.c.faces, 0))
+        .outerjoin(faces, faces.c.person_id == Person.id)
+        .where(Person.user_id == user_id)
+        .order_by(Person.name)
+    )
+    return [
+        PersonOut.model_validate(person).model_copy(update={"faces": count})
+        for person, count in rows
+    ]
+
+
+@router.post("", response_model=PersonOut, status_code=status.HTTP_201_CREATED)
+async def create_person(
+    payload: PersonCreate,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+) -> PersonOut:
+    """Add someone the user knows, with consent to store their face data."""
+    person = Person(
+        user_id=user_id,
+        name=payload.name,
+        relationship=payload.relationship,
+        consent_at=datetime.now(timezone.utc),
+    )
+    session.add(person)
+    await session.commit()
+    return PersonOut.model_validate(person)
+
+
+@router.delete("/{person_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_person(
+    person_id: int,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    cache: TieredCache = Depends(get_cache),
+) -> Response:
+    """Remove a person and all of their face data."""
+    await session.delete(await _person(session, user_id, person_id))
+    await session.commit()
+    await _forget_faces(cache, user_id, person_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.delete("/{person_id}/faces", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_faces(
+    person_id: int,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    cache: TieredCache = Depends(get_cache),
+) -> Response:
+    """Delete a person's face data on request, keeping them in the list."""
+    await _person(session, user_id, person_id)
+    await session.execute(delete(FaceEmbedding).where(FaceEmbedding.person_id == person_id))
+    await session.commit()
+    await _forget_faces(cache, user_id, person_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/{person_id}/faces",
+    response_model=FaceOut,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_IMAGE_BODY,
+)
+async def add_face(
+    person_id: int,
+    request: Request,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    index: FaceIndex = Depends(require_face_index),
+    cache: TieredCache = Depends(get_cache),
+) -> FaceOut:
+    """Enrol one face photo of a person; only its embedding is stored."""
+    image = await _face_image(request)
+    await _person(session, user_id, person_id)
+    try:
+        (vector,) = await index.embed([image])
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    face = FaceEmbedding(
+        person_id=person_id,
+        user_id=user_id,
+        model=index.embedder.name,
+        dim=index.embedder.dim,
+        vector=vector_bytes(vector),
+    )
+    session.add(face)
+    await session.commit()
+    # Every worker reloads the gallery, new face included, on its next match
+    await cache.invalidate(faces_tag(user_id))
+    return FaceOut(id=face.id, person_id=person_id)
+
+
+@router.post("/match", response_model=MatchOut, openapi_extra=_IMAGE_BODY)
+async def match_face(
+    request: Request,
+    limit: int = Query(default=1, ge=1, le=5),
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+    index: FaceIndex = Depends(require_face_index),
+) -> MatchOut:
+    """Which of the user's known people a detected face belongs to."""
+    image = await _face_image(request)
+    try:
+        (matches,) = await index.match(session, user_id, [image], limit)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    if not matches:
+        return MatchOut(matches=[])
+    names = dict(
+        (
+            await session.execute(
+                select(Person.id, Person.name).where(Person.id.in_([m[0] for m in matches]))
+            )
+        ).all()
+    )
+    return MatchOut(
+        matches=[
+            PersonMatch(person_id=person_id, name=names[person_id], score=round(score, 4))
+            for person_id, score in matches
+            if person_id in names
+        ]
+    )
@@ -0,0 +1,120 @@
+"""Routine endpoints and schedule-based suggestions (TODO 5.3).
+
+Caregivers set up routines ("breakfast, every day at 07:30 for 45
+minutes, food"). While a routine's window is open, ``GET
+/api/routines/active`` returns the objects and sentences for it, warmed
+ahead of the window by :mod:`app.services.routine_service`.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session, get_session
+from app.models import Routine
+from app.schemas.routine import RoutineCreate, RoutineOut, RoutineSuggestionsOut
+from app.services.routine_service import (
+    RoutineScheduler,
+    Schedule,
+    get_routine_scheduler,
+    routines_tag,
+    zone_info,
+)
+from app.utils.auth import require_user_id
+from app.utils.cache import TieredCache, get_cache
+
+router = APIRouter(prefix="/api/routines", tags=["routines"])
+
+MAX_ROUTINES = 50
+
+
+def _out(row: Routine, now: datetime) -> RoutineOut:
+    upcoming = Schedule.from_row(row).next_window(now) if row.enabled else None
+    return RoutineOut.model_validate(row).model_copy(update={"next_window": upcoming})
+
+
+async def _changed(
+    session: AsyncSession, cache: TieredCache, scheduler: RoutineScheduler, user_id: int
+) -> None:
+    # This worker reschedules now; the others reload the user's routines
+    await scheduler.refresh_user(session, user_id)
+    await cache.invalidate(routines_tag(user_id))
+
+
+@router.get("", response_model=list[RoutineOut])
+async def list_routines(
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> list[RoutineOut]:
+    rows = await session.scalars(
+        select(Routine).where(Routine.user_id == user_id).order_by(Routine.name, Routine.id)
+    )
+    now = datetime.now(timezone.utc)
+    return [_out(row, now) for row in rows]
+
+
+@router.post("", response_model=RoutineOut, status_code=status.HTTP_201_CREATED)
+async def create_routine(
+    payload: RoutineCreate,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    cache: TieredCache = Depends(get_cache),
+    scheduler: RoutineScheduler = Depends(get_routine_scheduler),
+) -> RoutineOut:
+    """Add a routine; its suggestions are warmed from its next window on."""
+    now = datetime.now(timezone.utc)
+    try:
+        zone = zone_info(payload.timezone)
+        starts_at = payload.starts_at or datetime.combine(
+            now.astimezone(zone).date(), datetime.min.time(), zone
+        )
+        Schedule.parse(payload.rrule, starts_at, payload.timezone, payload.duration_minutes)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    count = await session.scalar(select(func.count()).where(Routine.user_id == user_id))
+    if count >= MAX_ROUTINES:
+        raise HTTPException(status.HTTP_409_CONFLICT, f"At most {MAX_ROUTINES} routines per user")
+    row = Routine(
+        user_id=user_id,
+        name=payload.name,
+        rrule=payload.rrule.strip().upper().removeprefix("RRULE:"),
+        starts_at=starts_at if starts_at.tzinfo else starts_at.replace(tzinfo=zone),
+        timezone=payload.timezone,
+        duration_minutes=payload.duration_minutes,
+        categories=list(dict.fromkeys(payload.categories)),
+        enabled=payload.enabled,
+    )
+    session.add(row)
+    await session.commit()
+    await _changed(session, cache, scheduler, user_id)
+    return _out(row, now)
+
+
+@router.get("/active", response_model=RoutineSuggestionsOut)
+async def active_routines(
+    user_id: int = Depends(require_user_id),
+    scheduler: RoutineScheduler = Depends(get_routine_scheduler),
+) -> Response:
+    """Suggestions for the user's routines open right now."""
+    return Response(await scheduler.suggestions(user_id), media_type="application/json")
+
+
+@router.delete("/{routine_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_routine(
+    routine_id: int,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    cache: TieredCache = Depends(get_cache),
+    scheduler: RoutineScheduler = Depends(get_routine_scheduler),
+) -> Response:
+    row = await session.get(Routine, routine_id)
+    if row is None or row.user_id != user_id:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Routine not found")
+    await session.delete(row)
+    await session.commit()
+    await _changed(session, cache, scheduler, user_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,120 @@
+"""Switch-scanning and gaze layout endpoint (create_future_md, "Switch Access").
+
+``GET /api/scanning/layout`` returns a screen's scan tree ordered by the
+user's predicted next selection, with the layouts of the screens its
+likeliest items open, so the client can keep scanning without a round trip.
+Layouts are cached per user until they speak their next sentence.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import astuple
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from app.database import get_database
+from app.schemas.object import Category
+from app.schemas.scanning import ScanScreenOut
+from app.services.object_service import custom_objects_tag
+from app.services.prediction_service import (
+    PredictionIndex,
+    get_prediction_index,
+    sentences_tag,
+)
+from app.services.scanning_service import Timing, screen_layouts
+from app.services.sentence_service import SentenceEngine, get_sentence_engine
+from app.utils.auth import require_user_id
+from app.utils.cache import TieredCache, get_cache
+from app.utils.telemetry import span
+
+router = APIRouter(prefix="/api/scanning", tags=["scanning"])
+
+LAYOUT_TTL = 300.0
+
+
+def _timing(
+    mode: Literal["scan", "step", "gaze"] = "scan",
+    scan_interval: float = Query(default=1.0, gt=0, le=10),
+    reaction: float = Query(default=0.4, gt=0, le=10),
+    press_interval: float = Query(default=0.5, gt=0, le=10),
+    dwell: float = Query(default=2.0, gt=0, le=10),
+    min_dwell: float = Query(default=0.6, gt=0, le=10),
+    miss_rate: float = Query(default=0.05, ge=0, lt=1),
+) -> Timing:
+    try:
+        return Timing(mode, scan_interval, reaction, press_interval, dwell, min_dwell, miss_rate)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+
+
+@router.get("/layout", response_model=ScanScreenOut)
+async def scan_layout(
+    screen: Literal["objects", "verbs", "modifiers"] = "objects",
+    object_id: int | None = None,
+    verb_id: int | None = None,
+    category: Category | None = None,
+    method: Literal["linear", "row-column", "huffman", "best"] = "best",
+    columns: int = Query(default=4, ge=1, le=12),
+    timing: Timing = Depends(_timing),
+    user_id: int = Depends(require_user_id),
+    engine: SentenceEngine = Depends(get_sentence_engine),
+    predictions: PredictionIndex = Depends(get_prediction_index),
+    cache: TieredCache = Depends(get_cache),
+) -> Response:
+    """Lay out a screen for scanning or gaze, likeliest selections cheapest.
+
+    ``verbs`` needs the selected ``object_id``; ``modifiers`` uses the
+    selected object and verb as context when given. Another user's custom
+    object is unknown here.
+    """
+    visible = object_id is not None and engine.objects.visible(object_id, user_id) is not None
+    if not visible and (screen == "verbs" or object_id is not None):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, f"Unknown object {object_id}")
+
+    async def load() -> bytes:
+        async with get_database().session(read_only=True) as session:
+            model = await predictions.model(session, user_id)
+        with span("suggestion"):
+            body = screen_layouts(
+                model,
+                engine,
+                engine.objects,
+                user_id,
+                timing,
+                screen,
+                object_id,
+                verb_id,
+                category,
+                method,
+                columns,
+            )
+        return json.dumps(body).encode()
+
+    key = ":".join(
+        str(part)
+        for part in (
+            "scanning.layout",
+            user_id,
+            screen,
+            object_id,
+            verb_id,
+            category,
+            method,
+            columns,
+            *astuple(timing),
+        )
+    )
+    try:
+        body = await cache.get_or_load(
+            "scanning.layout",
+            key,
+            load,
+            ttl=LAYOUT_TTL,
+            stale_ttl=0.0,
+            tags=[sentences_tag(user_id), custom_objects_tag(user_id)],
+        )
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    return Response(body, media_type="application/json")
@@ -0,0 +1,49 @@
+"""Search endpoint for the caregiver dashboard (TODO 3.4 / 5.1).
+
+Typo-tolerant, search-as-you-type lookup across the library objects,
+verbs, modifiers and the user's custom objects and phrases. See
+:mod:`app.services.search_service`.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session
+from app.schemas.search import SearchOut, SearchResult
+from app.services.search_service import KINDS, Kind, SearchIndex, get_search_index
+from app.utils.auth import get_current_user_id
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+
+@router.get("", response_model=SearchOut)
+async def search(
+    q: str = Query(min_length=1, max_length=100),
+    kinds: list[Kind] | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    user_id: int | None = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_read_session),
+    index: SearchIndex = Depends(get_search_index),
+) -> SearchOut:
+    """Find items by words or word beginnings, tolerating misspellings.
+
+    Without a user only the shared library, verbs and modifiers are searched.
+    """
+    user = await index.user_index(session, user_id) if user_id is not None else None
+    hits = index.search(user, q, kinds or KINDS, limit)
+    return SearchOut(
+        query=q,
+        results=[
+            SearchResult(
+                kind=hit.kind,
+                id=hit.ref,
+                text=hit.text,
+                category=hit.category,
+                score=round(hit.score, 4),
+                usage_count=hit.usage,
+            )
+            for hit in hits
+        ],
+    )
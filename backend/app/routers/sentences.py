@@ -0,0 +1,280 @@
+"""Sentence construction and next-selection endpoints (FR-5, TODO 1.7).
+
+``POST /api/sentences/compose`` takes word sets the templates cannot handle
+well (several objects, odd pairings, a context) to the language model when
+one is configured. See :mod:`app.services.llm_service`.
+
+``POST /api/sentences/speak`` logs a spoken sentence to the history that
+``GET /api/sentences/next`` learns from. Predictions come with the sentences
+the likeliest next selections lead to, already realized, and their audio is
+rendered in the background when server-side TTS is enabled. The next screen
+then needs no further round trip or synthesis wait.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_database, get_read_session, get_session
+from app.lexicon import available_locales
+from app.models import ConstructedSentence
+from app.schemas.sentence import (
+    NextSelectionOut,
+    Prediction,
+    SentenceBatchRequest,
+    SentenceComposeOut,
+    SentenceComposeRequest,
+    SentenceConstructRequest,
+    SentenceOut,
+    SentenceSegment,
+)
+from app.services.llm_service import SentenceComposer, get_composer
+from app.services.prediction_service import (
+    NGramModel,
+    PredictionIndex,
+    TokenKind,
+    get_prediction_index,
+    sentence_tokens,
+    sentences_tag,
+    token,
+    unpack,
+)
+from app.services.sentence_service import (
+    Realization,
+    SentenceEngine,
+    TemplateError,
+    get_sentence_engine,
+)
+from app.services.tts_service import prefetch_sentences
+from app.utils.auth import get_current_user_id, require_user_id
+from app.utils.cache import TieredCache, get_cache
+from app.utils.telemetry import span
+
+router = APIRouter(prefix="/api/sentences", tags=["sentences"])
+
+# Sentences realized ahead for the next screen, and how many get audio
+PREFETCH_SENTENCES = 5
+PREFETCH_AUDIO = 3
+
+
+def _out(realization: Realization) -> SentenceOut:
+    return SentenceOut(
+        text=realization.text,
+        template_id=realization.template_id,
+        segments=[SentenceSegment(text=t, slot=s) for t, s in realization.segments],
+    )
+
+
+def _check_objects(engine: SentenceEngine, object_ids: list[int], user_id: int | None) -> None:
+    """404 unless the caller may use every object: shared ones and their own."""
+    for object_id in object_ids:
+        if engine.objects.visible(object_id, user_id) is None:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, f"Unknown object {object_id}")
+
+
+@router.post("/construct", response_model=SentenceOut)
+async def construct_sentence(
+    payload: SentenceConstructRequest,
+    user_id: int | None = Depends(get_current_user_id),
+    engine: SentenceEngine = Depends(get_sentence_engine),
+) -> SentenceOut:
+    """Build one sentence from the selected object, verb and modifier."""
+    if payload.object_id is not None:
+        _check_objects(engine, [payload.object_id], user_id)
+    try:
+        with span("construction"):
+            realization = engine.construct(
+                payload.verb_id,
+                payload.object_id,
+                payload.modifier_id,
+                payload.template_id,
+                payload.locale,
+                user_id,
+            )
+    except TemplateError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    return _out(realization)
+
+
+@router.post("/construct/batch", response_model=list[SentenceOut])
+async def construct_sentences(
+    payload: SentenceBatchRequest,
+    user_id: int | None = Depends(get_current_user_id),
+    engine: SentenceEngine = Depends(get_sentence_engine),
+) -> list[SentenceOut]:
+    """Build the top-k candidate sentences for the suggestion screen."""
+    _check_objects(engine, [payload.object_id], user_id)
+    try:
+        with span("suggestion"):
+            realizations = engine.construct_batch(
+                payload.object_id,
+                payload.verb_ids,
+                payload.modifier_ids,
+                payload.k,
+                payload.locale,
+                user_id,
+            )
+    except TemplateError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    return [_out(r) for r in realizations]
+
+
+@router.get("/locales", response_model=list[str])
+async def list_locales() -> list[str]:
+    """Locales ``construct`` accepts: English and those with a lexicon."""
+    return ["en", *available_locales()]
+
+
+@router.post(
+    "/compose",
+    response_model=SentenceComposeOut,
+    responses={503: {"description": "The sentence model is still working; retry shortly"}},
+)
+async def compose_sentence(
+    payload: SentenceComposeRequest,
+    user_id: int | None = Depends(get_current_user_id),
+    engine: SentenceEngine = Depends(get_sentence_engine),
+    composer: SentenceComposer = Depends(get_composer),
+) -> SentenceComposeOut:
+    """Build a sentence from templates, or from the language model when they fall short."""
+    _check_objects(engine, payload.object_ids, user_id)
+    try:
+        with span("construction"):
+            composition = await composer.compose(
+                engine,
+                payload.object_ids,
+                payload.verb_id,
+                payload.modifier_ids,
+                payload.context,
+                user_id,
+            )
+    except TemplateError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    except TimeoutError as exc:
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE, str(exc), headers={"Retry-After": "1"}
+        ) from exc
+    return SentenceComposeOut(
+        text=composition.text,
+        source=composition.source,
+        confidence=composition.confidence,
+        template_id=composition.template_id,
+    )
+
+
+@router.post("/speak", response_model=SentenceOut, status_code=status.HTTP_201_CREATED)
+async def speak_sentence(
+    payload: SentenceConstructRequest,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+    engine: SentenceEngine = Depends(get_sentence_engine),
+    predictions: PredictionIndex = Depends(get_prediction_index),
+    cache: TieredCache = Depends(get_cache),
+) -> SentenceOut:
+    """Log a spoken sentence to the user's history."""
+    if payload.object_id is not None:
+        _check_objects(engine, [payload.object_id], user_id)
+    try:
+        realization = engine.construct(
+            payload.verb_id,
+            payload.object_id,
+            payload.modifier_id,
+            payload.template_id,
+            payload.locale,
+            user_id,
+        )
+    except TemplateError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    row = ConstructedSentence(
+        user_id=user_id,
+        sentence_text=realization.text,
+        object_id=payload.object_id,
+        verb_id=payload.verb_id,
+        modifier_id=payload.modifier_id,
+        template_id=realization.template_id,
+        spoken=True,
+    )
+    session.add(row)
+    await session.commit()
+    predictions.record(user_id, row.id, row.created_at, row.object_id, row.verb_id, row.modifier_id)
+    # Other workers read the new sentence before their next prediction
+    await cache.invalidate(sentences_tag(user_id))
+    return _out(realization)
+
+
+def _name(engine: SentenceEngine, kind: TokenKind, item_id: int) -> str | None:
+    if kind is TokenKind.OBJECT:
+        entry = engine.objects.get(item_id)
+        return entry.name if entry is not None else None
+    if kind is TokenKind.VERB:
+        return engine.verbs.get(item_id)
+    return engine.modifiers.get(item_id)
+
+
+def _lookahead(
+    model: NGramModel,
+    engine: SentenceEngine,
+    selected: list[int],
+    object_id: int | None,
+    predicted: list[tuple[int, float]],
+    user_id: int,
+) -> list[Realization]:
+    """Sentences the likeliest next selection leads to."""
+    if object_id is None:
+        for packed, _probability in predicted:
+            kind, item_id = unpack(packed)
+            if kind is TokenKind.OBJECT:
+                object_id = item_id
+                break
+        else:
+            return []
+        selected = [*selected, token(TokenKind.OBJECT, object_id)]
+    verbs = [
+        unpack(t)[1]
+        for t, _p in model.predict(selected, PREFETCH_SENTENCES, [TokenKind.VERB])
+        if unpack(t)[1] in engine.verbs
+    ]
+    if not verbs:
+        return []
+    return engine.construct_batch(object_id, verbs, k=PREFETCH_SENTENCES, user_id=user_id)
+
+
+@router.get("/next", response_model=NextSelectionOut)
+async def predict_next(
+    object_id: int | None = None,
+    verb_id: int | None = None,
+    modifier_id: int | None = None,
+    k: int = Query(default=5, ge=1, le=20),
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+    engine: SentenceEngine = Depends(get_sentence_engine),
+    predictions: PredictionIndex = Depends(get_prediction_index),
+) -> NextSelectionOut:
+    """Predict the user's next selection from their sentence history.
+
+    Pass the selections already made in the sentence being built; with none
+    the prediction is for the start of the next sentence.
+    """
+    model = await predictions.model(session, user_id)
+    with span("suggestion"):
+        selected = sentence_tokens(object_id, verb_id, modifier_id)
+        predicted = model.predict(selected, k)
+        out = []
+        for packed, probability in predicted:
+            kind, item_id = unpack(packed)
+            name = _name(engine, kind, item_id)
+            if name is not None:
+                out.append(
+                    Prediction(
+                        kind=kind.name.lower(),  # type: ignore[arg-type]
+                        id=item_id,
+                        name=name,
+                        probability=round(probability, 4),
+                    )
+                )
+        sentences = []
+        if verb_id is None and modifier_id is None:
+            sentences = _lookahead(model, engine, selected, object_id, predicted, user_id)
+    prefetch_sentences(get_database(), user_id, [s.text for s in sentences[:PREFETCH_AUDIO]])
+    return NextSelectionOut(predictions=out, sentences=[_out(s) for s in sentences])
@@ -0,0 +1,113 @@
+"""Offline delta sync endpoints (TODO 4.2 / 4.5).
+
+``GET /api/sync?since=<cursor>`` returns the entries changed after the
+client's cursor. ``POST /api/sync`` merges the changes a client queued
+offline and answers with the delta after its ``since``, so a reconnect
+takes one round trip. Replies over 1 KiB are gzipped when the client
+accepts it. Pushes may be sent gzipped with ``Content-Encoding: gzip``.
+"""
+
+from __future__ import annotations
+
+import gzip
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_read_session, get_session
+from app.models import SyncItem
+from app.schemas.sync import Collection, SyncDelta, SyncItemOut, SyncPush
+from app.services.sync_service import (
+    COUNTER_COLLECTIONS,
+    PULL_LIMIT,
+    Change,
+    apply_changes,
+    changes_since,
+)
+from app.utils.auth import require_user_id
+from app.utils.body import read_body
+
+router = APIRouter(prefix="/api/sync", tags=["sync"])
+
+# Replies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+# Decompressed size limit of a pushed body
+MAX_PUSH_BYTES = 1024 * 1024
+
+
+def _out(item: SyncItem) -> SyncItemOut:
+    return SyncItemOut(
+        collection=item.collection,  # type: ignore[arg-type]
+        key=item.key,
+        seq=item.seq,
+        value=item.value,
+        deleted=item.deleted,
+        stamp=item.stamp,
+        node=item.node,
+        counts=item.counts if item.collection in COUNTER_COLLECTIONS else None,
+    )
+
+
+def _respond(delta: SyncDelta, request: Request) -> Response:
+    body = delta.model_dump_json(exclude_none=True).encode()
+    headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+    if len(body) >= COMPRESS_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def _read_push(request: Request) -> SyncPush:
+    body = await read_body(request, MAX_PUSH_BYTES, "Push too large")
+    try:
+        return SyncPush.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors()) from exc
+
+
+@router.get("", response_model=SyncDelta)
+async def pull(
+    request: Request,
+    since: int = Query(default=0, ge=0),
+    collections: list[Collection] | None = Query(default=None),
+    limit: int = Query(default=PULL_LIMIT, ge=1, le=PULL_LIMIT),
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
+    """Entries changed after ``since``, optionally only in ``collections``."""
+    items, cursor, more = await changes_since(session, user_id, since, collections, limit)
+    return _respond(SyncDelta(cursor=cursor, more=more, changes=[_out(i) for i in items]), request)
+
+
+@router.post(
+    "",
+    response_model=SyncDelta,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": SyncPush.model_json_schema()}},
+        }
+    },
+)
+async def push(
+    request: Request,
+    user_id: int = Depends(require_user_id),
+    session: AsyncSession = Depends(get_session),
+) -> Response:
+    """Merge queued offline changes, then return everything after ``since``."""
+    payload = await _read_push(request)
+    changes = [
+        Change(c.collection, c.key, c.value, c.deleted, c.stamp, c.count) for c in payload.changes
+    ]
+    try:
+        applied = await apply_changes(session, user_id, payload.node, changes)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    except LookupError as exc:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found") from exc
+    await session.commit()
+    items, cursor, more = await changes_since(session, user_id, payload.since)
+    delta = SyncDelta(cursor=cursor, more=more, changes=[_out(i) for i in items], applied=applied)
+    return _respond(delta, request)
@@ -0,0 +1,24 @@
+"""Client timing beacons (NFR-1).
+
+Page load, time to first audio and on-device detection happen in the
+browser. The client batches its measurements and sends them with
+``navigator.sendBeacon`` to ``POST /api/telemetry/timings``, and they are
+recorded against the same histograms and SLOs as the server-side stages.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Response, status
+
+from app.schemas.telemetry import TimingBeacon
+from app.utils.telemetry import record
+
+router = APIRouter(prefix="/api/telemetry", tags=["telemetry"])
+
+
+@router.post("/timings", status_code=status.HTTP_204_NO_CONTENT)
+async def report_timings(payload: TimingBeacon) -> Response:
+    """Record client-measured stage timings."""
+    for timing in payload.timings:
+        record(timing.stage, timing.seconds, timing.failed)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,119 @@
+"""Server-side text-to-speech endpoints (FR-6, optional).
+
+``POST /api/tts/speech`` returns the URL of the rendered audio, synthesizing
+it first on a cache miss. The audio URL is content-addressed and never
+changes, so clients cache it forever. It answers ``Range`` requests so
+``<audio>`` elements can seek and start playback early. Both endpoints
+return 503 unless ``TTS_ENGINE`` is configured; the client then falls back
+to Web Speech.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from app.schemas.tts import SpeechOut, SpeechRequest
+from app.services.tts_service import AudioCache, TTSError, get_audio_cache
+from app.utils.telemetry import span
+
+router = APIRouter(prefix="/api/tts", tags=["tts"])
+
+_KEY = re.compile(r"^[0-9a-f]{32}$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def require_audio_cache() -> AudioCache:
+    cache = get_audio_cache()
+    if cache is None:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Server-side TTS is disabled")
+    return cache
+
+
+@router.post("/speech", response_model=SpeechOut)
+async def synthesize_speech(
+    payload: SpeechRequest, cache: AudioCache = Depends(require_audio_cache)
+) -> SpeechOut:
+    """Return the audio URL for a sentence, synthesizing it if needed."""
+    try:
+        with span("tts"):
+            audio = await cache.get_or_synthesize(payload.text, payload.voice, payload.rate)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)) from exc
+    except TTSError as exc:
+        raise HTTPException(status.HTTP_502_BAD_GATEWAY, "Speech synthesis failed") from exc
+    return SpeechOut(
+        key=audio.key,
+        url=f"{router.prefix}/audio/{audio.path.name}",
+        media_type=audio.media_type,
+        cached=audio.cached,
+    )
+
+
+def _read(path: Path, start: int, length: int) -> bytes:
+    with path.open("rb") as file:
+        file.seek(start)
+        return file.read(length)
+
+
+def _byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into inclusive bounds.
+
+    Returns ``None`` for headers this endpoint ignores (multiple ranges or
+    other units), which are answered with the whole file.
+
+    Raises:
+        HTTPException: 416 when the range lies outside the file
+    """
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            "Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+@router.get("/audio/{filename}")
+async def get_audio(
+    filename: str, request: Request, cache: AudioCache = Depends(require_audio_cache)
+) -> Response:
+    """Serve rendered audio, honouring ``Range`` and ``If-None-Match``."""
+    key, _, extension = filename.partition(".")
+    path = cache.lookup(key) if _KEY.match(key) and extension == cache.engine.extension else None
+    if path is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Audio not found")
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE, "Accept-Ranges": "bytes"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    size = path.stat().st_size
+    requested = request.headers.get("range")
+    byte_range = _byte_range(requested, size) if requested else None
+    if byte_range is None:
+        body = await asyncio.to_thread(path.read_bytes)
+        return Response(body, media_type=cache.engine.media_type, headers=headers)
+    start, end = byte_range
+    body = await asyncio.to_thread(_read, path, start, end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(
+        body,
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=cache.engine.media_type,
+        headers=headers,
+    )
@@ -0,0 +1,60 @@
+"""Verb and modifier library endpoints (TODO 1.7).
+
+Both libraries change only through admin edits, so responses are served from
+the tiered cache; a miss reads the table once and renders the JSON body.
+Loaders open their own session because stale-while-revalidate may run them
+after the request that triggered them has finished.
+Edits must call ``cache.invalidate("verbs")`` / ``("modifiers")``.
+"""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.database import get_database
+from app.models import ModifierLibrary, VerbLibrary
+from app.schemas.verb import ModifierOut, VerbOut
+from app.utils.cache import TieredCache, get_cache
+
+router = APIRouter(prefix="/api/verbs", tags=["verbs"])
+modifiers_router = APIRouter(prefix="/api/modifiers", tags=["modifiers"])
+
+_VERBS = TypeAdapter(list[VerbOut])
+_MODIFIERS = TypeAdapter(list[ModifierOut])
+LIBRARY_TTL = 600.0
+
+
+@router.get("/library", response_model=list[VerbOut])
+async def get_verb_library(cache: TieredCache = Depends(get_cache)) -> Response:
+    async def load() -> bytes:
+        async with get_database().session(read_only=True) as session:
+            verbs = await session.scalars(
+                select(VerbLibrary).order_by(VerbLibrary.base_score.desc(), VerbLibrary.id)
+            )
+            return _VERBS.dump_json([VerbOut.model_validate(v) for v in verbs])
+
+    body = await cache.get_or_load(
+        "verbs.library", "verbs.library", load, ttl=LIBRARY_TTL, tags=["verbs"]
+    )
+    return Response(body, media_type="application/json")
+
+
+@modifiers_router.get("/library", response_model=list[ModifierOut])
+async def get_modifier_library(cache: TieredCache = Depends(get_cache)) -> Response:
+    async def load() -> bytes:
+        async with get_database().session(read_only=True) as session:
+            modifiers = await session.scalars(
+                select(ModifierLibrary).order_by(
+                    ModifierLibrary.modifier_type,
+                    ModifierLibrary.base_score.desc(),
+                    ModifierLibrary.id,
+                )
+            )
+            return _MODIFIERS.dump_json([ModifierOut.model_validate(m) for m in modifiers])
+
+    body = await cache.get_or_load(
+        "modifiers.library", "modifiers.library", load, ttl=LIBRARY_TTL, tags=["modifiers"]
+    )
+    return Response(body, media_type="application/json")
@@ -0,0 +1 @@
+"""Pydantic request and response schemas."""
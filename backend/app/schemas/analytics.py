@@ -0,0 +1,69 @@
+"""Caregiver dashboard schemas (TODO 2.4)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class UsageCounts(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    constructed: int = 0
+    spoken: int = 0
+    thumbs_up: int = 0
+    thumbs_down: int = 0
+
+
+class DailyUsage(UsageCounts):
+    day: date
+
+
+class TopItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    uses: int
+    spoken: int
+
+
+class AnalyticsOut(BaseModel):
+    start: date
+    end: date
+    timezone: str
+    totals: UsageCounts
+    daily: list[DailyUsage]
+    # Sentences constructed per local hour of day (24 entries)
+    hourly: list[int]
+    top_objects: list[TopItem]
+    top_verbs: list[TopItem]
+    top_modifiers: list[TopItem]
+
+
+class PhraseOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    phrase: str
+    uses: int
+    spoken: int
+
+
+class TimelineEntry(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: datetime
+    sentence_text: str
+    object_id: int | None = None
+    verb_id: int | None = None
+    modifier_id: int | None = None
+    spoken: bool
+
+
+class TimelinePage(BaseModel):
+    entries: list[TimelineEntry]
+    # Pass as ``before`` and ``before_id`` to fetch the next page; None on the last page
+    next_before: datetime | None = None
+    next_before_id: int | None = None
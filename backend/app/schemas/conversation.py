@@ -0,0 +1,37 @@
+"""Family Communication Bridge schemas."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+MemberRole = Literal["family", "caregiver", "therapist"]
+
+
+class MemberIn(BaseModel):
+    role: MemberRole = "family"
+
+
+class MemberOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    member_id: int
+    role: str
+    created_at: datetime
+
+
+class RoomOut(BaseModel):
+    owner_id: int
+    role: str
+
+
+class MessageIn(BaseModel):
+    # "sentence" is reserved for the room's owner
+    kind: Literal["sentence", "message", "typing"] = "message"
+    text: str = Field(default="", max_length=500)
+
+
+class MessageOut(BaseModel):
+    id: int
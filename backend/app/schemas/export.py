@@ -0,0 +1,23 @@
+"""Export schemas (TODO 2.4, 5.5)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class ReportRequest(BaseModel):
+    # Whole history when omitted
+    since: datetime | None = None
+
+
+class ExportJobOut(BaseModel):
+    id: str
+    format: str
+    status: str
+    progress: float
+    rows: int
+    error: str | None = None
+    # Set once the job is done
+    download_url: str | None = None
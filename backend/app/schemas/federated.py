@@ -0,0 +1,40 @@
+"""Federated learning schemas (create_future_md, "Federated Learning")."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+RankerName = Literal["qlearning", "bandit"]
+
+
+class ModelUpdateIn(BaseModel):
+    # Global version the device trained from
+    base_version: int = Field(ge=0)
+    # Interactions learned from since then; the update's FedAvg weight
+    samples: int = Field(ge=1)
+    # Change from the base: [state_key, action, q] for qlearning,
+    # [state_key, action, successes, pulls] for bandit
+    entries: list[list[float]] = Field(min_length=1, max_length=20_000)
+
+
+class ModelUpdateOut(BaseModel):
+    # Latest published version; pull its diff once it moves past base_version
+    version: int
+    # Updates in the open round, including this one
+    round_updates: int
+
+
+class FederatedStatusOut(BaseModel):
+    ranker: RankerName
+    version: int
+    channels: int
+    clip_norm: float
+    max_staleness: int
+    round_updates: int
+    # Updates that close the round, and the fewest it is published with
+    round_size: int
+    min_updates: int
+    # When the open round got its first update, Unix seconds; 0 if empty
+    round_opened_at: float
@@ -0,0 +1,73 @@
+"""Object library schemas."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import Base64Bytes, BaseModel, ConfigDict, Field
+
+Category = Literal["food", "person", "place", "thing", "action", "feeling"]
+
+
+class ObjectOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    category: str
+    icon_url: str | None = None
+    usage_count: int = 0
+    is_custom: bool = False
+
+
+class ObjectLibraryResponse(BaseModel):
+    version: str
+    objects: list[ObjectOut]
+
+
+class CustomObjectCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    category: Category
+    icon_url: str | None = Field(default=None, max_length=500)
+
+
+class BoundingBox(BaseModel):
+    # Normalized to the image size, origin top-left
+    x: float = Field(ge=0, le=1)
+    y: float = Field(ge=0, le=1)
+    width: float = Field(gt=0, le=1)
+    height: float = Field(gt=0, le=1)
+
+
+class DetectionIn(BaseModel):
+    label: str = Field(min_length=1, max_length=100)
+    confidence: float = Field(default=1.0, ge=0, le=1)
+    bbox: BoundingBox
+
+
+class RecognizeRequest(BaseModel):
+    image: Base64Bytes
+    # What the detector found; none means the whole image is one object
+    detections: list[DetectionIn] = Field(default_factory=list, max_length=50)
+
+
+class RecognizedObject(BaseModel):
+    label: str
+    confidence: float
+    bbox: BoundingBox | None = None
+    # Library object the detection maps to, custom objects first
+    object_id: int | None = None
+    # The custom object's name ("Sam's red cup"), or the library name
+    name: str
+    custom: bool = False
+    # Similarity to the custom object's closest reference photo
+    score: float | None = None
+
+
+class ObjectPhotoOut(BaseModel):
+    id: int
+    object_id: int
+
+
+class RecognizeOut(BaseModel):
+    objects: list[RecognizedObject]
@@ -0,0 +1,42 @@
+"""Known people and face matching schemas (TODO 3.3)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class PersonCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    relationship: str | None = Field(default=None, max_length=50)
+    # Face data is only stored with the person's (or guardian's) consent
+    consent: Literal[True]
+
+
+class PersonOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    relationship: str | None = None
+    consent_at: datetime
+    faces: int = 0
+
+
+class FaceOut(BaseModel):
+    id: int
+    person_id: int
+
+
+class PersonMatch(BaseModel):
+    person_id: int
+    name: str
+    # Cosine similarity of the closest enrolled face
+    score: float
+
+
+class MatchOut(BaseModel):
+    # Best first; empty when the face is nobody the user knows
+    matches: list[PersonMatch]
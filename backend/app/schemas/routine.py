@@ -0,0 +1,56 @@
+"""Routine schemas (TODO 5.3)."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.object import Category, ObjectOut
+
+
+class RoutineCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    # RFC 5545 recurrence, e.g. "FREQ=DAILY;BYHOUR=7;BYMINUTE=30" or
+    # "FREQ=WEEKLY;BYDAY=SA,SU;BYHOUR=10"; at most hourly
+    rrule: str = Field(min_length=6, max_length=500)
+    # First possible occurrence; also the time of day where the rule gives
+    # none. Defaults to today's midnight; times without an offset are local
+    starts_at: datetime | None = None
+    timezone: str = Field(default="UTC", max_length=64)
+    duration_minutes: int = Field(default=60, ge=1, le=1440)
+    # Object categories suggested while the routine is on
+    categories: list[Category] = Field(default_factory=list, max_length=6)
+    enabled: bool = True
+
+
+class RoutineOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    rrule: str
+    starts_at: datetime
+    timezone: str
+    duration_minutes: int
+    categories: list[str]
+    enabled: bool
+    # Start of the next window; null when the rule has no more occurrences
+    # or the routine is disabled
+    next_window: datetime | None = None
+
+
+class ActiveRoutine(BaseModel):
+    id: int
+    name: str
+    categories: list[str]
+    window_start: datetime
+    window_end: datetime
+
+
+class RoutineSuggestionsOut(BaseModel):
+    # Routines whose window is open now; all lists are empty outside them
+    routines: list[ActiveRoutine]
+    objects: list[ObjectOut]
+    # The user's most spoken sentences about the routines' categories
+    phrases: list[str]
@@ -0,0 +1,35 @@
+"""Switch-scanning and gaze layout schemas."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ScanNodeOut(BaseModel):
+    probability: float
+    # A group has children; an item has kind, id and name
+    children: list[ScanNodeOut] | None = None
+    kind: Literal["object", "verb", "modifier"] | None = None
+    id: int | None = None
+    name: str | None = None
+    # Gaze mode: how long to dwell on the item before selecting it
+    dwell_ms: int | None = None
+
+
+class ScanLayoutOut(BaseModel):
+    method: Literal["linear", "row-column", "huffman"]
+    # Per selection, averaged over the predicted distribution
+    expected_presses: float
+    expected_seconds: float
+    selections_per_minute: float
+    root: ScanNodeOut
+
+
+class ScanScreenOut(BaseModel):
+    screen: Literal["objects", "verbs", "modifiers"]
+    mode: Literal["scan", "step", "gaze"]
+    layout: ScanLayoutOut
+    # Layouts of the screens the likeliest items lead to, by item id
+    next: dict[str, ScanLayoutOut] = Field(default_factory=dict)
@@ -0,0 +1,23 @@
+"""Search schemas."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    kind: Literal["object", "verb", "modifier", "phrase"]
+    # Library id of objects, verbs and modifiers; null for phrases
+    id: int | None = None
+    text: str
+    category: str | None = None
+    score: float
+    # Times the user used the item
+    usage_count: int = 0
+
+
+class SearchOut(BaseModel):
+    query: str
+    results: list[SearchResult]
@@ -0,0 +1,71 @@
+"""Sentence construction schemas."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+LOCALE_PATTERN = r"^[a-z]{2,3}$"
+
+
+class SentenceConstructRequest(BaseModel):
+    object_id: int | None = None
+    verb_id: int | None = None
+    modifier_id: int | None = None
+    # Chosen from the supplied words when omitted
+    template_id: int | None = None
+    # "en", or a locale with a lexicon (GET /api/sentences/locales)
+    locale: str = Field(default="en", pattern=LOCALE_PATTERN)
+
+
+class SentenceSegment(BaseModel):
+    text: str
+    # "verb", "object", "modifier", or "" for template words
+    slot: str
+
+
+class SentenceOut(BaseModel):
+    text: str
+    template_id: int
+    segments: list[SentenceSegment]
+
+
+class SentenceBatchRequest(BaseModel):
+    object_id: int
+    # Ranked best first, e.g. straight from POST /api/verbs/suggest
+    verb_ids: list[int] = Field(min_length=1, max_length=50)
+    modifier_ids: list[int | None] = Field(default_factory=lambda: [None], max_length=50)
+    k: int = Field(default=5, ge=1, le=20)
+    locale: str = Field(default="en", pattern=LOCALE_PATTERN)
+
+
+class Prediction(BaseModel):
+    kind: Literal["object", "verb", "modifier"]
+    id: int
+    name: str
+    probability: float
+
+
+class NextSelectionOut(BaseModel):
+    # Likeliest next selections, best first
+    predictions: list[Prediction]
+    # Sentences the top predictions lead to, rendered ahead for the next screen
+    sentences: list[SentenceOut]
+
+
+class SentenceComposeRequest(BaseModel):
+    object_ids: list[int] = Field(default_factory=list, max_length=3)
+    verb_id: int | None = None
+    modifier_ids: list[int] = Field(default_factory=list, max_length=3)
+    # Free text such as "at breakfast" or the previous sentence
+    context: str = Field(default="", max_length=200)
+
+
+class SentenceComposeOut(BaseModel):
+    text: str
+    # "rules" (templates), "cache" (an earlier model sentence) or "llm"
+    source: Literal["rules", "cache", "llm"]
+    # How far the rules trust their sentence; null for model sentences
+    confidence: float | None = None
+    template_id: int | None = None
@@ -0,0 +1,54 @@
+"""Offline delta sync schemas (TODO 4.2 / 4.5)."""
+
+from __future__ import annotations
+
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+from app.services.sync_service import MAX_USAGE_COUNT
+
+# custom_objects is written by the server only
+WritableCollection = Literal["settings", "favorites", "recents", "usage"]
+Collection = Literal["settings", "favorites", "recents", "usage", "custom_objects"]
+
+
+class SyncChangeIn(BaseModel):
+    collection: WritableCollection
+    key: str = Field(min_length=1, max_length=100)
+    value: Any = None
+    deleted: bool = False
+    # Client clock when the change was made, Unix milliseconds
+    stamp: int = Field(default=0, ge=0)
+    # usage only: this device's running total for the key, not an increment
+    count: int | None = Field(default=None, ge=0, le=MAX_USAGE_COUNT)
+
+
+class SyncPush(BaseModel):
+    # Stable per-device id; breaks timestamp ties and owns a usage count
+    node: str = Field(min_length=1, max_length=36, pattern=r"^[A-Za-z0-9_.:-]+$")
+    # Cursor of the client's last pull; the reply carries everything after it
+    since: int = Field(default=0, ge=0)
+    changes: list[SyncChangeIn] = Field(default_factory=list, max_length=500)
+
+
+class SyncItemOut(BaseModel):
+    collection: Collection
+    key: str
+    seq: int
+    value: Any = None
+    deleted: bool = False
+    stamp: int
+    node: str
+    # usage only: per-device counts, so a client can merge its own back in
+    counts: dict[str, int] | None = None
+
+
+class SyncDelta(BaseModel):
+    # Pass back as ``since`` on the next pull
+    cursor: int
+    # More changes past ``cursor``; pull again straight away
+    more: bool
+    changes: list[SyncItemOut]
+    # Pushed changes that altered server state (0 for a replayed push)
+    applied: int = 0
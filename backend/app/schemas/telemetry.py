@@ -0,0 +1,21 @@
+"""Client timing beacon schemas (NFR-1)."""
+
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+# Stages only the browser can measure; see app.utils.telemetry.STAGES
+ClientStage = Literal["page_load", "tts_start", "detection_local"]
+
+
+class StageTiming(BaseModel):
+    stage: ClientStage
+    # Longer than any sane page load; anything above is a broken clock
+    seconds: float = Field(ge=0, le=120)
+    failed: bool = False
+
+
+class TimingBeacon(BaseModel):
+    timings: list[StageTiming] = Field(min_length=1, max_length=50)
@@ -0,0 +1,29 @@
+"""Server-side text-to-speech schemas."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+from app.services.tts_service import (
+    MAX_RATE,
+    MAX_TEXT_LENGTH,
+    MAX_VOICE_LENGTH,
+    MIN_RATE,
+    VOICE_PATTERN,
+)
+
+
+class SpeechRequest(BaseModel):
+    text: str = Field(min_length=1, max_length=MAX_TEXT_LENGTH)
+    # Engine voice name; the server default when omitted
+    voice: str | None = Field(default=None, max_length=MAX_VOICE_LENGTH, pattern=VOICE_PATTERN)
+    rate: float = Field(default=1.0, ge=MIN_RATE, le=MAX_RATE)
+
+
+class SpeechOut(BaseModel):
+    key: str
+    # Immutable, range-requestable audio file
+    url: str
+    media_type: str
+    # False when this request had to synthesize the audio
+    cached: bool
@@ -0,0 +1,25 @@
+"""Verb and modifier library schemas."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, ConfigDict
+
+
+class VerbOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    verb_text: str
+    emoji: str | None = None
+    compatible_object_categories: list[str] = []
+    base_score: float = 0.0
+
+
+class ModifierOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    modifier_text: str
+    modifier_type: str
+    emoji: str | None = None
+    base_score: float = 0.0
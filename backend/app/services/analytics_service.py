@@ -0,0 +1,242 @@
+"""Caregiver dashboard queries over the usage rollups (TODO 2.4, 3.5).
+
+Every query reads the trigger-maintained rollups in
+:mod:`app.models.analytics` by primary-key range, so its cost grows with the
+window (at most 24 rows per day per user) rather than with the history. The
+timeline is the exception: it pages through ``constructed_sentences`` using
+the covering ``(user_id, created_at DESC)`` index. Raw-history questions the
+rollups cannot answer belong in the columnar store (:mod:`app.analytics`).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Row, cast, extract, func, literal, select, tuple_, union_all
+from sqlalchemy import Date as SqlDate
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import (
+    ConstructedSentence,
+    ModifierLibrary,
+    ObjectLibrary,
+    UsageAnalytics,
+    UsageDailyItem,
+    UsageDailyPhrase,
+    VerbLibrary,
+)
+
+MAX_WINDOW_DAYS = 366
+
+
+@dataclass(slots=True, frozen=True)
+class Window:
+    """A dashboard period: whole local days, plus its UTC bounds.
+
+    Attributes:
+        first_day: First local day included
+        last_day: Last local day included (today)
+        start: UTC instant of ``first_day``'s local midnight
+        end: UTC instant of the local midnight after ``last_day``
+    """
+
+    first_day: date
+    last_day: date
+    start: datetime
+    end: datetime
+
+    @classmethod
+    def last_days(cls, days: int, tz: ZoneInfo, now: datetime) -> Window:
+        if not 1 <= days <= MAX_WINDOW_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_WINDOW_DAYS}")
+        last_day = now.astimezone(tz).date()
+        first_day = last_day - timedelta(days=days - 1)
+        start = datetime.combine(first_day, time(), tz)
+        end = datetime.combine(last_day + timedelta(days=1), time(), tz)
+        return cls(first_day, last_day, start, end)
+
+    @property
+    def utc_days(self) -> tuple[date, date]:
+        """UTC days overlapping the window, for the daily rollups.
+
+        Daily rollups are bucketed by UTC day, so in zones far from UTC the
+        top-item and phrase counts can include up to a day's activity on
+        either edge of the window.
+        """
+        last_instant = self.end - timedelta(microseconds=1)
+        return (
+            self.start.astimezone(timezone.utc).date(),
+            last_instant.astimezone(timezone.utc).date(),
+        )
+
+
+@dataclass(slots=True)
+class UsageReport:
+    window: Window
+    daily: list[Row] = field(default_factory=list)
+    # Sentences constructed per local hour of day, index 0-23
+    hourly: list[int] = field(default_factory=lambda: [0] * 24)
+    top_items: dict[str, list[Row]] = field(default_factory=dict)
+
+
+async def usage_report(
+    session: AsyncSession, user_id: int, window: Window, tz: ZoneInfo, top: int = 10
+) -> UsageReport:
+    """Daily series, hour-of-day pattern and most used words for one user."""
+    report = UsageReport(window)
+    in_window = (
+        UsageAnalytics.user_id == user_id,
+        UsageAnalytics.hour >= window.start,
+        UsageAnalytics.hour < window.end,
+    )
+    local_hour = func.timezone(tz.key, UsageAnalytics.hour)
+    day = cast(local_hour, SqlDate).label("day")
+    report.daily = list(
+        await session.execute(
+            select(
+                day,
+                func.sum(UsageAnalytics.constructed).label("constructed"),
+                func.sum(UsageAnalytics.spoken).label("spoken"),
+                func.sum(UsageAnalytics.thumbs_up).label("thumbs_up"),
+                func.sum(UsageAnalytics.thumbs_down).label("thumbs_down"),
+            )
+            .where(*in_window)
+            .group_by(day)
+            .order_by(day)
+        )
+    )
+    hour_of_day = extract("hour", local_hour)
+    for hour, constructed in await session.execute(
+        select(hour_of_day, func.sum(UsageAnalytics.constructed))
+        .where(*in_window)
+        .group_by(hour_of_day)
+    ):
+        report.hourly[int(hour)] = int(constructed)
+    report.top_items = await top_items(session, user_id, window, top)
+    return report
+
+
+async def top_items(
+    session: AsyncSession, user_id: int, window: Window, top: int
+) -> dict[str, list[Row]]:
+    """Most used objects, verbs and modifiers in the window, with their names.
+
+    Items deleted from the library since (a user's custom objects) have no
+    name left and are not ranked.
+    """
+    first, last = window.utc_days
+    names = union_all(
+        select(literal("object").label("dimension"), ObjectLibrary.id, ObjectLibrary.name),
+        select(literal("verb"), VerbLibrary.id, VerbLibrary.verb_text),
+        select(literal("modifier"), ModifierLibrary.id, ModifierLibrary.modifier_text),
+    ).subquery()
+    uses = func.sum(UsageDailyItem.uses)
+    ranked = (
+        select(
+            UsageDailyItem.dimension,
+            UsageDailyItem.item_id,
+            names.c.name,
+            uses.label("uses"),
+            func.sum(UsageDailyItem.spoken).label("spoken"),
+            func.row_number()
+            .over(
+                partition_by=UsageDailyItem.dimension,
+                order_by=(uses.desc(), UsageDailyItem.item_id),
+            )
+            .label("rank"),
+        )
+        .join(
+            names,
+            (names.c.dimension == UsageDailyItem.dimension)
+            & (names.c.id == UsageDailyItem.item_id),
+        )
+        .where(
+            UsageDailyItem.user_id == user_id,
+            UsageDailyItem.day >= first,
+            UsageDailyItem.day <= last,
+        )
+        .group_by(UsageDailyItem.dimension, UsageDailyItem.item_id, names.c.name)
+        .subquery()
+    )
+    rows = await session.execute(
+        select(
+            ranked.c.dimension,
+            ranked.c.item_id.label("id"),
+            ranked.c.name,
+            ranked.c.uses,
+            ranked.c.spoken,
+        )
+        .where(ranked.c.rank <= top)
+        .order_by(ranked.c.dimension, ranked.c.rank)
+    )
+    items: dict[str, list[Row]] = {"object": [], "verb": [], "modifier": []}
+    for row in rows:
+        items[row.dimension].append(row)
+    return items
+
+
+async def top_phrases(
+    session: AsyncSession, user_id: int, window: Window, top: int
+) -> Sequence[Row]:
+    """The user's most used sentences in the window."""
+    first, last = window.utc_days
+    uses = func.sum(UsageDailyPhrase.uses)
+    result = await session.execute(
+        select(
+            UsageDailyPhrase.phrase,
+            uses.label("uses"),
+            func.sum(UsageDailyPhrase.spoken).label("spoken"),
+        )
+        .where(
+            UsageDailyPhrase.user_id == user_id,
+            UsageDailyPhrase.day >= first,
+            UsageDailyPhrase.day <= last,
+        )
+        .group_by(UsageDailyPhrase.phrase)
+        .order_by(uses.desc(), UsageDailyPhrase.phrase)
+        .limit(top)
+    )
+    return result.all()
+
+
+async def timeline(
+    session: AsyncSession,
+    user_id: int,
+    before: datetime | None,
+    limit: int,
+    before_id: int | None = None,
+) -> Sequence[Row]:
+    """One page of the user's sentence history, newest first.
+
+    Keyset pagination on (``created_at``, ``id``): pass the last entry's
+    ``created_at`` and ``id`` as ``before`` and ``before_id`` to fetch the
+    next page. Sentences sharing a timestamp are then split across pages
+    without being skipped. ``before`` alone starts strictly before it.
+    """
+    query = select(
+        ConstructedSentence.id,
+        ConstructedSentence.created_at,
+        ConstructedSentence.sentence_text,
+        ConstructedSentence.object_id,
+        ConstructedSentence.verb_id,
+        ConstructedSentence.modifier_id,
+        ConstructedSentence.spoken,
+    ).where(ConstructedSentence.user_id == user_id)
+    if before is not None and before_id is not None:
+        # The plain bound keeps partition pruning; the row comparison breaks ties
+        query = query.where(
+            ConstructedSentence.created_at <= before,
+            tuple_(ConstructedSentence.created_at, ConstructedSentence.id)
+            < tuple_(before, before_id),
+        )
+    elif before is not None:
+        query = query.where(ConstructedSentence.created_at < before)
+    result = await session.execute(
+        query.order_by(ConstructedSentence.created_at.desc(), ConstructedSentence.id.desc()).limit(
+            limit
+        )
+    )
+    return result.all()
@@ -0,0 +1,161 @@
+"""Image blob storage: Azure Blob Storage in production, a directory locally.
+
+Both backends expose the same small async interface. ``delete_many`` treats
+a blob that is already gone as deleted, so retrying a batch after a crash is
+harmless.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Protocol
+
+# Azure's blob batch API accepts at most 256 sub-requests
+AZURE_BATCH_LIMIT = 256
+
+
+class BlobStore(Protocol):
+    async def put(self, name: str, data: bytes, content_type: str) -> None: ...
+
+    async def get(self, name: str) -> bytes | None: ...
+
+    async def delete_many(self, names: Sequence[str]) -> list[str]:
+        """Delete blobs; return the names that could not be deleted."""
+        ...
+
+    async def close(self) -> None: ...
+
+
+class FilesystemBlobStore:
+    """Blobs as files under ``root``; for development and tests.
+
+    Args:
+        root: Directory holding the blobs (created if missing)
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, name: str) -> Path:
+        path = (self.root / name).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Blob name escapes the store: {name!r}")
+        return path
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+    def _read(self, name: str) -> bytes | None:
+        try:
+            return self._path(name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _unlink(self, names: Sequence[str]) -> list[str]:
+        failed = []
+        for name in names:
+            try:
+                self._path(name).unlink(missing_ok=True)
+            except OSError:
+                failed.append(name)
+        return failed
+
+    async def put(self, name: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(self._write, name, data)
+
+    async def get(self, name: str) -> bytes | None:
+        return await asyncio.to_thread(self._read, name)
+
+    async def delete_many(self, names: Sequence[str]) -> list[str]:
+        return await asyncio.to_thread(self._unlink, names)
+
+    async def close(self) -> None:
+        pass
+
+
+class AzureBlobStore:
+    """Blobs in one Azure Storage container, deleted through batch requests.
+
+    Also works against Azurite with its development connection string.
+
+    Args:
+        connection_string: Storage account connection string
+        container: Container name
+    """
+
+    def __init__(self, connection_string: str, container: str) -> None:
+        from azure.storage.blob.aio import ContainerClient
+
+        self._container: Any = ContainerClient.from_connection_string(connection_string, container)
+
+    async def put(self, name: str, data: bytes, content_type: str) -> None:
+        from azure.storage.blob import ContentSettings
+
+        await self._container.upload_blob(
+            name, data, overwrite=True, content_settings=ContentSettings(content_type=content_type)
+        )
+
+    async def get(self, name: str) -> bytes | None:
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            downloader = await self._container.download_blob(name)
+        except ResourceNotFoundError:
+            return None
+        return await downloader.readall()
+
+    async def delete_many(self, names: Sequence[str]) -> list[str]:
+        failed = []
+        for start in range(0, len(names), AZURE_BATCH_LIMIT):
+            end = start + AZURE_BATCH_LIMIT
+            chunk = names[start:end]
+            responses = await self._container.delete_blobs(*chunk, raise_on_any_failure=False)
+            index = 0
+            async for response in responses:
+                # 202 deleted, 404 already gone
+                if response.status_code not in (202, 404):
+                    failed.append(chunk[index])
+                index += 1
+        return failed
+
+    async def close(self) -> None:
+        await self._container.close()
+
+
+def create_blob_store(
+    connection_string: str | None, container: str, local_root: str | Path
+) -> BlobStore:
+    """Azure when a connection string is configured, otherwise the filesystem."""
+    if connection_string:
+        return AzureBlobStore(connection_string, container)
+    return FilesystemBlobStore(Path(local_root) / container)
+
+
+_store: BlobStore | None = None
+
+
+def init_blob_store(
+    connection_string: str | None, container: str, local_root: str | Path
+) -> BlobStore:
+    """Create the process-wide blob store (called from the app lifespan)."""
+    global _store
+    _store = create_blob_store(connection_string, container, local_root)
+    return _store
+
+
+def get_blob_store() -> BlobStore:
+    if _store is None:
+        raise RuntimeError("Blob store not initialised; call init_blob_store() first")
+    return _store
+
+
+async def close_blob_store() -> None:
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
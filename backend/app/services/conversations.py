@@ -0,0 +1,122 @@
+"""Family Communication Bridge rooms (create_future_md, "Multi-User Conversations").
+
+Every AAC user owns one room, and the family members, caregivers and
+therapists they add can join it. The user's sentences and the members'
+replies are fanned out live to everyone connected, through the event hub
+(:mod:`app.services.events`) on the room's channel:
+
+* the hub keeps the room's recent messages, and a late joiner receives them
+  before live traffic;
+* members read in batches of up to ``BATCH_LINGER`` seconds, so a burst
+  costs one write per member;
+* typing indicators are coalesced per sender and never replayed;
+* a member who is too slow loses the oldest queued messages, not the room.
+
+A room costs a set of subscriptions and a short replay buffer. One worker
+holds thousands of rooms, and delivery latency is exported as
+``event_delivery_seconds{kind="room"}``. Messages are not stored; the
+sentence history (``constructed_sentences``) is the durable record.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Literal
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ConversationMember
+from app.services.events import Event, EventHub
+
+MessageKind = Literal["sentence", "message", "typing"]
+
+ROOM_MESSAGE = "room.message"
+ROOM_TYPING = "room.typing"
+# Seconds a member's stream waits after the first message to batch others with it
+BATCH_LINGER = 0.025
+
+
+def room_channel(owner_id: int) -> str:
+    return f"room:{owner_id}"
+
+
+def member_tag(user_id: int) -> str:
+    return f"member:{user_id}"
+
+
+async def member_role(session: AsyncSession, owner_id: int, user_id: int) -> str | None:
+    """The user's role in the room (``owner`` for its owner), or ``None``."""
+    if user_id == owner_id:
+        return "owner"
+    return await session.scalar(
+        select(ConversationMember.role).where(
+            ConversationMember.owner_id == owner_id, ConversationMember.member_id == user_id
+        )
+    )
+
+
+async def rooms_for(session: AsyncSession, user_id: int) -> list[tuple[int, str]]:
+    """(owner id, role) of every room the user may join, their own first."""
+    rows = await session.execute(
+        select(ConversationMember.owner_id, ConversationMember.role)
+        .where(ConversationMember.member_id == user_id)
+        .order_by(ConversationMember.owner_id)
+    )
+    return [(user_id, "owner"), *((owner_id, role) for owner_id, role in rows)]
+
+
+async def list_members(session: AsyncSession, owner_id: int) -> Sequence[ConversationMember]:
+    result = await session.scalars(
+        select(ConversationMember)
+        .where(ConversationMember.owner_id == owner_id)
+        .order_by(ConversationMember.created_at)
+    )
+    return result.all()
+
+
+async def add_member(
+    session: AsyncSession, owner_id: int, member_id: int, role: str
+) -> ConversationMember:
+    """Add a member, or change the role of an existing one."""
+    statement = insert(ConversationMember).values(owner_id=owner_id, member_id=member_id, role=role)
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[ConversationMember.owner_id, ConversationMember.member_id],
+            set_={"role": statement.excluded.role},
+        )
+    )
+    member = await session.get(ConversationMember, (owner_id, member_id), populate_existing=True)
+    assert member is not None
+    return member
+
+
+async def remove_member(session: AsyncSession, owner_id: int, member_id: int) -> bool:
+    """Delete a membership; commit, then :meth:`EventHub.disconnect` their streams."""
+    result = await session.execute(
+        delete(ConversationMember).where(
+            ConversationMember.owner_id == owner_id, ConversationMember.member_id == member_id
+        )
+    )
+    return bool(result.rowcount)
+
+
+async def post_message(
+    hub: EventHub, owner_id: int, sender_id: int, role: str, kind: MessageKind, text: str
+) -> Event:
+    """Fan a message out to everyone in the room."""
+    data = {
+        "sender_id": sender_id,
+        "role": role,
+        "kind": kind,
+        "text": text,
+        "sent_at": datetime.now(timezone.utc).isoformat(),
+    }
+    channel = room_channel(owner_id)
+    if kind == "typing":
+        return await hub.publish(
+            channel, ROOM_TYPING, data, key=f"typing:{sender_id}", replay=False
+        )
+    return await hub.publish(channel, ROOM_MESSAGE, data)
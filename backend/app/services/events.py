@@ -0,0 +1,349 @@
+"""Push events to connected clients (FR-2, NFR-1).
+
+Clients hold one server-sent events stream (``GET /api/events``) instead of
+polling for slow results. Export jobs publish ``export.progress``, and
+conversation rooms (:mod:`app.services.conversations`) are channels too.
+Events on one channel arrive in publish order.
+
+:class:`EventHub` fans events out to the subscribers connected to this
+worker. With Redis, every publish goes through one pub/sub channel, so each
+worker sees every event. It delivers the event to its own subscribers and
+keeps the last few per channel, so a client that reconnects to any worker
+can resume from ``Last-Event-ID`` and a late joiner can catch up. Without
+Redis the hub works locally only, for single-node installs.
+
+Each subscriber has a bounded queue, so a slow client never blocks a
+publisher:
+
+* events published with a ``key`` (progress, typing indicators) coalesce,
+  and a newer event replaces a still-queued one with the same key;
+* when the queue is full, the oldest queued event is dropped.
+
+Subscribers read in batches, so a burst costs one write per client rather
+than one per event.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from app.utils.cache import LRUCache
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PROGRESS = "export.progress"
+# Control event: ends the streams on a channel subscribed with ``data["tag"]``
+STREAM_CLOSE = "stream.close"
+
+# Events buffered per subscriber; a client this far behind loses the oldest
+SUBSCRIBER_BUFFER = 64
+# Recent events kept per channel for replay
+REPLAY_SIZE = 32
+# Seconds between keepalive comments on an idle stream
+KEEPALIVE = 15.0
+# Client reconnect delay, in milliseconds
+RETRY_MS = 2000
+
+# Seconds; from publish to hand-off to the client's connection
+DELIVERY_BUCKETS: tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+EVENTS_PUBLISHED = REGISTRY.counter("events_published_total", "Events published", ["type"])
+EVENTS_DROPPED = REGISTRY.counter(
+    "events_dropped_total", "Events dropped or coalesced for a slow subscriber", ["reason"]
+)
+EVENT_SUBSCRIBERS = REGISTRY.gauge("event_subscribers", "Open event streams in this worker")
+EVENT_DELIVERY = REGISTRY.histogram(
+    "event_delivery_seconds",
+    "Publish-to-delivery latency by channel kind",
+    ["kind"],
+    DELIVERY_BUCKETS,
+)
+
+
+def user_channel(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+@dataclass(slots=True, frozen=True)
+class Event:
+    """One pushed message.
+
+    Attributes:
+        id: Publish time in nanoseconds, unique per publisher; sent as the
+            SSE ``id``. Publishers' clocks differ, so ids from different
+            workers are not in publish order: order is the delivery order.
+        channel: Channel it was published on (usually :func:`user_channel`)
+        type: Event name, e.g. ``detection.partial``
+        data: JSON-serialisable body
+        key: Coalescing key; a queued event with the same key is replaced
+        replay: Whether the event is kept for replay and late joiners
+    """
+
+    id: int
+    channel: str
+    type: str
+    data: dict[str, Any]
+    key: str | None = None
+    replay: bool = True
+
+    def encode(self) -> str:
+        return json.dumps(
+            [self.id, self.channel, self.type, self.data, self.key, self.replay],
+            separators=(",", ":"),
+            default=str,
+        )
+
+    @classmethod
+    def decode(cls, raw: str | bytes) -> Event:
+        return cls(*json.loads(raw))
+
+    def sse(self) -> bytes:
+        """Render as a server-sent events frame."""
+        data = json.dumps(self.data, separators=(",", ":"), default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """A bounded, coalescing queue of events for one connected client."""
+
+    def __init__(self, channel: str, tag: str | None = None, size: int = SUBSCRIBER_BUFFER) -> None:
+        self.channel = channel
+        self.tag = tag
+        self.kind = channel.partition(":")[0]
+        self.size = size
+        self.closed = False
+        # Insertion-ordered, so batches keep publish order
+        self._pending: dict[object, Event] = {}
+        self._ready = asyncio.Event()
+
+    def put(self, event: Event) -> None:
+        if event.type == STREAM_CLOSE:
+            if self.tag is not None and event.data.get("tag") == self.tag:
+                self.close()
+            return
+        slot: object = event.id if event.key is None else event.key
+        if self._pending.pop(slot, None) is not None:
+            EVENTS_DROPPED.inc(1.0, "coalesced")
+        elif len(self._pending) >= self.size:
+            # Slow client: drop the oldest rather than block the publisher
+            del self._pending[next(iter(self._pending))]
+            EVENTS_DROPPED.inc(1.0, "overflow")
+        self._pending[slot] = event
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def get_batch(self, timeout: float, linger: float = 0.0) -> list[Event]:
+        """Wait up to ``timeout`` for events and return everything queued.
+
+        Args:
+            timeout: Longest wait for the first event; ``[]`` on timeout
+            linger: After the first event, wait this long for more to
+                batch with it
+        """
+        if not self._ready.is_set():
+            # asyncio.timeout rather than wait_for: no extra task per wait
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(timeout):
+                    await self._ready.wait()
+        if linger and self._pending and not self.closed:
+            await asyncio.sleep(linger)
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._ready.clear()
+        now = time.time_ns()
+        for event in batch:
+            EVENT_DELIVERY.observe(max(now - event.id, 0) / 1e9, self.kind)
+        return batch
+
+
+class EventHub:
+    """Publishes events and fans them out to this worker's subscribers.
+
+    Args:
+        redis: ``redis.asyncio`` client, or ``None`` for a local-only hub
+        namespace: Redis channel prefix
+        replay_channels: Channels whose recent events are kept for replay
+        replay_size: Events kept per channel
+    """
+
+    def __init__(
+        self,
+        redis: Any = None,
+        namespace: str = "events",
+        replay_channels: int = 8192,
+        replay_size: int = REPLAY_SIZE,
+    ) -> None:
+        self.redis = redis
+        self.namespace = namespace
+        self.replay_size = replay_size
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._recent: LRUCache[str, deque[Event]] = LRUCache(replay_channels)
+        self._listener: asyncio.Task[None] | None = None
+        self._last_id = 0
+        self._count = 0
+
+    @property
+    def redis_channel(self) -> str:
+        return f"{self.namespace}:publish"
+
+    def _next_id(self) -> int:
+        # Strictly increasing even if the clock stalls or steps back
+        self._last_id = max(time.time_ns(), self._last_id + 1)
+        return self._last_id
+
+    async def publish(
+        self,
+        channel: str,
+        event_type: str,
+        data: dict[str, Any],
+        key: str | None = None,
+        replay: bool = True,
+    ) -> Event:
+        event = Event(self._next_id(), channel, event_type, data, key, replay)
+        EVENTS_PUBLISHED.inc(1.0, event_type)
+        if self.redis is None:
+            self._deliver(event)
+        else:
+            await self.redis.publish(self.redis_channel, event.encode())
+        return event
+
+    def _deliver(self, event: Event) -> None:
+        if event.replay:
+            recent = self._recent.get(event.channel)
+            if recent is None:
+                recent = deque(maxlen=self.replay_size)
+                self._recent.put(event.channel, recent)
+            recent.append(event)
+        for subscription in self._subscribers.get(event.channel, ()):
+            subscription.put(event)
+
+    def replay(self, channel: str, after: int = 0) -> list[Event]:
+        """Buffered events on ``channel`` delivered after event ``after``.
+
+        Every worker sees events in the order of the shared Redis channel, so
+        position in the buffer is the order; ids only decide when ``after``
+        has already left the buffer.
+        """
+        recent = list(self._recent.get(channel) or ())
+        for start, event in enumerate(recent, start=1):
+            if event.id == after:
+                return recent[start:]
+        return [event for event in recent if event.id > after]
+
+    async def disconnect(self, channel: str, tag: str) -> None:
+        """End the streams on ``channel`` that subscribed with ``tag``, on every worker."""
+        await self.publish(channel, STREAM_CLOSE, {"tag": tag}, replay=False)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channel: str, tag: str | None = None) -> AsyncIterator[Subscription]:
+        subscription = Subscription(channel, tag)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        self._count += 1
+        EVENT_SUBSCRIBERS.set(self._count)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers[channel]
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[channel]
+            self._count -= 1
+            EVENT_SUBSCRIBERS.set(self._count)
+
+    async def sse(
+        self,
+        channel: str,
+        after: int = 0,
+        history: bool = False,
+        linger: float = 0.0,
+        tag: str | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Subscribe to ``channel`` and yield server-sent events frames.
+
+        Buffered events are sent first to a reconnecting client
+        (``after`` = its ``Last-Event-ID``), or to any client when
+        ``history`` is set. Subscribing happens inside the generator, so the
+        subscription ends with the response. ``tag`` lets
+        :meth:`disconnect` end the stream.
+        """
+        async with self.subscribe(channel, tag) as subscription:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            backlog = self.replay(channel, after) if after or history else []
+            if backlog:
+                yield b"".join(event.sse() for event in backlog)
+            # Events queued while the backlog was read are in both; only
+            # those can repeat, and only in the first batch
+            sent = {event.id for event in backlog}
+            while not subscription.closed:
+                batch = await subscription.get_batch(KEEPALIVE, linger)
+                fresh = [event for event in batch if event.id not in sent]
+                sent.clear()
+                if fresh:
+                    yield b"".join(event.sse() for event in fresh)
+                elif not subscription.closed:
+                    yield b": keepalive\n\n"
+
+    async def start(self) -> None:
+        """Receive events published by every worker."""
+        if self.redis is None or self._listener is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.redis_channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub: Any) -> None:
+        try:
+            async for message in pubsub.listen():
+                try:
+                    self._deliver(Event.decode(message["data"]))
+                except (ValueError, TypeError):
+                    logger.warning("Dropping malformed event %r", message["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        """Stop listening and end every open stream."""
+        if self._listener is not None:
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.close()
+
+
+_hub: EventHub | None = None
+
+
+async def init_events(redis: Any = None) -> EventHub:
+    """Create the process-wide hub (called from the app lifespan)."""
+    global _hub
+    _hub = EventHub(redis)
+    await _hub.start()
+    return _hub
+
+
+def get_event_hub() -> EventHub:
+    if _hub is None:
+        raise RuntimeError("Events not initialised; call init_events() first")
+    return _hub
+
+
+async def close_events() -> None:
+    global _hub
+    if _hub is not None:
+        await _hub.close()
+        _hub = None
@@ -0,0 +1,403 @@
+"""Data export (TODO 2.4, 5.5): streamed CSV/JSON and background PDF reports.
+
+Streamed exports read from a server-side cursor (``yield_per``) and encode
+rows through generators straight into a chunked response. At any moment the
+worker holds one cursor batch and one output chunk, whatever the size of the
+history. Each stream keeps a pooled connection until the client has read it
+all, so a semaphore caps how many run at once per worker.
+
+PDF reports are paginated and slow to render, so they run as background
+jobs. Progress is a JSON file next to the output in ``export_dir``. Any
+worker that shares the directory (App Service's ``/home`` is shared) can
+answer progress polls and downloads. Progress is also pushed to the user's
+event stream (``GET /api/events``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Literal
+
+from sqlalchemy import Select, func, select
+
+from app.database import Database
+from app.models import ConstructedSentence, FeedbackRecord, UsageAnalytics
+from app.services.events import EXPORT_PROGRESS, EventHub, user_channel
+from app.services.jobs import Job, JobRunner, JobType, Priority
+from app.utils.metrics import REGISTRY
+from app.utils.pdf import PdfWriter
+
+logger = logging.getLogger(__name__)
+
+Dataset = Literal["sentences", "feedback"]
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+# Rows fetched per server-side cursor round trip
+BATCH_ROWS = 1000
+# Bytes buffered before a chunk is handed to the response
+CHUNK_BYTES = 64 * 1024
+# Concurrent streamed exports per worker; each holds a pooled connection
+STREAM_SLOTS = 2
+
+REPORT_JOB = "export.report"
+REPORT_ATTEMPTS = 2
+
+EXPORT_ROWS = REGISTRY.counter("export_rows_total", "Rows written by exports", ["format"])
+EXPORT_JOBS = REGISTRY.counter("export_jobs_total", "Background export jobs by outcome", ["status"])
+
+_DATASETS: dict[str, tuple[Any, tuple[str, ...]]] = {
+    "sentences": (
+        ConstructedSentence,
+        ("created_at", "sentence_text", "object_id", "verb_id", "modifier_id", "spoken"),
+    ),
+    "feedback": (
+        FeedbackRecord,
+        (
+            "created_at",
+            "constructed_sentence",
+            "feedback_type",
+            "object_id",
+            "verb_id",
+            "modifier_id",
+        ),
+    ),
+}
+
+
+def dataset_columns(dataset: Dataset) -> tuple[str, ...]:
+    return _DATASETS[dataset][1]
+
+
+def dataset_query(
+    dataset: Dataset, user_id: int, since: datetime | None = None, until: datetime | None = None
+) -> Select[Any]:
+    """Rows of one dataset for one user, oldest first."""
+    model, columns = _DATASETS[dataset]
+    query = select(*(getattr(model, column) for column in columns)).where(model.user_id == user_id)
+    if since is not None:
+        query = query.where(model.created_at >= since)
+    if until is not None:
+        query = query.where(model.created_at < until)
+    return query.order_by(model.created_at).execution_options(yield_per=BATCH_ROWS)
+
+
+async def stream_rows(database: Database, query: Select[Any]) -> AsyncIterator[Sequence[Any]]:
+    """Yield rows from a server-side cursor, one batch in memory at a time."""
+    async with database.session(read_only=True) as session:
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            for row in partition:
+                yield row
+
+
+def _cell(value: Any) -> Any:
+    # Cells starting with these are evaluated as formulas by spreadsheet apps
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def csv_chunks(
+    rows: AsyncIterator[Sequence[Any]], columns: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """Encode rows as CSV with a header line, in chunks of about CHUNK_BYTES."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    async for row in rows:
+        writer.writerow([_cell(value) for value in row])
+        count += 1
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+    EXPORT_ROWS.inc(count, "csv")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def json_chunks(
+    rows: AsyncIterator[Sequence[Any]], columns: Sequence[str], lines: bool = False
+) -> AsyncIterator[bytes]:
+    """Encode rows as one JSON array, or as NDJSON when ``lines`` is set."""
+    parts: list[str] = [] if lines else ["["]
+    size = len(parts)
+    count = 0
+    async for row in rows:
+        record = json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False)
+        if lines:
+            record += "\n"
+        elif count:
+            record = ",\n" + record
+        parts.append(record)
+        size += len(record)
+        count += 1
+        if size >= CHUNK_BYTES:
+            yield "".join(parts).encode()
+            parts.clear()
+            size = 0
+    if not lines:
+        parts.append("]\n")
+    yield "".join(parts).encode()
+    EXPORT_ROWS.inc(count, "ndjson" if lines else "json")
+
+
+class ExportBusyError(RuntimeError):
+    """All streaming slots in this worker are in use."""
+
+
+class StreamLimiter:
+    """Caps concurrent streamed exports per worker.
+
+    :meth:`reserve` takes a slot without waiting before the response is
+    returned, so a request over the cap gets a 503 rather than a stalled
+    download. The response gives the slot back with :meth:`release` when it
+    ends, however it ends.
+    """
+
+    def __init__(self, slots: int = STREAM_SLOTS) -> None:
+        self.slots = slots
+        self.in_use = 0
+
+    def reserve(self) -> None:
+        if self.in_use >= self.slots:
+            raise ExportBusyError("Too many exports in progress; retry shortly")
+        self.in_use += 1
+
+    def release(self) -> None:
+        self.in_use -= 1
+
+
+STREAMS = StreamLimiter()
+
+
+@dataclass(slots=True)
+class ExportJob:
+    """State of one background export, persisted as ``<id>.json``."""
+
+    id: str
+    user_id: int
+    format: str
+    filename: str
+    status: JobStatus = "queued"
+    rows: int = 0
+    # Estimated from the usage rollups; progress is rows / total_rows
+    total_rows: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        return min(self.rows / self.total_rows, 0.99) if self.total_rows else 0.0
+
+
+class ExportJobs:
+    """Queues report jobs and persists their progress for all workers.
+
+    Rendering runs on the background job system (:mod:`app.services.jobs`)
+    as ``REPORT_JOB``. A retried attempt renders the report again from the
+    start, overwriting the partial file.
+
+    Args:
+        database: Database to read history from
+        root: Directory for job state and output files (shared between workers)
+        runner: Job runner that renders the reports
+        events: Hub that pushes ``export.progress`` to the user, if any
+        retention: Seconds finished jobs and their files are kept
+    """
+
+    # Job files are rewritten at most this often while rendering
+    SAVE_INTERVAL = 0.5
+
+    def __init__(
+        self,
+        database: Database,
+        root: str | Path,
+        runner: JobRunner,
+        events: EventHub | None = None,
+        retention: float = 3600.0,
+    ) -> None:
+        self.database = database
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.runner = runner
+        self.events = events
+        self.retention = retention
+        runner.register(
+            JobType(REPORT_JOB, self._run_job, max_attempts=REPORT_ATTEMPTS, lease=120.0)
+        )
+
+    def _state_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def output_path(self, job: ExportJob) -> Path:
+        return self.root / f"{job.id}-{job.filename}"
+
+    def _save(self, job: ExportJob) -> None:
+        path = self._state_path(job.id)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(job)))
+        os.replace(tmp, path)
+
+    async def _progress(self, job: ExportJob) -> None:
+        """Persist the job's state and push it to the user's event stream."""
+        self._save(job)
+        if self.events is not None:
+            await self.events.publish(
+                user_channel(job.user_id),
+                EXPORT_PROGRESS,
+                {
+                    "id": job.id,
+                    "status": job.status,
+                    "progress": round(job.progress, 3),
+                    "rows": job.rows,
+                    "error": job.error,
+                },
+                key=f"export:{job.id}",
+            )
+
+    def get(self, job_id: str) -> ExportJob | None:
+        try:
+            data = json.loads(self._state_path(job_id).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        return ExportJob(**data)
+
+    def prune(self) -> None:
+        """Delete finished jobs (state and output) older than the retention."""
+        cutoff = time.time() - self.retention
+        for path in self.root.glob("*.json"):
+            job = self.get(path.stem)
+            if job is not None and job.finished_at is not None and job.finished_at < cutoff:
+                self.output_path(job).unlink(missing_ok=True)
+                path.unlink(missing_ok=True)
+
+    async def submit_report(self, user_id: int, since: datetime | None = None) -> ExportJob:
+        """Queue a PDF report of the user's sentence history."""
+        await asyncio.to_thread(self.prune)
+        job = ExportJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            format="pdf",
+            filename=f"speakout-report-{user_id}.pdf",
+        )
+        async with self.database.session(read_only=True) as session:
+            query = select(func.coalesce(func.sum(UsageAnalytics.constructed), 0)).where(
+                UsageAnalytics.user_id == user_id
+            )
+            if since is not None:
+                query = query.where(UsageAnalytics.hour >= since)
+            job.total_rows = int(await session.scalar(query) or 0)
+        self._save(job)
+        await self.runner.enqueue(
+            REPORT_JOB,
+            {"export_id": job.id, "since": since.isoformat() if since else None},
+            priority=Priority.LOW,
+        )
+        return job
+
+    async def _run_job(self, task: Job) -> None:
+        job = self.get(task.payload["export_id"])
+        if job is None or job.status == "done":
+            # Pruned, or a redelivery of a finished report
+            return
+        since = task.payload["since"]
+        job.status, job.rows, job.error = "running", 0, None
+        await self._progress(job)
+        try:
+            await self._render_report(job, datetime.fromisoformat(since) if since else None)
+        except asyncio.CancelledError:
+            # Worker shutting down; the job system hands the report to another worker
+            job.status = "queued"
+            await self._progress(job)
+            raise
+        except Exception as exc:
+            self.output_path(job).unlink(missing_ok=True)
+            if task.attempts < REPORT_ATTEMPTS:
+                job.status, job.error = "queued", "Retrying after an error"
+                await self._progress(job)
+                raise
+            logger.exception("Export job %s failed", job.id)
+            job.status, job.error = "failed", str(exc) or type(exc).__name__
+            job.finished_at = time.time()
+            await self._progress(job)
+            EXPORT_JOBS.inc(1.0, job.status)
+            raise
+        job.status, job.finished_at = "done", time.time()
+        await self._progress(job)
+        EXPORT_JOBS.inc(1.0, job.status)
+
+    async def _render_report(self, job: ExportJob, since: datetime | None) -> None:
+        path = self.output_path(job)
+        last_save = time.monotonic()
+        with path.open("wb") as out:
+            pdf = PdfWriter(out, title="SpeakOut communication report")
+            pdf.line("SpeakOut communication report", size=16, style="bold")
+            generated = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+            pdf.line(f"User {job.user_id} - generated {generated}", size=9)
+            pdf.space(12)
+            pdf.line("Sentence history", size=12, style="bold")
+            query = dataset_query("sentences", job.user_id, since)
+            day = None
+            async for created_at, text, _, _, _, spoken in stream_rows(self.database, query):
+                if created_at.date() != day:
+                    day = created_at.date()
+                    pdf.space(4)
+                    pdf.line(day.isoformat(), style="bold")
+                marker = "" if spoken else "  (not spoken)"
+                pdf.line(f"{created_at:%H:%M}  {text}{marker}", indent=12)
+                job.rows += 1
+                if time.monotonic() - last_save >= self.SAVE_INTERVAL:
+                    # Quick next to row fetches; keep it inline
+                    await self._progress(job)
+                    last_save = time.monotonic()
+            pdf.close()
+        EXPORT_ROWS.inc(job.rows, "pdf")
+
+
+_jobs: ExportJobs | None = None
+
+
+def init_export_jobs(
+    database: Database, root: str | Path, runner: JobRunner, events: EventHub | None = None
+) -> ExportJobs:
+    """Create the process-wide export jobs (called from the app lifespan).
+
+    Registers the report job type, so call it before ``runner.start()``.
+    """
+    global _jobs
+    _jobs = ExportJobs(database, root, runner, events)
+    return _jobs
+
+
+def get_export_jobs() -> ExportJobs:
+    if _jobs is None:
+        raise RuntimeError("Export jobs not initialised; call init_export_jobs() first")
+    return _jobs
+
+
+def close_export_jobs() -> None:
+    global _jobs
+    _jobs = None
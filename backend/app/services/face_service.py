@@ -0,0 +1,89 @@
+"""Known-person face matching (TODO 3.3).
+
+Caregivers enrol the people a user knows with a few face photos, each
+cropped to the face. A local ArcFace-style ONNX model embeds each crop, and
+only the vector is kept (``face_embeddings``), never the photo. A detected
+face is matched by embedding its crop the same way and searching the user's
+gallery (see :mod:`app.services.embeddings`).
+
+Withdrawing consent deletes a person's vectors from the database and,
+immediately, from memory on every worker.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import FaceEmbedding
+from app.services.embeddings import (
+    FACE_MEAN,
+    FACE_STD,
+    GalleryIndex,
+    ImageEmbedder,
+    OnnxImageEmbedder,
+)
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+FACES_MATCHED = REGISTRY.counter("faces_matched_total", "Faces matched", ["outcome"])
+FACE_GALLERY_SIZE = REGISTRY.gauge("face_gallery_faces", "Enrolled faces held in memory")
+
+FACES_TAG_PREFIX = "faces:user:"
+
+
+def faces_tag(user_id: int) -> str:
+    """Invalidation tag telling every worker to drop ``user_id``'s gallery."""
+    return f"{FACES_TAG_PREFIX}{user_id}"
+
+
+class FaceIndex(GalleryIndex):
+    """Per-user galleries of enrolled faces, labelled by person id.
+
+    Args:
+        embedder: Local face embedding model
+        threshold: Cosine similarity above which a face counts as a match
+    """
+
+    def __init__(self, embedder: ImageEmbedder, threshold: float = 0.4) -> None:
+        super().__init__(
+            embedder, threshold, FaceEmbedding, FaceEmbedding.person_id, FACE_GALLERY_SIZE
+        )
+
+    async def match(
+        self, session: AsyncSession, user_id: int, images: Sequence[bytes], limit: int = 1
+    ) -> list[list[tuple[int, float]]]:
+        """Known people matching each face crop, as (person id, score), best first."""
+        gallery = await self.gallery(session, user_id)
+        if not gallery.size:
+            FACES_MATCHED.inc(len(images), "unknown")
+            return [[] for _ in images]
+        results = await self.search(session, user_id, await self.embed(images), limit)
+        for result in results:
+            FACES_MATCHED.inc(1.0, "known" if result else "unknown")
+        return results
+
+
+_index: FaceIndex | None = None
+
+
+def init_face_index(model_path: str | Path, threshold: float = 0.4) -> FaceIndex:
+    """Create the process-wide face index (called from the app lifespan)."""
+    global _index
+    _index = FaceIndex(OnnxImageEmbedder(model_path, FACE_MEAN, FACE_STD), threshold)
+    logger.info("Face matching with %s (dim %d)", _index.embedder.name, _index.embedder.dim)
+    return _index
+
+
+def get_face_index() -> FaceIndex | None:
+    """The face index, or ``None`` when no face model is configured."""
+    return _index
+
+
+def close_face_index() -> None:
+    global _index
+    _index = None
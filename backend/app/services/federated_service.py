@@ -0,0 +1,694 @@
+"""Federated learning aggregation (create_future_md, "Federated Learning").
+
+Devices train their own suggestion ranker (:mod:`app.services.learning_service`)
+on the feedback they see and share only how the model changed: a sparse
+delta ``{(state_key, action): values}`` against the global version they
+started from. The feedback behind it never leaves the device.
+
+Updates are aggregated with FedAvg as they arrive, so a round holds one sum
+per touched entry rather than every update:
+
+- each update is clipped to an L2 norm of its ranker's ``clip_norm``, so no
+  single device can move the model far
+- it is weighted by the interactions it learned from, capped at
+  ``MAX_WEIGHT``, and divided by ``1 + staleness``, the versions published
+  since its base
+- ``weight * delta`` is added to the round's per-entry sums and ``weight``
+  to its total
+
+A round closes once ``round_updates`` updates arrived, or on the
+``round_seconds`` tick if it has at least ``min_updates``. The new model is
+``old + server_lr * sums / total_weight`` and is published as a compact diff
+(:func:`encode_diff`): the new values of the entries that moved by more than
+``PUBLISH_EPSILON``. Devices pull the diff since the version they hold.
+
+Secure aggregation stand-in: the server behaves as if updates were masked
+with pairwise keys (Bonawitz et al.), where it can only learn the sum of a
+round. Updates are folded into the sum on arrival and never stored or
+logged. Contributors are only remembered as a salted hash of their user id,
+to accept one update per user per round however many devices they send
+from. Rounds with fewer than ``min_updates`` are not published, so
+every diff mixes at least that many devices. Real masking changes what
+devices send, not this service's interface. Clipping then moves to the
+device, because a masked update cannot be clipped by the server.
+
+Sums live in Redis when it is configured, so every worker adds to the same
+round, and in the process otherwise. A round whose publish fails is lost;
+its devices' next updates carry what it learned.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import struct
+import time
+import zlib
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Database
+from app.models import FederatedModel
+from app.services.jobs import Job, JobRunner, JobType, Priority
+from app.services.learning_service import Table
+from app.utils.metrics import REGISTRY
+
+PUBLISH_JOB = "federated.publish"
+# Interactions beyond this add no more weight to one update
+MAX_WEIGHT = 200.0
+# Smallest change of an entry worth publishing
+PUBLISH_EPSILON = 1e-4
+MAX_UPDATE_ENTRIES = 20_000
+# Keys and actions are stored as unsigned 32-bit integers
+MAX_ID = 2**32
+
+DIFF_MAGIC = b"FLD1"
+# Magic, channels, base version, version, entries; a zlib stream follows
+DIFF_HEADER = struct.Struct("<4sBIII")
+
+FEDERATED_UPDATES = REGISTRY.counter(
+    "federated_updates_total", "Device model updates by outcome", ["ranker", "outcome"]
+)
+FEDERATED_CLIPPED = REGISTRY.counter(
+    "federated_clipped_total", "Device updates scaled down to the clip norm", ["ranker"]
+)
+FEDERATED_ROUNDS = REGISTRY.counter(
+    "federated_rounds_total", "Aggregation rounds published", ["ranker"]
+)
+FEDERATED_VERSION = REGISTRY.gauge(
+    "federated_model_version", "Latest global model version seen by this worker", ["ranker"]
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RankerSpec:
+    """How one ranker's entries are aggregated.
+
+    Attributes:
+        channels: Values per entry: Q-learning has one (q), the bandit two
+            (successes, pulls)
+        clip_norm: L2 norm an update is clipped to
+        non_negative: Values cannot drop below zero (counts)
+    """
+
+    channels: int
+    clip_norm: float
+    non_negative: bool = False
+
+
+RANKERS: dict[str, RankerSpec] = {
+    # Rewards are at most 10 and alpha 0.1: one interaction moves a q by 1
+    "qlearning": RankerSpec(channels=1, clip_norm=10.0),
+    "bandit": RankerSpec(channels=2, clip_norm=20.0, non_negative=True),
+}
+
+
+class UpdateConflictError(RuntimeError):
+    """The update cannot join the current round: too stale, or the user
+    already contributed to it."""
+
+
+@dataclass(slots=True)
+class ModelDiff:
+    """A decoded diff: new values of the entries changed since ``base_version``."""
+
+    base_version: int
+    version: int
+    channels: int
+    entries: Table
+
+
+def _spec(ranker: str) -> RankerSpec:
+    spec = RANKERS.get(ranker)
+    if spec is None:
+        raise ValueError(f"Unknown ranker {ranker!r}")
+    return spec
+
+
+def encode_diff(base_version: int, version: int, channels: int, entries: Table) -> bytes:
+    """Pack entries as a compact diff.
+
+    Entries are sorted by (state key, action). The zlib stream holds the
+    state keys delta-encoded as ``uint32`` (runs of one state compress to
+    zeros), then the actions as ``uint32``, then the values as ``float32``,
+    one row of ``channels`` per entry.
+    """
+    count = len(entries)
+    coords = np.array(sorted(entries), dtype=np.uint32).reshape(count, 2)
+    values = np.array([entries[key, action] for key, action in coords.tolist()], np.float32)
+    keys = np.diff(coords[:, 0], prepend=np.uint32(0))
+    body = keys.tobytes() + coords[:, 1].tobytes() + values.reshape(count, channels).tobytes()
+    header = DIFF_HEADER.pack(DIFF_MAGIC, channels, base_version, version, count)
+    return header + zlib.compress(body, 6)
+
+
+def decode_diff(data: bytes) -> ModelDiff:
+    """Unpack :func:`encode_diff` output.
+
+    Raises:
+        ValueError: Not a diff, or truncated
+    """
+    if len(data) < DIFF_HEADER.size:
+        raise ValueError("Truncated model diff")
+    magic, channels, base_version, version, count = DIFF_HEADER.unpack_from(data)
+    if magic != DIFF_MAGIC:
+        raise ValueError("Not a model diff")
+    start = DIFF_HEADER.size
+    try:
+        body = zlib.decompress(data[start:])
+    except zlib.error as exc:
+        raise ValueError("Corrupt model diff") from exc
+    if len(body) != count * 4 * (2 + channels):
+        raise ValueError("Truncated model diff")
+    end = count * 4
+    keys = np.cumsum(np.frombuffer(body, np.uint32, count), dtype=np.uint32)
+    actions = np.frombuffer(body, np.uint32, count, end)
+    values = np.frombuffer(body, np.float32, count * channels, 2 * end).reshape(count, channels)
+    entries: Table = {
+        (key, action): tuple(row)
+        for key, action, row in zip(keys.tolist(), actions.tolist(), values.tolist())
+    }
+    return ModelDiff(base_version, version, channels, entries)
+
+
+def parse_update(ranker: str, rows: Iterable[Sequence[float]]) -> Table:
+    """Read an update's ``[state_key, action, value, ...]`` rows.
+
+    Raises:
+        ValueError: Unknown ranker, or a malformed or repeated row
+    """
+    spec = _spec(ranker)
+    width = 2 + spec.channels
+    entries: Table = {}
+    for row in rows:
+        if len(entries) == MAX_UPDATE_ENTRIES:
+            raise ValueError(f"Updates have at most {MAX_UPDATE_ENTRIES} entries")
+        if len(row) != width:
+            raise ValueError(f"{ranker} rows are [state_key, action, {spec.channels} values]")
+        if not all(math.isfinite(value) for value in row):
+            raise ValueError("Update rows must be finite numbers")
+        key, action, *values = row
+        if not (key == int(key) and action == int(action)):
+            raise ValueError("state_key and action must be integers")
+        if not (0 <= key < MAX_ID and 0 <= action < MAX_ID):
+            raise ValueError("state_key and action must fit in 32 bits")
+        coord = (int(key), int(action))
+        if coord in entries:
+            raise ValueError(f"Entry {coord} appears twice")
+        entries[coord] = tuple(values)
+    return entries
+
+
+def clip_update(entries: Table, clip_norm: float) -> tuple[Table, bool]:
+    """Scale ``entries`` down to an L2 norm of at most ``clip_norm``.
+
+    Returns:
+        The clipped entries and whether they had to be scaled
+    """
+    norm = math.sqrt(sum(value * value for values in entries.values() for value in values))
+    if norm <= clip_norm:
+        return entries, False
+    scale = clip_norm / norm
+    return {coord: tuple(v * scale for v in values) for coord, values in entries.items()}, True
+
+
+def update_weight(samples: int, staleness: int) -> float:
+    """FedAvg weight of an update learned from ``samples`` interactions."""
+    return min(float(samples), MAX_WEIGHT) / (1 + staleness)
+
+
+def model_delta(local: Table, base: Table) -> Table:
+    """What a device sends: its entries' change from the global ``base``."""
+    delta: Table = {}
+    for coord, values in local.items():
+        old = base.get(coord)
+        change = values if old is None else tuple(v - o for v, o in zip(values, old))
+        if any(change):
+            delta[coord] = change
+    return delta
+
+
+@dataclass(slots=True)
+class RoundSum:
+    """The weighted sums of one round's updates.
+
+    Attributes:
+        updates: Updates added, one per contributor
+        weight: Total weight
+        opened_at: When the first update arrived (epoch seconds)
+        sums: Weighted sum of the deltas per entry
+    """
+
+    updates: int = 0
+    weight: float = 0.0
+    opened_at: float = 0.0
+    sums: dict[tuple[int, int], list[float]] = field(default_factory=dict)
+
+
+def aggregate(
+    table: Mapping[tuple[int, int], Sequence[float]],
+    round_sum: RoundSum,
+    spec: RankerSpec,
+    server_lr: float = 1.0,
+) -> Table:
+    """The entries a round changes and their new values.
+
+    Entries that moved by ``PUBLISH_EPSILON`` or less are left out.
+    """
+    changed: Table = {}
+    if round_sum.weight <= 0:
+        return changed
+    step = server_lr / round_sum.weight
+    zeros = (0.0,) * spec.channels
+    for coord, sums in round_sum.sums.items():
+        old = table.get(coord, zeros)
+        new = [o + step * s for o, s in zip(old, sums)]
+        if spec.non_negative:
+            new = [max(value, 0.0) for value in new]
+        if max(abs(n - o) for n, o in zip(new, old)) > PUBLISH_EPSILON:
+            changed[coord] = tuple(new)
+    return changed
+
+
+class Accumulator(Protocol):
+    """Where rounds are summed while they are open."""
+
+    async def add(self, ranker: str, device: str, weight: float, entries: Table) -> int:
+        """Fold a clipped update into the open round.
+
+        ``device`` identifies the contributor: a user hash, or a simulated
+        device.
+
+        Returns:
+            Updates in the round including this one, or 0 if ``device``
+            already contributed to it
+        """
+        ...
+
+    async def pending(self, ranker: str) -> RoundSum:
+        """The open round's counts, without its sums."""
+        ...
+
+    async def take(self, ranker: str, min_updates: int) -> RoundSum | None:
+        """Close the open round and return it, if it has ``min_updates``."""
+        ...
+
+
+class MemoryAccumulator:
+    """Rounds summed in this process; for a single worker."""
+
+    def __init__(self) -> None:
+        self._rounds: dict[str, RoundSum] = {}
+        self._devices: dict[str, set[str]] = {}
+
+    async def add(self, ranker: str, device: str, weight: float, entries: Table) -> int:
+        devices = self._devices.setdefault(ranker, set())
+        if device in devices:
+            return 0
+        devices.add(device)
+        round_sum = self._rounds.get(ranker)
+        if round_sum is None:
+            round_sum = self._rounds[ranker] = RoundSum(opened_at=time.time())
+        sums = round_sum.sums
+        for coord, values in entries.items():
+            current = sums.get(coord)
+            if current is None:
+                sums[coord] = [weight * v for v in values]
+            else:
+                for i, v in enumerate(values):
+                    current[i] += weight * v
+        round_sum.weight += weight
+        round_sum.updates += 1
+        return round_sum.updates
+
+    async def pending(self, ranker: str) -> RoundSum:
+        round_sum = self._rounds.get(ranker)
+        if round_sum is None:
+            return RoundSum()
+        return RoundSum(round_sum.updates, round_sum.weight, round_sum.opened_at)
+
+    async def take(self, ranker: str, min_updates: int) -> RoundSum | None:
+        round_sum = self._rounds.get(ranker)
+        if round_sum is None or round_sum.updates < min_updates:
+            return None
+        del self._rounds[ranker]
+        self._devices.pop(ranker, None)
+        return round_sum
+
+
+# KEYS: sums, meta, devices; ARGV: device, weight, now, then field/value pairs
+_ADD = """
+if redis.call('SADD', KEYS[3], ARGV[1]) == 0 then
+    return 0
+end
+for i = 4, #ARGV, 2 do
+    redis.call('HINCRBYFLOAT', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('HINCRBYFLOAT', KEYS[2], 'weight', ARGV[2])
+redis.call('HSETNX', KEYS[2], 'opened_at', ARGV[3])
+return redis.call('HINCRBY', KEYS[2], 'updates', 1)
+"""
+
+# KEYS: sums, meta, devices; ARGV: min_updates
+_TAKE = """
+local updates = tonumber(redis.call('HGET', KEYS[2], 'updates') or '0')
+if updates < tonumber(ARGV[1]) then
+    return false
+end
+local taken = {redis.call('HGETALL', KEYS[2]), redis.call('HGETALL', KEYS[1])}
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+return taken
+"""
+
+
+class RedisAccumulator:
+    """Rounds summed in Redis, shared by every worker.
+
+    Per ranker there is a hash of sums (one field per entry and channel,
+    ``key:action:channel``), a hash of the round's counts and a set of the
+    devices in it. Adding and taking are Lua scripts, so an update lands in
+    exactly one round.
+
+    Args:
+        redis: ``redis.asyncio`` client
+        namespace: Key prefix
+    """
+
+    def __init__(self, redis: Any, namespace: str = "federated") -> None:
+        self.redis = redis
+        self.prefix = f"{namespace}:"
+        self._add = redis.register_script(_ADD)
+        self._take = redis.register_script(_TAKE)
+
+    def _keys(self, ranker: str) -> list[str]:
+        return [f"{self.prefix}{ranker}:{part}" for part in ("sums", "meta", "devices")]
+
+    async def add(self, ranker: str, device: str, weight: float, entries: Table) -> int:
+        args: list[Any] = [device, repr(weight), repr(time.time())]
+        for (key, action), values in entries.items():
+            for channel, value in enumerate(values):
+                args += (f"{key}:{action}:{channel}", repr(weight * value))
+        return int(await self._add(keys=self._keys(ranker), args=args))
+
+    @staticmethod
+    def _round(meta: Mapping[bytes, bytes]) -> RoundSum:
+        return RoundSum(
+            int(meta.get(b"updates", 0)),
+            float(meta.get(b"weight", 0.0)),
+            float(meta.get(b"opened_at", 0.0)),
+        )
+
+    async def pending(self, ranker: str) -> RoundSum:
+        return self._round(await self.redis.hgetall(self._keys(ranker)[1]))
+
+    async def take(self, ranker: str, min_updates: int) -> RoundSum | None:
+        taken = await self._take(keys=self._keys(ranker), args=[min_updates])
+        if not taken:
+            return None
+        meta, flat = taken
+        round_sum = self._round(dict(zip(meta[::2], meta[1::2])))
+        channels = _spec(ranker).channels
+        for name, value in zip(flat[::2], flat[1::2]):
+            key, action, channel = (int(part) for part in name.split(b":"))
+            sums = round_sum.sums.get((key, action))
+            if sums is None:
+                sums = round_sum.sums[key, action] = [0.0] * channels
+            sums[channel] = float(value)
+        return round_sum
+
+
+@dataclass(slots=True)
+class GlobalModel:
+    """This worker's copy of a ranker's latest published version."""
+
+    ranker: str
+    version: int = 0
+    table: Table = field(default_factory=dict)
+
+
+class FederatedAggregator:
+    """Collects device updates and publishes global model versions.
+
+    Args:
+        database: Where published versions are stored
+        accumulator: Where open rounds are summed
+        runner: Job runner that closes rounds in the background
+        round_updates: Updates that close a round straight away
+        min_updates: Fewest updates a published round may have
+        round_seconds: Seconds between closing whatever round is open
+        max_staleness: Versions an update's base may lag behind
+        server_lr: Server learning rate; 1 is plain FedAvg
+        salt: Mixed into user hashes
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        accumulator: Accumulator,
+        runner: JobRunner,
+        round_updates: int = 100,
+        min_updates: int = 10,
+        round_seconds: float = 600.0,
+        max_staleness: int = 4,
+        server_lr: float = 1.0,
+        salt: bytes = b"",
+    ) -> None:
+        if not 1 <= min_updates <= round_updates:
+            raise ValueError("Need 1 <= min_updates <= round_updates")
+        self.database = database
+        self.accumulator = accumulator
+        self.runner = runner
+        self.round_updates = round_updates
+        self.min_updates = min_updates
+        self.max_staleness = max_staleness
+        self.server_lr = server_lr
+        self.salt = salt
+        self._models = {name: GlobalModel(name) for name in RANKERS}
+        self._locks = {name: asyncio.Lock() for name in RANKERS}
+        runner.register(JobType(PUBLISH_JOB, self._run_publish, lease=120.0))
+        runner.every(PUBLISH_JOB, round_seconds)
+
+    async def _refresh(self, session: AsyncSession, ranker: str) -> GlobalModel:
+        """Apply versions other workers published since this one last looked."""
+        model = self._models[ranker]
+        rows = await session.execute(
+            select(FederatedModel.version, FederatedModel.payload)
+            .where(FederatedModel.ranker == ranker, FederatedModel.version > model.version)
+            .order_by(FederatedModel.version)
+        )
+        for version, payload in rows:
+            # Another refresh of this worker may have got there first
+            if version == model.version + 1:
+                model.table.update(decode_diff(payload).entries)
+                model.version = version
+        FEDERATED_VERSION.set(model.version, ranker)
+        return model
+
+    async def model(self, ranker: str, read_only: bool = True) -> GlobalModel:
+        """The latest published version of ``ranker``'s model.
+
+        Raises:
+            ValueError: Unknown ranker
+        """
+        _spec(ranker)
+        async with self.database.session(read_only=read_only) as session:
+            return await self._refresh(session, ranker)
+
+    async def diff(self, ranker: str, since: int) -> bytes | None:
+        """The diff from version ``since`` to the latest, or None if current.
+
+        ``since=0`` gives the whole model.
+
+        Raises:
+            ValueError: Unknown ranker, or a version not published yet
+        """
+        spec = _spec(ranker)
+        async with self.database.session(read_only=True) as session:
+            model = await self._refresh(session, ranker)
+            if since == model.version:
+                return None
+            if since > model.version:
+                raise ValueError(f"Version {since} is not published yet")
+            if since == 0:
+                return encode_diff(0, model.version, spec.channels, model.table)
+            rows = await session.scalars(
+                select(FederatedModel.payload)
+                .where(
+                    FederatedModel.ranker == ranker,
+                    FederatedModel.version > since,
+                    FederatedModel.version <= model.version,
+                )
+                .order_by(FederatedModel.version)
+            )
+            entries: Table = {}
+            for payload in rows:
+                entries.update(decode_diff(payload).entries)
+        return encode_diff(since, model.version, spec.channels, entries)
+
+    def _user_hash(self, ranker: str, user_id: int) -> str:
+        data = f"{ranker}\x1f{user_id}".encode()
+        return hashlib.blake2b(data, key=self.salt[:64], digest_size=12).hexdigest()
+
+    async def submit(
+        self,
+        ranker: str,
+        user_id: int,
+        base_version: int,
+        samples: int,
+        rows: Iterable[Sequence[float]],
+    ) -> tuple[int, int]:
+        """Add a device's update to the open round.
+
+        Args:
+            ranker: ``"qlearning"`` or ``"bandit"``
+            user_id: Authenticated sender; one update per user per round
+            base_version: Global version the device trained from
+            samples: Interactions the device learned from since then
+            rows: The delta as ``[state_key, action, value, ...]`` rows
+
+        Returns:
+            The latest version and the updates now in the round
+
+        Raises:
+            ValueError: Malformed update, or an unpublished base version
+            UpdateConflictError: Base too stale, or the user is already in
+                the round
+        """
+        entries = parse_update(ranker, rows)
+        spec = RANKERS[ranker]
+        model = await self.model(ranker)
+        if base_version > model.version:
+            # The replica may lag behind the version the device pulled
+            model = await self.model(ranker, read_only=False)
+            if base_version > model.version:
+                raise ValueError(f"Version {base_version} is not published yet")
+        staleness = model.version - base_version
+        if staleness > self.max_staleness:
+            FEDERATED_UPDATES.inc(1.0, ranker, "stale")
+            raise UpdateConflictError(
+                f"Update is {staleness} versions behind {model.version}; pull and retrain"
+            )
+        entries, clipped = clip_update(entries, spec.clip_norm)
+        if clipped:
+            FEDERATED_CLIPPED.inc(1.0, ranker)
+        weight = update_weight(samples, staleness)
+        updates = await self.accumulator.add(
+            ranker, self._user_hash(ranker, user_id), weight, entries
+        )
+        if updates == 0:
+            FEDERATED_UPDATES.inc(1.0, ranker, "duplicate")
+            raise UpdateConflictError("Already contributed to this round")
+        FEDERATED_UPDATES.inc(1.0, ranker, "accepted")
+        if updates >= self.round_updates:
+            await self.runner.enqueue(
+                PUBLISH_JOB,
+                {"ranker": ranker},
+                priority=Priority.HIGH,
+                idempotency_key=f"{PUBLISH_JOB}:{ranker}:{model.version}",
+            )
+        return model.version, updates
+
+    async def pending(self, ranker: str) -> RoundSum:
+        """The open round's counts.
+
+        Raises:
+            ValueError: Unknown ranker
+        """
+        _spec(ranker)
+        return await self.accumulator.pending(ranker)
+
+    async def publish(self, ranker: str) -> int | None:
+        """Close the open round and publish the version it makes.
+
+        Returns:
+            The new version, or None if the round is below ``min_updates``
+        """
+        spec = _spec(ranker)
+        async with self._locks[ranker]:
+            round_sum = await self.accumulator.take(ranker, self.min_updates)
+            if round_sum is None:
+                return None
+            while True:
+                async with self.database.session() as session:
+                    model = await self._refresh(session, ranker)
+                    version = model.version + 1
+                    changed = aggregate(model.table, round_sum, spec, self.server_lr)
+                    payload = encode_diff(model.version, version, spec.channels, changed)
+                    inserted = await session.scalar(
+                        insert(FederatedModel)
+                        .values(
+                            ranker=ranker,
+                            version=version,
+                            updates=round_sum.updates,
+                            weight=round_sum.weight,
+                            entries=len(changed),
+                            payload=payload,
+                        )
+                        .on_conflict_do_nothing()
+                        .returning(FederatedModel.version)
+                    )
+                if inserted is not None:
+                    break
+                # Another worker published this version first; build on top of it
+            # Values as devices decode them, so every worker holds the same model
+            model.table.update(decode_diff(payload).entries)
+            model.version = version
+        FEDERATED_ROUNDS.inc(1.0, ranker)
+        FEDERATED_VERSION.set(version, ranker)
+        return version
+
+    async def _run_publish(self, job: Job) -> None:
+        rankers = [job.payload["ranker"]] if "ranker" in job.payload else list(RANKERS)
+        for ranker in rankers:
+            await self.publish(ranker)
+
+
+_aggregator: FederatedAggregator | None = None
+
+
+def init_federated(
+    database: Database,
+    runner: JobRunner,
+    redis: Any | None = None,
+    round_updates: int = 100,
+    min_updates: int = 10,
+    round_seconds: float = 600.0,
+    max_staleness: int = 4,
+    salt: bytes = b"",
+) -> FederatedAggregator:
+    """Create the process-wide aggregator (called from the app lifespan).
+
+    Sums rounds in Redis when a client is given, in the process otherwise.
+    Registers the publish job type, so call it before ``runner.start()``.
+    """
+    global _aggregator
+    accumulator: Accumulator = RedisAccumulator(redis) if redis is not None else MemoryAccumulator()
+    _aggregator = FederatedAggregator(
+        database,
+        accumulator,
+        runner,
+        round_updates,
+        min_updates,
+        round_seconds,
+        max_staleness,
+        salt=salt,
+    )
+    return _aggregator
+
+
+def get_federated() -> FederatedAggregator:
+    if _aggregator is None:
+        raise RuntimeError("Federated learning not initialised; call init_federated() first")
+    return _aggregator
+
+
+def close_federated() -> None:
+    global _aggregator
+    _aggregator = None
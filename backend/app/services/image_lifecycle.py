@@ -0,0 +1,230 @@
+"""24-hour image deletion (NFR-5, TODO 1.6).
+
+Every upload gets a row in ``uploaded_images`` whose ``expiry_hour`` puts it
+in an hourly bucket. :class:`ImageExpiryScheduler` walks the buckets oldest
+first and deletes expired images in batches. Each batch claims up to
+``batch_size`` rows with ``FOR UPDATE SKIP LOCKED``, deletes their blobs in
+one batch call, then deletes the rows in the same transaction. Blob deletion
+is idempotent, so:
+
+* a crash after the blobs are gone but before the commit rolls the row
+  deletes back, and the next pass deletes the already-missing blobs and
+  commits;
+* several workers can run the scheduler at once without doing the same
+  batch twice.
+
+Rows whose blob delete failed stay in place with a ``retry_at`` that backs
+off exponentially (up to :data:`RETRY_MAX`), so a blob that keeps failing is
+retried without holding the head of the expiry index and starving newer
+expirations. Deletion lag (time between ``expires_at`` and the row's removal) is
+recorded per image, and the backlog of overdue images is exported as gauges,
+so the privacy SLA can be alerted on.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import ColumnElement, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Database
+from app.models import UploadedImage
+from app.services.blob_store import BlobStore
+from app.utils.metrics import REGISTRY
+from app.utils.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Seconds; the SLA cares about minutes-to-hours, not request latencies
+LAG_BUCKETS: tuple[float, ...] = (1, 10, 60, 300, 900, 1800, 3600, 7200, 21600, 86400)
+
+# Backoff after a failed blob delete: RETRY_BASE doubling per attempt
+RETRY_BASE = timedelta(minutes=1)
+RETRY_MAX = timedelta(hours=1)
+
+IMAGES_DELETED = REGISTRY.counter("images_deleted_total", "Expired images deleted")
+IMAGE_DELETE_FAILURES = REGISTRY.counter(
+    "image_delete_failures_total", "Expired images whose blob delete failed (retried)"
+)
+IMAGE_DELETION_LAG = REGISTRY.histogram(
+    "image_deletion_lag_seconds", "Time from expires_at to deletion", buckets=LAG_BUCKETS
+)
+IMAGE_OVERDUE = REGISTRY.gauge("images_overdue", "Expired images not yet deleted")
+IMAGE_OVERDUE_AGE = REGISTRY.gauge(
+    "images_overdue_oldest_seconds", "How long the oldest expired image has been overdue"
+)
+
+
+def expiry_hour(moment: datetime) -> int:
+    """Return the hourly expiry bucket (hours since the Unix epoch) of ``moment``."""
+    return int(moment.timestamp() // 3600)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Return how long to wait before retrying after ``attempts`` failed deletes."""
+    return min(RETRY_BASE * 2 ** min(attempts - 1, 16), RETRY_MAX)
+
+
+async def register_image(
+    session: AsyncSession,
+    store: BlobStore,
+    user_id: int,
+    data: bytes,
+    content_type: str,
+    retention: timedelta = timedelta(hours=24),
+) -> UploadedImage:
+    """Store an uploaded image and schedule its deletion.
+
+    The row is flushed before the blob is written, so a failed upload rolls
+    back and a crash after the upload leaves a row the scheduler will clean up.
+    """
+    image_id = uuid.uuid4().hex
+    expires_at = datetime.now(timezone.utc) + retention
+    image = UploadedImage(
+        id=image_id,
+        user_id=user_id,
+        blob_name=f"{user_id}/{image_id}",
+        content_type=content_type,
+        size_bytes=len(data),
+        expires_at=expires_at,
+        expiry_hour=expiry_hour(expires_at),
+    )
+    session.add(image)
+    await session.flush()
+    with span("upload", bytes=len(data)):
+        await store.put(image.blob_name, data, content_type)
+    return image
+
+
+class ImageExpiryScheduler:
+    """Deletes expired images in batches.
+
+    Args:
+        database: Database whose primary holds ``uploaded_images``
+        store: Blob store holding the image data
+        batch_size: Images claimed per transaction
+        interval: Seconds between passes when running in the background
+    """
+
+    def __init__(
+        self, database: Database, store: BlobStore, batch_size: int = 256, interval: float = 60.0
+    ) -> None:
+        self.database = database
+        self.store = store
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    @staticmethod
+    def _expired(now: datetime) -> tuple[ColumnElement[bool], ColumnElement[bool]]:
+        # The bucket bound lets Postgres range-scan the expiry index; the
+        # exact timestamp filters the current, partly expired bucket
+        return (
+            UploadedImage.expiry_hour <= expiry_hour(now),
+            UploadedImage.expires_at <= now,
+        )
+
+    async def _delete_batch(self, now: datetime) -> tuple[int, int]:
+        async with self.database.session() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        UploadedImage.id,
+                        UploadedImage.blob_name,
+                        UploadedImage.expires_at,
+                        UploadedImage.delete_attempts,
+                    )
+                    .where(
+                        *self._expired(now),
+                        or_(UploadedImage.retry_at.is_(None), UploadedImage.retry_at <= now),
+                    )
+                    .order_by(UploadedImage.expiry_hour)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+            if not rows:
+                return 0, 0
+            failed = set(await self.store.delete_many([row.blob_name for row in rows]))
+            done = [row for row in rows if row.blob_name not in failed]
+            if done:
+                await session.execute(
+                    delete(UploadedImage).where(UploadedImage.id.in_([row.id for row in done]))
+                )
+            if failed:
+                retries = []
+                for row in rows:
+                    if row.blob_name in failed:
+                        attempts = row.delete_attempts + 1
+                        retry_at = now + retry_delay(attempts)
+                        retries.append(
+                            {"id": row.id, "delete_attempts": attempts, "retry_at": retry_at}
+                        )
+                await session.execute(update(UploadedImage), retries)
+        deleted_at = datetime.now(timezone.utc)
+        for row in done:
+            IMAGE_DELETION_LAG.observe((deleted_at - row.expires_at).total_seconds())
+        IMAGES_DELETED.inc(len(done))
+        if failed:
+            IMAGE_DELETE_FAILURES.inc(len(failed))
+        return len(done), len(failed)
+
+    async def run_once(self, now: datetime | None = None) -> int:
+        """Delete everything expired as of ``now``; return the number deleted.
+
+        Stops after the first short batch. Rows whose blobs could not be
+        deleted are backed off in the same transaction, so later batches move
+        on to newer expirations instead of claiming them again.
+        """
+        now = now or datetime.now(timezone.utc)
+        total = failed = 0
+        while True:
+            deleted, batch_failed = await self._delete_batch(now)
+            total += deleted
+            failed += batch_failed
+            if deleted + batch_failed < self.batch_size:
+                break
+        if failed:
+            logger.warning("%d expired image blobs could not be deleted", failed)
+        await self.report_backlog()
+        return total
+
+    async def report_backlog(self, now: datetime | None = None) -> tuple[int, float]:
+        """Update and return the overdue image count and oldest overdue age."""
+        now = now or datetime.now(timezone.utc)
+        async with self.database.session() as session:
+            count, oldest = (
+                await session.execute(
+                    select(func.count(), func.min(UploadedImage.expires_at)).where(
+                        *self._expired(now)
+                    )
+                )
+            ).one()
+        age = (now - oldest).total_seconds() if oldest is not None else 0.0
+        IMAGE_OVERDUE.set(count)
+        IMAGE_OVERDUE_AGE.set(age)
+        return count, age
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Image expiry pass failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
@@ -0,0 +1,657 @@
+"""Background jobs (TODO 3.1; extract.md "Celery + Redis").
+
+Work that should not hold a request open (image analysis, model updates,
+report rendering) is enqueued as a :class:`Job` and run by a
+:class:`JobRunner` in every worker process. The runner claims jobs from a
+broker:
+
+* :class:`RedisBroker` shares the queues between workers and instances
+  through the Redis already used by the cache;
+* :class:`MemoryBroker` keeps them in the process, so a single-node install
+  needs no broker. Queued jobs are lost if the process exits.
+
+Delivery is at least once. A claimed job holds a lease that the runner
+extends while the handler runs. If the worker dies, the lease expires and the
+job returns to its queue, so handlers must be idempotent. A failing job is
+retried with exponential backoff up to ``max_attempts``, then marked
+``failed``. Jobs enqueued with an ``idempotency_key`` are deduplicated: while
+the first job is known, enqueueing the same key returns it instead.
+
+Within a type, jobs run by priority, then oldest first. Each type has a
+concurrency limit per worker, so a burst of uploads cannot starve report
+rendering and the other way round.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Literal, Protocol
+
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+JobState = Literal["queued", "running", "done", "failed"]
+
+
+class Priority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+# Ready-queue rank is priority * PRIORITY_STRIDE + enqueue time (epoch seconds)
+PRIORITY_STRIDE = 1e10
+# Seconds an idempotency key keeps pointing at its job
+IDEMPOTENCY_TTL = 24 * 3600
+# Seconds finished jobs stay readable
+JOB_RETENTION = 24 * 3600
+
+JOBS_ENQUEUED = REGISTRY.counter("jobs_enqueued_total", "Jobs enqueued", ["type"])
+JOBS_FINISHED = REGISTRY.counter(
+    "jobs_finished_total", "Job attempts by outcome (done, retried, failed)", ["type", "outcome"]
+)
+JOBS_RUNNING = REGISTRY.gauge("jobs_running", "Jobs running in this worker", ["type"])
+JOBS_QUEUED = REGISTRY.gauge("jobs_queued", "Jobs waiting to run", ["type"])
+# Seconds; jobs range from sub-second detections to minutes-long reports
+JOB_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900)
+
+JOB_WAIT = REGISTRY.histogram(
+    "job_wait_seconds", "Time from enqueue to first claim", ["type"], JOB_BUCKETS
+)
+JOB_DURATION = REGISTRY.histogram("job_duration_seconds", "Handler run time", ["type"], JOB_BUCKETS)
+
+
+@dataclass(slots=True)
+class Job:
+    """One unit of background work.
+
+    Attributes:
+        id: Job id
+        type: Name of the :class:`JobType` that runs it
+        payload: JSON-serialisable handler arguments
+        priority: :class:`Priority`; lower runs first
+        idempotency_key: Deduplication key, if any
+        status: ``queued``, ``running``, ``done`` or ``failed``
+        attempts: Claims so far, including the current one
+        error: Last failure message
+        created_at: Enqueue time (epoch seconds)
+        finished_at: When the job reached ``done`` or ``failed``
+    """
+
+    id: str
+    type: str
+    payload: dict[str, Any] = field(default_factory=dict)
+    priority: int = Priority.NORMAL
+    idempotency_key: str | None = None
+    status: JobState = "queued"
+    attempts: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def rank(self) -> float:
+        return self.priority * PRIORITY_STRIDE + self.created_at
+
+    def to_fields(self) -> dict[str, str]:
+        """Flatten to strings for a Redis hash."""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "payload": json.dumps(self.payload),
+            "priority": str(int(self.priority)),
+            "rank": repr(self.rank),
+            "idempotency_key": self.idempotency_key or "",
+            "status": self.status,
+            "attempts": str(self.attempts),
+            "error": self.error or "",
+            "created_at": repr(self.created_at),
+            "finished_at": "" if self.finished_at is None else repr(self.finished_at),
+        }
+
+    @classmethod
+    def from_fields(cls, fields: Mapping[str, str]) -> Job:
+        return cls(
+            id=fields["id"],
+            type=fields["type"],
+            payload=json.loads(fields["payload"]),
+            priority=int(fields["priority"]),
+            idempotency_key=fields["idempotency_key"] or None,
+            status=fields["status"],  # type: ignore[arg-type]
+            attempts=int(fields["attempts"]),
+            error=fields["error"] or None,
+            created_at=float(fields["created_at"]),
+            finished_at=float(fields["finished_at"]) if fields["finished_at"] else None,
+        )
+
+
+Handler = Callable[[Job], Awaitable[None]]
+
+
+@dataclass(slots=True, frozen=True)
+class JobType:
+    """A kind of job and how to run it.
+
+    Attributes:
+        name: Type name used when enqueueing
+        handler: Coroutine run for each job; raising schedules a retry
+        concurrency: Jobs of this type run at once per worker
+        max_attempts: Attempts before the job is marked ``failed``
+        lease: Seconds a claim lasts without renewal; the runner renews it
+            every third of this while the handler runs
+        retry_delay: Backoff before the first retry, doubled on each retry
+    """
+
+    name: str
+    handler: Handler
+    concurrency: int = 1
+    max_attempts: int = 3
+    lease: float = 60.0
+    retry_delay: float = 5.0
+
+
+class JobBroker(Protocol):
+    """Queue storage shared by the runners that use it."""
+
+    async def enqueue(self, job: Job, delay: float = 0.0) -> Job:
+        """Queue ``job``, or return the existing job with the same idempotency key."""
+        ...
+
+    async def claim(self, job_type: str, lease: float) -> Job | None:
+        """Take the next ready job of a type and lease it for ``lease`` seconds."""
+        ...
+
+    async def touch(self, job: Job, lease: float) -> None:
+        """Extend a held lease."""
+        ...
+
+    async def complete(self, job: Job) -> None: ...
+
+    async def retry(self, job: Job, delay: float, error: str | None = None) -> None:
+        """Release a claimed job back to its queue after ``delay`` seconds."""
+        ...
+
+    async def fail(self, job: Job, error: str) -> None: ...
+
+    async def get(self, job_id: str) -> Job | None: ...
+
+    async def recover(self) -> int:
+        """Requeue jobs whose lease expired; returns how many."""
+        ...
+
+    async def depth(self, job_type: str) -> int:
+        """Jobs of a type waiting to run, including delayed retries."""
+        ...
+
+    async def wait(self, timeout: float) -> None:
+        """Sleep until work may be available, at most ``timeout`` seconds."""
+        ...
+
+
+class MemoryBroker:
+    """In-process broker for single-node installs and development."""
+
+    def __init__(self, retention: float = JOB_RETENTION) -> None:
+        self.retention = retention
+        self._jobs: dict[str, Job] = {}
+        self._ready: defaultdict[str, list[tuple[float, str]]] = defaultdict(list)
+        # (available_at, job id)
+        self._delayed: list[tuple[float, str]] = []
+        self._leases: dict[str, float] = {}
+        # idempotency key -> (job id, expires_at)
+        self._keys: dict[str, tuple[str, float]] = {}
+        self._wakeup = asyncio.Event()
+
+    def _schedule(self, job: Job, at: float, now: float) -> None:
+        job.status = "queued"
+        if at <= now:
+            heapq.heappush(self._ready[job.type], (job.rank, job.id))
+        else:
+            heapq.heappush(self._delayed, (at, job.id))
+        self._wakeup.set()
+
+    async def enqueue(self, job: Job, delay: float = 0.0) -> Job:
+        now = time.time()
+        if job.idempotency_key is not None:
+            job_id, expires_at = self._keys.get(job.idempotency_key, ("", 0.0))
+            if expires_at > now and job_id in self._jobs:
+                return self._jobs[job_id]
+            self._keys[job.idempotency_key] = (job.id, now + IDEMPOTENCY_TTL)
+        self._jobs[job.id] = job
+        self._schedule(job, now + delay, now)
+        return job
+
+    async def claim(self, job_type: str, lease: float) -> Job | None:
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, job_id = heapq.heappop(self._delayed)
+            job = self._jobs.get(job_id)
+            if job is not None:
+                heapq.heappush(self._ready[job.type], (job.rank, job.id))
+        ready = self._ready[job_type]
+        while ready:
+            _, job_id = heapq.heappop(ready)
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == "queued":
+                job.status = "running"
+                job.attempts += 1
+                self._leases[job.id] = now + lease
+                return job
+        return None
+
+    async def touch(self, job: Job, lease: float) -> None:
+        if job.id in self._leases:
+            self._leases[job.id] = time.time() + lease
+
+    def _finish(self, job: Job, status: JobState, error: str | None) -> None:
+        self._leases.pop(job.id, None)
+        job.status, job.error, job.finished_at = status, error, time.time()
+
+    async def complete(self, job: Job) -> None:
+        self._finish(job, "done", None)
+
+    async def retry(self, job: Job, delay: float, error: str | None = None) -> None:
+        self._leases.pop(job.id, None)
+        job.error = error
+        now = time.time()
+        self._schedule(job, now + delay, now)
+
+    async def fail(self, job: Job, error: str) -> None:
+        self._finish(job, "failed", error)
+
+    async def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def recover(self) -> int:
+        now = time.time()
+        expired = [job_id for job_id, deadline in self._leases.items() if deadline <= now]
+        for job_id in expired:
+            del self._leases[job_id]
+            self._schedule(self._jobs[job_id], now, now)
+        # Forget finished jobs and stale keys past their retention
+        cutoff = now - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+        for key, (_, expires_at) in list(self._keys.items()):
+            if expires_at <= now:
+                del self._keys[key]
+        return len(expired)
+
+    async def depth(self, job_type: str) -> int:
+        delayed = sum(1 for _, job_id in self._delayed if self._jobs[job_id].type == job_type)
+        return len(self._ready[job_type]) + delayed
+
+    async def wait(self, timeout: float) -> None:
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        self._wakeup.clear()
+
+
+# KEYS: job hash, target queue, [idempotency key]
+# ARGV: job id, queue score, idempotency TTL, job hash key prefix,
+#       job hash field/value pairs...
+_ENQUEUE = """
+if #KEYS == 3 then
+    local existing = redis.call('GET', KEYS[3])
+    if existing and redis.call('EXISTS', ARGV[4] .. existing) == 1 then
+        return existing
+    end
+    redis.call('SET', KEYS[3], ARGV[1], 'EX', ARGV[3])
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 5))
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+return ARGV[1]
+"""
+
+# KEYS: ready queue, delayed queue, leases
+# ARGV: now, lease deadline, job hash key prefix
+_CLAIM = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, id in ipairs(due) do
+    redis.call('ZREM', KEYS[2], id)
+    local rank = redis.call('HGET', ARGV[3] .. id, 'rank')
+    if rank then
+        redis.call('ZADD', KEYS[1], rank, id)
+    end
+end
+while true do
+    local popped = redis.call('ZPOPMIN', KEYS[1])
+    if #popped == 0 then
+        return false
+    end
+    local key = ARGV[3] .. popped[1]
+    if redis.call('HGET', key, 'status') == 'queued' then
+        redis.call('HINCRBY', key, 'attempts', 1)
+        redis.call('HSET', key, 'status', 'running')
+        redis.call('ZADD', KEYS[3], ARGV[2], popped[1])
+        return redis.call('HGETALL', key)
+    end
+end
+"""
+
+# KEYS: leases
+# ARGV: now, key prefix
+_RECOVER = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[1], id)
+    local key = ARGV[2] .. 'job:' .. id
+    local fields = redis.call('HMGET', key, 'type', 'rank', 'status')
+    if fields[3] == 'running' then
+        redis.call('HSET', key, 'status', 'queued')
+        redis.call('ZADD', ARGV[2] .. 'ready:' .. fields[1], fields[2], id)
+    end
+end
+return #expired
+"""
+
+
+class RedisBroker:
+    """Broker shared through Redis.
+
+    Per type there is a ready sorted set (scored by rank) and a delayed set
+    (scored by the time a retry becomes due). Claims and lease recovery are
+    Lua scripts, so a job is never handed to two workers at once except
+    after its lease expired.
+
+    Args:
+        redis: ``redis.asyncio`` client
+        namespace: Key prefix
+        retention: Seconds finished jobs stay readable
+    """
+
+    def __init__(
+        self, redis: Any, namespace: str = "jobs", retention: float = JOB_RETENTION
+    ) -> None:
+        self.redis = redis
+        self.prefix = f"{namespace}:"
+        self.retention = retention
+        self._enqueue = redis.register_script(_ENQUEUE)
+        self._claim = redis.register_script(_CLAIM)
+        self._recover = redis.register_script(_RECOVER)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}job:{job_id}"
+
+    def _ready_key(self, job_type: str) -> str:
+        return f"{self.prefix}ready:{job_type}"
+
+    def _delayed_key(self, job_type: str) -> str:
+        return f"{self.prefix}delayed:{job_type}"
+
+    @property
+    def _leases_key(self) -> str:
+        return f"{self.prefix}leases"
+
+    async def enqueue(self, job: Job, delay: float = 0.0) -> Job:
+        if delay > 0:
+            queue, score = self._delayed_key(job.type), time.time() + delay
+        else:
+            queue, score = self._ready_key(job.type), job.rank
+        keys = [self._job_key(job.id), queue]
+        if job.idempotency_key is not None:
+            keys.append(f"{self.prefix}key:{job.idempotency_key}")
+        args: list[Any] = [job.id, score, IDEMPOTENCY_TTL, f"{self.prefix}job:"]
+        for name, value in job.to_fields().items():
+            args += (name, value)
+        job_id = (await self._enqueue(keys=keys, args=args)).decode()
+        if job_id != job.id:
+            return await self.get(job_id) or job
+        return job
+
+    async def claim(self, job_type: str, lease: float) -> Job | None:
+        now = time.time()
+        flat = await self._claim(
+            keys=[self._ready_key(job_type), self._delayed_key(job_type), self._leases_key],
+            args=[now, now + lease, f"{self.prefix}job:"],
+        )
+        if not flat:
+            return None
+        values = [value.decode() for value in flat]
+        return Job.from_fields(dict(zip(values[::2], values[1::2])))
+
+    async def touch(self, job: Job, lease: float) -> None:
+        await self.redis.zadd(self._leases_key, {job.id: time.time() + lease}, xx=True)
+
+    async def _finish(self, job: Job, status: JobState, error: str | None) -> None:
+        job.status, job.error, job.finished_at = status, error, time.time()
+        key = self._job_key(job.id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._leases_key, job.id)
+            pipe.hset(
+                key,
+                mapping={"status": status, "error": error or "", "finished_at": job.finished_at},
+            )
+            pipe.expire(key, int(self.retention))
+            await pipe.execute()
+
+    async def complete(self, job: Job) -> None:
+        await self._finish(job, "done", None)
+
+    async def retry(self, job: Job, delay: float, error: str | None = None) -> None:
+        job.status, job.error = "queued", error
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._leases_key, job.id)
+            pipe.hset(self._job_key(job.id), mapping={"status": "queued", "error": error or ""})
+            pipe.zadd(self._delayed_key(job.type), {job.id: time.time() + delay})
+            await pipe.execute()
+
+    async def fail(self, job: Job, error: str) -> None:
+        await self._finish(job, "failed", error)
+
+    async def get(self, job_id: str) -> Job | None:
+        fields = await self.redis.hgetall(self._job_key(job_id))
+        if not fields:
+            return None
+        return Job.from_fields({k.decode(): v.decode() for k, v in fields.items()})
+
+    async def recover(self) -> int:
+        return int(await self._recover(keys=[self._leases_key], args=[time.time(), self.prefix]))
+
+    async def depth(self, job_type: str) -> int:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zcard(self._ready_key(job_type))
+            pipe.zcard(self._delayed_key(job_type))
+            ready, delayed = await pipe.execute()
+        return int(ready) + int(delayed)
+
+    async def wait(self, timeout: float) -> None:
+        await asyncio.sleep(timeout)
+
+
+class JobRunner:
+    """Enqueues jobs and runs the registered types in this worker.
+
+    Args:
+        broker: Queue storage
+        poll_interval: Seconds between claim rounds when idle
+        recover_interval: Seconds between expired-lease sweeps
+    """
+
+    def __init__(
+        self, broker: JobBroker, poll_interval: float = 0.5, recover_interval: float = 30.0
+    ) -> None:
+        self.broker = broker
+        self.poll_interval = poll_interval
+        self.recover_interval = recover_interval
+        self.types: dict[str, JobType] = {}
+        self._running: dict[str, int] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._loop_task: asyncio.Task[None] | None = None
+        self._schedules: list[tuple[str, float, dict[str, Any]]] = []
+
+    def register(self, job_type: JobType) -> None:
+        self.types[job_type.name] = job_type
+        self._running.setdefault(job_type.name, 0)
+
+    def every(
+        self, job_type: str, interval: float, payload: Mapping[str, Any] | None = None
+    ) -> None:
+        """Enqueue ``job_type`` once per ``interval`` seconds across all workers.
+
+        Each period's job carries an idempotency key naming the period, so
+        every worker can try to enqueue it and only one job results.
+        """
+        self._schedules.append((job_type, interval, dict(payload or {})))
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Mapping[str, Any] | None = None,
+        priority: Priority = Priority.NORMAL,
+        idempotency_key: str | None = None,
+        delay: float = 0.0,
+    ) -> Job:
+        """Queue a job and return it (or the earlier job with the same key)."""
+        if job_type not in self.types:
+            raise KeyError(f"Unknown job type {job_type!r}")
+        job = Job(
+            id=uuid.uuid4().hex,
+            type=job_type,
+            payload=dict(payload or {}),
+            priority=priority,
+            idempotency_key=idempotency_key,
+        )
+        queued = await self.broker.enqueue(job, delay)
+        if queued is job:
+            JOBS_ENQUEUED.inc(1.0, job_type)
+        return queued
+
+    async def get(self, job_id: str) -> Job | None:
+        return await self.broker.get(job_id)
+
+    async def run_once(self) -> int:
+        """Claim ready jobs into every free slot; returns how many started."""
+        started = 0
+        for name, job_type in self.types.items():
+            while self._running[name] < job_type.concurrency:
+                job = await self.broker.claim(name, job_type.lease)
+                if job is None:
+                    break
+                if job.attempts > job_type.max_attempts:
+                    # Its worker died mid-run too often; do not try again
+                    await self.broker.fail(job, job.error or "Lease expired too many times")
+                    JOBS_FINISHED.inc(1.0, name, "failed")
+                    continue
+                if job.attempts == 1:
+                    JOB_WAIT.observe(max(time.time() - job.created_at, 0.0), name)
+                self._running[name] += 1
+                JOBS_RUNNING.set(self._running[name], name)
+                task = asyncio.create_task(self._execute(job_type, job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                started += 1
+        return started
+
+    async def _keep_lease(self, job_type: JobType, job: Job) -> None:
+        while True:
+            await asyncio.sleep(job_type.lease / 3)
+            await self.broker.touch(job, job_type.lease)
+
+    async def _execute(self, job_type: JobType, job: Job) -> None:
+        name = job_type.name
+        keeper = asyncio.create_task(self._keep_lease(job_type, job))
+        started = time.perf_counter()
+        try:
+            await job_type.handler(job)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job to another worker straight away
+            await self.broker.retry(job, 0.0, "Interrupted")
+            raise
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+            if job.attempts < job_type.max_attempts:
+                logger.warning("Job %s (%s) failed, will retry: %s", job.id, name, error)
+                delay = job_type.retry_delay * 2 ** (job.attempts - 1)
+                await self.broker.retry(job, delay, error)
+                JOBS_FINISHED.inc(1.0, name, "retried")
+            else:
+                logger.exception("Job %s (%s) failed", job.id, name)
+                await self.broker.fail(job, error)
+                JOBS_FINISHED.inc(1.0, name, "failed")
+        else:
+            await self.broker.complete(job)
+            JOBS_FINISHED.inc(1.0, name, "done")
+        finally:
+            keeper.cancel()
+            JOB_DURATION.observe(time.perf_counter() - started, name)
+            self._running[name] -= 1
+            JOBS_RUNNING.set(self._running[name], name)
+
+    async def _enqueue_scheduled(self) -> None:
+        now = time.time()
+        for job_type, interval, payload in self._schedules:
+            period = int(now // interval)
+            await self.enqueue(job_type, payload, idempotency_key=f"every:{job_type}:{period}")
+
+    async def _run(self) -> None:
+        next_recover = 0.0
+        while True:
+            try:
+                if time.monotonic() >= next_recover:
+                    next_recover = time.monotonic() + self.recover_interval
+                    recovered = await self.broker.recover()
+                    if recovered:
+                        logger.warning("Requeued %d jobs with expired leases", recovered)
+                    for name in self.types:
+                        JOBS_QUEUED.set(await self.broker.depth(name), name)
+                    await self._enqueue_scheduled()
+                if await self.run_once():
+                    continue
+            except Exception:
+                logger.exception("Job runner pass failed")
+            await self.broker.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._loop_task
+            self._loop_task = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+_runner: JobRunner | None = None
+
+
+def init_jobs(redis: Any | None = None, poll_interval: float = 0.5) -> JobRunner:
+    """Create the process-wide runner (called from the app lifespan).
+
+    Uses Redis when a client is given, the in-process broker otherwise.
+    Register job types, then call :meth:`JobRunner.start`.
+    """
+    global _runner
+    broker: JobBroker = RedisBroker(redis) if redis is not None else MemoryBroker()
+    _runner = JobRunner(broker, poll_interval)
+    return _runner
+
+
+def get_job_runner() -> JobRunner:
+    if _runner is None:
+        raise RuntimeError("Jobs not initialised; call init_jobs() first")
+    return _runner
+
+
+async def close_jobs() -> None:
+    global _runner
+    if _runner is not None:
+        await _runner.close()
+        _runner = None
@@ -0,0 +1,240 @@
+"""Learning engine: reward model and adaptive suggestion rankers.
+
+Implements the Q-learning and contextual-bandit strategies from the design
+notes (Phase 2/3). Every ranker follows the ``Ranker`` protocol shared with the
+rule-based ranker in :mod:`app.services.verb_service`, so the suggestion
+endpoints and the offline replay harness (:mod:`app.simulation`) can swap them
+freely.
+
+Rankers work on small integer keys rather than rich state objects: a state is
+packed with :func:`context_key` and actions are verb or modifier ids. This keeps
+the per-suggestion cost to a couple of dict lookups.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from collections.abc import Mapping, Sequence
+from enum import IntEnum
+from typing import Protocol, TypeAlias
+
+
+class FeedbackType(IntEnum):
+    """Feedback outcomes recorded in ``feedback_records.feedback_type``."""
+
+    THUMBS_UP = 0
+    THUMBS_DOWN = 1
+    SPOKEN = 2
+    DISMISSED = 3
+    CONSTRUCTED = 4
+
+
+class TimeOfDay(IntEnum):
+    """Time-of-day context buckets (TODO 2.1)."""
+
+    MORNING = 0
+    AFTERNOON = 1
+    EVENING = 2
+    NIGHT = 3
+
+    @classmethod
+    def from_hour(cls, hour: int) -> TimeOfDay:
+        """Bucket a 0-23 hour into a time-of-day context."""
+        return cls(HOUR_TO_TIME_OF_DAY[hour % 24])
+
+
+# 05-11 morning, 12-16 afternoon, 17-20 evening, 21-04 night
+HOUR_TO_TIME_OF_DAY: tuple[int, ...] = tuple(
+    0 if 5 <= h < 12 else 1 if 12 <= h < 17 else 2 if 17 <= h < 21 else 3 for h in range(24)
+)
+
+# Reward function from TODO 3.1 / the design notes
+REWARDS: dict[FeedbackType, float] = {
+    FeedbackType.THUMBS_UP: 10.0,
+    FeedbackType.SPOKEN: 5.0,
+    FeedbackType.CONSTRUCTED: 1.0,
+    FeedbackType.THUMBS_DOWN: -5.0,
+    FeedbackType.DISMISSED: -2.0,
+}
+
+POSITIVE_FEEDBACK: frozenset[FeedbackType] = frozenset(
+    {FeedbackType.THUMBS_UP, FeedbackType.SPOKEN}
+)
+
+NO_PREVIOUS = 0xFFFF
+
+# A ranker's learned values, ``{(state_key, action): values}``, as shared with
+# the federated aggregator (:mod:`app.services.federated_service`)
+Table: TypeAlias = dict[tuple[int, int], tuple[float, ...]]
+
+
+def context_key(category: int, time_of_day: int, previous: int = NO_PREVIOUS) -> int:
+    """Pack a suggestion state into a single integer key.
+
+    Args:
+        category: Object category index (see ``OBJECT_CATEGORIES``)
+        time_of_day: ``TimeOfDay`` value
+        previous: Previously used verb id, or ``NO_PREVIOUS``
+
+    Returns:
+        Integer key usable as a dict key by every ranker
+    """
+    return (category << 20) | (time_of_day << 16) | (previous & 0xFFFF)
+
+
+class Ranker(Protocol):
+    """Common interface for suggestion rankers."""
+
+    name: str
+
+    def rank(self, key: int, candidates: Sequence[int]) -> list[int]:
+        """Order ``candidates`` for display, best first.
+
+        ``candidates`` arrive in prior (rule-based) order, which rankers use to
+        break ties and as their cold-start ordering.
+        """
+        ...
+
+    def update(self, key: int, action: int, reward: float, next_key: int | None = None) -> None:
+        """Learn from the reward observed for ``action`` in state ``key``."""
+        ...
+
+
+class QLearningRanker:
+    """Tabular Q-learning with ε-greedy exploration.
+
+    Q-values are stored sparsely as ``{state_key: {action: q}}``; unvisited
+    actions have Q = 0 and keep their prior order, so a fresh ranker behaves
+    exactly like the rule-based one.
+
+    Args:
+        alpha: Learning rate
+        gamma: Discount factor
+        epsilon: Probability of showing one exploratory suggestion
+        page_size: Number of suggestions visible at once; exploration swaps
+            a candidate from beyond the first page into its last slot
+        seed: Seed for the exploration RNG
+    """
+
+    name = "qlearning"
+
+    def __init__(
+        self,
+        alpha: float = 0.1,
+        gamma: float = 0.9,
+        epsilon: float = 0.2,
+        page_size: int = 5,
+        seed: int | None = None,
+    ) -> None:
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.page_size = page_size
+        self._q: dict[int, dict[int, float]] = {}
+        self._rng = random.Random(seed)
+
+    def rank(self, key: int, candidates: Sequence[int]) -> list[int]:
+        q = self._q.get(key)
+        if q is None:
+            ordered = list(candidates)
+        else:
+            ordered = sorted(candidates, key=lambda a: -q.get(a, 0.0))
+        page = self.page_size
+        if len(ordered) > page and self._rng.random() < self.epsilon:
+            j = self._rng.randrange(page, len(ordered))
+            ordered[page - 1], ordered[j] = ordered[j], ordered[page - 1]
+        return ordered
+
+    def update(self, key: int, action: int, reward: float, next_key: int | None = None) -> None:
+        q = self._q.get(key)
+        if q is None:
+            q = self._q[key] = {}
+        future = 0.0
+        if next_key is not None:
+            q_next = self._q.get(next_key)
+            if q_next:
+                future = max(q_next.values())
+        current = q.get(action, 0.0)
+        q[action] = current + self.alpha * (reward + self.gamma * future - current)
+
+    def q_values(self, key: int) -> dict[int, float]:
+        """Return a copy of the learned Q-values for one state."""
+        return dict(self._q.get(key, {}))
+
+    def table(self) -> Table:
+        """Every learned value as ``{(state_key, action): (q,)}``."""
+        return {(key, action): (q,) for key, qs in self._q.items() for action, q in qs.items()}
+
+    def load_table(self, table: Mapping[tuple[int, int], Sequence[float]]) -> None:
+        """Replace the learned values, e.g. with a published global model."""
+        self._q = {}
+        for (key, action), (q, *_rest) in table.items():
+            self._q.setdefault(key, {})[action] = q
+
+
+class BanditRanker:
+    """Contextual UCB1 bandit over binary success (positive feedback).
+
+    Each (context, action) arm starts with one pseudo-observation at
+    ``prior_mean``. Unseen arms share the same score and keep their prior
+    order (the sort is stable), so cold-start rankings match the rule-based
+    order and only arms with evidence move.
+
+    Args:
+        exploration: UCB exploration coefficient; kept small because every
+            exploratory suggestion costs the user a tap
+        prior_mean: Pseudo-success rate for unseen arms
+    """
+
+    name = "bandit"
+
+    def __init__(self, exploration: float = 0.1, prior_mean: float = 0.5) -> None:
+        self.exploration = exploration
+        self.prior_mean = prior_mean
+        # key -> action -> [successes, pulls]
+        self._arms: dict[int, dict[int, list[float]]] = {}
+        # Fractional once loaded from a federated average
+        self._pulls: dict[int, float] = {}
+
+    def rank(self, key: int, candidates: Sequence[int]) -> list[int]:
+        arms = self._arms.get(key)
+        if arms is None:
+            return list(candidates)
+        log_total = math.log(self._pulls[key] + 1)
+        c = self.exploration
+        prior = self.prior_mean
+        scores = {
+            action: (successes + prior) / (pulls + 1.0) + c * math.sqrt(log_total / (pulls + 1.0))
+            for action, (successes, pulls) in arms.items()
+        }
+        unseen = prior + c * math.sqrt(log_total)
+        return sorted(candidates, key=lambda a: -scores.get(a, unseen))
+
+    def update(self, key: int, action: int, reward: float, next_key: int | None = None) -> None:
+        arms = self._arms.get(key)
+        if arms is None:
+            arms = self._arms[key] = {}
+            self._pulls[key] = 0.0
+        arm = arms.get(action)
+        if arm is None:
+            arm = arms[action] = [0.0, 0.0]
+        arm[0] += 1.0 if reward > 0 else 0.0
+        arm[1] += 1.0
+        self._pulls[key] += 1
+
+    def table(self) -> Table:
+        """Every arm as ``{(state_key, action): (successes, pulls)}``."""
+        return {
+            (key, action): (arm[0], arm[1])
+            for key, arms in self._arms.items()
+            for action, arm in arms.items()
+        }
+
+    def load_table(self, table: Mapping[tuple[int, int], Sequence[float]]) -> None:
+        """Replace every arm, e.g. with a published global model."""
+        self._arms = {}
+        self._pulls = {}
+        for (key, action), (successes, pulls, *_rest) in table.items():
+            self._arms.setdefault(key, {})[action] = [successes, pulls]
+            self._pulls[key] = self._pulls.get(key, 0.0) + pulls
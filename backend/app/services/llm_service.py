@@ -0,0 +1,598 @@
+"""LLM-assisted sentence construction (create_future_md, "Large Language Model Integration").
+
+Rules for common cases, a language model for the rest. The template engine
+(:mod:`app.services.sentence_service`) answers first, and its result is
+scored: a verb that suits the object's category is confident, an odd pairing
+("drink" + "ball") is not, and word sets no template fits (two objects, two
+modifiers) score zero. Only low-confidence requests reach the model.
+
+Model calls take hundreds of milliseconds to seconds, so their results go
+into a semantic cache. The key is the normalized words (objects, verb,
+modifiers), matched exactly. The free-text context is matched by embedding
+similarity, so "at breakfast" and "breakfast time" share one answer. Entries
+live in this worker and, with Redis, in a shared hash per word set, which a
+Lua script keeps to the newest ``CONTEXTS_PER_WORD_SET`` contexts. Contexts
+are the user's own words, so a request with a context is cached under that
+user's word set only; context-free sentences are shared by everyone.
+
+A request waits for the model at most ``timeout`` seconds, sized for the
+500 ms construction budget. A slower call keeps running in the background
+and fills the cache for the next request, while this one gets the rule-based
+sentence. Backends speak the OpenAI chat completions API (OpenAI, Azure
+OpenAI, or a local ``llama-server`` from llama.cpp), or run a GGUF model in
+process with ``llama-cpp-python`` for offline use.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+import zlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal, Protocol
+
+import numpy as np
+
+from app.services.object_service import normalize_label
+from app.services.sentence_service import Realization, SentenceEngine, TemplateError
+from app.services.verb_service import CATEGORY_VERBS
+from app.utils.cache import LRUCache
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+Source = Literal["rules", "cache", "llm"]
+
+# Rule results below this confidence are sent to the model
+CONFIDENCE_THRESHOLD = 0.75
+# Confidence of a rule sentence whose verb does not suit the object's category
+MISMATCH_CONFIDENCE = 0.5
+# Hashed character-trigram context embeddings
+CONTEXT_DIM = 256
+# Cosine similarity at which two contexts share a cached sentence
+CONTEXT_SIMILARITY = 0.65
+CACHE_WORD_SETS = 10_000
+CONTEXTS_PER_WORD_SET = 16
+# Shared entries expire after a week
+SHARED_TTL_SECONDS = 7 * 86_400
+MAX_TOKENS = 48
+MAX_SENTENCE_CHARS = 200
+
+SYSTEM_PROMPT = (
+    "You help a person who uses an AAC app to speak. Write exactly one short, natural, "
+    "first-person sentence that uses the given words and fits the context. "
+    "Reply with the sentence only."
+)
+
+COMPOSITIONS = REGISTRY.counter(
+    "sentence_compositions_total", "Composed sentences by source (rules, cache, llm)", ["source"]
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "Model calls by outcome (ok, error, late)", ["outcome"]
+)
+LLM_LATENCY = REGISTRY.histogram("llm_request_seconds", "Model completion time", ["backend"])
+
+
+class LLMError(RuntimeError):
+    """The model call failed or returned no usable sentence."""
+
+
+class LLMBackend(Protocol):
+    name: str
+
+    async def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        """Return the model's reply to ``prompt``."""
+        ...
+
+    async def close(self) -> None: ...
+
+
+class OpenAIBackend:
+    """Chat completions over HTTP: OpenAI, Azure OpenAI, or llama.cpp's ``llama-server``.
+
+    Args:
+        base_url: API root, e.g. ``http://localhost:8080/v1`` for ``llama-server``
+        model: Model or deployment name
+        api_key: Bearer token, if the server wants one
+        timeout: Seconds before a call is abandoned entirely
+    """
+
+    name = "openai"
+
+    def __init__(
+        self, base_url: str, model: str, api_key: str | None = None, timeout: float = 10.0
+    ) -> None:
+        import httpx
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.model = model
+        self._client = httpx.AsyncClient(base_url=base_url, headers=headers, timeout=timeout)
+        self._errors: tuple[type[Exception], ...] = (httpx.HTTPError,)
+
+    async def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.2,
+        }
+        try:
+            response = await self._client.post("/chat/completions", json=body)
+            response.raise_for_status()
+            return str(response.json()["choices"][0]["message"]["content"])
+        except self._errors as exc:
+            raise LLMError(f"Model request failed: {exc}") from exc
+        except (KeyError, IndexError, TypeError, ValueError) as exc:
+            raise LLMError("Malformed model response") from exc
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class LlamaCppBackend:
+    """A GGUF model run on the CPU in this process (``llama-cpp-python``).
+
+    One generation runs at a time; the model is not thread-safe.
+
+    Args:
+        model_path: GGUF file, e.g. a 1-3B instruction-tuned model
+        threads: CPU threads for generation
+        context: Context window in tokens
+    """
+
+    name = "llama.cpp"
+
+    def __init__(self, model_path: str | Path, threads: int = 2, context: int = 512) -> None:
+        from llama_cpp import Llama
+
+        self._model = Llama(
+            model_path=str(model_path), n_ctx=context, n_threads=threads, verbose=False
+        )
+        self._lock = asyncio.Lock()
+
+    def _generate(self, system: str, prompt: str, max_tokens: int) -> str:
+        reply = self._model.create_chat_completion(
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=max_tokens,
+            temperature=0.2,
+        )
+        return str(reply["choices"][0]["message"]["content"])
+
+    async def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        async with self._lock:
+            try:
+                return await asyncio.to_thread(self._generate, system, prompt, max_tokens)
+            except (KeyError, IndexError, ValueError, RuntimeError) as exc:
+                raise LLMError(f"Generation failed: {exc}") from exc
+
+    async def close(self) -> None:
+        return None
+
+
+def embed_context(text: str) -> np.ndarray:
+    """Unit vector of the hashed character trigrams of normalized ``text``.
+
+    Spelling-level similarity, enough to match rephrased short contexts
+    without a second model.
+    """
+    vector = np.zeros(CONTEXT_DIM, dtype=np.float32)
+    padded = f" {normalize_label(text)} "
+    for trigram in zip(padded, padded[1:], padded[2:]):
+        digest = zlib.crc32("".join(trigram).encode())
+        vector[digest % CONTEXT_DIM] += 1.0 if digest & 0x80000000 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+@dataclass(frozen=True, slots=True)
+class WordSet:
+    """The normalized words of a request, the exact part of a cache key.
+
+    ``user_id`` scopes the entry to one user; ``None`` shares it.
+    """
+
+    objects: tuple[str, ...]
+    verb: str
+    modifiers: tuple[str, ...]
+    user_id: int | None = None
+
+    @classmethod
+    def of(
+        cls,
+        objects: Sequence[str],
+        verb: str | None,
+        modifiers: Sequence[str],
+        user_id: int | None = None,
+    ) -> WordSet:
+        return cls(
+            tuple(sorted(normalize_label(o) for o in objects)),
+            normalize_label(verb or ""),
+            tuple(sorted(normalize_label(m) for m in modifiers)),
+            user_id,
+        )
+
+    def digest(self) -> str:
+        raw = "\x1f".join(("\x1e".join(self.objects), self.verb, "\x1e".join(self.modifiers)))
+        if self.user_id is not None:
+            raw = f"{raw}\x1f{self.user_id}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
+class _Contexts:
+    texts: list[str]
+    sentences: list[str]
+    vectors: np.ndarray
+
+
+# KEYS: sentences hash, order list (newest first); ARGV: context, sentence,
+# limit, ttl. Evicts the oldest contexts past the limit from both.
+_PUT = """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('LREM', KEYS[2], 0, ARGV[1])
+redis.call('LPUSH', KEYS[2], ARGV[1])
+local limit = tonumber(ARGV[3])
+local evicted = redis.call('LRANGE', KEYS[2], limit, -1)
+if #evicted > 0 then
+    redis.call('LTRIM', KEYS[2], 0, limit - 1)
+    redis.call('HDEL', KEYS[1], unpack(evicted))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return #evicted
+"""
+
+# KEYS: sentences hash, order list; ARGV: limit. Returns the newest contexts
+# and their sentences.
+_GET = """
+local order = redis.call('LRANGE', KEYS[2], 0, tonumber(ARGV[1]) - 1)
+if #order == 0 then
+    return false
+end
+return {order, redis.call('HMGET', KEYS[1], unpack(order))}
+"""
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class SemanticCache:
+    """Model sentences by word set, then by context similarity.
+
+    Both tiers keep the newest ``CONTEXTS_PER_WORD_SET`` contexts per word
+    set. In Redis each word set is a hash of context to sentence plus a list
+    of its contexts, newest first, that bounds it.
+
+    Args:
+        redis: ``redis.asyncio`` client for the shared tier, or ``None``
+        threshold: Context cosine similarity that counts as the same request
+    """
+
+    def __init__(self, redis: Any = None, threshold: float = CONTEXT_SIMILARITY) -> None:
+        self.redis = redis
+        self.threshold = threshold
+        self._local: LRUCache[WordSet, _Contexts] = LRUCache(CACHE_WORD_SETS)
+        if redis is not None:
+            self._put = redis.register_script(_PUT)
+            self._get = redis.register_script(_GET)
+
+    def _keys(self, words: WordSet) -> list[str]:
+        key = f"llm:sentences:{words.digest()}"
+        return [key, f"{key}:order"]
+
+    async def _contexts(self, words: WordSet) -> _Contexts | None:
+        contexts = self._local.get(words)
+        if contexts is not None or self.redis is None:
+            return contexts
+        shared = await self._get(keys=self._keys(words), args=[CONTEXTS_PER_WORD_SET])
+        if not shared:
+            return None
+        # Oldest first, as the local tier appends
+        pairs = [
+            (_text(context), _text(sentence))
+            for context, sentence in zip(*shared)
+            if sentence is not None
+        ][::-1]
+        if not pairs:
+            return None
+        texts = [context for context, _sentence in pairs]
+        contexts = _Contexts(
+            texts,
+            [sentence for _context, sentence in pairs],
+            np.vstack([embed_context(context) for context in texts]),
+        )
+        self._local.put(words, contexts)
+        return contexts
+
+    @staticmethod
+    def _append(contexts: _Contexts, context: str, sentence: str) -> None:
+        if context in contexts.texts:
+            # Rewritten contexts become the newest, as in Redis
+            i = contexts.texts.index(context)
+            del contexts.texts[i], contexts.sentences[i]
+            contexts.vectors = np.delete(contexts.vectors, i, axis=0)
+        contexts.texts.append(context)
+        contexts.sentences.append(sentence)
+        contexts.vectors = np.vstack([contexts.vectors, embed_context(context)])
+        if len(contexts.texts) > CONTEXTS_PER_WORD_SET:
+            del contexts.texts[0], contexts.sentences[0]
+            contexts.vectors = contexts.vectors[1:]
+
+    async def get(self, words: WordSet, context: str) -> str | None:
+        """The sentence cached for ``words`` in a context like ``context``."""
+        contexts = await self._contexts(words)
+        if contexts is None or not contexts.texts:
+            return None
+        if context in contexts.texts:
+            return contexts.sentences[contexts.texts.index(context)]
+        similarity = contexts.vectors @ embed_context(context)
+        best = int(np.argmax(similarity))
+        return contexts.sentences[best] if similarity[best] >= self.threshold else None
+
+    async def put(self, words: WordSet, context: str, sentence: str) -> None:
+        contexts = await self._contexts(words)
+        if contexts is None:
+            contexts = _Contexts([], [], np.zeros((0, CONTEXT_DIM), dtype=np.float32))
+            self._local.put(words, contexts)
+        self._append(contexts, context, sentence)
+        if self.redis is not None:
+            await self._put(
+                keys=self._keys(words),
+                args=[context, sentence, CONTEXTS_PER_WORD_SET, SHARED_TTL_SECONDS],
+            )
+
+
+def clean_sentence(reply: str) -> str:
+    """The first line of a model reply as one tidy sentence.
+
+    Raises:
+        LLMError: The reply holds no sentence
+    """
+    lines = [line.strip().strip("\"'`").strip() for line in reply.splitlines()]
+    text = next((line for line in lines if line), "")[:MAX_SENTENCE_CHARS].strip()
+    if not text:
+        raise LLMError("Empty model reply")
+    text = text[:1].upper() + text[1:]
+    return text if text[-1] in ".!?" else f"{text}."
+
+
+@dataclass(frozen=True, slots=True)
+class Composition:
+    text: str
+    source: Source
+    # Trust in a rule-based sentence; None for model sentences
+    confidence: float | None = None
+    template_id: int | None = None
+
+
+class SentenceComposer:
+    """Routes sentence requests between the template engine and a language model.
+
+    Args:
+        backend: Model backend, or ``None`` for rules only
+        cache: Semantic cache of model sentences
+        timeout: Seconds a request waits for the model
+        threshold: Rule confidence below which the model is asked
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend | None,
+        cache: SemanticCache,
+        timeout: float = 0.35,
+        threshold: float = CONFIDENCE_THRESHOLD,
+    ) -> None:
+        self.backend = backend
+        self.cache = cache
+        self.timeout = timeout
+        self.threshold = threshold
+        self._inflight: dict[tuple[WordSet, str], asyncio.Task[str]] = {}
+
+    @staticmethod
+    def rules(
+        engine: SentenceEngine,
+        object_ids: Sequence[int],
+        verb_id: int | None,
+        modifier_ids: Sequence[int],
+        user_id: int | None = None,
+    ) -> tuple[Realization | None, float]:
+        """The template engine's sentence and how much to trust it."""
+        if len(object_ids) > 1 or len(modifier_ids) > 1:
+            return None, 0.0
+        object_id = object_ids[0] if object_ids else None
+        try:
+            realization = engine.construct(
+                verb_id, object_id, modifier_ids[0] if modifier_ids else None, user_id=user_id
+            )
+        except TemplateError:
+            return None, 0.0
+        entry = engine.objects.get(object_id) if object_id is not None else None
+        if entry is None or verb_id is None:
+            return realization, 1.0
+        suits = engine.verbs[verb_id] in CATEGORY_VERBS.get(entry.category, ())
+        return realization, 1.0 if suits else MISMATCH_CONFIDENCE
+
+    @staticmethod
+    def words(
+        engine: SentenceEngine,
+        object_ids: Sequence[int],
+        verb_id: int | None,
+        modifier_ids: Sequence[int],
+        user_id: int | None = None,
+    ) -> tuple[list[str], str | None, list[str]]:
+        """The words behind the ids.
+
+        Raises:
+            TemplateError: An id is unknown, or an object is another user's
+        """
+        objects = []
+        for object_id in object_ids:
+            entry = engine.objects.visible(object_id, user_id)
+            if entry is None:
+                raise TemplateError(f"Unknown object {object_id}")
+            objects.append(entry.name)
+        verb = None
+        if verb_id is not None:
+            verb = engine.verbs.get(verb_id)
+            if verb is None:
+                raise TemplateError(f"Unknown verb {verb_id}")
+        modifiers = []
+        for modifier_id in modifier_ids:
+            modifier = engine.modifiers.get(modifier_id)
+            if modifier is None:
+                raise TemplateError(f"Unknown modifier {modifier_id}")
+            modifiers.append(modifier)
+        return objects, verb, modifiers
+
+    async def compose(
+        self,
+        engine: SentenceEngine,
+        object_ids: Sequence[int],
+        verb_id: int | None = None,
+        modifier_ids: Sequence[int] = (),
+        context: str = "",
+        user_id: int | None = None,
+    ) -> Composition:
+        """One sentence for the selected words, from rules, cache or model.
+
+        ``user_id`` is the caller, who may use shared objects and their own.
+        Model sentences for a non-empty ``context`` are cached for the caller
+        only, since the context is their own free text.
+
+        Raises:
+            TemplateError: An id is unknown, or no template fits and no model
+                sentence is available
+            TimeoutError: No template fits and the model is still working
+        """
+        objects, verb, modifiers = self.words(engine, object_ids, verb_id, modifier_ids, user_id)
+        realization, confidence = self.rules(engine, object_ids, verb_id, modifier_ids, user_id)
+        if realization is not None and confidence >= self.threshold:
+            return self._done(realization.text, "rules", confidence, realization.template_id)
+        context = " ".join(context.split())
+        words = WordSet.of(objects, verb, modifiers, user_id if context else None)
+        cached = await self.cache.get(words, context)
+        if cached is not None:
+            return self._done(cached, "cache")
+        if self.backend is not None:
+            key = (words, context)
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.create_task(
+                    self._ask(self.backend, words, context, objects, verb, modifiers)
+                )
+                self._inflight[key] = task
+                task.add_done_callback(lambda done: self._finished(key, done))
+            # A late answer still lands in the cache for the next request
+            done, _pending = await asyncio.wait({task}, timeout=self.timeout)
+            if done and task.exception() is None:
+                return self._done(task.result(), "llm")
+            if not done:
+                LLM_REQUESTS.inc(1.0, "late")
+                if realization is None:
+                    raise TimeoutError("The sentence model is still working; try again")
+        if realization is None:
+            raise TemplateError("No template fits these words")
+        return self._done(realization.text, "rules", confidence, realization.template_id)
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self.backend is not None:
+            await self.backend.close()
+
+    @staticmethod
+    def _done(
+        text: str, source: Source, confidence: float | None = None, template_id: int | None = None
+    ) -> Composition:
+        COMPOSITIONS.inc(1.0, source)
+        return Composition(text, source, confidence, template_id)
+
+    def _finished(self, key: tuple[WordSet, str], task: asyncio.Task[str]) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Failures are logged in _ask; retrieve them so late ones stay quiet
+            task.exception()
+
+    async def _ask(
+        self,
+        backend: LLMBackend,
+        words: WordSet,
+        context: str,
+        objects: Sequence[str],
+        verb: str | None,
+        modifiers: Sequence[str],
+    ) -> str:
+        lines = [f"Objects: {', '.join(objects) or 'none'}", f"Verb: {verb or 'none'}"]
+        if modifiers:
+            lines.append(f"Modifiers: {', '.join(modifiers)}")
+        if context:
+            lines.append(f"Context: {context}")
+        started = time.perf_counter()
+        try:
+            reply = await backend.complete(SYSTEM_PROMPT, "\n".join(lines), MAX_TOKENS)
+            sentence = clean_sentence(reply)
+        except LLMError:
+            LLM_REQUESTS.inc(1.0, "error")
+            logger.warning("Sentence model failed for %s", words, exc_info=True)
+            raise
+        LLM_LATENCY.observe(time.perf_counter() - started, backend.name)
+        LLM_REQUESTS.inc(1.0, "ok")
+        await self.cache.put(words, context, sentence)
+        return sentence
+
+
+_composer: SentenceComposer | None = None
+
+
+def init_composer(
+    backend: str | None,
+    redis: Any = None,
+    timeout: float = 0.35,
+    base_url: str = "http://localhost:8080/v1",
+    model: str = "local",
+    api_key: str | None = None,
+    model_path: str | None = None,
+) -> SentenceComposer:
+    """Create the process-wide composer (called from the app lifespan).
+
+    Args:
+        backend: ``"openai"``, ``"llama.cpp"``, or ``None`` for rules only
+    """
+    global _composer
+    llm: LLMBackend | None
+    if backend is None:
+        llm = None
+    elif backend == OpenAIBackend.name:
+        llm = OpenAIBackend(base_url, model, api_key)
+    elif backend == LlamaCppBackend.name:
+        if model_path is None:
+            raise ValueError("The llama.cpp backend needs LLM_MODEL_PATH")
+        llm = LlamaCppBackend(model_path)
+    else:
+        raise ValueError(f"Unknown LLM backend {backend!r}; expected openai or llama.cpp")
+    _composer = SentenceComposer(llm, SemanticCache(redis), timeout)
+    return _composer
+
+
+def get_composer() -> SentenceComposer:
+    if _composer is None:
+        raise RuntimeError("Sentence composer not created; call init_composer() first")
+    return _composer
+
+
+async def close_composer() -> None:
+    global _composer
+    if _composer is not None:
+        await _composer.close()
+    _composer = None
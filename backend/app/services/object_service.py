@@ -0,0 +1,353 @@
+"""In-memory object library index (FR-8).
+
+The shared library (100+ objects) and every user's custom objects are loaded
+once per worker and served from memory, so ``GET /api/objects/library`` never
+touches the database. The index keeps:
+
+- a category → ids inverted index, most used first
+- a prefix trie over every word of every label, for the library search box
+- a normalized label → id map, used to match detector labels ("Apples",
+  "dining table") to library objects
+
+Each scope (the shared library, and each user's custom objects) carries a
+version counter that increments on every change and a content digest. The
+ETag for a user's view combines both digests, so it is identical across
+workers holding the same data and changes exactly when the visible library
+does. Adding or deleting a custom object updates only that user's scope.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ObjectLibrary
+
+_NON_WORD = re.compile(r"[^a-z0-9' ]+")
+
+
+def normalize_label(label: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_NON_WORD.sub(" ", label.lower()).split())
+
+
+def singular_forms(label: str) -> tuple[str, ...]:
+    # Detector labels are often plural ("apples", "glasses"); the library is singular
+    if label.endswith("ies"):
+        return (label[:-3] + "y",)
+    if label.endswith("es"):
+        return (label[:-2], label[:-1])
+    if label.endswith("s") and not label.endswith("ss"):
+        return (label[:-1],)
+    return ()
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectEntry:
+    """One library object as served by the API."""
+
+    id: int
+    name: str
+    category: str
+    icon_url: str | None = None
+    usage_count: int = 0
+    user_id: int | None = None
+
+    @property
+    def is_custom(self) -> bool:
+        return self.user_id is not None
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.ids: set[int] = set()
+
+
+class LabelTrie:
+    """Prefix trie mapping the start of any word in a label to object ids.
+
+    Every node stores the ids of all labels below it, so a lookup costs one
+    step per prefix character regardless of library size.
+    """
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+
+    @staticmethod
+    def _keys(label: str) -> Iterable[str]:
+        words = label.split()
+        for i in range(len(words)):
+            yield " ".join(words[i:])
+
+    def add(self, label: str, object_id: int) -> None:
+        for key in self._keys(label):
+            node = self._root
+            for char in key:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.add(object_id)
+
+    def remove(self, label: str, object_id: int) -> None:
+        for key in self._keys(label):
+            node = self._root
+            path = []
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    break
+                child.ids.discard(object_id)
+                path.append((node, char, child))
+                node = child
+            for parent, char, child in reversed(path):
+                if child.ids:
+                    break
+                del parent.children[char]
+
+    def lookup(self, prefix: str) -> set[int]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.ids
+
+
+def _digest(entries: Iterable[ObjectEntry]) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    for e in sorted(entries, key=lambda e: e.id):
+        h.update(
+            f"{e.id}\x1f{e.name}\x1f{e.category}\x1f{e.icon_url}\x1f{e.usage_count}\x1e".encode()
+        )
+    return h.hexdigest()
+
+
+@dataclass
+class _Scope:
+    """Objects visible in one scope: the shared library or one user's custom set."""
+
+    entries: dict[int, ObjectEntry] = field(default_factory=dict)
+    by_category: dict[str, list[int]] = field(default_factory=dict)
+    by_label: dict[str, int] = field(default_factory=dict)
+    trie: LabelTrie = field(default_factory=LabelTrie)
+    version: int = 0
+    digest: str = ""
+
+    def add(self, entry: ObjectEntry) -> None:
+        previous = self.entries.get(entry.id)
+        if previous is not None:
+            self._unindex(previous)
+        self.entries[entry.id] = entry
+        label = normalize_label(entry.name)
+        self.by_label[label] = entry.id
+        self.trie.add(label, entry.id)
+        self.by_category.setdefault(entry.category, []).append(entry.id)
+
+    def remove(self, object_id: int) -> ObjectEntry | None:
+        entry = self.entries.pop(object_id, None)
+        if entry is not None:
+            self._unindex(entry)
+        return entry
+
+    def _unindex(self, entry: ObjectEntry) -> None:
+        label = normalize_label(entry.name)
+        if self.by_label.get(label) == entry.id:
+            del self.by_label[label]
+        self.trie.remove(label, entry.id)
+        self.by_category[entry.category].remove(entry.id)
+
+    def touch(self) -> None:
+        """Re-sort categories and bump the version after a batch of changes."""
+        for ids in self.by_category.values():
+            ids.sort(key=lambda i: (-self.entries[i].usage_count, self.entries[i].name))
+        self.version += 1
+        self.digest = _digest(self.entries.values())
+
+
+class ObjectLibraryIndex:
+    """Per-worker index of the shared library and users' custom objects."""
+
+    def __init__(self) -> None:
+        self._shared = _Scope()
+        self._custom: dict[int, _Scope] = {}
+        self._owner: dict[int, int] = {}
+        self._shared.touch()
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[ObjectEntry]) -> ObjectLibraryIndex:
+        index = cls()
+        touched: set[int | None] = set()
+        for entry in entries:
+            index._scope(entry.user_id).add(entry)
+            if entry.user_id is not None:
+                index._owner[entry.id] = entry.user_id
+            touched.add(entry.user_id)
+        for user_id in touched:
+            index._scope(user_id).touch()
+        return index
+
+    @classmethod
+    async def load(cls, session: AsyncSession) -> ObjectLibraryIndex:
+        """Build the index from ``object_library`` (shared and custom rows)."""
+        rows = await session.execute(
+            select(
+                ObjectLibrary.id,
+                ObjectLibrary.name,
+                ObjectLibrary.category,
+                ObjectLibrary.icon_url,
+                ObjectLibrary.usage_count,
+                ObjectLibrary.user_id,
+            )
+        )
+        return cls.from_entries(ObjectEntry(*row) for row in rows)
+
+    def _scope(self, user_id: int | None) -> _Scope:
+        if user_id is None:
+            return self._shared
+        scope = self._custom.get(user_id)
+        if scope is None:
+            scope = self._custom[user_id] = _Scope()
+            scope.touch()
+        return scope
+
+    def version(self, user_id: int | None = None) -> str:
+        """Opaque version of the library as seen by ``user_id``, usable as an ETag."""
+        shared = self._shared.digest
+        custom = self._custom.get(user_id) if user_id is not None else None
+        return f"{shared}-{custom.digest}" if custom is not None else shared
+
+    def has_custom(self, user_id: int) -> bool:
+        scope = self._custom.get(user_id)
+        return scope is not None and bool(scope.entries)
+
+    def custom(self, user_id: int) -> list[ObjectEntry]:
+        """Only ``user_id``'s custom objects."""
+        scope = self._custom.get(user_id)
+        return list(scope.entries.values()) if scope is not None else []
+
+    def get(self, object_id: int) -> ObjectEntry | None:
+        owner = self._owner.get(object_id)
+        return self._scope(owner).entries.get(object_id)
+
+    def visible(self, object_id: int, user_id: int | None) -> ObjectEntry | None:
+        """The object if ``user_id`` may use it: shared, or one of their own."""
+        owner = self._owner.get(object_id)
+        if owner is not None and owner != user_id:
+            return None
+        return self._shared.entries.get(object_id) if owner is None else self.get(object_id)
+
+    def _scopes(self, user_id: int | None) -> list[_Scope]:
+        custom = self._custom.get(user_id) if user_id is not None else None
+        return [custom, self._shared] if custom is not None else [self._shared]
+
+    def objects(self, user_id: int | None = None, category: str | None = None) -> list[ObjectEntry]:
+        """Library objects for a user, custom objects first, then most used."""
+        result = []
+        for scope in self._scopes(user_id):
+            if category is None:
+                for ids in scope.by_category.values():
+                    result.extend(scope.entries[i] for i in ids)
+            else:
+                result.extend(scope.entries[i] for i in scope.by_category.get(category, ()))
+        return result
+
+    def search(
+        self,
+        prefix: str,
+        user_id: int | None = None,
+        category: str | None = None,
+        limit: int = 20,
+    ) -> list[ObjectEntry]:
+        """Objects with a label word starting with ``prefix``, best first."""
+        prefix = normalize_label(prefix)
+        result: list[ObjectEntry] = []
+        for scope in self._scopes(user_id):
+            matches = [scope.entries[i] for i in scope.trie.lookup(prefix)]
+            if category is not None:
+                matches = [e for e in matches if e.category == category]
+            matches.sort(key=lambda e: (-e.usage_count, e.name))
+            result.extend(matches)
+        return result[:limit]
+
+    def resolve_label(self, label: str, user_id: int | None = None) -> int | None:
+        """Map a detector label to a library object id (custom objects win)."""
+        normalized = normalize_label(label)
+        candidates = (normalized, *singular_forms(normalized))
+        for scope in self._scopes(user_id):
+            for candidate in candidates:
+                object_id = scope.by_label.get(candidate)
+                if object_id is not None:
+                    return object_id
+        return None
+
+    def add_custom(self, entry: ObjectEntry) -> None:
+        """Index a newly created custom object for its owner."""
+        if entry.user_id is None:
+            raise ValueError("Custom objects need a user_id")
+        scope = self._scope(entry.user_id)
+        scope.add(entry)
+        self._owner[entry.id] = entry.user_id
+        scope.touch()
+
+    def remove_custom(self, object_id: int) -> ObjectEntry | None:
+        owner = self._owner.pop(object_id, None)
+        if owner is None:
+            return None
+        scope = self._custom[owner]
+        entry = scope.remove(object_id)
+        scope.touch()
+        return entry
+
+    async def refresh_user(self, session: AsyncSession, user_id: int) -> None:
+        """Reload one user's custom objects, e.g. after another worker changed them."""
+        rows = await session.execute(
+            select(
+                ObjectLibrary.id,
+                ObjectLibrary.name,
+                ObjectLibrary.category,
+                ObjectLibrary.icon_url,
+                ObjectLibrary.usage_count,
+                ObjectLibrary.user_id,
+            ).where(ObjectLibrary.user_id == user_id)
+        )
+        self.replace_user(user_id, [ObjectEntry(*row) for row in rows])
+
+    def replace_user(self, user_id: int, entries: Sequence[ObjectEntry]) -> None:
+        """Swap in a freshly loaded set of custom objects for one user."""
+        for object_id in list(self._custom.get(user_id, _Scope()).entries):
+            self._owner.pop(object_id, None)
+        scope = self._custom[user_id] = _Scope()
+        for entry in entries:
+            scope.add(entry)
+            self._owner[entry.id] = user_id
+        scope.touch()
+
+
+CUSTOM_TAG_PREFIX = "objects:user:"
+
+
+def custom_objects_tag(user_id: int) -> str:
+    """Cache tag for responses that include ``user_id``'s custom objects."""
+    return f"{CUSTOM_TAG_PREFIX}{user_id}"
+
+
+_index: ObjectLibraryIndex | None = None
+
+
+async def init_object_index(session: AsyncSession) -> ObjectLibraryIndex:
+    """Load the process-wide index (called from the app lifespan)."""
+    global _index
+    _index = await ObjectLibraryIndex.load(session)
+    return _index
+
+
+def get_object_index() -> ObjectLibraryIndex:
+    if _index is None:
+        raise RuntimeError("Object index not loaded; call init_object_index() first")
+    return _index
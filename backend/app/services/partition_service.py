@@ -0,0 +1,69 @@
+"""Keep the history tables' monthly partitions provisioned ahead of time.
+
+Migration 0001 creates a year of partitions. Without more, rows from the
+thirteenth month on land in the ``_default`` partitions, and Postgres then
+refuses to create the month they belong to (see :mod:`app.models.partitions`).
+:class:`PartitionProvisioner` runs :func:`~app.models.partitions.provision_ahead`
+once at startup and as a daily background job, so the current month and the
+next ``months_ahead`` always exist.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date
+
+from app.database import Database
+from app.models.partitions import provision_ahead
+from app.services.jobs import Job, JobRunner, JobType
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PROVISION_JOB = "partitions.provision"
+# Seconds between provisioning runs
+PROVISION_INTERVAL = 24 * 3600.0
+
+PARTITIONS_CREATED = REGISTRY.counter(
+    "partitions_created_total", "Monthly history partitions created by the app"
+)
+
+
+class PartitionProvisioner:
+    """Creates missing monthly partitions from a recurring job.
+
+    Args:
+        database: Database whose primary gets the partitions
+        runner: Job runner the daily job is registered with
+        months_ahead: Months past the current one to keep provisioned
+        interval: Seconds between runs
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        runner: JobRunner,
+        months_ahead: int = 3,
+        interval: float = PROVISION_INTERVAL,
+    ) -> None:
+        self.database = database
+        self.months_ahead = months_ahead
+        runner.register(JobType(PROVISION_JOB, self._run_job, lease=120.0))
+        runner.every(PROVISION_JOB, interval)
+
+    async def run_once(self, today: date | None = None) -> list[str]:
+        """Create any missing partitions up to ``months_ahead`` past ``today``.
+
+        Returns:
+            Names of the partitions that were created
+        """
+        today = today or date.today()
+        async with self.database.primary.begin() as connection:
+            created = await connection.run_sync(provision_ahead, today, self.months_ahead)
+        if created:
+            PARTITIONS_CREATED.inc(len(created))
+            logger.info("Created partitions %s", ", ".join(created))
+        return created
+
+    async def _run_job(self, job: Job) -> None:
+        await self.run_once()
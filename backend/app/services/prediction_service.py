@@ -0,0 +1,408 @@
+"""Next-selection prediction (create_future_md, "Predictive Intent Recognition").
+
+Each user's sentence history (``constructed_sentences``) is read as one
+stream of selections in tap order (object, verb, modifier) with a boundary
+token after every sentence. A trigram model with interpolated Kneser-Ney
+smoothing then predicts the next selection from the last two tokens. At the
+start of a sentence that means the previous sentence's last selection and
+the boundary, so "eat apple" can lead to "drink juice".
+
+Counts live in sorted ``int64`` arrays of packed n-gram keys. Every
+continuation of a context is one contiguous range found with two binary
+searches. A query scores the user's whole vocabulary (a few hundred to a few
+thousand tokens) with a handful of vector operations, well under a
+millisecond. A new sentence inserts its few n-grams in place, and other
+workers catch up by reading only the sentences they have not seen.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import IntEnum
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ConstructedSentence
+from app.utils.cache import LRUCache
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Kneser-Ney absolute discount, the usual value for small counts
+DISCOUNT = 0.75
+# Bits per token in a packed n-gram key: three tokens fit in an int64
+TOKEN_BITS = 20
+MAX_VOCABULARY = (1 << TOKEN_BITS) - 1
+# Context token for selections the model has never seen
+UNKNOWN = MAX_VOCABULARY
+# Dense id of the sentence boundary
+BOUNDARY = 0
+# Sentences read when a user's model is built
+HISTORY_LIMIT = 5000
+MAX_MODELS = 2048
+# Rows committed by other workers may carry a slightly older created_at
+CATCH_UP_SLACK = timedelta(minutes=5)
+
+PREDICTION_MODELS = REGISTRY.gauge("prediction_models", "Users' n-gram models held in memory")
+
+SENTENCES_TAG_PREFIX = "sentences:user:"
+
+_TOKEN_MASK = np.int64(MAX_VOCABULARY)
+_BIGRAM_MASK = np.int64((1 << 2 * TOKEN_BITS) - 1)
+
+
+def sentences_tag(user_id: int) -> str:
+    """Invalidation tag telling every worker that ``user_id`` added a sentence."""
+    return f"{SENTENCES_TAG_PREFIX}{user_id}"
+
+
+class TokenKind(IntEnum):
+    OBJECT = 0
+    VERB = 1
+    MODIFIER = 2
+
+
+def token(kind: TokenKind, item_id: int) -> int:
+    """Pack a selection into a token: kind in the high bits, library id below."""
+    return int(kind) << 32 | item_id
+
+
+def unpack(packed: int) -> tuple[TokenKind, int]:
+    return TokenKind(packed >> 32), packed & 0xFFFFFFFF
+
+
+def sentence_tokens(
+    object_id: int | None, verb_id: int | None, modifier_id: int | None
+) -> list[int]:
+    """A sentence's selections in tap order: object, then verb, then modifier."""
+    return [
+        token(kind, item_id)
+        for kind, item_id in (
+            (TokenKind.OBJECT, object_id),
+            (TokenKind.VERB, verb_id),
+            (TokenKind.MODIFIER, modifier_id),
+        )
+        if item_id is not None
+    ]
+
+
+def _key(*ids: int) -> int:
+    key = 0
+    for dense in ids:
+        key = key << TOKEN_BITS | dense
+    return key
+
+
+def _span(keys: np.ndarray, prefix: int) -> slice:
+    # Keys with the given prefix one token shorter than the keys
+    lo = int(np.searchsorted(keys, prefix << TOKEN_BITS))
+    hi = int(np.searchsorted(keys, (prefix + 1) << TOKEN_BITS))
+    return slice(lo, hi)
+
+
+def _insert(keys: np.ndarray, counts: np.ndarray, key: int) -> tuple[np.ndarray, np.ndarray, bool]:
+    """Count one ``key``; return the arrays and whether the key is new."""
+    i = int(np.searchsorted(keys, key))
+    if i < len(keys) and keys[i] == key:
+        counts[i] += 1
+        return keys, counts, False
+    return np.insert(keys, i, key), np.insert(counts, i, 1), True
+
+
+@dataclass(slots=True)
+class Watermark:
+    """How far a model has read: the newest ``created_at`` it has seen, and
+    the sentences it counted within :data:`CATCH_UP_SLACK` of it.
+
+    Ids are allocated before commit, so a sentence with a smaller id can
+    commit after a larger one was read. Catch-up therefore rereads the slack
+    window and skips only the ids it has counted.
+    """
+
+    created_at: datetime
+    # Sentence id -> created_at, for sentences inside the slack window
+    recent: dict[int, datetime] = field(default_factory=dict)
+
+    def seen(self, sentence_id: int) -> bool:
+        return sentence_id in self.recent
+
+    def add(self, sentence_id: int, created_at: datetime) -> None:
+        self.created_at = max(self.created_at, created_at)
+        self.recent[sentence_id] = created_at
+        cutoff = self.created_at - CATCH_UP_SLACK
+        if min(self.recent.values()) < cutoff:
+            self.recent = {i: t for i, t in self.recent.items() if t >= cutoff}
+
+
+class NGramModel:
+    """Trigram Kneser-Ney model over one user's selection stream.
+
+    Tokens get dense ids in order of first use, ``BOUNDARY`` being 0.
+
+    Attributes:
+        trigrams: Sorted packed ``(u, v, w)`` keys
+        trigram_counts: Occurrences of each trigram
+        bigrams: Sorted packed ``(v, w)`` keys
+        continuations: Distinct ``u`` seen before each bigram, N1+(• v w)
+        unigram_continuations: Distinct bigrams ending in each token, N1+(• w)
+        history: The last two tokens of the stream
+    """
+
+    def __init__(self) -> None:
+        self.tokens: list[int] = [-1]
+        self.ids: dict[int, int] = {}
+        self.trigrams = np.zeros(0, dtype=np.int64)
+        self.trigram_counts = np.zeros(0, dtype=np.int32)
+        self.bigrams = np.zeros(0, dtype=np.int64)
+        self.continuations = np.zeros(0, dtype=np.int32)
+        self.unigram_continuations = np.zeros(1, dtype=np.int32)
+        # TokenKind of each dense id, -1 for the boundary
+        self.kinds = np.full(1, -1, dtype=np.int8)
+        self.history = (BOUNDARY, BOUNDARY)
+        self.sentences = 0
+        self.watermark: Watermark | None = None
+
+    @property
+    def vocabulary(self) -> int:
+        return len(self.tokens)
+
+    def _dense(self, packed: int) -> int:
+        dense = self.ids.get(packed)
+        if dense is None:
+            if len(self.tokens) >= MAX_VOCABULARY:
+                return UNKNOWN
+            dense = self.ids[packed] = len(self.tokens)
+            self.tokens.append(packed)
+            self.unigram_continuations = np.append(self.unigram_continuations, np.int32(0))
+            self.kinds = np.append(self.kinds, np.int8(packed >> 32))
+        return dense
+
+    def _stream(self, sentences: Iterable[Sequence[int]]) -> list[int]:
+        stream = list(self.history)
+        for sentence in sentences:
+            stream.extend(self._dense(t) for t in sentence)
+            stream.append(BOUNDARY)
+            self.sentences += 1
+        self.history = (stream[-2], stream[-1])
+        return stream
+
+    def add(self, sentence: Sequence[int]) -> None:
+        """Count one new sentence in place."""
+        stream = self._stream([sentence])
+        for i in range(2, len(stream)):
+            u, v, w = stream[i - 2], stream[i - 1], stream[i]
+            if UNKNOWN in (u, v, w):
+                continue
+            self.trigrams, self.trigram_counts, new = _insert(
+                self.trigrams, self.trigram_counts, _key(u, v, w)
+            )
+            if not new:
+                continue
+            # A new (u, v, w) is one more distinct u before (v, w)
+            self.bigrams, self.continuations, new = _insert(
+                self.bigrams, self.continuations, _key(v, w)
+            )
+            if new:
+                self.unigram_continuations[w] += 1
+
+    def extend(self, sentences: Iterable[Sequence[int]]) -> None:
+        """Count many sentences at once, e.g. a user's whole history."""
+        stream = np.asarray(self._stream(sentences), dtype=np.int64)
+        if len(stream) < 3:
+            return
+        keys = stream[:-2] << 2 * TOKEN_BITS | stream[1:-1] << TOKEN_BITS | stream[2:]
+        known = (stream[:-2] != UNKNOWN) & (stream[1:-1] != UNKNOWN) & (stream[2:] != UNKNOWN)
+        keys = np.concatenate([self.trigrams, keys[known]])
+        weights = np.concatenate([self.trigram_counts, np.ones(int(known.sum()), np.int32)])
+        self.trigrams, inverse = np.unique(keys, return_inverse=True)
+        self.trigram_counts = np.bincount(inverse, weights=weights).astype(np.int32)
+        self.bigrams, self.continuations = np.unique(
+            self.trigrams & _BIGRAM_MASK, return_counts=True
+        )
+        self.continuations = self.continuations.astype(np.int32)
+        self.unigram_continuations = np.bincount(
+            self.bigrams & _TOKEN_MASK, minlength=self.vocabulary
+        ).astype(np.int32)
+
+    def probabilities(self, selected: Sequence[int] = ()) -> np.ndarray:
+        """P(next token) over the vocabulary, after the stream and ``selected``.
+
+        Args:
+            selected: Tokens already chosen in the sentence being built
+        """
+        context = [*self.history, *(self.ids.get(t, UNKNOWN) for t in selected)]
+        u, v = context[-2], context[-1]
+        size = self.vocabulary
+        # Lowest order: continuation counts, interpolated with uniform
+        bigram_types = len(self.bigrams)
+        if bigram_types:
+            seen = np.count_nonzero(self.unigram_continuations)
+            probs = np.maximum(self.unigram_continuations - DISCOUNT, 0) / bigram_types
+            probs += DISCOUNT * seen / bigram_types / size
+        else:
+            probs = np.full(size, 1.0 / size)
+        # Middle order: continuation counts of (v, w)
+        probs = self._interpolate(probs, self.bigrams, self.continuations, _key(v))
+        # Highest order: raw counts of (u, v, w)
+        return self._interpolate(probs, self.trigrams, self.trigram_counts, _key(u, v))
+
+    @staticmethod
+    def _interpolate(
+        lower: np.ndarray, keys: np.ndarray, counts: np.ndarray, prefix: int
+    ) -> np.ndarray:
+        found = _span(keys, prefix)
+        following = counts[found]
+        total = int(following.sum())
+        if not total:
+            return lower
+        probs = lower * (DISCOUNT * len(following) / total)
+        probs[keys[found] & _TOKEN_MASK] += np.maximum(following - DISCOUNT, 0) / total
+        return probs
+
+    def predict(
+        self,
+        selected: Sequence[int] = (),
+        k: int = 5,
+        kinds: Iterable[TokenKind] | None = None,
+    ) -> list[tuple[int, float]]:
+        """The ``k`` likeliest next selections as (token, probability), best first.
+
+        Args:
+            selected: Tokens already chosen in the sentence being built
+            k: Number of predictions
+            kinds: Only predict these kinds of selection
+        """
+        if self.vocabulary < 2:
+            return []
+        probs = self.probabilities(selected)
+        probs[BOUNDARY] = 0.0
+        if kinds is not None:
+            # Indexed by kind + 1, so the boundary's -1 stays excluded
+            wanted = np.zeros(len(TokenKind) + 1, dtype=bool)
+            wanted[[int(kind) + 1 for kind in kinds]] = True
+            probs[~wanted[self.kinds + 1]] = 0.0
+        k = min(k, self.vocabulary - 1)
+        top = np.argpartition(-probs, k - 1)[:k]
+        top = top[np.argsort(-probs[top])]
+        return [(self.tokens[i], float(probs[i])) for i in top if probs[i] > 0]
+
+
+class PredictionIndex:
+    """Per-user n-gram models, built from the sentence history on first use."""
+
+    def __init__(self, max_models: int = MAX_MODELS) -> None:
+        self._models: LRUCache[int, NGramModel] = LRUCache(max_models)
+        # Users whose models miss sentences committed by another worker
+        self._stale: set[int] = set()
+
+    async def model(self, session: AsyncSession, user_id: int) -> NGramModel:
+        """The user's model, loaded or brought up to date as needed."""
+        model = self._models.get(user_id)
+        if model is None:
+            self._stale.discard(user_id)
+            model = await self._load(session, user_id)
+        elif user_id in self._stale:
+            self._stale.discard(user_id)
+            await self._catch_up(session, user_id, model)
+        return model
+
+    async def _load(self, session: AsyncSession, user_id: int) -> NGramModel:
+        rows = (
+            await session.execute(
+                select(
+                    ConstructedSentence.created_at,
+                    ConstructedSentence.id,
+                    ConstructedSentence.object_id,
+                    ConstructedSentence.verb_id,
+                    ConstructedSentence.modifier_id,
+                )
+                .where(ConstructedSentence.user_id == user_id)
+                .order_by(ConstructedSentence.created_at.desc())
+                .limit(HISTORY_LIMIT)
+            )
+        ).all()
+        rows.reverse()
+        model = NGramModel()
+        model.extend(sentence_tokens(*row[2:]) for row in rows)
+        if rows:
+            model.watermark = mark = Watermark(rows[-1][0])
+            for created_at, sentence_id, *_selection in reversed(rows):
+                if created_at < mark.created_at - CATCH_UP_SLACK:
+                    break
+                mark.add(sentence_id, created_at)
+        self._models.put(user_id, model)
+        PREDICTION_MODELS.set(len(self._models))
+        return model
+
+    async def _catch_up(self, session: AsyncSession, user_id: int, model: NGramModel) -> None:
+        mark = model.watermark
+        if mark is None:
+            self._models.pop(user_id)
+            await self._load(session, user_id)
+            return
+        rows = (
+            await session.execute(
+                select(
+                    ConstructedSentence.created_at,
+                    ConstructedSentence.id,
+                    ConstructedSentence.object_id,
+                    ConstructedSentence.verb_id,
+                    ConstructedSentence.modifier_id,
+                )
+                .where(
+                    ConstructedSentence.user_id == user_id,
+                    ConstructedSentence.created_at >= mark.created_at - CATCH_UP_SLACK,
+                )
+                .order_by(ConstructedSentence.created_at, ConstructedSentence.id)
+            )
+        ).all()
+        for created_at, sentence_id, *selection in rows:
+            self.record(user_id, sentence_id, created_at, *selection)
+
+    def record(
+        self,
+        user_id: int,
+        sentence_id: int,
+        created_at: datetime,
+        object_id: int | None,
+        verb_id: int | None,
+        modifier_id: int | None,
+    ) -> None:
+        """Count a new sentence in the user's model if it is loaded."""
+        model = self._models.get(user_id)
+        if model is None:
+            return
+        mark = model.watermark
+        if mark is not None and mark.seen(sentence_id):
+            # A concurrent catch-up already counted it
+            return
+        model.add(sentence_tokens(object_id, verb_id, modifier_id))
+        if mark is None:
+            mark = model.watermark = Watermark(created_at)
+        mark.add(sentence_id, created_at)
+
+    def mark_stale(self, user_id: int) -> None:
+        """Another worker added a sentence; read it before the next prediction."""
+        if user_id in self._models:
+            self._stale.add(user_id)
+
+
+_index: PredictionIndex | None = None
+
+
+def init_prediction_index() -> PredictionIndex:
+    """Create the process-wide prediction index (called from the app lifespan)."""
+    global _index
+    _index = PredictionIndex()
+    return _index
+
+
+def get_prediction_index() -> PredictionIndex:
+    if _index is None:
+        raise RuntimeError("Prediction index not created; call init_prediction_index() first")
+    return _index
@@ -0,0 +1,548 @@
+"""Routines and time-triggered suggestion preloading (TODO 5.3).
+
+A routine ("breakfast", daily at 07:30 for 45 minutes, about food) is an
+RFC 5545 recurrence rule in the user's time zone, a window length and the
+object categories the user talks about in that window. While a window is
+open, ``GET /api/routines/active`` offers the user's objects and most
+spoken sentences in those categories.
+
+Every worker holds all enabled routines in a :class:`RoutineScheduler`: a
+min-heap of upcoming window openings and one task that sleeps until the
+earliest of them. Recurrence rules are expanded lazily, one occurrence at a
+time when the previous one fires, so tens of thousands of routines cost a
+heap entry each and no work between their windows. Nothing polls.
+
+``PREWARM_LEAD`` seconds before a window opens, the scheduler warms what
+the user's next screens will need:
+
+* the routine suggestions in the tiered cache. Every worker fires, but the
+  cache's load lock lets one of them query the database while the others
+  read its result from Redis;
+* the TTS audio of the suggested sentences, rendered by the worker that
+  loaded them;
+* this worker's phrase search index and next-selection model for the user.
+
+Routine edits invalidate ``routines_tag(user_id)``; each worker then
+reloads that user's routines, and heap entries of the old versions are
+skipped when they come up.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import json
+import logging
+import math
+import time
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrule, rrulestr
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Database
+from app.models import ConstructedSentence, ObjectLibrary, Routine
+from app.services.object_service import ObjectEntry, ObjectLibraryIndex, custom_objects_tag
+from app.services.prediction_service import PredictionIndex
+from app.services.search_service import SearchIndex
+from app.services.tts_service import frequent_sentences, prefetch_sentences
+from app.utils.cache import TieredCache
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ROUTINES_TAG_PREFIX = "routines:user:"
+
+# Recurrences more frequent than hourly are not routines
+FREQUENCIES = ("HOURLY", "DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+# Periods of the frequencies re-anchored by whole periods; the others move by whole years
+PERIODS = {"HOURLY": timedelta(hours=1), "DAILY": timedelta(days=1), "WEEKLY": timedelta(weeks=1)}
+# Seconds before a window opens that its suggestions are warmed
+PREWARM_LEAD = 60.0
+# Users warmed at once per worker when many windows open together
+WARM_CONCURRENCY = 4
+# Suggestions per open window
+SUGGESTED_OBJECTS = 12
+SUGGESTED_PHRASES = 10
+# Suggested sentences whose audio is rendered ahead
+PREFETCH_AUDIO = 5
+# Sentence history the suggestions are ranked over
+HISTORY_WINDOW = timedelta(days=30)
+# Heap entries handled before yielding to the event loop
+FIRE_BATCH = 256
+
+ROUTINES_SCHEDULED = REGISTRY.gauge(
+    "routines_scheduled", "Routines with an upcoming window on this worker"
+)
+ROUTINE_WARMS = REGISTRY.counter(
+    "routine_warms_total", "Routine windows prewarmed by outcome", ["outcome"]
+)
+ROUTINE_WARM_LAG = REGISTRY.histogram(
+    "routine_warm_lag_seconds",
+    "Time from a window's prewarm time to its warming starting",
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 60, 300),
+)
+
+
+def routines_tag(user_id: int) -> str:
+    return f"{ROUTINES_TAG_PREFIX}{user_id}"
+
+
+def zone_info(name: str) -> ZoneInfo:
+    """The time zone called ``name``.
+
+    Raises:
+        ValueError: No such time zone
+    """
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValueError(f"Unknown time zone {name}") from exc
+
+
+@dataclass(slots=True)
+class Schedule:
+    """A routine's recurrence, expanded on demand.
+
+    Occurrences are computed in local wall-clock time (``07:30`` stays
+    ``07:30`` across DST changes) and returned in UTC.
+    """
+
+    id: int
+    user_id: int
+    name: str
+    categories: tuple[str, ...]
+    duration: timedelta
+    zone: ZoneInfo
+    rule: rrule
+    # The rule's DTSTART, local wall-clock time
+    anchor: datetime
+    # What the anchor may move by (any multiple of it), or None when it must stay
+    step: timedelta | relativedelta | None
+
+    @classmethod
+    def parse(
+        cls,
+        rule: str,
+        starts_at: datetime,
+        zone: str,
+        duration_minutes: int,
+        categories: Iterable[str] = (),
+        routine_id: int = 0,
+        user_id: int = 0,
+        name: str = "",
+    ) -> Schedule:
+        """Build a schedule from an RRULE such as ``FREQ=DAILY;BYHOUR=7;BYMINUTE=30``.
+
+        Raises:
+            ValueError: The rule, time zone or frequency is not accepted
+        """
+        tz = zone_info(zone)
+        body = rule.strip().upper().removeprefix("RRULE:")
+        parts = dict(part.partition("=")[::2] for part in body.split(";"))
+        if "DTSTART" in body or "\n" in body:
+            raise ValueError("Give the start as starts_at, not inside the rule")
+        if parts.get("FREQ") not in FREQUENCIES:
+            raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+        if starts_at.tzinfo is None:
+            starts_at = starts_at.replace(tzinfo=tz)
+        anchor = starts_at.astimezone(tz).replace(tzinfo=None, second=0, microsecond=0)
+        until = parts.get("UNTIL", "")
+        if until.endswith("Z"):
+            # Rules are expanded in local time, so a UTC end becomes local too
+            moment = datetime.strptime(until, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            local_until = moment.astimezone(tz).strftime("%Y%m%dT%H%M%S")
+            body = body.replace(f"UNTIL={until}", f"UNTIL={local_until}")
+        try:
+            expanded = rrulestr(body, dtstart=anchor)
+            interval = int(parts.get("INTERVAL", "1"))
+        except (ValueError, TypeError) as exc:
+            raise ValueError(f"Invalid recurrence rule: {exc}") from exc
+        step: timedelta | relativedelta | None
+        if "COUNT" in parts:
+            step = None  # Every occurrence since DTSTART counts, so the anchor stays
+        elif parts["FREQ"] in PERIODS:
+            step = PERIODS[parts["FREQ"]] * interval
+        elif (anchor.month, anchor.day) == (2, 29):
+            step = None  # A year on, February 29 would become the 28th
+        elif parts["FREQ"] == "MONTHLY":
+            step = relativedelta(years=math.lcm(interval, 12) // 12)
+        else:
+            step = relativedelta(years=interval)
+        return cls(
+            routine_id,
+            user_id,
+            name,
+            tuple(categories),
+            timedelta(minutes=duration_minutes),
+            tz,
+            expanded,
+            anchor,
+            step,
+        )
+
+    @classmethod
+    def from_row(cls, row: Routine) -> Schedule:
+        return cls.parse(
+            row.rrule,
+            row.starts_at,
+            row.timezone,
+            row.duration_minutes,
+            row.categories,
+            row.id,
+            row.user_id,
+            row.name,
+        )
+
+    def _local(self, moment: datetime) -> datetime:
+        return moment.astimezone(self.zone).replace(tzinfo=None)
+
+    def _utc(self, local: datetime) -> datetime:
+        return local.replace(tzinfo=self.zone).astimezone(timezone.utc)
+
+    def _expand_from(self, local: datetime) -> rrule:
+        # Expansion starts at DTSTART. Moving DTSTART by whole intervals to just
+        # before ``local`` leaves the occurrences unchanged and keeps the cost
+        # independent of the routine's age.
+        if isinstance(self.step, timedelta):
+            steps = (local - self.anchor - self.duration) // self.step - 1
+        elif self.step is not None:
+            steps = (local.year - self.anchor.year - 1) // self.step.years - 1
+        if self.step is not None and steps > 0:
+            self.anchor += self.step * steps
+            self.rule = self.rule.replace(dtstart=self.anchor)
+        return self.rule
+
+    def next_window(self, after: datetime) -> datetime | None:
+        """Start (UTC) of the first window opening after ``after``, if any."""
+        local = self._local(after)
+        start = self._expand_from(local).after(local)
+        return self._utc(start) if start is not None else None
+
+    def open_window(self, now: datetime) -> datetime | None:
+        """Start (UTC) of the window open at ``now``, if one is."""
+        local = self._local(now)
+        start = self._expand_from(local).before(local, inc=True)
+        if start is None:
+            return None
+        opened = self._utc(start)
+        return opened if now < opened + self.duration else None
+
+
+@dataclass(slots=True)
+class OpenWindow:
+    schedule: Schedule
+    start: datetime
+
+    @property
+    def end(self) -> datetime:
+        return self.start + self.schedule.duration
+
+
+async def routine_phrases(
+    session: AsyncSession, user_id: int, categories: Sequence[str], limit: int, since: datetime
+) -> list[str]:
+    """The user's most spoken sentences about objects in ``categories``.
+
+    With no categories, their most spoken sentences and favourites overall.
+    """
+    if not categories:
+        return (await frequent_sentences(session, user_id, limit, since))[:limit]
+    rows = await session.scalars(
+        select(ConstructedSentence.sentence_text)
+        .join(ObjectLibrary, ObjectLibrary.id == ConstructedSentence.object_id)
+        .where(
+            ConstructedSentence.user_id == user_id,
+            ConstructedSentence.spoken,
+            ConstructedSentence.created_at >= since,
+            ObjectLibrary.category.in_(categories),
+        )
+        .group_by(ConstructedSentence.sentence_text)
+        .order_by(func.count().desc())
+        .limit(limit)
+    )
+    return list(rows)
+
+
+def _object_json(entry: ObjectEntry) -> dict[str, object]:
+    return {
+        "id": entry.id,
+        "name": entry.name,
+        "category": entry.category,
+        "icon_url": entry.icon_url,
+        "usage_count": entry.usage_count,
+        "is_custom": entry.is_custom,
+    }
+
+
+class RoutineScheduler:
+    """Every enabled routine's next window, in a heap ordered by prewarm time.
+
+    Args:
+        database: Database to read routines and sentence history from
+        cache: Tiered cache holding the routine suggestions
+        objects: Object library, for the suggested objects
+        predictions: Next-selection models to warm
+        search: Phrase search indexes to warm
+        lead: Seconds before a window opens that it is warmed
+        concurrency: Users warmed at once
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        cache: TieredCache,
+        objects: ObjectLibraryIndex,
+        predictions: PredictionIndex,
+        search: SearchIndex,
+        lead: float = PREWARM_LEAD,
+        concurrency: int = WARM_CONCURRENCY,
+    ) -> None:
+        self.database = database
+        self.cache = cache
+        self.objects = objects
+        self.predictions = predictions
+        self.search = search
+        self.lead = lead
+        self.concurrency = concurrency
+        self._schedules: dict[int, Schedule] = {}
+        self._by_user: defaultdict[int, set[int]] = defaultdict(set)
+        # (prewarm time, routine id, window start) as epoch seconds
+        self._heap: list[tuple[float, int, float]] = []
+        # Window start each routine's live heap entry is for; others are stale
+        self._due: dict[int, float] = {}
+        # Window start each routine was last warmed for, kept across reloads
+        self._warmed: dict[int, float] = {}
+        self._wake = asyncio.Event()
+        # (user id, window end) of windows to warm
+        self._warm_queue: asyncio.Queue[tuple[int, float]] = asyncio.Queue()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def _schedule(self, schedule: Schedule, after: datetime) -> None:
+        start = schedule.next_window(after)
+        if start is None:
+            self._due.pop(schedule.id, None)
+            return
+        at = start.timestamp()
+        self._due[schedule.id] = at
+        heapq.heappush(self._heap, (at - self.lead, schedule.id, at))
+
+    def _add(self, schedule: Schedule, now: datetime) -> None:
+        self._schedules[schedule.id] = schedule
+        self._by_user[schedule.user_id].add(schedule.id)
+        opened = schedule.open_window(now)
+        if opened is not None and self._warmed.get(schedule.id) != opened.timestamp():
+            # Loaded mid-window (after a restart or an edit): warm it right away
+            self._due[schedule.id] = opened.timestamp()
+            heapq.heappush(self._heap, (now.timestamp(), schedule.id, opened.timestamp()))
+        else:
+            self._schedule(schedule, now)
+
+    def _remove_user(self, user_id: int) -> set[int]:
+        removed = self._by_user.pop(user_id, set())
+        for routine_id in removed:
+            del self._schedules[routine_id]
+            self._due.pop(routine_id, None)
+        return removed
+
+    def _add_rows(self, rows: Iterable[Routine], now: datetime) -> None:
+        for row in rows:
+            try:
+                self._add(Schedule.from_row(row), now)
+            except ValueError:
+                logger.warning("Skipping routine %s with an invalid rule", row.id, exc_info=True)
+
+    async def load(self, session: AsyncSession) -> None:
+        """Schedule every enabled routine."""
+        now = datetime.now(timezone.utc)
+        rows = await session.stream_scalars(
+            select(Routine).where(Routine.enabled).execution_options(yield_per=1000)
+        )
+        async for batch in rows.partitions():
+            self._add_rows(batch, now)
+            await asyncio.sleep(0)
+        ROUTINES_SCHEDULED.set(len(self._due))
+        self._wake.set()
+
+    async def refresh_user(self, session: AsyncSession, user_id: int) -> None:
+        """Re-read one user's routines after they changed."""
+        rows = await session.scalars(
+            select(Routine).where(Routine.user_id == user_id, Routine.enabled)
+        )
+        removed = self._remove_user(user_id)
+        self._add_rows(rows, datetime.now(timezone.utc))
+        for routine_id in removed - self._by_user.get(user_id, set()):
+            self._warmed.pop(routine_id, None)
+        ROUTINES_SCHEDULED.set(len(self._due))
+        self._wake.set()
+
+    def open_windows(self, user_id: int, now: datetime | None = None) -> list[OpenWindow]:
+        """The user's routine windows open at ``now``, earliest first."""
+        now = now or datetime.now(timezone.utc)
+        windows = []
+        for routine_id in self._by_user.get(user_id, ()):
+            schedule = self._schedules[routine_id]
+            start = schedule.open_window(now)
+            if start is not None:
+                windows.append(OpenWindow(schedule, start))
+        return sorted(windows, key=lambda w: (w.start, w.schedule.id))
+
+    async def suggestions(self, user_id: int, now: datetime | None = None) -> bytes:
+        """The JSON body of ``GET /api/routines/active`` for the user.
+
+        Cached per set of open windows until the last of them closes.
+        """
+        now = now or datetime.now(timezone.utc)
+        windows = self.open_windows(user_id, now)
+        if not windows:
+            return json.dumps({"routines": [], "objects": [], "phrases": []}).encode()
+        categories = list(dict.fromkeys(c for w in windows for c in w.schedule.categories))
+
+        async def load() -> bytes:
+            async with self.database.session(read_only=True) as session:
+                phrases = await routine_phrases(
+                    session, user_id, categories, SUGGESTED_PHRASES, now - HISTORY_WINDOW
+                )
+            objects = [e for c in categories for e in self.objects.objects(user_id, c)]
+            prefetch_sentences(self.database, user_id, phrases[:PREFETCH_AUDIO])
+            routines = [
+                {
+                    "id": w.schedule.id,
+                    "name": w.schedule.name,
+                    "categories": list(w.schedule.categories),
+                    "window_start": w.start.isoformat(),
+                    "window_end": w.end.isoformat(),
+                }
+                for w in windows
+            ]
+            body = {
+                "routines": routines,
+                "objects": [_object_json(e) for e in objects[:SUGGESTED_OBJECTS]],
+                "phrases": phrases,
+            }
+            return json.dumps(body).encode()
+
+        opened = ",".join(f"{w.schedule.id}@{int(w.start.timestamp())}" for w in windows)
+        remaining = max(w.end for w in windows) - datetime.now(timezone.utc)
+        return await self.cache.get_or_load(
+            "routines.active",
+            f"routines.active:{user_id}:{opened}",
+            load,
+            ttl=max(remaining.total_seconds(), 1.0),
+            stale_ttl=0.0,
+            tags=[routines_tag(user_id), custom_objects_tag(user_id)],
+        )
+
+    async def warm(self, user_id: int) -> None:
+        """Load everything the user's screens need in their open windows."""
+        async with self.database.session(read_only=True) as session:
+            await self.predictions.model(session, user_id)
+            await self.search.user_index(session, user_id)
+        # Warming runs ahead of the window, so look at it as it will be open
+        await self.suggestions(user_id, datetime.now(timezone.utc) + timedelta(seconds=self.lead))
+
+    async def _fire_due(self) -> None:
+        now = time.time()
+        fired = 0
+        while self._heap and self._heap[0][0] <= now:
+            at, routine_id, start = heapq.heappop(self._heap)
+            if self._due.get(routine_id) != start:
+                continue  # Superseded by an edit or a reload
+            schedule = self._schedules[routine_id]
+            ROUTINE_WARM_LAG.observe(max(now - at, 0.0))
+            self._warmed[routine_id] = start
+            end = start + schedule.duration.total_seconds()
+            self._warm_queue.put_nowait((schedule.user_id, end))
+            # The next occurrence is expanded only now
+            self._schedule(schedule, datetime.fromtimestamp(start, timezone.utc))
+            fired += 1
+            if fired % FIRE_BATCH == 0:
+                await asyncio.sleep(0)
+                now = time.time()
+        if fired:
+            ROUTINES_SCHEDULED.set(len(self._due))
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await self._fire_due()
+            except Exception:
+                logger.exception("Routine scheduling failed")
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout)
+
+    async def _warm_worker(self) -> None:
+        while True:
+            user_id, end = await self._warm_queue.get()
+            try:
+                # A backlog can outlast short windows; closed ones are not worth warming
+                if time.time() < end:
+                    await self.warm(user_id)
+                    ROUTINE_WARMS.inc(1, "warmed")
+                else:
+                    ROUTINE_WARMS.inc(1, "expired")
+            except Exception:
+                ROUTINE_WARMS.inc(1, "failed")
+                logger.warning("Warming routines of user %s failed", user_id, exc_info=True)
+            finally:
+                self._warm_queue.task_done()
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks.append(asyncio.create_task(self._run()))
+            for _ in range(self.concurrency):
+                self._tasks.append(asyncio.create_task(self._warm_worker()))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks.clear()
+
+
+_scheduler: RoutineScheduler | None = None
+
+
+async def init_routine_scheduler(
+    database: Database,
+    cache: TieredCache,
+    objects: ObjectLibraryIndex,
+    predictions: PredictionIndex,
+    search: SearchIndex,
+    lead: float = PREWARM_LEAD,
+) -> RoutineScheduler:
+    """Load every enabled routine and start scheduling (called from the app lifespan)."""
+    global _scheduler
+    _scheduler = RoutineScheduler(database, cache, objects, predictions, search, lead)
+    async with database.session(read_only=True) as session:
+        await _scheduler.load(session)
+    _scheduler.start()
+    logger.info("Scheduled %d routines", len(_scheduler))
+    return _scheduler
+
+
+def get_routine_scheduler() -> RoutineScheduler:
+    if _scheduler is None:
+        raise RuntimeError("Routine scheduler not initialised")
+    return _scheduler
+
+
+async def close_routine_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.close()
+    _scheduler = None
@@ -0,0 +1,445 @@
+"""Switch-scanning and gaze layouts ordered by predicted selection.
+
+Users who cannot tap select by scanning (create_future_md, "Switch Access"):
+the app highlights groups one after another and a switch press picks the
+highlighted one, level by level down to a single item. How long that takes
+depends almost entirely on where the wanted item sits, so layouts here are
+built from the next-selection model (:mod:`app.services.prediction_service`)
+rather than in library order:
+
+- ``linear``: one group, likeliest first
+- ``row-column``: a grid whose cheapest cells (rows near the top, columns
+  near the left) hold the likeliest items
+- ``huffman``: a scan tree built like a k-ary Huffman code, so likely items
+  sit near the root, with each group's members ordered likeliest first
+
+Costs are expected values over the predicted distribution, for one of three
+timing models: ``scan`` (one switch, automatic highlighting), ``step`` (two
+switches, one moving the highlight and one selecting) and ``gaze`` (direct
+selection by dwell, where likely items get a shorter dwell). ``best`` tries
+every method and fan-out and keeps the fastest.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+
+from app.services.object_service import ObjectLibraryIndex
+from app.services.prediction_service import NGramModel, TokenKind, token
+from app.services.sentence_service import SentenceEngine
+from app.services.verb_service import CATEGORY_VERBS
+
+SCREENS = ("objects", "verbs", "modifiers")
+MODES = ("scan", "step", "gaze")
+METHODS = ("linear", "row-column", "huffman", "best")
+# Rule order weighs like this many sentences of history against the model
+PRIOR_STRENGTH = 20.0
+MAX_SCREEN_ITEMS = 64
+MAX_FANOUT = 8
+# Likeliest selections whose next screen is laid out ahead
+LOOKAHEAD = 3
+
+# (position in its group, group size) at each level from the root
+ScanPath = tuple[tuple[int, int], ...]
+
+_KINDS = {"objects": TokenKind.OBJECT, "verbs": TokenKind.VERB, "modifiers": TokenKind.MODIFIER}
+
+
+@dataclass(frozen=True, slots=True)
+class ScanItem:
+    """One selectable item and its predicted probability on its screen."""
+
+    kind: str
+    id: int
+    name: str
+    probability: float
+
+
+@dataclass(frozen=True, slots=True)
+class ScanNode:
+    """A scan group (``children``) or a single item (``item``)."""
+
+    probability: float
+    item: ScanItem | None = None
+    children: tuple[ScanNode, ...] = ()
+
+    def leaves(self, path: ScanPath = ()) -> list[tuple[ScanItem, ScanPath]]:
+        """Every item with its path: (position, group size) at each level."""
+        if self.item is not None:
+            return [(self.item, path)]
+        size = len(self.children)
+        return [
+            leaf
+            for position, child in enumerate(self.children)
+            for leaf in child.leaves((*path, (position, size)))
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class Timing:
+    """How the user selects, in seconds.
+
+    Attributes:
+        mode: ``"scan"``, ``"step"`` or ``"gaze"``
+        scan_interval: Time each group stays highlighted (scan)
+        reaction: Time from the highlight reaching a group to the press
+            (scan), or from the screen appearing to the gaze reaching the
+            item (gaze)
+        press_interval: Time per press (step)
+        dwell: Dwell for the least likely items (gaze)
+        min_dwell: Dwell for the likeliest item (gaze)
+        miss_rate: Chance of letting the wanted group go by, which costs a
+            full cycle of the group (scan, step)
+    """
+
+    mode: str = "scan"
+    scan_interval: float = 1.0
+    reaction: float = 0.4
+    press_interval: float = 0.5
+    dwell: float = 2.0
+    min_dwell: float = 0.6
+    miss_rate: float = 0.05
+
+    def __post_init__(self) -> None:
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown mode {self.mode!r}; expected one of {', '.join(MODES)}")
+        if not 0 < self.reaction <= self.scan_interval:
+            raise ValueError("reaction must be positive and at most scan_interval")
+        if not 0 < self.min_dwell <= self.dwell:
+            raise ValueError("min_dwell must be positive and at most dwell")
+        if self.press_interval <= 0:
+            raise ValueError("press_interval must be positive")
+        if not 0 <= self.miss_rate < 1:
+            raise ValueError("miss_rate must be in [0, 1)")
+
+    def cost(self, path: ScanPath) -> tuple[float, float]:
+        """Expected (presses, seconds) to select the item at ``path`` (scan and step)."""
+        # Misses before the press at a level: geometric, mean m / (1 - m)
+        cycles = self.miss_rate / (1 - self.miss_rate)
+        if self.mode == "scan":
+            # The highlight passes ``position`` groups, then one press per level
+            seconds = sum(
+                (p + cycles * size) * self.scan_interval + self.reaction for p, size in path
+            )
+            return float(len(path)), seconds
+        presses = sum(p + 1 + cycles * size for p, size in path)
+        return presses, presses * self.press_interval
+
+    def dwell_for(self, probability: float, lowest: float, highest: float) -> float:
+        """Dwell before a gaze selection.
+
+        ``min_dwell`` for the likeliest item up to ``dwell`` for the least
+        likely, and ``dwell`` for every item when all are equally likely.
+        """
+        if highest <= lowest:
+            return self.dwell
+        share = (probability - lowest) / (highest - lowest)
+        return self.dwell - (self.dwell - self.min_dwell) * share
+
+
+@dataclass(frozen=True, slots=True)
+class ScanLayout:
+    """A screen's scan tree and its expected cost per selection."""
+
+    method: str
+    root: ScanNode
+    expected_presses: float
+    expected_seconds: float
+    # Gaze dwell per (kind, id); empty for switch modes
+    dwell: dict[tuple[str, int], float]
+
+    @property
+    def selections_per_minute(self) -> float:
+        return 60.0 / self.expected_seconds if self.expected_seconds > 0 else 0.0
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "method": self.method,
+            "expected_presses": round(self.expected_presses, 3),
+            "expected_seconds": round(self.expected_seconds, 3),
+            "selections_per_minute": round(self.selections_per_minute, 2),
+            "root": self._node(self.root),
+        }
+
+    def _node(self, node: ScanNode) -> dict[str, object]:
+        if node.item is not None:
+            out: dict[str, object] = {
+                "kind": node.item.kind,
+                "id": node.item.id,
+                "name": node.item.name,
+                "probability": round(node.probability, 5),
+            }
+            dwell = self.dwell.get((node.item.kind, node.item.id))
+            if dwell is not None:
+                out["dwell_ms"] = round(dwell * 1000)
+            return out
+        return {
+            "probability": round(node.probability, 5),
+            "children": [self._node(child) for child in node.children],
+        }
+
+
+def _leaf(item: ScanItem) -> ScanNode:
+    return ScanNode(item.probability, item)
+
+
+def _group(children: Sequence[ScanNode]) -> ScanNode:
+    return ScanNode(sum(child.probability for child in children), None, tuple(children))
+
+
+def _ranked(items: Sequence[ScanItem]) -> list[ScanItem]:
+    # Stable, so equal probabilities keep the screen's own order
+    return sorted(items, key=lambda item: -item.probability)
+
+
+def linear_layout(items: Sequence[ScanItem]) -> ScanNode:
+    """One group of every item, likeliest first."""
+    return _group([_leaf(item) for item in _ranked(items)])
+
+
+def row_column_layout(items: Sequence[ScanItem], columns: int) -> ScanNode:
+    """Rows of up to ``columns`` items, the likeliest in the cheapest cells.
+
+    A cell's cost grows with row plus column in both switch modes, so cells
+    are filled along anti-diagonals from the top left. The last rows may be
+    short; scanning skips empty cells.
+    """
+    rows = math.ceil(len(items) / columns)
+    cells = sorted(
+        itertools.product(range(rows), range(columns)), key=lambda cell: (sum(cell), cell[0])
+    )
+    grid: list[dict[int, ScanNode]] = [{} for _ in range(rows)]
+    for (row, column), item in zip(cells, _ranked(items)):
+        grid[row][column] = _leaf(item)
+    # A one-item row selects its item directly; one row needs no row level
+    lines = [
+        _group([line[c] for c in sorted(line)]) if len(line) > 1 else next(iter(line.values()))
+        for line in grid
+        if line
+    ]
+    return lines[0] if len(lines) == 1 else _group(lines)
+
+
+def huffman_layout(items: Sequence[ScanItem], fanout: int) -> ScanNode:
+    """A ``fanout``-ary Huffman scan tree, each group ordered likeliest first.
+
+    Merging the ``fanout`` least likely nodes until one is left minimizes
+    the expected number of levels, which is the number of presses in
+    automatic scanning. Zero-probability padding makes every merge full, as
+    in k-ary Huffman coding, and is dropped again afterwards.
+    """
+    if len(items) <= fanout:
+        return linear_layout(items)
+    counter = itertools.count()
+    heap: list[tuple[float, int, ScanNode | None]] = [
+        (item.probability, next(counter), _leaf(item)) for item in items
+    ]
+    padding = (fanout - 1 - (len(items) - 1) % (fanout - 1)) % (fanout - 1)
+    heap.extend((0.0, next(counter), None) for _ in range(padding))
+    heapq.heapify(heap)
+    while len(heap) > 1:
+        merged = [heapq.heappop(heap) for _ in range(min(fanout, len(heap)))]
+        children = sorted(
+            (node for _p, _n, node in merged if node is not None), key=lambda n: -n.probability
+        )
+        node = children[0] if len(children) == 1 else _group(children)
+        heapq.heappush(heap, (node.probability, next(counter), node))
+    root = heap[0][2]
+    return root if root is not None else linear_layout(items)
+
+
+def evaluate(method: str, root: ScanNode, timing: Timing) -> ScanLayout:
+    """Expected presses and seconds per selection of a layout under ``timing``."""
+    leaves = root.leaves()
+    total = sum(item.probability for item, _path in leaves) or 1.0
+    presses = seconds = 0.0
+    dwell: dict[tuple[str, int], float] = {}
+    if timing.mode == "gaze":
+        lowest = min(item.probability for item, _path in leaves)
+        highest = max(item.probability for item, _path in leaves)
+        for item, _path in leaves:
+            dwell[item.kind, item.id] = timing.dwell_for(item.probability, lowest, highest)
+            seconds += item.probability / total * (timing.reaction + dwell[item.kind, item.id])
+        presses = 1.0
+    else:
+        for item, path in leaves:
+            item_presses, item_seconds = timing.cost(path)
+            presses += item.probability / total * item_presses
+            seconds += item.probability / total * item_seconds
+    return ScanLayout(method, root, presses, seconds, dwell)
+
+
+def build_layout(
+    items: Sequence[ScanItem], timing: Timing, method: str = "best", columns: int = 4
+) -> ScanLayout:
+    """Lay out a screen's items for ``timing``.
+
+    Args:
+        items: The screen's items with their predicted probabilities
+        timing: How the user selects
+        method: One of :data:`METHODS`; ``"best"`` keeps the fastest layout,
+            trying Huffman fan-outs up to :data:`MAX_FANOUT`
+        columns: Grid width for ``row-column``
+
+    Raises:
+        ValueError: Unknown method, no items or fewer than one column
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}; expected one of {', '.join(METHODS)}")
+    if not items:
+        raise ValueError("Nothing to lay out")
+    if columns < 1:
+        raise ValueError("columns must be at least 1")
+    if timing.mode == "gaze":
+        # Every item is on screen at once; only the dwell times differ
+        return evaluate("linear", linear_layout(items), timing)
+    candidates: list[ScanLayout] = []
+    if method in ("linear", "best"):
+        candidates.append(evaluate("linear", linear_layout(items), timing))
+    if method in ("row-column", "best"):
+        candidates.append(evaluate("row-column", row_column_layout(items, columns), timing))
+    if method == "huffman":
+        candidates.append(evaluate("huffman", huffman_layout(items, max(columns, 2)), timing))
+    elif method == "best":
+        for fanout in range(2, MAX_FANOUT + 1):
+            candidates.append(evaluate("huffman", huffman_layout(items, fanout), timing))
+    return min(candidates, key=lambda layout: (layout.expected_seconds, layout.expected_presses))
+
+
+def uniform(items: Sequence[ScanItem]) -> list[ScanItem]:
+    """``items`` with equal probabilities: the fixed, library-order layout."""
+    return [replace(item, probability=1.0 / len(items)) for item in items]
+
+
+def _screen_candidates(
+    engine: SentenceEngine,
+    objects: ObjectLibraryIndex,
+    user_id: int,
+    screen: str,
+    object_id: int | None,
+    category: str | None,
+) -> list[tuple[int, str]]:
+    # (id, name) in the order the screen shows without prediction
+    if screen == "objects":
+        entries = objects.objects(user_id, category)
+        entries.sort(key=lambda e: (not e.is_custom, -e.usage_count, e.name))
+        return [(e.id, e.name) for e in entries[:MAX_SCREEN_ITEMS]]
+    if screen == "verbs":
+        entry = objects.visible(object_id, user_id) if object_id is not None else None
+        if entry is None:
+            raise ValueError(f"Unknown object {object_id}")
+        preferred = CATEGORY_VERBS.get(entry.category, ())
+        rank = {verb: i for i, verb in enumerate(preferred)}
+        verbs = sorted(engine.verbs.items(), key=lambda v: (rank.get(v[1], len(rank)), v[0]))
+        return verbs[:MAX_SCREEN_ITEMS]
+    return sorted(engine.modifiers.items())[:MAX_SCREEN_ITEMS]
+
+
+def screen_items(
+    model: NGramModel,
+    engine: SentenceEngine,
+    objects: ObjectLibraryIndex,
+    user_id: int,
+    screen: str,
+    object_id: int | None = None,
+    verb_id: int | None = None,
+    category: str | None = None,
+) -> list[ScanItem]:
+    """A screen's items with their probability of being selected next.
+
+    The model's prediction is blended with a Zipf prior over the screen's
+    rule order, weighted by how much history the model has seen, so new
+    users get the rule order and regular users their own habits.
+
+    Args:
+        model: The user's next-selection model
+        engine: Sentence engine, for the verb and modifier libraries
+        objects: Object library index
+        user_id: The user
+        screen: ``"objects"``, ``"verbs"`` (needs ``object_id``) or
+            ``"modifiers"``
+        object_id: Object selected so far
+        verb_id: Verb selected so far
+        category: Object category shown on the objects screen
+
+    Raises:
+        ValueError: Unknown screen or object
+    """
+    if screen not in SCREENS:
+        raise ValueError(f"Unknown screen {screen!r}; expected one of {', '.join(SCREENS)}")
+    candidates = _screen_candidates(engine, objects, user_id, screen, object_id, category)
+    if not candidates:
+        return []
+    selected = []
+    if screen != "objects" and object_id is not None:
+        selected.append(token(TokenKind.OBJECT, object_id))
+    if screen == "modifiers" and verb_id is not None:
+        selected.append(token(TokenKind.VERB, verb_id))
+    kind = _KINDS[screen]
+    predicted = [0.0] * len(candidates)
+    if model.vocabulary > 1:
+        probs = model.probabilities(selected)
+        for i, (item_id, _name) in enumerate(candidates):
+            dense = model.ids.get(token(kind, item_id))
+            if dense is not None:
+                predicted[i] = float(probs[dense])
+    mass = sum(predicted)
+    weight = PRIOR_STRENGTH / (PRIOR_STRENGTH + model.sentences) if mass > 0 else 1.0
+    harmonic = sum(1.0 / (rank + 1) for rank in range(len(candidates)))
+    items = []
+    for rank, (item_id, name) in enumerate(candidates):
+        prior = 1.0 / (rank + 1) / harmonic
+        learned = predicted[rank] / mass if mass else 0.0
+        items.append(ScanItem(screen[:-1], item_id, name, weight * prior + (1 - weight) * learned))
+    return items
+
+
+def screen_layouts(
+    model: NGramModel,
+    engine: SentenceEngine,
+    objects: ObjectLibraryIndex,
+    user_id: int,
+    timing: Timing,
+    screen: str,
+    object_id: int | None = None,
+    verb_id: int | None = None,
+    category: str | None = None,
+    method: str = "best",
+    columns: int = 4,
+) -> dict[str, object]:
+    """A screen's layout plus those of the screens its likeliest items open.
+
+    Returns:
+        JSON-ready body with ``layout`` and ``next``, the latter keyed by the
+        id of the item whose selection leads to the screen
+
+    Raises:
+        ValueError: Unknown screen, object, method or an empty screen
+    """
+
+    def layout(screen: str, object_id: int | None, verb_id: int | None) -> ScanLayout:
+        items = screen_items(model, engine, objects, user_id, screen, object_id, verb_id, category)
+        return build_layout(items, timing, method, columns)
+
+    current = layout(screen, object_id, verb_id)
+    ahead: dict[str, object] = {}
+    if screen != "modifiers":
+        likeliest = sorted(
+            (leaf for leaf, _path in current.root.leaves()), key=lambda i: -i.probability
+        )
+        for item in likeliest[:LOOKAHEAD]:
+            if screen == "objects":
+                following = layout("verbs", item.id, None)
+            else:
+                following = layout("modifiers", object_id, item.id)
+            ahead[str(item.id)] = following.to_dict()
+    return {
+        "screen": screen,
+        "mode": timing.mode,
+        "layout": current.to_dict(),
+        "next": ahead,
+    }
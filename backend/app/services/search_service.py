@@ -0,0 +1,418 @@
+"""Fuzzy full-text search over objects, verbs, modifiers and phrases (TODO 3.4 / 5.1).
+
+Caregivers look up items in the dashboard by typing a few letters, often
+misspelled. Everything searchable lives in in-process inverted indexes, so
+search needs no search cluster and works offline:
+
+- one shared index of the library objects, verbs and modifiers, built once
+  per worker from the in-memory object index and sentence engine
+- per user, an index of their custom objects and phrases (the distinct
+  sentences of ``constructed_sentences``), with how often they used each
+  item, loaded on the user's first search
+
+Query words match index terms exactly, by prefix (the last word, as it is
+being typed) or by character-trigram similarity ("bananna" finds "banana").
+Documents are ranked with BM25 over the combined statistics of both indexes,
+then boosted by the user's own usage count. A user's index is updated in
+place: custom objects are diffed against the object index when its version
+changes, and new sentences are read from a slack window before the newest
+one seen, skipping those already counted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Literal
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ConstructedSentence
+from app.services.object_service import ObjectLibraryIndex, normalize_label
+from app.services.prediction_service import CATCH_UP_SLACK, Watermark
+from app.services.sentence_service import SentenceEngine
+from app.utils.cache import LRUCache
+from app.utils.metrics import REGISTRY
+
+Kind = Literal["object", "verb", "modifier", "phrase"]
+KINDS: tuple[Kind, ...] = ("object", "verb", "modifier", "phrase")
+
+# BM25 parameters, the usual defaults
+K1 = 1.2
+B = 0.75
+# Score multiplier per log unit of the user's usage count
+USAGE_BOOST = 0.25
+# Trigram (Dice) similarity at which a word counts as a misspelling of a term
+FUZZY_SIMILARITY = 0.4
+# Weights of non-exact matches, so exact ones rank first
+PREFIX_WEIGHT = 0.9
+FUZZY_WEIGHT = 0.8
+# Index terms tried per query word
+MAX_EXPANSIONS = 8
+MIN_PREFIX = 2
+# Distinct phrases loaded per user, most used first
+MAX_PHRASES = 5000
+MAX_USER_INDEXES = 1024
+
+SEARCH_INDEX_TERMS = REGISTRY.gauge("search_index_terms", "Distinct terms in the shared index")
+
+
+def terms(text: str) -> list[str]:
+    return normalize_label(text).split()
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {"".join(t) for t in zip(padded, padded[1:], padded[2:])}
+
+
+@dataclass(slots=True)
+class Document:
+    kind: Kind
+    # Library id; None for phrases
+    ref: int | None
+    text: str
+    category: str | None = None
+
+
+class InvertedIndex:
+    """Term postings with a trigram index over the vocabulary.
+
+    Documents are added and removed one at a time; nothing is rebuilt.
+    """
+
+    def __init__(self) -> None:
+        self.docs: dict[int, Document] = {}
+        self.postings: dict[str, dict[int, int]] = {}
+        self.lengths: dict[int, int] = {}
+        self.total_length = 0
+        self.vocabulary: list[str] = []
+        self._by_trigram: dict[str, set[str]] = {}
+        self._next_id = 0
+
+    def add(self, doc: Document) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        words = terms(doc.text)
+        self.docs[doc_id] = doc
+        self.lengths[doc_id] = len(words)
+        self.total_length += len(words)
+        for term, tf in Counter(words).items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                bisect.insort(self.vocabulary, term)
+                for gram in trigrams(term):
+                    self._by_trigram.setdefault(gram, set()).add(term)
+            postings[doc_id] = tf
+        return doc_id
+
+    def remove(self, doc_id: int) -> None:
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self.total_length -= self.lengths.pop(doc_id)
+        for term in set(terms(doc.text)):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if postings:
+                continue
+            del self.postings[term]
+            del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+            for gram in trigrams(term):
+                grams = self._by_trigram[gram]
+                grams.discard(term)
+                if not grams:
+                    del self._by_trigram[gram]
+
+    def with_prefix(self, prefix: str) -> Iterable[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        for term in self.vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def sharing_trigrams(self, grams: set[str]) -> Counter[str]:
+        """Vocabulary terms by how many of ``grams`` they contain."""
+        shared: Counter[str] = Counter()
+        for gram in grams:
+            shared.update(self._by_trigram.get(gram, ()))
+        return shared
+
+
+@dataclass(slots=True)
+class UserIndex:
+    """One user's custom objects and phrases, and their usage counts."""
+
+    index: InvertedIndex = field(default_factory=InvertedIndex)
+    custom: dict[int, int] = field(default_factory=dict)
+    phrases: dict[str, int] = field(default_factory=dict)
+    # (kind, library id) or ("phrase", text) -> times used
+    usage: Counter[tuple[str, int | str]] = field(default_factory=Counter)
+    objects_version: str = ""
+    # Sentences read so far; None until the user has any
+    seen: Watermark | None = None
+
+    def count(
+        self,
+        text: str,
+        object_id: int | None,
+        verb_id: int | None,
+        modifier_id: int | None,
+        times: int = 1,
+    ) -> None:
+        for kind, ref in (("object", object_id), ("verb", verb_id), ("modifier", modifier_id)):
+            if ref is not None:
+                self.usage[kind, ref] += times
+        self.usage["phrase", text] += times
+        if text not in self.phrases and len(self.phrases) < MAX_PHRASES:
+            self.phrases[text] = self.index.add(Document("phrase", None, text))
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    kind: Kind
+    ref: int | None
+    text: str
+    category: str | None
+    score: float
+    usage: int
+
+
+class SearchIndex:
+    """The shared index plus per-user indexes, searched together.
+
+    Args:
+        objects: Object index holding the library and custom objects
+        engine: Sentence engine holding the verbs and modifiers
+    """
+
+    def __init__(self, objects: ObjectLibraryIndex, engine: SentenceEngine) -> None:
+        self.objects = objects
+        self.shared = InvertedIndex()
+        for entry in objects.objects(None):
+            self.shared.add(Document("object", entry.id, entry.name, entry.category))
+        for verb_id, verb in engine.verbs.items():
+            self.shared.add(Document("verb", verb_id, verb))
+        for modifier_id, modifier in engine.modifiers.items():
+            self.shared.add(Document("modifier", modifier_id, modifier))
+        SEARCH_INDEX_TERMS.set(len(self.shared.postings))
+        self._users: LRUCache[int, UserIndex] = LRUCache(MAX_USER_INDEXES)
+        self._stale: set[int] = set()
+        self._loading: dict[int, asyncio.Future[UserIndex]] = {}
+
+    async def user_index(self, session: AsyncSession, user_id: int) -> UserIndex:
+        """The user's index, loaded or brought up to date as needed."""
+        user = self._users.get(user_id)
+        if user is None:
+            user = await self._load(session, user_id)
+        elif user_id in self._stale:
+            self._stale.discard(user_id)
+            try:
+                await self._load_phrases(session, user_id, user)
+            except BaseException:
+                # Read them on the next search instead
+                self._stale.add(user_id)
+                raise
+        self._sync_custom(user_id, user)
+        return user
+
+    async def _load(self, session: AsyncSession, user_id: int) -> UserIndex:
+        """Build the user's index; concurrent first searches share one load.
+
+        The index is cached only once complete, so nobody sees it half
+        loaded and a failed load leaves nothing behind.
+        """
+        pending = self._loading.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = self._loading[user_id] = asyncio.get_running_loop().create_future()
+        self._stale.discard(user_id)
+        user = UserIndex()
+        try:
+            await self._load_phrases(session, user_id, user)
+        except BaseException as exc:
+            if isinstance(exc, Exception):
+                future.set_exception(exc)
+                # Waiters re-raise it; don't also log it as never retrieved
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        else:
+            self._users.put(user_id, user)
+            future.set_result(user)
+        finally:
+            del self._loading[user_id]
+        return user
+
+    def _sync_custom(self, user_id: int, user: UserIndex) -> None:
+        version = self.objects.version(user_id)
+        if version == user.objects_version:
+            return
+        user.objects_version = version
+        current = {entry.id: entry for entry in self.objects.custom(user_id)}
+        for object_id in [i for i in user.custom if i not in current]:
+            user.index.remove(user.custom.pop(object_id))
+        for object_id, entry in current.items():
+            if object_id not in user.custom:
+                user.custom[object_id] = user.index.add(
+                    Document("object", object_id, entry.name, entry.category)
+                )
+
+    async def _load_phrases(self, session: AsyncSession, user_id: int, user: UserIndex) -> None:
+        if user.seen is None:
+            newest = await session.scalar(
+                select(func.max(ConstructedSentence.created_at)).where(
+                    ConstructedSentence.user_id == user_id
+                )
+            )
+            if newest is None:
+                return
+            # History before the slack window, counted in the database
+            user.seen = Watermark(newest)
+            grouped = await session.execute(
+                select(
+                    ConstructedSentence.sentence_text,
+                    ConstructedSentence.object_id,
+                    ConstructedSentence.verb_id,
+                    ConstructedSentence.modifier_id,
+                    func.count(),
+                )
+                .where(
+                    ConstructedSentence.user_id == user_id,
+                    ConstructedSentence.created_at < newest - CATCH_UP_SLACK,
+                )
+                .group_by(
+                    ConstructedSentence.sentence_text,
+                    ConstructedSentence.object_id,
+                    ConstructedSentence.verb_id,
+                    ConstructedSentence.modifier_id,
+                )
+                .order_by(func.count().desc())
+            )
+            for text, object_id, verb_id, modifier_id, times in grouped:
+                user.count(text, object_id, verb_id, modifier_id, times)
+        # The slack window one sentence at a time: rows may commit late, so
+        # only ids already counted are skipped
+        recent = await session.execute(
+            select(
+                ConstructedSentence.id,
+                ConstructedSentence.created_at,
+                ConstructedSentence.sentence_text,
+                ConstructedSentence.object_id,
+                ConstructedSentence.verb_id,
+                ConstructedSentence.modifier_id,
+            )
+            .where(
+                ConstructedSentence.user_id == user_id,
+                ConstructedSentence.created_at >= user.seen.created_at - CATCH_UP_SLACK,
+            )
+            .order_by(ConstructedSentence.created_at, ConstructedSentence.id)
+        )
+        for sentence_id, created_at, text, object_id, verb_id, modifier_id in recent:
+            if not user.seen.seen(sentence_id):
+                user.seen.add(sentence_id, created_at)
+                user.count(text, object_id, verb_id, modifier_id)
+
+    def mark_stale(self, user_id: int) -> None:
+        """The user spoke new sentences; read them before the next search."""
+        if user_id in self._users or user_id in self._loading:
+            self._stale.add(user_id)
+
+    def evict(self, user_id: int) -> None:
+        self._users.pop(user_id)
+        self._stale.discard(user_id)
+
+    def _expand(self, word: str, last: bool, indexes: Sequence[InvertedIndex]) -> dict[str, float]:
+        """Index terms a query word may stand for, with match weights."""
+        found: dict[str, float] = {}
+        if any(word in index.postings for index in indexes):
+            found[word] = 1.0
+        exact = bool(found)
+        if last and len(word) >= MIN_PREFIX:
+            for index in indexes:
+                for term in index.with_prefix(word):
+                    found.setdefault(term, PREFIX_WEIGHT)
+        # Only words the index does not know are treated as misspellings
+        if len(word) > 2 and not exact:
+            grams = trigrams(word)
+            for index in indexes:
+                for term, shared in index.sharing_trigrams(grams).items():
+                    similarity = 2 * shared / (len(grams) + len(trigrams(term)))
+                    if similarity >= FUZZY_SIMILARITY and term not in found:
+                        found[term] = FUZZY_WEIGHT * similarity
+        best = sorted(found.items(), key=lambda item: -item[1])
+        return dict(best[:MAX_EXPANSIONS])
+
+    def search(
+        self,
+        user: UserIndex | None,
+        query: str,
+        kinds: Iterable[Kind] = KINDS,
+        limit: int = 20,
+    ) -> list[SearchHit]:
+        """Documents matching ``query``, best first.
+
+        Args:
+            user: The user's index, or ``None`` for the shared items only
+            query: Words to look for; the last one may be incomplete
+            kinds: Kinds of item to return
+            limit: Maximum results
+        """
+        words = terms(query)
+        indexes = [self.shared] if user is None else [self.shared, user.index]
+        wanted = set(kinds)
+        count = sum(len(index.docs) for index in indexes)
+        if not words or not count:
+            return []
+        average = max(sum(index.total_length for index in indexes) / count, 1.0)
+        scores: dict[tuple[int, int], float] = {}
+        for position, word in enumerate(words):
+            best: dict[tuple[int, int], float] = {}
+            for term, weight in self._expand(word, position == len(words) - 1, indexes).items():
+                frequency = sum(len(index.postings.get(term, ())) for index in indexes)
+                idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+                for which, index in enumerate(indexes):
+                    for doc_id, tf in index.postings.get(term, {}).items():
+                        norm = K1 * (1 - B + B * index.lengths[doc_id] / average)
+                        score = weight * idf * tf * (K1 + 1) / (tf + norm)
+                        key = (which, doc_id)
+                        if score > best.get(key, 0.0):
+                            best[key] = score
+            # A query word counts once per document, through its best term
+            for key, score in best.items():
+                scores[key] = scores.get(key, 0.0) + score
+        hits = []
+        for (which, doc_id), score in scores.items():
+            doc = indexes[which].docs[doc_id]
+            if doc.kind not in wanted:
+                continue
+            used = 0
+            if user is not None:
+                used = user.usage[doc.kind, doc.text if doc.ref is None else doc.ref]
+            boosted = score * (1 + USAGE_BOOST * math.log1p(used))
+            hits.append(SearchHit(doc.kind, doc.ref, doc.text, doc.category, boosted, used))
+        hits.sort(key=lambda hit: (-hit.score, hit.text))
+        return hits[:limit]
+
+
+_index: SearchIndex | None = None
+
+
+def init_search_index(objects: ObjectLibraryIndex, engine: SentenceEngine) -> SearchIndex:
+    """Build the process-wide search index (called from the app lifespan)."""
+    global _index
+    _index = SearchIndex(objects, engine)
+    return _index
+
+
+def get_search_index() -> SearchIndex:
+    if _index is None:
+        raise RuntimeError("Search index not built; call init_search_index() first")
+    return _index
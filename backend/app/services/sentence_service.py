@@ -0,0 +1,503 @@
+"""Sentence construction (FR-5).
+
+Templates such as ``"I [verb] [object]"`` are compiled once into a slot-filling
+plan: a tuple of literal words and slot codes. Everything that depends on the
+words themselves (articles, possessives, prepositions, capitalization) is
+resolved when a verb, modifier or object is first seen and stored in lookup
+tables, so realizing a sentence is a join over precomputed pieces. Realized
+sentences are memoized per ``(locale, template, verb, object, modifier)`` in a
+bounded LRU.
+
+Grammar rules, all applied once per word:
+
+- objects after a verb get a determiner: nothing for people, feelings,
+  actions, plurals, mass nouns ("water") and proper names; "my" for a user's
+  own custom objects; "the" for places; otherwise "a"/"an" by pronunciation
+- "go" takes "to" before places, except bare places ("home", "outside")
+- an object that opens a sentence ("[Object] please") is bare and capitalized
+- the first letter is capitalized and a full stop is added
+
+Other locales go through :mod:`app.lexicon`: the English template is swapped
+for its localized structure, and the locale's grammar inflects the library
+words (agreement, conjugation, contractions) before the same assembly.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from enum import IntEnum
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lexicon import Lexicon, LexiconError, ObjectWord, get_lexicon
+from app.models import ModifierLibrary, SentenceTemplate, VerbLibrary
+from app.services.object_service import ObjectEntry, ObjectLibraryIndex
+from app.utils.cache import LRUCache
+
+# FR-5 templates, seeded into sentence_templates with ids 1..n
+DEFAULT_TEMPLATES: tuple[str, ...] = (
+    "I [verb] [object]",
+    "I [verb] [object] [modifier]",
+    "[Object] please",
+    "I [verb] [modifier]",
+)
+
+MASS_NOUNS: frozenset[str] = frozenset(
+    {
+        "bread",
+        "candy",
+        "cereal",
+        "cheese",
+        "chocolate",
+        "coffee",
+        "food",
+        "fruit",
+        "help",
+        "ice cream",
+        "juice",
+        "milk",
+        "money",
+        "music",
+        "pasta",
+        "popcorn",
+        "rice",
+        "soup",
+        "tea",
+        "toast",
+        "water",
+        "yogurt",
+    }
+)
+# Places used without article or preposition: "I go home"
+BARE_PLACES: frozenset[str] = frozenset(
+    {"home", "outside", "inside", "upstairs", "downstairs", "there", "here"}
+)
+# Places used without article but with a preposition: "I go to school"
+INSTITUTION_PLACES: frozenset[str] = frozenset({"bed", "church", "class", "school", "work"})
+# Verbs that need a preposition before a place
+PLACE_PREPOSITIONS: dict[str, str] = {"go": "to", "come": "to", "run": "to", "walk": "to"}
+NO_DETERMINER_CATEGORIES: frozenset[str] = frozenset({"person", "feeling", "action"})
+# Spelling says vowel/consonant but pronunciation disagrees
+_AN_EXCEPTIONS = ("hour", "honest", "honor", "heir")
+_A_EXCEPTIONS = ("uni", "use", "usu", "one", "once", "euro", "ewe", "u-")
+
+_SLOT = re.compile(r"\[(verb|object|modifier)\]", re.IGNORECASE)
+# Template literals attached to the previous word: "[Object], por favor"
+_ATTACHED = (",", ".", ";", ":", "!", "?")
+
+
+class Slot(IntEnum):
+    VERB = 0
+    OBJECT = 1
+    OBJECT_BARE = 2
+    MODIFIER = 3
+
+
+class TemplateError(ValueError):
+    """Template structure is invalid or does not fit the supplied words."""
+
+
+def indefinite_article(noun: str) -> str:
+    word = noun.lower()
+    if word.startswith(_AN_EXCEPTIONS):
+        return "an"
+    if word.startswith(_A_EXCEPTIONS):
+        return "a"
+    return "an" if word[:1] in "aeiou" else "a"
+
+
+def _is_plural(noun: str) -> bool:
+    last = noun.split()[-1].lower()
+    return last.endswith("s") and not last.endswith(("ss", "us", "is"))
+
+
+def determiner(entry: ObjectEntry) -> str:
+    """Determiner placed before an object that follows a verb ("" for none)."""
+    name = entry.name
+    lowered = name.lower()
+    if entry.category in NO_DETERMINER_CATEGORIES or name[:1].isupper():
+        return ""
+    if entry.is_custom:
+        return "my"
+    if entry.category == "place":
+        return "" if lowered in BARE_PLACES or lowered in INSTITUTION_PLACES else "the"
+    if lowered in MASS_NOUNS or _is_plural(lowered):
+        return ""
+    return indefinite_article(lowered)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTemplate:
+    """A template reduced to literal words and slots.
+
+    Attributes:
+        id: ``sentence_templates.id``
+        structure: Source text, e.g. ``"I [verb] [object]"``
+        plan: Literal strings and :class:`Slot` codes in sentence order
+        slots: Slots the template needs, for matching against supplied words
+    """
+
+    id: int
+    structure: str
+    plan: tuple[str | Slot, ...]
+    slots: frozenset[str]
+
+
+def compile_template(template_id: int, structure: str) -> CompiledTemplate:
+    """Compile ``structure`` into a slot-filling plan.
+
+    Raises:
+        TemplateError: The template repeats a slot or has no slots
+    """
+    plan: list[str | Slot] = []
+    slots: set[str] = set()
+    position = 0
+    for match in _SLOT.finditer(structure):
+        start, end = match.span()
+        literal = structure[position:start].strip()
+        if literal:
+            plan.append(literal)
+        name = match.group(1)
+        kind = name.lower()
+        if kind in slots:
+            raise TemplateError(f"Slot [{kind}] repeated in {structure!r}")
+        slots.add(kind)
+        if kind == "object":
+            # Objects after a verb take a determiner; leading objects stand bare
+            plan.append(Slot.OBJECT if "verb" in slots else Slot.OBJECT_BARE)
+        else:
+            plan.append(Slot[kind.upper()])
+        position = end
+    literal = structure[position:].strip()
+    if literal:
+        plan.append(literal)
+    if not slots:
+        raise TemplateError(f"Template {structure!r} has no slots")
+    return CompiledTemplate(template_id, structure, tuple(plan), frozenset(slots))
+
+
+@dataclass(frozen=True, slots=True)
+class Realization:
+    """A constructed sentence and its parts, for the structure preview."""
+
+    text: str
+    template_id: int
+    # (word or phrase, slot name or "" for template literals)
+    segments: tuple[tuple[str, str], ...]
+
+
+_SLOT_NAMES = {
+    Slot.VERB: "verb",
+    Slot.OBJECT: "object",
+    Slot.OBJECT_BARE: "object",
+    Slot.MODIFIER: "modifier",
+}
+
+
+class SentenceEngine:
+    """Realizes sentences from templates, verbs, objects and modifiers.
+
+    Args:
+        templates: Compiled templates, in preference order for auto-selection
+        verbs: Verb text by ``verb_library.id``
+        modifiers: Modifier text by ``modifier_library.id``
+        objects: Object library index used to resolve object ids
+        cache_size: Maximum memoized sentences
+    """
+
+    def __init__(
+        self,
+        templates: Sequence[CompiledTemplate],
+        verbs: dict[int, str],
+        modifiers: dict[int, str],
+        objects: ObjectLibraryIndex,
+        cache_size: int = 10_000,
+    ) -> None:
+        self.templates = {t.id: t for t in templates}
+        self._by_slots: dict[frozenset[str], CompiledTemplate] = {}
+        for template in templates:
+            self._by_slots.setdefault(template.slots, template)
+        self.verbs = verbs
+        self.modifiers = modifiers
+        self.objects = objects
+        self.cache: LRUCache[tuple[str, int, int | None, int | None, int | None], Realization] = (
+            LRUCache(cache_size)
+        )
+        # (locale, template id) -> localized template
+        self._localized: dict[tuple[str, int], CompiledTemplate] = {}
+        # object id -> (phrase after a verb, bare capitalized name, takes a preposition)
+        self._object_forms: dict[int, tuple[str, str, bool]] = {}
+        # (verb id, object takes a preposition) -> verb phrase
+        self._verb_forms: dict[tuple[int, bool], str] = {}
+
+    @classmethod
+    async def load(
+        cls, session: AsyncSession, objects: ObjectLibraryIndex, cache_size: int = 10_000
+    ) -> SentenceEngine:
+        """Load templates, verbs and modifiers from the library tables."""
+        rows = (
+            await session.execute(select(SentenceTemplate.id, SentenceTemplate.structure))
+        ).all()
+        if not rows:
+            rows = list(enumerate(DEFAULT_TEMPLATES, start=1))
+        templates = [compile_template(i, s) for i, s in sorted(rows)]
+        verbs = dict((await session.execute(select(VerbLibrary.id, VerbLibrary.verb_text))).all())
+        modifiers = dict(
+            (await session.execute(select(ModifierLibrary.id, ModifierLibrary.modifier_text))).all()
+        )
+        return cls(templates, verbs, modifiers, objects, cache_size)
+
+    def _object_form(self, object_id: int) -> tuple[str, str, bool]:
+        forms = self._object_forms.get(object_id)
+        if forms is None:
+            entry = self.objects.get(object_id)
+            if entry is None:
+                raise TemplateError(f"Unknown object {object_id}")
+            article = determiner(entry)
+            phrase = f"{article} {entry.name}" if article else entry.name
+            forms = self._object_forms[object_id] = (
+                phrase,
+                entry.name[:1].upper() + entry.name[1:],
+                entry.category == "place" and entry.name.lower() not in BARE_PLACES,
+            )
+        return forms
+
+    def _verb_form(self, verb_id: int, object_id: int | None) -> str:
+        takes_preposition = object_id is not None and self._object_form(object_id)[2]
+        key = (verb_id, takes_preposition)
+        form = self._verb_forms.get(key)
+        if form is None:
+            verb = self.verbs.get(verb_id)
+            if verb is None:
+                raise TemplateError(f"Unknown verb {verb_id}")
+            preposition = PLACE_PREPOSITIONS.get(verb) if takes_preposition else None
+            form = self._verb_forms[key] = f"{verb} {preposition}" if preposition else verb
+        return form
+
+    def select_template(
+        self, verb_id: int | None, object_id: int | None, modifier_id: int | None
+    ) -> CompiledTemplate:
+        """Pick the first template whose slots are exactly the supplied words."""
+        slots = frozenset(
+            name
+            for name, value in (("verb", verb_id), ("object", object_id), ("modifier", modifier_id))
+            if value is not None
+        )
+        template = self._by_slots.get(slots)
+        if template is None:
+            raise TemplateError(f"No template for {', '.join(sorted(slots)) or 'no words'}")
+        return template
+
+    def construct(
+        self,
+        verb_id: int | None = None,
+        object_id: int | None = None,
+        modifier_id: int | None = None,
+        template_id: int | None = None,
+        locale: str = "en",
+        user_id: int | None = None,
+    ) -> Realization:
+        """Realize one sentence, from the memo when possible.
+
+        ``user_id`` is the caller; other users' custom objects are unknown to
+        them, and anonymous callers see only the shared library.
+
+        Raises:
+            TemplateError: Unknown template, word or locale, or the template
+                needs a word that was not supplied
+        """
+        if object_id is not None and self.objects.visible(object_id, user_id) is None:
+            # Deleted custom objects must not be served from the memo
+            if self.objects.get(object_id) is None:
+                self._object_forms.pop(object_id, None)
+            raise TemplateError(f"Unknown object {object_id}")
+        if template_id is None:
+            template_id = self.select_template(verb_id, object_id, modifier_id).id
+        key = (locale, template_id, verb_id, object_id, modifier_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        template = self.templates.get(template_id)
+        if template is None:
+            raise TemplateError(f"Unknown template {template_id}")
+        if locale == "en":
+            realization = self._realize(template, verb_id, object_id, modifier_id)
+        else:
+            realization = self._realize_localized(
+                self.lexicon(locale), template, verb_id, object_id, modifier_id
+            )
+        self.cache.put(key, realization)
+        return realization
+
+    def _realize(
+        self,
+        template: CompiledTemplate,
+        verb_id: int | None,
+        object_id: int | None,
+        modifier_id: int | None,
+    ) -> Realization:
+        segments: list[tuple[str, str]] = []
+        for step in template.plan:
+            if isinstance(step, str):
+                segments.append((step, ""))
+                continue
+            if step is Slot.VERB:
+                if verb_id is None:
+                    raise TemplateError(f"{template.structure!r} needs a verb")
+                word = self._verb_form(verb_id, object_id)
+            elif step is Slot.MODIFIER:
+                if modifier_id is None:
+                    raise TemplateError(f"{template.structure!r} needs a modifier")
+                word = self.modifiers.get(modifier_id)
+                if word is None:
+                    raise TemplateError(f"Unknown modifier {modifier_id}")
+            else:
+                if object_id is None:
+                    raise TemplateError(f"{template.structure!r} needs an object")
+                phrase, bare, _preposition = self._object_form(object_id)
+                word = phrase if step is Slot.OBJECT else bare
+            segments.append((word, _SLOT_NAMES[step]))
+        return _assemble(template.id, segments)
+
+    def lexicon(self, locale: str) -> Lexicon:
+        """The lexicon for a non-English ``locale``.
+
+        Raises:
+            TemplateError: The locale is not supported
+        """
+        try:
+            return get_lexicon(locale)
+        except LexiconError as exc:
+            raise TemplateError(str(exc)) from exc
+
+    def _localized_template(self, lexicon: Lexicon, template: CompiledTemplate) -> CompiledTemplate:
+        key = (lexicon.locale, template.id)
+        localized = self._localized.get(key)
+        if localized is None:
+            structure = lexicon.template(template.structure)
+            if structure is None:
+                raise TemplateError(f"No {lexicon.locale} form of {template.structure!r}")
+            localized = compile_template(template.id, structure)
+            if localized.slots != template.slots:
+                raise TemplateError(
+                    f"{structure!r} does not have the slots of {template.structure!r}"
+                )
+            self._localized[key] = localized
+        return localized
+
+    def _realize_localized(
+        self,
+        lexicon: Lexicon,
+        template: CompiledTemplate,
+        verb_id: int | None,
+        object_id: int | None,
+        modifier_id: int | None,
+    ) -> Realization:
+        localized = self._localized_template(lexicon, template)
+        verb = modifier = None
+        word = None
+        if "verb" in template.slots:
+            if verb_id is None:
+                raise TemplateError(f"{template.structure!r} needs a verb")
+            verb = self.verbs.get(verb_id)
+            if verb is None:
+                raise TemplateError(f"Unknown verb {verb_id}")
+        if "modifier" in template.slots:
+            if modifier_id is None:
+                raise TemplateError(f"{template.structure!r} needs a modifier")
+            modifier = self.modifiers.get(modifier_id)
+            if modifier is None:
+                raise TemplateError(f"Unknown modifier {modifier_id}")
+        if "object" in template.slots:
+            entry = self.objects.get(object_id) if object_id is not None else None
+            if entry is None:
+                raise TemplateError(f"{template.structure!r} needs an object")
+            word = ObjectWord(entry.name, entry.category, entry.is_custom)
+        clause = lexicon.realize(verb, word, modifier)
+        fillers = {
+            Slot.VERB: clause.verb,
+            Slot.OBJECT: clause.object,
+            Slot.OBJECT_BARE: clause.object_bare,
+            Slot.MODIFIER: clause.modifier,
+        }
+        segments = [
+            (step, "") if isinstance(step, str) else (fillers[step], _SLOT_NAMES[step])
+            for step in localized.plan
+        ]
+        return _assemble(template.id, segments)
+
+    def construct_batch(
+        self,
+        object_id: int,
+        verb_ids: Sequence[int],
+        modifier_ids: Iterable[int | None] = (None,),
+        k: int = 5,
+        locale: str = "en",
+        user_id: int | None = None,
+    ) -> list[Realization]:
+        """Construct the ``k`` best candidate sentences for the suggestion screen.
+
+        ``verb_ids`` and ``modifier_ids`` are ranked best first (``None`` means
+        "no modifier"); pairs are taken in order of combined rank, so the top
+        sentences use the top verb with the top modifiers before reaching
+        lower-ranked verbs. Combinations without a matching template are
+        skipped, and so is everything when ``user_id`` may not use the object.
+
+        Raises:
+            TemplateError: The locale is not supported
+        """
+        if locale != "en":
+            self.lexicon(locale)
+        modifiers = list(modifier_ids) or [None]
+        pairs = sorted(
+            ((v + m, v, m) for v in range(min(len(verb_ids), k)) for m in range(len(modifiers))),
+        )
+        sentences = []
+        for _rank, v, m in pairs:
+            try:
+                sentences.append(
+                    self.construct(
+                        verb_ids[v], object_id, modifiers[m], locale=locale, user_id=user_id
+                    )
+                )
+            except TemplateError:
+                continue
+            if len(sentences) == k:
+                break
+        return sentences
+
+
+def _assemble(template_id: int, segments: list[tuple[str, str]]) -> Realization:
+    first, slot = segments[0]
+    segments[0] = (first[:1].upper() + first[1:], slot)
+    words: list[str] = []
+    for word, _slot in segments:
+        if words and word.startswith(_ATTACHED):
+            words[-1] += word
+        else:
+            words.append(word)
+    text = " ".join(words)
+    if not text.endswith((".", "!", "?")):
+        text += "."
+    return Realization(text, template_id, tuple(segments))
+
+
+_engine: SentenceEngine | None = None
+
+
+async def init_sentence_engine(
+    session: AsyncSession, objects: ObjectLibraryIndex
+) -> SentenceEngine:
+    """Load the process-wide engine (called from the app lifespan)."""
+    global _engine
+    _engine = await SentenceEngine.load(session, objects)
+    return _engine
+
+
+def get_sentence_engine() -> SentenceEngine:
+    if _engine is None:
+        raise RuntimeError("Sentence engine not loaded; call init_sentence_engine() first")
+    return _engine
@@ -0,0 +1,271 @@
+"""Delta sync for offline clients (TODO 4.2 / 4.5).
+
+The PWA keeps settings, favourites, recents and usage counts in IndexedDB
+and works offline. When it reconnects it pushes what it queued and pulls
+what changed elsewhere. It never downloads a whole collection again.
+
+Every synced entry is one :class:`~app.models.SyncItem` row holding the
+merged state. Each change takes the next number from the user's change
+sequence (``users.sync_seq``), and the client's cursor is the last number
+it has seen, so ``seq > cursor`` is exactly its delta. Writers lock the
+user's row while they allocate numbers, so a user's changes commit in
+sequence order and a reader never skips one that commits late.
+
+Conflicts resolve without coordination, CRDT-style, so a push can be
+replayed or reordered and every device converges:
+
+* ``settings``, ``favorites``, ``recents`` and ``custom_objects`` are
+  last-writer-wins registers. The change with the larger (``stamp``,
+  ``node``) wins. Client clocks more than :data:`MAX_CLOCK_SKEW_MS` ahead
+  are clamped, so a tablet with a wrong clock cannot pin a value forever.
+  Deletions are tombstones, so they reach every device.
+* ``usage`` entries are grow-only counters. Each device sends its own
+  running total, the server keeps the highest total per device, and the
+  value is the sum. A push grows a device's total by at most
+  :data:`MAX_USAGE_GROWTH`, so a client cannot inflate a count in one go.
+  Only the growth is added to the ``usage_count`` of the user's own custom
+  objects, so a replayed push counts once. Shared library counts are not
+  written from client data.
+
+Settings winners are mirrored into ``users.settings``, where the rest of
+the backend reads them. ``custom_objects`` is written by the server when a
+caregiver adds or removes one, and clients only read it. The shared object
+and verb libraries are not synced here. Their endpoints revalidate with
+``ETag``, so an unchanged library costs a 304.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Text, func, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import ObjectLibrary, SyncItem, User
+from app.models.sync import SYNC_COLLECTIONS
+from app.utils.metrics import REGISTRY
+
+COUNTER_COLLECTIONS = frozenset({"usage"})
+# Usage keys of this form also count towards object_library.usage_count
+OBJECT_USAGE_PREFIX = "object:"
+SERVER_NODE = "server"
+
+# A client stamp this far past the server clock is clamped to it
+MAX_CLOCK_SKEW_MS = 5 * 60 * 1000
+# Serialized size limit of one register value
+MAX_VALUE_BYTES = 4096
+# Largest running total a device may report for one usage key
+MAX_USAGE_COUNT = 1_000_000
+# Largest growth of one device's usage total a single push can apply
+MAX_USAGE_GROWTH = 1_000
+# object_library.usage_count is a 32-bit integer
+MAX_USAGE_COLUMN = 2**31 - 1
+PULL_LIMIT = 500
+
+SYNC_CHANGES = REGISTRY.counter(
+    "sync_changes_total", "Pushed sync changes by collection and outcome", ["collection", "outcome"]
+)
+
+
+@dataclass(slots=True)
+class Change:
+    """One change to merge: a register write or delete, or a counter total."""
+
+    collection: str
+    key: str
+    value: Any = None
+    deleted: bool = False
+    stamp: int = 0
+    count: int | None = None
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def supersedes(stamp: int, node: str, current_stamp: int, current_node: str) -> bool:
+    """Last-writer-wins order: the later stamp wins, the larger node breaks ties."""
+    return (stamp, node) > (current_stamp, current_node)
+
+
+def collapse(changes: Iterable[Change]) -> dict[tuple[str, str], Change]:
+    """Reduce a queue of changes to the one per entry that matters.
+
+    An offline client may queue many writes to one key; only the winning
+    register write and the highest counter total survive.
+    """
+    merged: dict[tuple[str, str], Change] = {}
+    for change in changes:
+        slot = (change.collection, change.key)
+        current = merged.get(slot)
+        if current is None:
+            merged[slot] = change
+        elif change.collection in COUNTER_COLLECTIONS:
+            if (change.count or 0) > (current.count or 0):
+                merged[slot] = change
+        # Same node, so equal stamps mean queue order decides
+        elif change.stamp >= current.stamp:
+            merged[slot] = change
+    return merged
+
+
+def _validate(change: Change) -> None:
+    if change.collection not in SYNC_COLLECTIONS:
+        raise ValueError(f"Unknown collection {change.collection!r}")
+    if change.collection in COUNTER_COLLECTIONS:
+        if change.count is None:
+            raise ValueError(f"{change.collection} changes need a count")
+        if not 0 <= change.count <= MAX_USAGE_COUNT:
+            raise ValueError(f"Count of {change.collection}/{change.key} is out of range")
+    elif not change.deleted and len(json.dumps(change.value)) > MAX_VALUE_BYTES:
+        raise ValueError(f"Value of {change.collection}/{change.key} is too large")
+
+
+async def apply_changes(
+    session: AsyncSession, user_id: int, node: str, changes: Sequence[Change]
+) -> int:
+    """Merge one device's changes and return how many altered the server state.
+
+    Applying the same changes twice alters nothing the second time. The
+    caller commits.
+
+    Raises:
+        ValueError: A change is malformed
+        LookupError: The user does not exist
+    """
+    for change in changes:
+        _validate(change)
+    ceiling = now_ms() + MAX_CLOCK_SKEW_MS
+    merged = collapse(changes)
+    # Locks the user's row until commit: this user's writers take turns
+    seq = await session.scalar(select(User.sync_seq).where(User.id == user_id).with_for_update())
+    if seq is None:
+        raise LookupError(f"User {user_id} not found")
+    if not merged:
+        return 0
+    existing = {
+        (item.collection, item.key): item
+        for item in await session.scalars(
+            select(SyncItem).where(
+                SyncItem.user_id == user_id,
+                tuple_(SyncItem.collection, SyncItem.key).in_(list(merged)),
+            )
+        )
+    }
+
+    rows: list[dict[str, Any]] = []
+    settings_set: dict[str, Any] = {}
+    settings_removed: list[str] = []
+    usage_growth: dict[int, int] = {}
+    for (collection, key), change in merged.items():
+        current = existing.get((collection, key))
+        if collection in COUNTER_COLLECTIONS:
+            counts = dict(current.counts) if current is not None else {}
+            growth = min((change.count or 0) - counts.get(node, 0), MAX_USAGE_GROWTH)
+            if growth <= 0:
+                SYNC_CHANGES.inc(1.0, collection, "stale")
+                continue
+            counts[node] = counts.get(node, 0) + growth
+            row = {
+                "value": sum(counts.values()),
+                "deleted": False,
+                "stamp": min(change.stamp, ceiling),
+                "node": node,
+                "counts": counts,
+            }
+            object_id = key.removeprefix(OBJECT_USAGE_PREFIX)
+            if object_id != key and object_id.isdigit():
+                usage_growth[int(object_id)] = growth
+        else:
+            stamp = min(change.stamp, ceiling)
+            if current is not None and not supersedes(stamp, node, current.stamp, current.node):
+                SYNC_CHANGES.inc(1.0, collection, "stale")
+                continue
+            value = None if change.deleted else change.value
+            row = {
+                "value": value,
+                "deleted": change.deleted,
+                "stamp": stamp,
+                "node": node,
+                "counts": {},
+            }
+            if collection == "settings":
+                if change.deleted:
+                    settings_removed.append(key)
+                else:
+                    settings_set[key] = value
+        seq += 1
+        rows.append({"user_id": user_id, "collection": collection, "key": key, "seq": seq, **row})
+        SYNC_CHANGES.inc(1.0, collection, "applied")
+    if not rows:
+        return 0
+
+    statement = insert(SyncItem).values(rows)
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[SyncItem.user_id, SyncItem.collection, SyncItem.key],
+            set_={
+                column: statement.excluded[column]
+                for column in ("seq", "value", "deleted", "stamp", "node", "counts")
+            },
+        )
+    )
+    user_values: dict[str, Any] = {"sync_seq": seq}
+    if settings_set or settings_removed:
+        settings = User.settings.op("||")(literal(settings_set, JSONB))
+        if settings_removed:
+            settings = settings.op("-")(literal(settings_removed, ARRAY(Text)))
+        user_values["settings"] = settings
+    await session.execute(update(User).where(User.id == user_id).values(**user_values))
+    # The user's own custom objects only; in id order, like any other writer
+    for object_id, growth in sorted(usage_growth.items()):
+        await session.execute(
+            update(ObjectLibrary)
+            .where(ObjectLibrary.id == object_id, ObjectLibrary.user_id == user_id)
+            .values(
+                usage_count=func.least(ObjectLibrary.usage_count, MAX_USAGE_COLUMN - growth)
+                + growth
+            )
+        )
+    return len(rows)
+
+
+async def record_server_change(
+    session: AsyncSession,
+    user_id: int,
+    collection: str,
+    key: str,
+    value: Any = None,
+    deleted: bool = False,
+) -> None:
+    """Record a change made through the API (not by a syncing client)."""
+    await apply_changes(
+        session, user_id, SERVER_NODE, [Change(collection, key, value, deleted, now_ms())]
+    )
+
+
+async def changes_since(
+    session: AsyncSession,
+    user_id: int,
+    since: int = 0,
+    collections: Sequence[str] | None = None,
+    limit: int = PULL_LIMIT,
+) -> tuple[list[SyncItem], int, bool]:
+    """The user's entries changed after ``since``, oldest change first.
+
+    Returns:
+        (items, cursor, more): up to ``limit`` items, the cursor to pull
+        from next, and whether more changes are waiting
+    """
+    query = select(SyncItem).where(SyncItem.user_id == user_id, SyncItem.seq > since)
+    if collections:
+        query = query.where(SyncItem.collection.in_(collections))
+    items = list(await session.scalars(query.order_by(SyncItem.seq).limit(limit + 1)))
+    more = len(items) > limit
+    del items[limit:]
+    return items, items[-1].seq if items else since, more
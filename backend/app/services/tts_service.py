@@ -0,0 +1,474 @@
+"""Optional server-side text-to-speech with a content-addressed audio cache (FR-6).
+
+Browsers' Web Speech voices differ per device. When ``TTS_ENGINE`` is set,
+the API can synthesize sentences with a local offline engine (espeak-ng or
+Piper) instead. Audio files are named by a hash of ``(engine, voice, rate,
+text)``, so one synthesis serves every user who speaks the same sentence
+with the same voice. Because the content at a URL never changes, the files
+can be cached by clients forever.
+
+Synthesis takes hundreds of milliseconds on the App Service CPU, too slow
+for FR-6's 500 ms budget on a cold request. :class:`PreSynthesizer` closes
+the gap: in the background it renders each active user's most frequently
+spoken sentences and thumbs-up favourites, so those play straight from disk.
+:func:`prefetch_sentences` does the same on demand for the sentences a user
+is predicted to say next.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Protocol
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Database
+from app.models import ConstructedSentence, FeedbackRecord, User
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_LENGTH = 500
+MIN_RATE, MAX_RATE = 0.5, 2.0
+# Engine voice names; anything else falls back to the default voice
+VOICE_PATTERN = r"^[A-Za-z0-9_.+-]+$"
+MAX_VOICE_LENGTH = 64
+# User.settings keys (TODO 2.6) consulted by pre-synthesis
+VOICE_SETTING, RATE_SETTING = "tts_voice", "tts_rate"
+
+TTS_REQUESTS = REGISTRY.counter(
+    "tts_requests_total", "Audio lookups by outcome (hit, coalesced, miss)", ["result"]
+)
+TTS_SYNTHESIS = REGISTRY.histogram(
+    "tts_synthesis_seconds", "Wall time to synthesize one sentence", ["engine"]
+)
+TTS_PRESYNTHESIZED = REGISTRY.counter(
+    "tts_presynthesized_total", "Sentences rendered ahead of time by the background worker"
+)
+
+_SPACE = re.compile(r"\s+")
+_VOICE = re.compile(VOICE_PATTERN)
+
+
+class TTSError(RuntimeError):
+    """The engine failed to produce audio."""
+
+
+class TTSEngine(Protocol):
+    name: str
+    extension: str
+    media_type: str
+
+    async def synthesize(self, text: str, voice: str, rate: float, path: Path) -> None:
+        """Write audio for ``text`` to ``path``."""
+        ...
+
+
+async def _run(args: Sequence[str], stdin: bytes | None = None) -> None:
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate(stdin)
+    if process.returncode != 0:
+        raise TTSError(f"{args[0]} exited with {process.returncode}: {stderr.decode()[:200]}")
+
+
+class EspeakEngine:
+    """espeak-ng: formant synthesis, tiny and fast, robotic but intelligible.
+
+    Args:
+        binary: ``espeak-ng`` executable
+    """
+
+    name = "espeak-ng"
+    extension = "wav"
+    media_type = "audio/wav"
+    # espeak-ng's default speed, in words per minute
+    BASE_WPM = 175
+
+    def __init__(self, binary: str = "espeak-ng") -> None:
+        self.binary = binary
+
+    async def synthesize(self, text: str, voice: str, rate: float, path: Path) -> None:
+        speed = str(round(self.BASE_WPM * rate))
+        await _run([self.binary, "-v", voice, "-s", speed, "-w", str(path), "--", text])
+
+
+class PiperEngine:
+    """Piper: local neural voices (one ``<voice>.onnx`` model per voice).
+
+    Args:
+        binary: ``piper`` executable
+        model_dir: Directory holding the ``.onnx`` voice models
+    """
+
+    name = "piper"
+    extension = "wav"
+    media_type = "audio/wav"
+
+    def __init__(self, binary: str = "piper", model_dir: str | Path = "voices") -> None:
+        self.binary = binary
+        self.model_dir = Path(model_dir)
+
+    async def synthesize(self, text: str, voice: str, rate: float, path: Path) -> None:
+        model = self.model_dir / f"{voice}.onnx"
+        await _run(
+            [
+                self.binary,
+                "--model",
+                str(model),
+                "--length_scale",
+                f"{1 / rate:.3f}",
+                "--output_file",
+                str(path),
+            ],
+            stdin=text.encode(),
+        )
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace; the engines read case and punctuation, so keep those."""
+    return _SPACE.sub(" ", text).strip()
+
+
+def audio_key(engine: str, voice: str, rate: float, text: str) -> str:
+    """Content address of one rendering of ``text``."""
+    material = f"{engine}\0{voice}\0{rate:.2f}\0{normalize_text(text)}"
+    return hashlib.blake2b(material.encode(), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True, frozen=True)
+class Audio:
+    key: str
+    path: Path
+    media_type: str
+    cached: bool
+
+
+class AudioCache:
+    """Rendered audio on local disk, one file per content address.
+
+    Files are written to a temporary name and renamed into place, so readers
+    never see partial audio. Concurrent requests for the same key share one
+    synthesis, and at most ``concurrency`` syntheses run at a time. Hits touch
+    the file's mtime so :meth:`prune` evicts least recently used audio first.
+
+    Args:
+        root: Cache directory
+        engine: Synthesis backend
+        default_voice: Voice used when the caller does not pick one
+        concurrency: Maximum simultaneous engine processes
+        max_bytes: Size :meth:`prune` trims the cache down to
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        engine: TTSEngine,
+        default_voice: str,
+        concurrency: int = 2,
+        max_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.engine = engine
+        self.default_voice = default_voice
+        self.max_bytes = max_bytes
+        self._slots = asyncio.Semaphore(concurrency)
+        self._inflight: dict[str, asyncio.Future[None]] = {}
+
+    def path(self, key: str) -> Path:
+        # Two-character fan-out keeps directories small
+        return self.root / key[:2] / f"{key}.{self.engine.extension}"
+
+    def lookup(self, key: str) -> Path | None:
+        path = self.path(key)
+        return path if path.is_file() else None
+
+    async def get_or_synthesize(
+        self, text: str, voice: str | None = None, rate: float = 1.0
+    ) -> Audio:
+        """Return cached audio for ``text``, synthesizing it on a miss.
+
+        Raises:
+            ValueError: Empty or over-long text, or a rate out of range
+            TTSError: The engine failed
+        """
+        text = normalize_text(text)
+        if not text or len(text) > MAX_TEXT_LENGTH:
+            raise ValueError(f"Text must be 1-{MAX_TEXT_LENGTH} characters")
+        if not MIN_RATE <= rate <= MAX_RATE:
+            raise ValueError(f"Rate must be between {MIN_RATE} and {MAX_RATE}")
+        voice = voice or self.default_voice
+        rate = round(rate, 2)
+        key = audio_key(self.engine.name, voice, rate, text)
+        path = self.path(key)
+        if path.is_file():
+            TTS_REQUESTS.inc(1.0, "hit")
+            with contextlib.suppress(OSError):
+                os.utime(path)
+            return Audio(key, path, self.engine.media_type, cached=True)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            TTS_REQUESTS.inc(1.0, "coalesced")
+            await asyncio.shield(pending)
+            return Audio(key, path, self.engine.media_type, cached=True)
+        TTS_REQUESTS.inc(1.0, "miss")
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            await self._synthesize(text, voice, rate, path)
+        except BaseException as exc:
+            if isinstance(exc, Exception):
+                future.set_exception(exc)
+                # Waiters re-raise it; don't also log it as never retrieved
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        else:
+            future.set_result(None)
+        finally:
+            del self._inflight[key]
+        return Audio(key, path, self.engine.media_type, cached=False)
+
+    async def _synthesize(self, text: str, voice: str, rate: float, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        async with self._slots:
+            start = time.perf_counter()
+            try:
+                await self.engine.synthesize(text, voice, rate, tmp)
+                os.replace(tmp, path)
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    tmp.unlink()
+            TTS_SYNTHESIS.observe(time.perf_counter() - start, self.engine.name)
+
+    def prune(self) -> int:
+        """Delete least recently used audio until the cache fits ``max_bytes``."""
+        files = [(p.stat(), p) for p in self.root.glob("*/*") if not p.name.startswith(".")]
+        total = sum(stat.st_size for stat, _ in files)
+        removed = 0
+        for stat, path in sorted(files, key=lambda item: item[0].st_mtime):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+                total -= stat.st_size
+                removed += 1
+        return removed
+
+
+async def frequent_sentences(
+    session: AsyncSession, user_id: int, limit: int, since: datetime
+) -> list[str]:
+    """The user's most often spoken sentences plus recent thumbs-up favourites."""
+    spoken = await session.scalars(
+        select(ConstructedSentence.sentence_text)
+        .where(
+            ConstructedSentence.user_id == user_id,
+            ConstructedSentence.spoken,
+            ConstructedSentence.created_at >= since,
+        )
+        .group_by(ConstructedSentence.sentence_text)
+        .order_by(func.count().desc())
+        .limit(limit)
+    )
+    favourites = await session.scalars(
+        select(FeedbackRecord.constructed_sentence)
+        .where(
+            FeedbackRecord.user_id == user_id,
+            FeedbackRecord.feedback_type == "thumbs_up",
+            FeedbackRecord.created_at >= since,
+        )
+        .group_by(FeedbackRecord.constructed_sentence)
+        .order_by(func.max(FeedbackRecord.created_at).desc())
+        .limit(limit)
+    )
+    return list(dict.fromkeys([*spoken, *favourites]))
+
+
+async def user_voice(session: AsyncSession, user_id: int) -> tuple[str | None, float]:
+    """The user's TTS voice (``None`` for the default) and speaking rate.
+
+    Settings are free-form JSON, so a voice that is not a valid engine name
+    means the default voice and an unusable rate means 1.0.
+    """
+    settings = await session.scalar(select(User.settings).where(User.id == user_id)) or {}
+    rate = settings.get(RATE_SETTING, 1.0)
+    try:
+        rate = min(max(float(rate), MIN_RATE), MAX_RATE)
+    except (TypeError, ValueError):
+        rate = 1.0
+    voice = settings.get(VOICE_SETTING)
+    if not (isinstance(voice, str) and len(voice) <= MAX_VOICE_LENGTH and _VOICE.fullmatch(voice)):
+        voice = None
+    return voice, rate
+
+
+async def render_sentences(
+    cache: AudioCache, user_id: int, texts: Sequence[str], voice: str | None, rate: float
+) -> int:
+    """Synthesize whatever of ``texts`` is not cached yet; return how many were new."""
+    rendered = 0
+    for text in texts:
+        try:
+            audio = await cache.get_or_synthesize(text, voice, rate)
+        except (ValueError, TTSError):
+            logger.warning("Pre-synthesis failed for user %s", user_id, exc_info=True)
+            continue
+        rendered += not audio.cached
+    TTS_PRESYNTHESIZED.inc(rendered)
+    return rendered
+
+
+class PreSynthesizer:
+    """Background worker that renders active users' frequent sentences.
+
+    Each pass picks users with sentences in the last ``active_window``, reads
+    their voice and rate from ``User.settings`` and synthesizes whatever is
+    missing from their top ``top_n`` spoken sentences and favourites over
+    ``history_window``. Cached entries cost one ``stat`` call, so repeat
+    passes are cheap.
+
+    Args:
+        database: Database to read history from (reads may use the replica)
+        cache: Audio cache to fill
+        top_n: Sentences per user per source (frequent, favourites)
+        interval: Seconds between passes
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        cache: AudioCache,
+        top_n: int = 20,
+        interval: float = 900.0,
+        active_window: timedelta = timedelta(days=1),
+        history_window: timedelta = timedelta(days=30),
+    ) -> None:
+        self.database = database
+        self.cache = cache
+        self.top_n = top_n
+        self.interval = interval
+        self.active_window = active_window
+        self.history_window = history_window
+        self._task: asyncio.Task[None] | None = None
+
+    async def warm_user(self, user_id: int) -> int:
+        """Render the user's frequent sentences; return how many were new."""
+        now = datetime.now(timezone.utc)
+        async with self.database.session(read_only=True) as session:
+            voice, rate = await user_voice(session, user_id)
+            texts = await frequent_sentences(
+                session, user_id, self.top_n, now - self.history_window
+            )
+        return await render_sentences(self.cache, user_id, texts, voice, rate)
+
+    async def run_once(self) -> int:
+        since = datetime.now(timezone.utc) - self.active_window
+        async with self.database.session(read_only=True) as session:
+            users = list(
+                await session.scalars(
+                    select(ConstructedSentence.user_id)
+                    .where(ConstructedSentence.created_at >= since)
+                    .distinct()
+                )
+            )
+        rendered = 0
+        for user_id in users:
+            rendered += await self.warm_user(user_id)
+        await asyncio.to_thread(self.cache.prune)
+        return rendered
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Pre-synthesis pass failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+_cache: AudioCache | None = None
+# At most one prefetch per user in flight
+_prefetches: dict[int, asyncio.Task[int]] = {}
+
+
+def init_tts(
+    engine: str,
+    root: str | Path,
+    default_voice: str,
+    max_bytes: int,
+    binary: str | None = None,
+    model_dir: str | Path = "voices",
+) -> AudioCache:
+    """Create the process-wide audio cache (called from the app lifespan)."""
+    global _cache
+    if engine == EspeakEngine.name:
+        backend: TTSEngine = EspeakEngine(binary or engine)
+    elif engine == PiperEngine.name:
+        backend = PiperEngine(binary or engine, model_dir)
+    else:
+        raise ValueError(f"Unknown TTS engine {engine!r}; expected espeak-ng or piper")
+    _cache = AudioCache(root, backend, default_voice, max_bytes=max_bytes)
+    return _cache
+
+
+def get_audio_cache() -> AudioCache | None:
+    """The audio cache, or ``None`` when server-side TTS is disabled."""
+    return _cache
+
+
+def prefetch_sentences(database: Database, user_id: int, texts: Sequence[str]) -> None:
+    """Render ``texts`` in the user's voice in the background, if TTS is enabled.
+
+    For sentences the user is likely to say next, so they play without a
+    synthesis wait. Skipped while the user's previous prefetch is running.
+    """
+    cache = _cache
+    if cache is None or not texts or user_id in _prefetches:
+        return
+
+    async def render() -> int:
+        async with database.session(read_only=True) as session:
+            voice, rate = await user_voice(session, user_id)
+        return await render_sentences(cache, user_id, texts, voice, rate)
+
+    task = asyncio.create_task(render())
+    _prefetches[user_id] = task
+    task.add_done_callback(lambda _task: _prefetches.pop(user_id, None))
+
+
+def close_tts() -> None:
+    global _cache
+    _cache = None
+    for task in _prefetches.values():
+        task.cancel()
+    _prefetches.clear()
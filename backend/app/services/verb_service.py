@@ -0,0 +1,78 @@
+"""Rule-based verb and modifier suggestions (Phase 1).
+
+Holds the seed vocabulary from the design notes (object category → likely
+verbs, request/modifier groups) and the ``RuleBasedRanker`` that serves it in
+a fixed, category-aware order. Adaptive rankers live in
+:mod:`app.services.learning_service` and share the same interface.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+OBJECT_CATEGORIES: tuple[str, ...] = ("food", "person", "place", "thing", "action", "feeling")
+
+# Ordered by base_score: earlier verbs are suggested first
+CATEGORY_VERBS: dict[str, tuple[str, ...]] = {
+    "food": ("want", "need", "eat", "drink", "like", "don't want"),
+    "person": ("see", "talk to", "call", "hug", "help", "want"),
+    "place": ("go", "go to", "leave", "stay"),
+    "thing": ("get", "give", "show", "play with", "need"),
+    "action": ("want", "need", "like", "don't want"),
+    "feeling": ("feel", "think", "know", "understand"),
+}
+
+MODIFIER_GROUPS: dict[str, tuple[str, ...]] = {
+    "intensity": ("please", "now", "later", "soon"),
+    "quantity": ("more", "less", "all", "some"),
+    "location": ("here", "there", "home", "outside"),
+    "assistance": ("help", "alone", "together"),
+    "negation": ("don't", "stop", "no more"),
+}
+
+VERBS: tuple[str, ...] = tuple(
+    dict.fromkeys(verb for verbs in CATEGORY_VERBS.values() for verb in verbs)
+)
+MODIFIERS: tuple[str, ...] = tuple(
+    modifier for group in MODIFIER_GROUPS.values() for modifier in group
+)
+
+VERB_IDS: dict[str, int] = {verb: i for i, verb in enumerate(VERBS)}
+MODIFIER_IDS: dict[str, int] = {modifier: i for i, modifier in enumerate(MODIFIERS)}
+
+
+def _candidate_order(category: str) -> tuple[int, ...]:
+    preferred = [VERB_IDS[verb] for verb in CATEGORY_VERBS[category]]
+    rest = [i for i in range(len(VERBS)) if i not in preferred]
+    return tuple(preferred + rest)
+
+
+# Category-compatible verbs first (by base_score), then every other verb
+CATEGORY_VERB_CANDIDATES: tuple[tuple[int, ...], ...] = tuple(
+    _candidate_order(category) for category in OBJECT_CATEGORIES
+)
+MODIFIER_CANDIDATES: tuple[int, ...] = tuple(range(len(MODIFIERS)))
+
+
+def candidate_verbs(category: str) -> tuple[int, ...]:
+    """Return verb ids for an object category in rule-based order.
+
+    Args:
+        category: Object category name (see ``OBJECT_CATEGORIES``)
+
+    Returns:
+        Every verb id, category-compatible verbs first
+    """
+    return CATEGORY_VERB_CANDIDATES[OBJECT_CATEGORIES.index(category)]
+
+
+class RuleBasedRanker:
+    """Static ranker that keeps the prior (base_score) order and ignores feedback."""
+
+    name = "rule"
+
+    def rank(self, key: int, candidates: Sequence[int]) -> list[int]:
+        return list(candidates)
+
+    def update(self, key: int, action: int, reward: float, next_key: int | None = None) -> None:
+        return None
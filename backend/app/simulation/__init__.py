@@ -0,0 +1,33 @@
+"""Offline simulation harness for the suggestion rankers (TODO 3.6).
+
+Generates or imports feedback logs and replays them through the rule-based,
+Q-learning and bandit rankers in parallel, measures the selection rate of
+switch-scanning and gaze layouts, and runs federated rounds over simulated
+devices::
+
+    python -m app.simulation generate data/sim --events 10000000 --users 5000
+    python -m app.simulation replay data/sim --workers 8
+    python -m app.simulation scan --items 36 --columns 6 --accuracy 0.7
+    python -m app.simulation federated --devices 5000 --rounds 50 --cohort 100
+"""
+
+from app.simulation.federated import FederatedReport, simulate_federated
+from app.simulation.logs import FeedbackLog, convert_ndjson, generate_feedback_log
+from app.simulation.replay import ENGINES, EngineStats, SimulationReport, replay
+from app.simulation.scanning import LAYOUTS, LayoutStats, ScanReport, simulate
+
+__all__ = [
+    "ENGINES",
+    "EngineStats",
+    "FederatedReport",
+    "FeedbackLog",
+    "LAYOUTS",
+    "LayoutStats",
+    "ScanReport",
+    "SimulationReport",
+    "convert_ndjson",
+    "generate_feedback_log",
+    "replay",
+    "simulate",
+    "simulate_federated",
+]
@@ -0,0 +1,133 @@
+"""Command-line entry point: ``python -m app.simulation {generate,import,...,federated}``."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from app.services.federated_service import RANKERS
+from app.services.scanning_service import MODES, Timing
+from app.simulation.federated import simulate_federated
+from app.simulation.logs import FeedbackLog, convert_ndjson, generate_feedback_log
+from app.simulation.replay import ENGINES, replay
+from app.simulation.scanning import LAYOUTS, simulate
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.simulation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Write a synthetic feedback log")
+    generate.add_argument("path", type=Path)
+    generate.add_argument("--events", type=int, default=1_000_000)
+    generate.add_argument("--users", type=int, default=1000)
+    generate.add_argument("--objects", type=int, default=120)
+    generate.add_argument("--habit", type=float, default=0.7)
+    generate.add_argument("--seed", type=int, default=0)
+
+    imported = commands.add_parser("import", help="Convert an NDJSON feedback export")
+    imported.add_argument("source", type=Path)
+    imported.add_argument("path", type=Path)
+
+    run = commands.add_parser("replay", help="Replay a log through the rankers")
+    run.add_argument("path", type=Path)
+    run.add_argument("--engines", default=",".join(ENGINES))
+    run.add_argument("--workers", type=int, default=None)
+    run.add_argument("--page-size", type=int, default=5)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    scan = commands.add_parser("scan", help="Simulate switch-scanning and gaze layouts")
+    scan.add_argument("--screens", type=int, default=200)
+    scan.add_argument("--items", type=int, default=36)
+    scan.add_argument("--columns", type=int, default=6)
+    scan.add_argument("--mode", choices=MODES, default="scan")
+    scan.add_argument("--scan-interval", type=float, default=1.0)
+    scan.add_argument("--reaction", type=float, default=0.4)
+    scan.add_argument("--press-interval", type=float, default=0.5)
+    scan.add_argument("--dwell", type=float, default=2.0)
+    scan.add_argument("--min-dwell", type=float, default=0.6)
+    scan.add_argument("--accuracy", type=float, default=0.7, help="Prediction quality, 0-1")
+    scan.add_argument("--zipf", type=float, default=1.1)
+    scan.add_argument("--miss-rate", type=float, default=0.05)
+    scan.add_argument("--selections", type=int, default=500, help="Per screen")
+    scan.add_argument("--layouts", default=",".join(LAYOUTS))
+    scan.add_argument("--seed", type=int, default=0)
+    scan.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    fed = commands.add_parser("federated", help="Run federated rounds over simulated devices")
+    fed.add_argument("--ranker", choices=tuple(RANKERS), default="qlearning")
+    fed.add_argument("--devices", type=int, default=5000)
+    fed.add_argument("--rounds", type=int, default=50)
+    fed.add_argument("--cohort", type=int, default=100, help="Devices asked per round")
+    fed.add_argument("--local-steps", type=int, default=20)
+    fed.add_argument("--dropout", type=float, default=0.1)
+    fed.add_argument("--stragglers", type=float, default=0.2)
+    fed.add_argument("--spread", type=float, default=0.5, help="Personal taste noise")
+    fed.add_argument("--page-size", type=int, default=5)
+    fed.add_argument("--server-lr", type=float, default=1.0)
+    fed.add_argument("--seed", type=int, default=0)
+    fed.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        began = time.perf_counter()
+        log = generate_feedback_log(
+            args.path, args.events, args.users, args.objects, args.habit, args.seed
+        )
+        print(f"Wrote {len(log):,} events to {log.path} in {time.perf_counter() - began:.1f}s")
+    elif args.command == "import":
+        log = convert_ndjson(args.source, args.path)
+        print(f"Imported {len(log):,} events to {log.path}")
+    elif args.command == "scan":
+        timing = Timing(
+            args.mode,
+            args.scan_interval,
+            args.reaction,
+            args.press_interval,
+            args.dwell,
+            args.min_dwell,
+            args.miss_rate,
+        )
+        result = simulate(
+            screens=args.screens,
+            items=args.items,
+            columns=args.columns,
+            timing=timing,
+            accuracy=args.accuracy,
+            zipf=args.zipf,
+            selections=args.selections,
+            layouts=args.layouts.split(","),
+            seed=args.seed,
+        )
+        print(json.dumps(result.to_dict(), indent=2) if args.json else result.format_table())
+    elif args.command == "federated":
+        outcome = simulate_federated(
+            ranker=args.ranker,
+            devices=args.devices,
+            rounds=args.rounds,
+            cohort=args.cohort,
+            local_steps=args.local_steps,
+            dropout=args.dropout,
+            stragglers=args.stragglers,
+            spread=args.spread,
+            page_size=args.page_size,
+            server_lr=args.server_lr,
+            seed=args.seed,
+        )
+        print(json.dumps(outcome.to_dict(), indent=2) if args.json else outcome.format_table())
+    else:
+        report = replay(
+            FeedbackLog(args.path),
+            engines=args.engines.split(","),
+            workers=args.workers,
+            page_size=args.page_size,
+            seed=args.seed,
+        )
+        print(json.dumps(report.to_dict(), indent=2) if args.json else report.format_table())
+
+
+if __name__ == "__main__":
+    main()
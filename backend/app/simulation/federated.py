@@ -0,0 +1,313 @@
+"""Simulated devices for the federated aggregator.
+
+Thousands of virtual devices run on one machine against the aggregation code
+in :mod:`app.services.federated_service`. Each device is a user with its own
+taste: for every (object category, time of day) state its verb utilities are
+the population's plus personal noise, and it asks for a verb by a softmax
+over them. A round:
+
+- samples a cohort; ``dropout`` of it never reports
+- each reporting device loads the global model (``stragglers`` load the
+  previous version, so their updates arrive one version stale), plays
+  ``local_steps`` interactions and learns from the feedback they get, as the
+  app would
+- sends its delta as update rows; the server parses, clips, weights and
+  folds each one into the round sum, then publishes the new version as a
+  compact diff that the devices decode
+
+Server time (parse to publish) and device time are measured apart, so the
+report gives rounds per hour for the aggregator alone and for the whole
+simulation. Model quality is the cold-start hit rate: how often a new device,
+using the global model alone, finds the verb it wants on the first page.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.services.federated_service import (
+    RANKERS,
+    MemoryAccumulator,
+    aggregate,
+    clip_update,
+    decode_diff,
+    encode_diff,
+    model_delta,
+    parse_update,
+    update_weight,
+)
+from app.services.learning_service import (
+    REWARDS,
+    BanditRanker,
+    FeedbackType,
+    QLearningRanker,
+    Table,
+    context_key,
+)
+from app.services.verb_service import CATEGORY_VERB_CANDIDATES
+
+TIMES_OF_DAY = 4
+# Softmax temperature of a device's choice among its verb utilities
+CHOICE_TEMPERATURE = 0.5
+# Hit-rate evaluation: simulated new devices and requests per device
+EVAL_DEVICES = 200
+EVAL_REQUESTS = 50
+
+
+@dataclass
+class FederatedReport:
+    """Throughput and model quality of a federated simulation."""
+
+    ranker: str
+    devices: int
+    rounds: int
+    updates: int = 0
+    dropped: int = 0
+    clipped: int = 0
+    stale: int = 0
+    update_bytes: int = 0
+    diff_bytes: int = 0
+    diff_entries: int = 0
+    model_entries: int = 0
+    server_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    initial_hit_rate: float = 0.0
+    final_hit_rate: float = 0.0
+
+    @property
+    def rounds_per_hour(self) -> float:
+        """Whole simulation, devices included, on this machine."""
+        return 3600.0 * self.rounds / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def server_rounds_per_hour(self) -> float:
+        """Aggregator alone: parse, clip, sum and publish."""
+        return 3600.0 * self.rounds / self.server_seconds if self.server_seconds else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ranker": self.ranker,
+            "devices": self.devices,
+            "rounds": self.rounds,
+            "updates": self.updates,
+            "dropped": self.dropped,
+            "clipped": self.clipped,
+            "stale": self.stale,
+            "update_bytes": self.update_bytes,
+            "diff_bytes": self.diff_bytes,
+            "diff_entries": self.diff_entries,
+            "model_entries": self.model_entries,
+            "server_seconds": round(self.server_seconds, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "rounds_per_hour": round(self.rounds_per_hour),
+            "server_rounds_per_hour": round(self.server_rounds_per_hour),
+            "initial_hit_rate": round(self.initial_hit_rate, 4),
+            "final_hit_rate": round(self.final_hit_rate, 4),
+        }
+
+    def format_table(self) -> str:
+        rounds = max(self.rounds, 1)
+        updates = max(self.updates, 1)
+        return "\n".join(
+            [
+                f"{self.ranker}: {self.rounds} rounds, {self.updates:,} updates "
+                f"from {self.devices:,} devices ({self.dropped:,} dropped, "
+                f"{self.stale:,} stale, {self.clipped:,} clipped)",
+                f"rounds/hour      {self.rounds_per_hour:>12,.0f} simulation"
+                f"   {self.server_rounds_per_hour:>12,.0f} aggregator",
+                f"update (gzip)    {self.update_bytes / updates:>12,.0f} B"
+                f"   diff {self.diff_bytes / rounds:>10,.0f} B"
+                f" ({self.diff_entries / rounds:,.0f} of {self.model_entries:,} entries)",
+                f"cold-start hits  {self.initial_hit_rate:>12.1%} before"
+                f"   {self.final_hit_rate:>12.1%} after",
+                f"{self.wall_seconds:.1f}s wall, {self.server_seconds:.2f}s in the aggregator",
+            ]
+        )
+
+
+def _ranker(name: str, seed: int) -> QLearningRanker | BanditRanker:
+    # Deployed rankers explore; evaluation (seed < 0) shows the model as is
+    if name == "qlearning":
+        return QLearningRanker(epsilon=0.2 if seed >= 0 else 0.0, seed=seed)
+    return BanditRanker()
+
+
+def _intents(utilities: np.ndarray, rng: np.random.Generator, size: int) -> np.ndarray:
+    """Verb indexes a device with ``utilities`` asks for."""
+    weights = np.exp((utilities - utilities.max()) / CHOICE_TEMPERATURE)
+    return rng.choice(len(utilities), size=size, p=weights / weights.sum())
+
+
+def _train(
+    ranker: QLearningRanker | BanditRanker,
+    utilities: np.ndarray,
+    steps: int,
+    page_size: int,
+    rng: np.random.Generator,
+) -> None:
+    """Play ``steps`` interactions, learning from the feedback as the app does."""
+    categories = rng.integers(0, utilities.shape[0], steps)
+    times = rng.integers(0, TIMES_OF_DAY, steps)
+    for category, tod in zip(categories.tolist(), times.tolist()):
+        candidates = CATEGORY_VERB_CANDIDATES[category]
+        intent = candidates[int(_intents(utilities[category, tod], rng, 1)[0])]
+        key = context_key(category, tod)
+        ranked = ranker.rank(key, candidates)
+        if ranked[0] != intent:
+            ranker.update(key, ranked[0], REWARDS[FeedbackType.DISMISSED])
+        # Found on the first page and spoken, or built by paging on
+        found = intent in ranked[:page_size]
+        feedback = FeedbackType.SPOKEN if found else FeedbackType.CONSTRUCTED
+        ranker.update(key, intent, REWARDS[feedback])
+
+
+def _hit_rate(
+    name: str,
+    table: Table,
+    population: np.ndarray,
+    spread: float,
+    page_size: int,
+    rng: np.random.Generator,
+) -> float:
+    """Share of new devices' requests the global model puts on the first page."""
+    ranker = _ranker(name, -1)
+    ranker.load_table(table)
+    hits = 0
+    for _device in range(EVAL_DEVICES):
+        utilities = population + spread * rng.standard_normal(population.shape)
+        categories = rng.integers(0, population.shape[0], EVAL_REQUESTS)
+        times = rng.integers(0, TIMES_OF_DAY, EVAL_REQUESTS)
+        for category, tod in zip(categories.tolist(), times.tolist()):
+            candidates = CATEGORY_VERB_CANDIDATES[category]
+            intent = candidates[int(_intents(utilities[category, tod], rng, 1)[0])]
+            page = ranker.rank(context_key(category, tod), candidates)[:page_size]
+            hits += intent in page
+    return hits / (EVAL_DEVICES * EVAL_REQUESTS)
+
+
+async def _simulate(
+    ranker: str,
+    devices: int,
+    rounds: int,
+    cohort: int,
+    local_steps: int,
+    dropout: float,
+    stragglers: float,
+    spread: float,
+    page_size: int,
+    server_lr: float,
+    seed: int,
+) -> FederatedReport:
+    spec = RANKERS[ranker]
+    rng = np.random.default_rng(seed)
+    shape = (len(CATEGORY_VERB_CANDIDATES), TIMES_OF_DAY, len(CATEGORY_VERB_CANDIDATES[0]))
+    population = rng.gumbel(0.0, 1.0, shape)
+    # Devices' personal tastes, drawn once so a device is the same user every round
+    personal = rng.standard_normal((devices, *shape), dtype=np.float32) * spread
+    report = FederatedReport(ranker, devices, rounds)
+    report.initial_hit_rate = _hit_rate(ranker, {}, population, spread, page_size, rng)
+    accumulator = MemoryAccumulator()
+    version = 0
+    current: Table = {}
+    previous: Table = {}
+    began = time.perf_counter()
+    for _round in range(rounds):
+        members = rng.choice(devices, size=min(cohort, devices), replace=False)
+        for device in members.tolist():
+            if rng.random() < dropout:
+                report.dropped += 1
+                continue
+            straggler = version > 0 and rng.random() < stragglers
+            base = previous if straggler else current
+            local = _ranker(ranker, seed + device)
+            local.load_table(base)
+            _train(local, population + personal[device], local_steps, page_size, rng)
+            rows = [[*coord, *values] for coord, values in model_delta(local.table(), base).items()]
+            body = json.dumps({"samples": local_steps, "entries": rows}).encode()
+            report.update_bytes += len(zlib.compress(body, 6))
+
+            started = time.perf_counter()
+            entries, clipped = clip_update(parse_update(ranker, rows), spec.clip_norm)
+            weight = update_weight(local_steps, int(straggler))
+            await accumulator.add(ranker, str(device), weight, entries)
+            report.server_seconds += time.perf_counter() - started
+            report.updates += 1
+            report.clipped += clipped
+            report.stale += straggler
+
+        started = time.perf_counter()
+        round_sum = await accumulator.take(ranker, 1)
+        changed = aggregate(current, round_sum, spec, server_lr) if round_sum else {}
+        payload = encode_diff(version, version + 1, spec.channels, changed)
+        report.server_seconds += time.perf_counter() - started
+        report.diff_bytes += len(payload)
+
+        previous = dict(current)
+        current.update(decode_diff(payload).entries)
+        version += 1
+        report.diff_entries += len(changed)
+    report.wall_seconds = time.perf_counter() - began
+    report.model_entries = len(current)
+    report.final_hit_rate = _hit_rate(ranker, current, population, spread, page_size, rng)
+    return report
+
+
+def simulate_federated(
+    ranker: str = "qlearning",
+    devices: int = 5000,
+    rounds: int = 50,
+    cohort: int = 100,
+    local_steps: int = 20,
+    dropout: float = 0.1,
+    stragglers: float = 0.2,
+    spread: float = 0.5,
+    page_size: int = 5,
+    server_lr: float = 1.0,
+    seed: int = 0,
+) -> FederatedReport:
+    """Run federated rounds over simulated devices.
+
+    Args:
+        ranker: ``"qlearning"`` or ``"bandit"``
+        devices: Population size
+        rounds: Rounds to run
+        cohort: Devices asked to train each round
+        local_steps: Interactions each device learns from per round
+        dropout: Share of the cohort that never reports
+        stragglers: Share of updates trained on the previous version
+        spread: How far a device's taste strays from the population's
+        page_size: Suggestions on the first page
+        server_lr: Server learning rate; 1 is plain FedAvg
+        seed: RNG seed
+
+    Raises:
+        ValueError: Unknown ranker or out-of-range parameter
+    """
+    if ranker not in RANKERS:
+        raise ValueError(f"Unknown ranker {ranker!r}")
+    if not (0 <= dropout < 1 and 0 <= stragglers <= 1):
+        raise ValueError("dropout must be in [0, 1) and stragglers in [0, 1]")
+    if min(devices, rounds, cohort, local_steps, page_size) < 1:
+        raise ValueError("devices, rounds, cohort, local_steps and page_size must be positive")
+    return asyncio.run(
+        _simulate(
+            ranker,
+            devices,
+            rounds,
+            cohort,
+            local_steps,
+            dropout,
+            stragglers,
+            spread,
+            page_size,
+            server_lr,
+            seed,
+        )
+    )
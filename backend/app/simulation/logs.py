@@ -0,0 +1,384 @@
+"""Columnar feedback logs for offline replay.
+
+A log is a directory holding one ``.npy`` file per column plus ``meta.json``.
+Rows follow the Feedback Record model (user/session, object, verb, modifier,
+time-of-day context, feedback type, timestamp) and are sorted by
+``(user_id, timestamp)`` so that a contiguous row range always covers whole
+users. Columns are memory-mapped on read, which lets every replay worker open
+the same log and touch only its own shard.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from array import array
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.services.learning_service import HOUR_TO_TIME_OF_DAY, FeedbackType, TimeOfDay
+from app.services.verb_service import (
+    CATEGORY_VERBS,
+    MODIFIER_IDS,
+    MODIFIERS,
+    OBJECT_CATEGORIES,
+    VERB_IDS,
+    VERBS,
+)
+
+COLUMNS: dict[str, np.dtype[Any]] = {
+    "user_id": np.dtype(np.int32),
+    "session_id": np.dtype(np.int32),
+    "object_id": np.dtype(np.int32),
+    "category": np.dtype(np.int8),
+    "verb_id": np.dtype(np.int16),
+    "modifier_id": np.dtype(np.int16),
+    "time_of_day": np.dtype(np.int8),
+    "feedback_type": np.dtype(np.int8),
+    "timestamp": np.dtype(np.int64),
+}
+
+NO_MODIFIER = -1
+SESSION_GAP_SECONDS = 30 * 60
+_ARRAY_TYPECODES = {"int32": "i", "int16": "h", "int8": "b", "int64": "q"}
+
+
+@dataclass(frozen=True)
+class FeedbackLog:
+    """Read-only handle on a columnar feedback log directory."""
+
+    path: Path
+
+    @property
+    def meta(self) -> dict[str, Any]:
+        return json.loads((self.path / "meta.json").read_text())
+
+    def __len__(self) -> int:
+        return int(self.meta["n_events"])
+
+    def column(self, name: str) -> np.ndarray:
+        """Memory-map one column."""
+        return np.load(self.path / f"{name}.npy", mmap_mode="r")
+
+    def shards(self, n_shards: int) -> list[tuple[int, int]]:
+        """Split the log into at most ``n_shards`` row ranges on user boundaries.
+
+        Args:
+            n_shards: Desired number of shards
+
+        Returns:
+            Non-empty ``(start, stop)`` row ranges covering the whole log
+        """
+        users = self.column("user_id")
+        total = len(users)
+        if total == 0:
+            return []
+        cuts = [0]
+        for i in range(1, n_shards):
+            target = (total * i) // n_shards
+            # Advance to the first row of the next user so users never straddle shards
+            cut = int(np.searchsorted(users, users[target], side="left"))
+            if cut <= cuts[-1]:
+                cut = int(np.searchsorted(users, users[target], side="right"))
+            if cuts[-1] < cut < total:
+                cuts.append(cut)
+        cuts.append(total)
+        return list(zip(cuts[:-1], cuts[1:]))
+
+    def iter_records(self, start: int = 0, stop: int | None = None) -> Iterator[dict[str, Any]]:
+        """Yield rows as Feedback Record dicts (for inspection or DB seeding)."""
+        stop = len(self) if stop is None else stop
+        cols = {name: self.column(name)[start:stop].tolist() for name in COLUMNS}
+        for offset in range(stop - start):
+            verb = VERBS[cols["verb_id"][offset]]
+            modifier_id = cols["modifier_id"][offset]
+            modifier = MODIFIERS[modifier_id] if modifier_id != NO_MODIFIER else None
+            object_id = cols["object_id"][offset]
+            sentence = f"I {verb} object {object_id}" + (f" {modifier}" if modifier else "")
+            yield {
+                "id": start + offset + 1,
+                "user_id": cols["user_id"][offset],
+                "user_session_id": cols["session_id"][offset],
+                "constructed_sentence": sentence,
+                "object_id": object_id,
+                "object_category": OBJECT_CATEGORIES[cols["category"][offset]],
+                "verb_id": cols["verb_id"][offset],
+                "modifier_id": modifier_id if modifier is not None else None,
+                "context": {
+                    "time_of_day": TimeOfDay(cols["time_of_day"][offset]).name.lower(),
+                },
+                "feedback_type": FeedbackType(cols["feedback_type"][offset]).name.lower(),
+                "timestamp": datetime.fromtimestamp(
+                    cols["timestamp"][offset], tz=timezone.utc
+                ).isoformat(),
+            }
+
+
+def _open_columns(path: Path, n_events: int) -> dict[str, np.ndarray]:
+    path.mkdir(parents=True, exist_ok=True)
+    return {
+        name: np.lib.format.open_memmap(
+            path / f"{name}.npy", mode="w+", dtype=dtype, shape=(n_events,)
+        )
+        for name, dtype in COLUMNS.items()
+    }
+
+
+def _write_meta(path: Path, n_events: int, **extra: Any) -> None:
+    meta = {"n_events": n_events, "columns": list(COLUMNS), **extra}
+    (path / "meta.json").write_text(json.dumps(meta, indent=2))
+
+
+def generate_feedback_log(
+    path: str | Path,
+    n_events: int,
+    n_users: int = 1000,
+    n_objects: int = 120,
+    habit: float = 0.7,
+    seed: int = 0,
+    start: datetime | None = None,
+    users_per_batch: int = 2000,
+) -> FeedbackLog:
+    """Generate a synthetic feedback log with learnable per-user habits.
+
+    Each user has a hidden preferred verb per (object category, time of day)
+    and a preferred modifier per verb. With probability ``habit`` an event uses
+    the preferred choice and gets positive feedback most of the time; other
+    events pick a random verb and mostly get negative feedback. Generation is
+    vectorized and streamed in user batches, so memory stays bounded for logs
+    of tens of millions of events.
+
+    Args:
+        path: Output directory
+        n_events: Total number of feedback events
+        n_users: Number of simulated users
+        n_objects: Size of the simulated object library
+        habit: Probability that an event follows the user's preference
+        seed: RNG seed
+        start: Timestamp of the first event (defaults to 2025-01-01 UTC)
+        users_per_batch: Users generated per vectorized batch
+
+    Returns:
+        Handle on the written log
+    """
+    out = Path(path)
+    rng = np.random.default_rng(seed)
+    start_ts = int((start or datetime(2025, 1, 1, tzinfo=timezone.utc)).timestamp())
+    n_categories = len(OBJECT_CATEGORIES)
+    n_verbs = len(VERBS)
+    n_modifiers = len(MODIFIERS)
+
+    object_category = (np.arange(n_objects) % n_categories).astype(np.int8)
+    # Zipf-like object popularity: a handful of objects dominate requests
+    popularity = 1.0 / np.arange(1, n_objects + 1)
+    popularity /= popularity.sum()
+
+    max_verbs = max(len(v) for v in CATEGORY_VERBS.values())
+    category_verbs = np.zeros((n_categories, max_verbs), dtype=np.int16)
+    category_len = np.zeros(n_categories, dtype=np.int64)
+    for c, category in enumerate(OBJECT_CATEGORIES):
+        ids = [VERB_IDS[v] for v in CATEGORY_VERBS[category]]
+        category_verbs[c, : len(ids)] = ids
+        category_len[c] = len(ids)
+    hour_to_tod = np.asarray(HOUR_TO_TIME_OF_DAY, dtype=np.int8)
+
+    weights = rng.gamma(2.0, 1.0, size=n_users)
+    counts = rng.multinomial(n_events, weights / weights.sum())
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    columns = _open_columns(out, n_events)
+    next_session = 0
+
+    for first in range(0, n_users, users_per_batch):
+        last = min(first + users_per_batch, n_users)
+        lo, hi = int(offsets[first]), int(offsets[last])
+        n = hi - lo
+        if n == 0:
+            continue
+        batch_counts = counts[first:last]
+        users = np.repeat(np.arange(first, last, dtype=np.int32), batch_counts)
+        local = users - first
+        row_start = np.repeat(offsets[first:last] - lo, batch_counts)
+
+        # Timestamps: per-user cumulative gaps, mostly minutes apart within a
+        # session with occasional multi-hour breaks
+        gaps = np.where(
+            rng.random(n) < 0.1,
+            rng.exponential(6 * 3600, n),
+            rng.exponential(120, n),
+        ).astype(np.int64)
+        new_session = gaps > SESSION_GAP_SECONDS
+        first_row = np.arange(n) == row_start
+        gaps[first_row] = rng.integers(0, 86400, int(first_row.sum()))
+        cum = np.cumsum(gaps)
+        timestamps = start_ts + cum - (cum[row_start] - gaps[row_start])
+        sessions = next_session + np.cumsum(new_session | first_row) - 1
+        next_session = int(sessions[-1]) + 1
+
+        tod = hour_to_tod[(timestamps // 3600) % 24]
+        objects = rng.choice(n_objects, size=n, p=popularity).astype(np.int32)
+        categories = object_category[objects]
+
+        pref_verb_idx = rng.integers(
+            0, category_len[None, :, None], size=(last - first, n_categories, 4)
+        )
+        pref_modifier = rng.integers(-1, n_modifiers, size=(last - first, n_verbs))
+
+        follows = rng.random(n) < habit
+        preferred_verbs = category_verbs[categories, pref_verb_idx[local, categories, tod]].astype(
+            np.int16
+        )
+        random_in_category = category_verbs[
+            categories, (rng.random(n) * category_len[categories]).astype(np.int64)
+        ]
+        random_any = rng.integers(0, n_verbs, size=n)
+        other_verbs = np.where(rng.random(n) < 0.9, random_in_category, random_any)
+        verbs = np.where(follows, preferred_verbs, other_verbs).astype(np.int16)
+        hit = verbs == preferred_verbs
+
+        random_modifier = np.where(
+            rng.random(n) < 0.3, NO_MODIFIER, rng.integers(0, n_modifiers, size=n)
+        )
+        modifiers = np.where(follows, pref_modifier[local, verbs], random_modifier)
+
+        # Intended sentences are usually spoken or liked; others rejected
+        u = rng.random(n)
+        good = np.select(
+            [u < 0.6, u < 0.9],
+            [FeedbackType.SPOKEN, FeedbackType.THUMBS_UP],
+            FeedbackType.DISMISSED,
+        )
+        bad = np.select(
+            [u < 0.1, u < 0.3, u < 0.7],
+            [FeedbackType.THUMBS_UP, FeedbackType.SPOKEN, FeedbackType.THUMBS_DOWN],
+            FeedbackType.DISMISSED,
+        )
+
+        columns["user_id"][lo:hi] = users
+        columns["session_id"][lo:hi] = sessions
+        columns["object_id"][lo:hi] = objects
+        columns["category"][lo:hi] = categories
+        columns["verb_id"][lo:hi] = verbs
+        columns["modifier_id"][lo:hi] = modifiers
+        columns["time_of_day"][lo:hi] = tod
+        columns["feedback_type"][lo:hi] = np.where(hit, good, bad)
+        columns["timestamp"][lo:hi] = timestamps
+
+    for column in columns.values():
+        column.flush()
+    _write_meta(
+        out,
+        n_events,
+        source="synthetic",
+        n_users=n_users,
+        n_objects=n_objects,
+        habit=habit,
+        seed=seed,
+    )
+    return FeedbackLog(out)
+
+
+def _parse_timestamp(value: Any) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _lookup(table: Mapping[str, int], value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    return table[str(value)]
+
+
+def convert_ndjson(
+    source: str | Path,
+    path: str | Path,
+    object_categories: Mapping[int, str] | None = None,
+) -> FeedbackLog:
+    """Convert an NDJSON export of feedback records into a columnar log.
+
+    Each line is a Feedback Record. Users are ``user_id`` when present and
+    the session (``session_id`` or ``user_session_id``) otherwise; both may be
+    numbers or strings and are renumbered densely in order of appearance.
+    ``verb_id``/``modifier_id`` may be ids or verb/modifier text. The object
+    category comes from ``object_category`` or, failing that, from
+    ``object_categories``; time of day comes from ``context.time_of_day`` or
+    is derived from ``timestamp`` (``created_at`` in database exports).
+
+    Args:
+        source: NDJSON file path
+        path: Output directory
+        object_categories: Optional object id → category name mapping
+
+    Returns:
+        Handle on the written log
+    """
+    out = Path(path)
+    categories = {name: i for i, name in enumerate(OBJECT_CATEGORIES)}
+    times = {t.name.lower(): int(t) for t in TimeOfDay}
+    feedback = {f.name.lower(): int(f) for f in FeedbackType}
+    buffers = {name: array(_ARRAY_TYPECODES[dtype.name]) for name, dtype in COLUMNS.items()}
+    users: dict[Any, int] = {}
+    sessions: dict[Any, int] = {}
+
+    with open(source, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            session_key = record.get("session_id", record.get("user_session_id"))
+            user_key = record.get("user_id", session_key)
+            if user_key is None:
+                raise ValueError("Feedback record has neither a user nor a session id")
+            user = users.setdefault(user_key, len(users))
+            # Sessions are per user: two users' session "1" are different sessions
+            session = sessions.setdefault((user, session_key), len(sessions))
+            object_id = int(record["object_id"])
+            category = record.get("object_category")
+            if category is None and object_categories is not None:
+                category = object_categories[object_id]
+            if category is None:
+                raise ValueError(f"No category for object {object_id}")
+            timestamp = _parse_timestamp(record.get("timestamp", record.get("created_at")))
+            context = record.get("context") or {}
+            tod = context.get("time_of_day")
+            modifier = record.get("modifier_id")
+
+            buffers["user_id"].append(user)
+            buffers["session_id"].append(session)
+            buffers["object_id"].append(object_id)
+            buffers["category"].append(categories[category])
+            buffers["verb_id"].append(_lookup(VERB_IDS, record["verb_id"]))
+            buffers["modifier_id"].append(
+                NO_MODIFIER if modifier is None else _lookup(MODIFIER_IDS, modifier)
+            )
+            buffers["time_of_day"].append(
+                HOUR_TO_TIME_OF_DAY[(timestamp // 3600) % 24] if tod is None else times[tod]
+            )
+            buffers["feedback_type"].append(_lookup(feedback, record["feedback_type"]))
+            buffers["timestamp"].append(timestamp)
+
+    arrays = {
+        name: np.frombuffer(buffers[name], dtype=dtype) if buffers[name] else np.empty(0, dtype)
+        for name, dtype in COLUMNS.items()
+    }
+    order = np.lexsort((arrays["timestamp"], arrays["user_id"]))
+    n_events = len(order)
+    columns = _open_columns(out, n_events)
+    for name, column in columns.items():
+        column[:] = arrays[name][order]
+        column.flush()
+    _write_meta(out, n_events, source=str(source))
+    return FeedbackLog(out)
+
+
+def shard_count(n_events: int, workers: int, min_rows: int = 50_000) -> int:
+    """Pick a shard count that keeps every worker busy without tiny tasks."""
+    return max(1, min(workers * 4, math.ceil(n_events / min_rows)))
@@ -0,0 +1,258 @@
+"""Parallel offline replay of feedback logs through suggestion rankers.
+
+Replay is prequential: for every event the ranker first orders the
+candidates (what the user would have seen), the outcome is scored against that
+ordering, and only then does the ranker learn from the logged feedback. Each
+user gets fresh per-user rankers, matching per-user personalization
+(TODO 3.2), which makes users independent and lets shards of whole users run in
+separate processes without any shared state.
+
+Metrics are computed over *intent* events (spoken or thumbs up), whose logged
+verb/modifier is the sentence the user actually wanted:
+
+- acceptance rate: the intended verb (and modifier, if any) was on the first
+  page of suggestions
+- taps-to-sentence: object tap + page-flips and selections for verb and
+  modifier + speak tap
+- throughput: events replayed per CPU-second of worker time
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.services.learning_service import (
+    NO_PREVIOUS,
+    POSITIVE_FEEDBACK,
+    REWARDS,
+    BanditRanker,
+    FeedbackType,
+    QLearningRanker,
+    Ranker,
+    context_key,
+)
+from app.services.verb_service import (
+    CATEGORY_VERB_CANDIDATES,
+    MODIFIER_CANDIDATES,
+    RuleBasedRanker,
+)
+from app.simulation.logs import COLUMNS, NO_MODIFIER, FeedbackLog, shard_count
+
+ENGINES: dict[str, Callable[[int, int], Ranker]] = {
+    "rule": lambda page_size, seed: RuleBasedRanker(),
+    "qlearning": lambda page_size, seed: QLearningRanker(page_size=page_size, seed=seed),
+    "bandit": lambda page_size, seed: BanditRanker(),
+}
+
+CHUNK_ROWS = 1_000_000
+_REWARD_BY_CODE = tuple(REWARDS[FeedbackType(code)] for code in range(len(FeedbackType)))
+_POSITIVE_CODES = frozenset(int(code) for code in POSITIVE_FEEDBACK)
+
+
+@dataclass
+class EngineStats:
+    """Replay counters for one engine, mergeable across shards."""
+
+    engine: str
+    events: int = 0
+    intents: int = 0
+    accepted: int = 0
+    taps: int = 0
+    seconds: float = 0.0
+
+    def merge(self, other: EngineStats) -> None:
+        self.events += other.events
+        self.intents += other.intents
+        self.accepted += other.accepted
+        self.taps += other.taps
+        self.seconds += other.seconds
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted / self.intents if self.intents else 0.0
+
+    @property
+    def taps_per_sentence(self) -> float:
+        return self.taps / self.intents if self.intents else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Events per CPU-second of worker time."""
+        return self.events / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class SimulationReport:
+    """Aggregated replay results for every engine."""
+
+    events: int
+    wall_seconds: float
+    engines: dict[str, EngineStats] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "events": self.events,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "engines": {
+                name: {
+                    **asdict(stats),
+                    "acceptance_rate": round(stats.acceptance_rate, 4),
+                    "taps_per_sentence": round(stats.taps_per_sentence, 3),
+                    "throughput": round(stats.throughput),
+                }
+                for name, stats in self.engines.items()
+            },
+        }
+
+    def format_table(self) -> str:
+        lines = [
+            f"{'engine':<10} {'acceptance':>10} {'taps/sent':>10} {'events/s':>12}",
+        ]
+        for name, stats in self.engines.items():
+            lines.append(
+                f"{name:<10} {stats.acceptance_rate:>10.1%} {stats.taps_per_sentence:>10.2f} "
+                f"{stats.throughput:>12,.0f}"
+            )
+        lines.append(
+            f"{self.events:,} events x {len(self.engines)} engines "
+            f"in {self.wall_seconds:.1f}s wall"
+        )
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class ReplayTask:
+    """One (engine, shard) unit of work, picklable for the process pool."""
+
+    log_path: str
+    engine: str
+    start: int
+    stop: int
+    page_size: int = 5
+    seed: int = 0
+
+
+def _chunks(log: FeedbackLog, start: int, stop: int) -> Iterable[list[list[int]]]:
+    columns = [log.column(name) for name in COLUMNS]
+    for lo in range(start, stop, CHUNK_ROWS):
+        hi = min(lo + CHUNK_ROWS, stop)
+        yield [column[lo:hi].tolist() for column in columns]
+
+
+def replay_shard(task: ReplayTask) -> EngineStats:
+    """Replay one shard of whole users through fresh per-user rankers."""
+    make_ranker = ENGINES[task.engine]
+    page = task.page_size
+    stats = EngineStats(task.engine)
+    began = time.perf_counter()
+
+    current_user = -1
+    verb_ranker: Ranker = make_ranker(page, task.seed)
+    modifier_ranker: Ranker = make_ranker(page, task.seed)
+    pending: tuple[int, int, float] | None = None
+    previous_verb = NO_PREVIOUS
+    last_session = -1
+
+    log = FeedbackLog(Path(task.log_path))
+    for users, sessions, _objects, cats, verbs, mods, tods, feedback, _stamps in _chunks(
+        log, task.start, task.stop
+    ):
+        for i in range(len(users)):
+            user = users[i]
+            if user != current_user:
+                if pending is not None:
+                    verb_ranker.update(*pending)
+                current_user = user
+                seed = task.seed ^ (user * 2654435761 & 0xFFFFFFFF)
+                verb_ranker = make_ranker(page, seed)
+                modifier_ranker = make_ranker(page, seed + 1)
+                pending = None
+                previous_verb = NO_PREVIOUS
+            elif sessions[i] != last_session:
+                previous_verb = NO_PREVIOUS
+            last_session = sessions[i]
+
+            verb = verbs[i]
+            modifier = mods[i]
+            code = feedback[i]
+            key = context_key(cats[i], tods[i], previous_verb)
+            if pending is not None:
+                verb_ranker.update(*pending, key)
+
+            if code in _POSITIVE_CODES:
+                stats.intents += 1
+                position = verb_ranker.rank(key, CATEGORY_VERB_CANDIDATES[cats[i]]).index(verb)
+                taps = 2 + position // page + 1
+                first_page = position < page
+                if modifier != NO_MODIFIER:
+                    modifier_key = context_key(0, tods[i], verb)
+                    m_position = modifier_ranker.rank(modifier_key, MODIFIER_CANDIDATES).index(
+                        modifier
+                    )
+                    taps += m_position // page + 1
+                    first_page = first_page and m_position < page
+                stats.taps += taps
+                stats.accepted += first_page
+
+            reward = _REWARD_BY_CODE[code]
+            pending = (key, verb, reward)
+            if modifier != NO_MODIFIER:
+                modifier_ranker.update(context_key(0, tods[i], verb), modifier, reward)
+            previous_verb = verb
+        stats.events += len(users)
+
+    if pending is not None:
+        verb_ranker.update(*pending)
+    stats.seconds = time.perf_counter() - began
+    return stats
+
+
+def replay(
+    log: FeedbackLog,
+    engines: Iterable[str] = tuple(ENGINES),
+    workers: int | None = None,
+    page_size: int = 5,
+    seed: int = 0,
+) -> SimulationReport:
+    """Replay a feedback log through each engine across a process pool.
+
+    Args:
+        log: Columnar feedback log
+        engines: Engine names (keys of ``ENGINES``)
+        workers: Process count; defaults to the CPU count, ``1`` runs inline
+        page_size: Suggestions visible per page
+        seed: Base seed for exploration
+
+    Returns:
+        Per-engine metrics plus wall time
+    """
+    engines = list(engines)
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        raise ValueError(f"Unknown engines: {', '.join(sorted(unknown))}")
+    workers = workers or os.cpu_count() or 1
+    shards = log.shards(shard_count(len(log), workers))
+    tasks = [
+        ReplayTask(str(log.path), engine, start, stop, page_size, seed)
+        for engine in engines
+        for start, stop in shards
+    ]
+    report = SimulationReport(events=len(log), wall_seconds=0.0)
+    report.engines = {engine: EngineStats(engine) for engine in engines}
+
+    began = time.perf_counter()
+    if workers == 1:
+        for result in map(replay_shard, tasks):
+            report.engines[result.engine].merge(result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(replay_shard, tasks):
+                report.engines[result.engine].merge(result)
+    report.wall_seconds = time.perf_counter() - began
+    return report
@@ -0,0 +1,226 @@
+"""Monte Carlo simulation of switch-scanning and gaze layouts.
+
+Every simulated screen has a true selection distribution, Zipf over a random
+order of its items, and a predicted one: the truth blended with uniform by
+``accuracy`` (1 is a perfect model, 0 one that knows nothing). Layouts are
+built from the prediction, as :mod:`app.services.scanning_service` builds
+them, and simulated users select against the truth:
+
+- scan: each level waits out ``position`` highlights, then presses after a
+  log-normally jittered reaction; a missed highlight costs a full cycle of
+  the group
+- step: ``position + 1`` presses per level, each jittered; a miss costs one
+  more cycle of moves
+- gaze: a jittered reaction to find the target and its dwell, looking away
+  (``miss_rate``) restarting the dwell; meanwhile exponential fixations on
+  other items that outlast their dwell select them by mistake, costing that
+  dwell plus an undo
+
+``fixed-*`` layouts keep the library order, which is how scanning works
+without prediction.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import numpy as np
+
+from app.services.scanning_service import (
+    ScanItem,
+    ScanLayout,
+    Timing,
+    build_layout,
+    uniform,
+)
+
+LAYOUTS = ("fixed-linear", "fixed-row-column", "linear", "row-column", "huffman", "best")
+# Gaze: distractor fixations per selection and their mean duration (seconds)
+SEARCH_FIXATIONS = 2
+FIXATION_SECONDS = 0.3
+
+
+@dataclass
+class LayoutStats:
+    """Simulated selections with one layout method, summed over screens."""
+
+    layout: str
+    selections: int = 0
+    seconds: float = 0.0
+    presses: float = 0.0
+    # Sum over screens of the layout's own expected seconds per selection
+    expected_seconds: float = 0.0
+    screens: int = 0
+
+    @property
+    def selections_per_minute(self) -> float:
+        return 60.0 * self.selections / self.seconds if self.seconds else 0.0
+
+    @property
+    def presses_per_selection(self) -> float:
+        return self.presses / self.selections if self.selections else 0.0
+
+    @property
+    def expected_selections_per_minute(self) -> float:
+        """What the layouts promise, from the predicted distribution."""
+        return 60.0 * self.screens / self.expected_seconds if self.expected_seconds else 0.0
+
+
+@dataclass
+class ScanReport:
+    """Simulated throughput of every layout method."""
+
+    screens: int
+    selections: int
+    mode: str
+    wall_seconds: float
+    layouts: dict[str, LayoutStats] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "screens": self.screens,
+            "selections": self.selections,
+            "mode": self.mode,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "layouts": {
+                name: {
+                    **asdict(stats),
+                    "selections_per_minute": round(stats.selections_per_minute, 2),
+                    "presses_per_selection": round(stats.presses_per_selection, 3),
+                    "expected_selections_per_minute": round(
+                        stats.expected_selections_per_minute, 2
+                    ),
+                }
+                for name, stats in self.layouts.items()
+            },
+        }
+
+    def format_table(self) -> str:
+        lines = [f"{'layout':<18} {'sel/min':>8} {'expected':>9} {'presses/sel':>12}"]
+        for name, stats in self.layouts.items():
+            lines.append(
+                f"{name:<18} {stats.selections_per_minute:>8.2f} "
+                f"{stats.expected_selections_per_minute:>9.2f} "
+                f"{stats.presses_per_selection:>12.2f}"
+            )
+        lines.append(
+            f"{self.selections:,} {self.mode} selections on {self.screens:,} screens "
+            f"in {self.wall_seconds:.1f}s wall"
+        )
+        return "\n".join(lines)
+
+
+def synthetic_screen(
+    items: int, zipf: float, accuracy: float, rng: np.random.Generator
+) -> tuple[list[ScanItem], np.ndarray]:
+    """A screen's predicted items, in library order, and the true distribution."""
+    truth = 1.0 / np.arange(1, items + 1) ** zipf
+    truth = truth[rng.permutation(items)]
+    truth /= truth.sum()
+    predicted = accuracy * truth + (1 - accuracy) / items
+    scan_items = [ScanItem("object", i, f"item {i}", float(p)) for i, p in enumerate(predicted)]
+    return scan_items, truth
+
+
+def _build(name: str, items: Sequence[ScanItem], timing: Timing, columns: int) -> ScanLayout:
+    if name.startswith("fixed-"):
+        return build_layout(uniform(items), timing, name.removeprefix("fixed-"), columns)
+    return build_layout(items, timing, name, columns)
+
+
+def simulate_layout(
+    layout: ScanLayout,
+    truth: np.ndarray,
+    timing: Timing,
+    selections: int,
+    jitter: float,
+    rng: np.random.Generator,
+) -> tuple[float, float]:
+    """Total (seconds, presses) of ``selections`` drawn from ``truth``.
+
+    Args:
+        layout: Layout to select from; item ids index ``truth``
+        truth: True probability of each item id
+        timing: How the user selects
+        selections: Selections to simulate
+        jitter: Log-normal sigma of reaction and press times
+        rng: Random generator
+    """
+    leaves = layout.root.leaves()
+    depth = max(len(path) for _item, path in leaves)
+    count = len(leaves)
+    position = np.zeros((count, depth))
+    size = np.zeros((count, depth))
+    valid = np.zeros((count, depth))
+    for row, (_item, path) in enumerate(leaves):
+        for level, (index, width) in enumerate(path):
+            position[row, level] = index
+            size[row, level] = width
+            valid[row, level] = 1.0
+    weights = truth[[item.id for item, _path in leaves]]
+    targets = rng.choice(count, size=selections, p=weights / weights.sum())
+    shape = (selections, depth)
+    missed = (rng.geometric(1.0 - timing.miss_rate, shape) - 1) * valid[targets]
+    if timing.mode == "scan":
+        reaction = timing.reaction * rng.lognormal(0.0, jitter, shape)
+        waited = position[targets] + missed * size[targets]
+        seconds = (valid[targets] * (waited * timing.scan_interval + reaction)).sum()
+        return float(seconds), float(valid[targets].sum())
+    if timing.mode == "step":
+        presses = valid[targets] * (position[targets] + 1) + missed * size[targets]
+        pace = timing.press_interval * rng.lognormal(0.0, jitter, shape)
+        return float((presses * pace).sum()), float(presses.sum())
+    dwell = np.array([layout.dwell[item.kind, item.id] for item, _path in leaves])
+    fixations = rng.exponential(FIXATION_SECONDS, (selections, SEARCH_FIXATIONS))
+    distractors = rng.integers(0, count, (selections, SEARCH_FIXATIONS))
+    mistaken = fixations > dwell[distractors]
+    # A mistaken selection costs the distractor's dwell and an undo
+    slips = (mistaken * (dwell[distractors] + timing.dwell)).sum()
+    reaction = timing.reaction * rng.lognormal(0.0, jitter, selections)
+    seconds = reaction.sum() + slips + (dwell[targets] * (1 + missed[:, 0])).sum()
+    return float(seconds), float(selections + 2 * mistaken.sum())
+
+
+def simulate(
+    screens: int = 200,
+    items: int = 36,
+    columns: int = 6,
+    timing: Timing | None = None,
+    accuracy: float = 0.7,
+    zipf: float = 1.1,
+    jitter: float = 0.25,
+    selections: int = 500,
+    layouts: Sequence[str] = LAYOUTS,
+    seed: int = 0,
+) -> ScanReport:
+    """Simulate every layout method on the same random screens.
+
+    Raises:
+        ValueError: Unknown layout or out-of-range parameter
+    """
+    timing = timing or Timing()
+    if not 0 <= accuracy <= 1:
+        raise ValueError("accuracy must be in [0, 1]")
+    unknown = set(layouts) - set(LAYOUTS)
+    if unknown:
+        raise ValueError(f"Unknown layouts: {', '.join(sorted(unknown))}")
+    rng = np.random.default_rng(seed)
+    began = time.perf_counter()
+    report = ScanReport(screens, screens * selections, timing.mode, 0.0)
+    report.layouts = {name: LayoutStats(name) for name in layouts}
+    for _screen in range(screens):
+        scan_items, truth = synthetic_screen(items, zipf, accuracy, rng)
+        for name in layouts:
+            layout = _build(name, scan_items, timing, columns)
+            seconds, presses = simulate_layout(layout, truth, timing, selections, jitter, rng)
+            stats = report.layouts[name]
+            stats.selections += selections
+            stats.seconds += seconds
+            stats.presses += presses
+            stats.expected_seconds += layout.expected_seconds
+            stats.screens += 1
+    report.wall_seconds = time.perf_counter() - began
+    return report
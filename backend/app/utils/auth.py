@@ -0,0 +1,23 @@
+"""Request identity.
+
+JWT authentication (TODO 1.5) is not in place yet; until it is, the caller's
+user id comes from the ``X-User-Id`` header. Endpoints depend on
+:func:`get_current_user_id` / :func:`require_user_id` so the JWT version can
+replace them without touching the routers.
+"""
+
+from __future__ import annotations
+
+from fastapi import Header, HTTPException, status
+
+
+async def get_current_user_id(x_user_id: int | None = Header(default=None)) -> int | None:
+    """Return the caller's user id, or ``None`` for anonymous requests."""
+    return x_user_id
+
+
+async def require_user_id(x_user_id: int | None = Header(default=None)) -> int:
+    """Return the caller's user id, rejecting anonymous requests."""
+    if x_user_id is None:
+        raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Authentication required")
+    return x_user_id
@@ -0,0 +1,62 @@
+"""Bounded reading of raw request bodies.
+
+Endpoints that take a raw body (sync pushes, federated updates, face and
+photo uploads) read it with :func:`read_body` rather than
+``request.body()``, so an oversized request is turned away before it is held
+in memory. A declared ``Content-Length`` over the limit is refused without
+reading; otherwise the stream is read chunk by chunk and abandoned once it
+passes the limit. ``Content-Encoding: gzip`` bodies are inflated as they
+arrive, and the limit applies to both the compressed and the inflated size.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+from fastapi import HTTPException, Request, status
+
+
+def _too_large(message: str) -> HTTPException:
+    return HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, message)
+
+
+async def read_body(request: Request, limit: int, too_large: str = "Body too large") -> bytes:
+    """The request body, inflated if gzipped, of at most ``limit`` bytes.
+
+    Args:
+        request: Incoming request
+        limit: Largest body accepted, before and after inflating
+        too_large: Detail of the 413 response
+
+    Raises:
+        HTTPException: 413 past ``limit``, 415 for an encoding other than
+            gzip, 400 for a malformed gzip body
+    """
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+    if encoding not in ("identity", "gzip"):
+        raise HTTPException(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, f"Unsupported {encoding}")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise _too_large(too_large)
+    inflater = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS) if encoding == "gzip" else None
+    chunks: list[bytes] = []
+    received = size = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise _too_large(too_large)
+        if inflater is not None:
+            try:
+                # One byte past what is left, so an oversized body shows
+                chunk = inflater.decompress(chunk, limit - size + 1)
+            except zlib.error as exc:
+                raise HTTPException(status.HTTP_400_BAD_REQUEST, "Malformed gzip body") from exc
+            if inflater.unconsumed_tail:
+                raise _too_large(too_large)
+        size += len(chunk)
+        if size > limit:
+            raise _too_large(too_large)
+        chunks.append(chunk)
+    if inflater is not None and received and not inflater.eof:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Malformed gzip body")
+    return b"".join(chunks)
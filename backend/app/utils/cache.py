@@ -0,0 +1,479 @@
+"""In-process LRU and the tiered (worker LRU + Redis) response cache."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from app.utils.metrics import REGISTRY
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded mapping that evicts the least recently used entry.
+
+    Args:
+        maxsize: Maximum number of entries
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: K) -> V | None:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        return self._data.pop(key, None)
+
+    def values(self) -> list[V]:
+        return list(self._data.values())
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """A cached response body with its freshness window (wall-clock seconds)."""
+
+    value: bytes
+    fresh_until: float
+    stale_until: float
+    tags: tuple[str, ...] = ()
+    # Local tier only: when this worker must re-read the shared tier
+    local_until: float = 0.0
+
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total",
+    "Cache lookups by endpoint and outcome (local, redis, stale, coalesced, miss)",
+    ["endpoint", "result"],
+)
+CACHE_LOAD = REGISTRY.histogram(
+    "cache_load_seconds", "Time to compute a value on a cache miss", ["endpoint"]
+)
+CACHE_SAVED = REGISTRY.counter(
+    "cache_latency_saved_seconds_total",
+    "Estimated load time avoided by cache hits (mean miss cost x hits)",
+    ["endpoint"],
+)
+
+HIT_RESULTS = ("local", "redis", "stale", "coalesced")
+# Tag sets outlive every entry they index (entries live ttl + stale_ttl)
+TAG_TTL_MS = 86_400_000
+Loader = Callable[[], Awaitable[bytes]]
+InvalidationListener = Callable[[Sequence[str]], None]
+
+
+class TieredCache:
+    """Per-worker LRU in front of a shared Redis tier.
+
+    - Values are rendered response bodies (``bytes``), so hits skip both the
+      database and serialization.
+    - Concurrent misses for one key share a single load (per worker); across
+      workers a short Redis lock lets one worker load while the others poll
+      the shared tier.
+    - After ``ttl`` an entry is stale: it is still served for ``stale_ttl``
+      seconds while one background task refreshes it.
+    - Entries carry tags; :meth:`invalidate` deletes tagged entries from Redis
+      and broadcasts the tags so every worker drops its local copies.
+
+    Without Redis the cache runs as a local-only tier.
+
+    Args:
+        redis: ``redis.asyncio`` client (or ``fakeredis`` in tests), or ``None``
+        local_size: Entries kept per worker
+        local_ttl: Longest a worker serves an entry without re-reading Redis,
+            which bounds staleness if an invalidation message is lost
+        namespace: Redis key prefix
+        lock_timeout: How long other workers wait on a loading worker
+    """
+
+    def __init__(
+        self,
+        redis: Any = None,
+        local_size: int = 2048,
+        local_ttl: float = 30.0,
+        namespace: str = "cache",
+        lock_timeout: float = 2.0,
+    ) -> None:
+        self.redis = redis
+        self.local: LRUCache[str, CacheEntry] = LRUCache(local_size)
+        self.local_ttl = local_ttl
+        self.namespace = namespace
+        self.lock_timeout = lock_timeout
+        self._local_tags: dict[str, set[str]] = {}
+        self._inflight: dict[str, asyncio.Future[bytes]] = {}
+        self._refreshing: set[asyncio.Task[None]] = set()
+        self._listeners: list[InvalidationListener] = []
+        self._subscriber: asyncio.Task[None] | None = None
+        self._load_cost: dict[str, float] = {}
+        self._epoch = 0
+
+    @property
+    def channel(self) -> str:
+        return f"{self.namespace}:invalidate"
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:v:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:t:{tag}"
+
+    def add_listener(self, listener: InvalidationListener) -> None:
+        """Call ``listener(tags)`` whenever any worker invalidates tags."""
+        self._listeners.append(listener)
+
+    async def get_or_load(
+        self,
+        endpoint: str,
+        key: str,
+        loader: Loader,
+        ttl: float = 60.0,
+        stale_ttl: float = 300.0,
+        tags: Sequence[str] = (),
+    ) -> bytes:
+        """Return the cached value for ``key``, loading it on a miss.
+
+        Args:
+            endpoint: Metrics label, e.g. ``"verbs.library"``
+            key: Cache key, unique across endpoints
+            loader: Coroutine factory producing the value
+            ttl: Seconds the value is fresh
+            stale_ttl: Extra seconds a stale value may be served while refreshing
+            tags: Invalidation tags
+        """
+        now = time.time()
+        entry = self.local.get(key)
+        if entry is not None and now < entry.local_until:
+            if now < entry.fresh_until:
+                return self._hit(endpoint, "local", entry.value)
+            if now < entry.stale_until:
+                self._refresh(endpoint, key, loader, ttl, stale_ttl, tags)
+                return self._hit(endpoint, "stale", entry.value)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return self._hit(endpoint, "coalesced", await asyncio.shield(pending))
+        return await self._fetch(self._begin(key), endpoint, key, loader, ttl, stale_ttl, tags)
+
+    def _hit(self, endpoint: str, result: str, value: bytes) -> bytes:
+        CACHE_REQUESTS.inc(1, endpoint, result)
+        cost = self._load_cost.get(endpoint)
+        if cost is not None:
+            CACHE_SAVED.inc(cost, endpoint)
+        return value
+
+    def _refresh(
+        self,
+        endpoint: str,
+        key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+        tags: Sequence[str],
+    ) -> None:
+        if key in self._inflight:
+            return
+        future = self._begin(key)
+        task = asyncio.create_task(self._load(future, endpoint, key, loader, ttl, stale_ttl, tags))
+        self._refreshing.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task[Any]) -> None:
+        self._refreshing.discard(task)
+        if not task.cancelled():
+            # A failed refresh keeps serving the stale value; the next stale hit retries
+            task.exception()
+
+    async def _fetch(
+        self,
+        future: asyncio.Future[bytes],
+        endpoint: str,
+        key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+        tags: Sequence[str],
+    ) -> bytes:
+        # Local miss: read the shared tier, then load; concurrent callers wait on ``future``
+        result = "miss"
+        try:
+            entry = await self._read_shared(key)
+            now = time.time()
+            if entry is not None and now < entry.stale_until:
+                self._store_local(key, entry, now)
+                result = "redis" if now < entry.fresh_until else "stale"
+                value = entry.value
+            else:
+                CACHE_REQUESTS.inc(1, endpoint, "miss")
+                value = await self._load_once(endpoint, key, loader, ttl, stale_ttl, tags)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(value)
+        if result == "miss":
+            return value
+        if result == "stale":
+            self._refresh(endpoint, key, loader, ttl, stale_ttl, tags)
+        return self._hit(endpoint, result, value)
+
+    def _begin(self, key: str) -> asyncio.Future[bytes]:
+        # Registered synchronously so a second miss in the same tick coalesces
+        future: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    async def _load(
+        self,
+        future: asyncio.Future[bytes],
+        endpoint: str,
+        key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+        tags: Sequence[str],
+    ) -> bytes:
+        try:
+            # Another worker may already have refreshed the shared copy
+            entry = await self._read_shared(key)
+            now = time.time()
+            if entry is not None and now < entry.fresh_until:
+                self._store_local(key, entry, now)
+                value = entry.value
+            else:
+                value = await self._load_once(endpoint, key, loader, ttl, stale_ttl, tags)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Retrieve it so waiter-less failures are not reported as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    async def _load_once(
+        self,
+        endpoint: str,
+        key: str,
+        loader: Loader,
+        ttl: float,
+        stale_ttl: float,
+        tags: Sequence[str],
+    ) -> bytes:
+        lock = f"{self.namespace}:lock:{key}"
+        locked = self.redis is None or await self.redis.set(
+            lock, b"1", nx=True, px=int(self.lock_timeout * 1000)
+        )
+        if not locked:
+            # Another worker is loading: wait for its result before loading ourselves
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.02)
+                entry = await self._read_shared(key)
+                if entry is not None and time.time() < entry.fresh_until:
+                    self._store_local(key, entry, time.time())
+                    return entry.value
+        try:
+            epoch = self._epoch
+            began = time.perf_counter()
+            value = await loader()
+            elapsed = time.perf_counter() - began
+            CACHE_LOAD.observe(elapsed, endpoint)
+            previous = self._load_cost.get(endpoint)
+            self._load_cost[endpoint] = (
+                elapsed if previous is None else 0.9 * previous + 0.1 * elapsed
+            )
+            if epoch != self._epoch:
+                # Invalidated while loading: the value may predate the write
+                return value
+            now = time.time()
+            entry = CacheEntry(value, now + ttl, now + ttl + stale_ttl, tuple(tags))
+            self._store_local(key, entry, now)
+            await self._write_shared(key, entry)
+            return value
+        finally:
+            if self.redis is not None and locked:
+                await self.redis.delete(lock)
+
+    def _store_local(self, key: str, entry: CacheEntry, now: float) -> None:
+        entry.local_until = min(now + self.local_ttl, entry.stale_until)
+        self.local.put(key, entry)
+        for tag in entry.tags:
+            keys = self._local_tags.setdefault(tag, set())
+            keys.add(key)
+            if len(keys) > 2 * self.local.maxsize:
+                # Forget keys the LRU has already evicted
+                keys.intersection_update(k for k in keys if k in self.local)
+
+    async def _read_shared(self, key: str) -> CacheEntry | None:
+        if self.redis is None:
+            return None
+        fields = await self.redis.hgetall(self._key(key))
+        if not fields:
+            return None
+        tags = fields.get(b"tags", b"").decode()
+        return CacheEntry(
+            fields[b"value"],
+            float(fields[b"fresh"]),
+            float(fields[b"stale"]),
+            tuple(tags.split("\x1f")) if tags else (),
+        )
+
+    async def _write_shared(self, key: str, entry: CacheEntry) -> None:
+        if self.redis is None:
+            return
+        redis_key = self._key(key)
+        expire_ms = max(1, int((entry.stale_until - time.time()) * 1000))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                redis_key,
+                mapping={
+                    "value": entry.value,
+                    "fresh": repr(entry.fresh_until),
+                    "stale": repr(entry.stale_until),
+                    "tags": "\x1f".join(entry.tags),
+                },
+            )
+            pipe.pexpire(redis_key, expire_ms)
+            for tag in entry.tags:
+                pipe.sadd(self._tag_key(tag), redis_key)
+                pipe.pexpire(self._tag_key(tag), TAG_TTL_MS)
+            await pipe.execute()
+
+    def _drop_local(self, tags: Sequence[str]) -> None:
+        self._epoch += 1
+        for tag in tags:
+            for key in self._local_tags.pop(tag, ()):
+                self.local.pop(key)
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying any of ``tags``, in all workers."""
+        self._drop_local(tags)
+        if self.redis is not None:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                keys = await self.redis.smembers(tag_key)
+                await self.redis.delete(tag_key, *keys)
+            await self.redis.publish(self.channel, "\x1f".join(tags))
+        else:
+            self._notify(tags)
+
+    def _notify(self, tags: Sequence[str]) -> None:
+        for listener in self._listeners:
+            listener(tags)
+
+    async def start(self) -> None:
+        """Subscribe to invalidations from other workers."""
+        if self.redis is None or self._subscriber is not None:
+            return
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._subscriber = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub: Any) -> None:
+        try:
+            async for message in pubsub.listen():
+                data = message["data"]
+                tags = (data.decode() if isinstance(data, bytes) else data).split("\x1f")
+                self._drop_local(tags)
+                self._notify(tags)
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._subscriber
+            self._subscriber = None
+        for task in list(self._refreshing):
+            task.cancel()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-endpoint hit ratio and estimated seconds saved."""
+        report: dict[str, dict[str, float]] = {}
+        for (endpoint, result), count in CACHE_REQUESTS.items():
+            row = report.setdefault(endpoint, {"hits": 0.0, "misses": 0.0})
+            row["hits" if result in HIT_RESULTS else "misses"] += count
+        for endpoint, row in report.items():
+            total = row["hits"] + row["misses"]
+            row["hit_ratio"] = row["hits"] / total if total else 0.0
+            row["seconds_saved"] = CACHE_SAVED.value(endpoint)
+        return report
+
+
+_cache: TieredCache | None = None
+
+
+async def init_cache(redis_url: str | None = None) -> TieredCache:
+    """Create the process-wide cache (called from the app lifespan).
+
+    ``redis_url`` of ``None`` runs the local tier only.
+    """
+    global _cache
+    redis = None
+    if redis_url:
+        from redis.asyncio import Redis
+
+        redis = Redis.from_url(redis_url)
+    _cache = TieredCache(redis)
+    await _cache.start()
+    return _cache
+
+
+def get_cache() -> TieredCache:
+    if _cache is None:
+        raise RuntimeError("Cache not initialised; call init_cache() first")
+    return _cache
+
+
+async def close_cache() -> None:
+    global _cache
+    if _cache is not None:
+        await _cache.close()
+        if _cache.redis is not None:
+            await _cache.redis.aclose()
+        _cache = None
@@ -0,0 +1,115 @@
+"""Minimal streaming PDF writer for text reports.
+
+Pages are written to the output file as soon as they are full, and only the
+byte offsets of finished objects are kept in memory, so a report with
+thousands of pages uses the same memory as a one-page report. It supports
+only what caregiver reports need: the built-in Helvetica fonts, left-aligned
+lines and automatic page breaks. Text outside Latin-1 is replaced with
+``?``, because the standard fonts only cover WinAnsi.
+"""
+
+from __future__ import annotations
+
+from typing import BinaryIO
+
+# A4 in points
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 50
+FONTS = {"regular": "F1", "bold": "F2"}
+
+
+def _escape(text: str) -> bytes:
+    raw = text.encode("latin-1", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class PdfWriter:
+    """Write a text-only PDF incrementally to ``out``.
+
+    Object 1 is the catalog, 2 the page tree and 3-4 the fonts; pages and
+    their content streams follow as they fill. The page tree and
+    cross-reference table are written by :meth:`close`.
+
+    Args:
+        out: Binary file opened for writing
+        title: Document title (metadata)
+    """
+
+    def __init__(self, out: BinaryIO, title: str = "") -> None:
+        self.out = out
+        self.title = title
+        self._offsets: dict[int, int] = {}
+        self._pages: list[int] = []
+        self._next_id = 5
+        self._lines: list[bytes] = []
+        self._y = PAGE_HEIGHT - MARGIN
+        self.out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages) + (1 if self._lines else 0)
+
+    def _object(self, number: int, body: bytes) -> None:
+        self._offsets[number] = self.out.tell()
+        self.out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def _allocate(self) -> int:
+        number = self._next_id
+        self._next_id += 1
+        return number
+
+    def line(self, text: str, size: float = 10, style: str = "regular", indent: float = 0) -> None:
+        """Add one line, starting a new page when the current one is full."""
+        leading = size * 1.4
+        if self._y - leading < MARGIN:
+            self.page_break()
+        self._y -= leading
+        self._lines.append(
+            b"BT /%s %.1f Tf %.1f %.1f Td (%s) Tj ET"
+            % (FONTS[style].encode(), size, MARGIN + indent, self._y, _escape(text))
+        )
+
+    def space(self, points: float = 6) -> None:
+        self._y -= points
+
+    def page_break(self) -> None:
+        if not self._lines:
+            # Nothing drawn yet, but space() may have moved past the margin
+            self._y = PAGE_HEIGHT - MARGIN
+            return
+        stream = b"\n".join(self._lines)
+        content, page = self._allocate(), self._allocate()
+        self._object(content, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        self._object(
+            page,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, content),
+        )
+        self._pages.append(page)
+        self._lines = []
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def close(self) -> None:
+        """Finish the last page and write the page tree, info and trailer."""
+        self.page_break()
+        if not self._pages:
+            # A PDF needs at least one page
+            self.line("")
+            self.page_break()
+        kids = b" ".join(b"%d 0 R" % page for page in self._pages)
+        self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        info = self._allocate()
+        self._object(info, b"<< /Title (%s) /Producer (SpeakOut) >>" % _escape(self.title))
+        xref = self.out.tell()
+        size = self._next_id
+        self.out.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for number in range(1, size):
+            self.out.write(b"%010d 00000 n \n" % self._offsets[number])
+        self.out.write(
+            b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (size, info, xref)
+        )
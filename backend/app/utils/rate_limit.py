@@ -0,0 +1,319 @@
+"""Per-client rate limiting (NFR-4: 100 requests per minute per user).
+
+Callers are keyed by their address. The ``X-User-Id`` header is not
+authenticated until JWT login (TODO 1.5) lands, and a client could rotate it
+to get a fresh budget on every request. Behind a proxy, run uvicorn with
+``--proxy-headers`` so the address is the client's and not the proxy's.
+
+The limiter is GCRA (generic cell rate algorithm): each key stores a
+theoretical arrival time (TAT) that advances by ``cost * interval`` per
+request, where ``interval = period / limit``. A request is allowed while the
+advanced TAT stays within ``period`` of now, which admits at most ``limit``
+units in any ``period`` window and refills smoothly instead of resetting at
+minute boundaries.
+
+Decisions are made from worker-local state, so a request costs a dict lookup
+and some float arithmetic. With Redis configured, the units each worker
+admits are flushed every ``sync_interval`` seconds through an atomic Lua
+script that adds them to the shared TAT and returns the shared debt. Workers
+then adopt the larger of their own and the shared view. Over-admission by a
+client spread across instances is therefore bounded by what it can send in
+one sync interval per worker, and it is paid back by later rejections because
+the shared TAT keeps the excess. If Redis is unreachable, the limit stays
+enforced per worker and the unsynced units are retried on the next flush.
+
+Routes carry cost weights (:data:`ROUTE_COSTS`). A PDF report uses five units
+of the budget, and anything that runs ONNX inference on an uploaded image
+(face enrolment and matching, object photos and recognition) uses three,
+while a library read uses one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# (method, path prefix, cost); the first match wins and unmatched routes cost 1.
+# Prefixes match whole path segments, and a ``*`` segment matches any one, so
+# more specific entries go before the prefixes that would also match them.
+# Cost 0 exempts a route (health probes and metrics scrapes).
+ROUTE_COSTS: tuple[tuple[str, str, int], ...] = (
+    ("*", "/health", 0),
+    ("*", "/metrics", 0),
+    ("*", "/docs", 0),
+    ("*", "/openapi.json", 0),
+    ("POST", "/api/export/pdf", 5),
+    ("POST", "/api/sync", 2),
+    ("POST", "/api/people/match", 3),
+    ("POST", "/api/people/*/faces", 3),
+    ("POST", "/api/objects/recognize", 3),
+    ("POST", "/api/objects/custom/*/photos", 3),
+    ("POST", "/api/caregiver/export", 5),
+    ("POST", "/api/tts/speech", 3),
+    ("GET", "/api/export/csv", 3),
+    ("GET", "/api/export/json", 3),
+    ("POST", "/api/sentences/construct/batch", 2),
+    ("POST", "/api/sentences/compose", 2),
+    ("POST", "/api/objects/custom", 2),
+)
+
+RATE_LIMIT_DECISIONS = REGISTRY.counter(
+    "rate_limit_decisions_total", "Rate limiter decisions by result", ["result"]
+)
+RATE_LIMIT_SYNC_ERRORS = REGISTRY.counter(
+    "rate_limit_sync_errors_total", "Failed flushes of admitted units to Redis"
+)
+
+# KEYS[1] = TAT key; ARGV = units, interval (ms per unit).
+# Returns the shared debt (TAT - now, ms) after adding the units. Uses the
+# Redis clock so workers with skewed clocks agree.
+_GCRA_ADD = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+tat = tat + tonumber(ARGV[1]) * tonumber(ARGV[2])
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now) + 1)
+return tostring(tat - now)
+"""
+
+
+@dataclass(slots=True)
+class Decision:
+    """Outcome of a rate-limit check.
+
+    Attributes:
+        allowed: Whether the request may proceed
+        remaining: Whole units still available right now
+        retry_after: Seconds until the request would be allowed (0 if allowed)
+    """
+
+    allowed: bool
+    remaining: int
+    retry_after: float = 0.0
+
+
+class RateLimiter:
+    """GCRA limiter with local decisions and optional Redis synchronisation.
+
+    Args:
+        limit: Units allowed per ``period``
+        period: Window length in seconds
+        redis: ``redis.asyncio`` client shared by all workers, or ``None`` for a
+            per-worker limit
+        sync_interval: Seconds between flushes to Redis
+        namespace: Redis key prefix
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        period: float = 60.0,
+        redis: Any | None = None,
+        sync_interval: float = 0.05,
+        namespace: str = "ratelimit",
+    ) -> None:
+        if limit <= 0 or period <= 0:
+            raise ValueError("limit and period must be positive")
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+        self.redis = redis
+        self.sync_interval = sync_interval
+        self.namespace = namespace
+        # key -> TAT on the time.monotonic() clock
+        self._tat: dict[str, float] = {}
+        # key -> units admitted here and not yet flushed to Redis
+        self._pending: dict[str, int] = {}
+        self._script = redis.register_script(_GCRA_ADD) if redis is not None else None
+        self._task: asyncio.Task[None] | None = None
+
+    def check(self, key: str, cost: int = 1) -> Decision:
+        """Admit or reject ``cost`` units for ``key``.
+
+        Synchronous and local; the admitted units reach Redis on the next
+        flush.
+        """
+        now = time.monotonic()
+        tat = self._tat.get(key, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + cost * self.interval
+        debt = new_tat - now
+        if debt > self.period:
+            RATE_LIMIT_DECISIONS.inc(1.0, "rejected")
+            remaining = int((self.period - (tat - now)) / self.interval)
+            return Decision(False, remaining, debt - self.period)
+        self._tat[key] = new_tat
+        if self._script is not None:
+            self._pending[key] = self._pending.get(key, 0) + cost
+        RATE_LIMIT_DECISIONS.inc(1.0, "allowed")
+        return Decision(True, int((self.period - debt) / self.interval))
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def sync(self) -> None:
+        """Flush admitted units to Redis and adopt the shared TATs."""
+        if self._script is None or not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        keys = list(batch)
+        interval_ms = self.interval * 1000
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    await self._script(
+                        keys=[self._redis_key(key)], args=[batch[key], interval_ms], client=pipe
+                    )
+                debts = await pipe.execute()
+        except Exception:
+            RATE_LIMIT_SYNC_ERRORS.inc()
+            logger.warning("Rate limit sync failed; limiting per worker", exc_info=True)
+            for key, units in batch.items():
+                self._pending[key] = self._pending.get(key, 0) + units
+            return
+        now = time.monotonic()
+        for key, debt in zip(keys, debts):
+            shared = now + float(debt) / 1000
+            if shared > self._tat.get(key, now):
+                self._tat[key] = shared
+
+    def _prune(self) -> None:
+        # Keys whose TAT has passed are back to a full budget; forget them
+        now = time.monotonic()
+        idle = [key for key, tat in self._tat.items() if tat <= now and key not in self._pending]
+        for key in idle:
+            del self._tat[key]
+
+    async def _run(self) -> None:
+        prune_every = max(1, int(self.period / self.sync_interval))
+        ticks = 0
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+            ticks += 1
+            if ticks % prune_every == 0:
+                self._prune()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.sync()
+
+
+def route_cost(method: str, path: str, costs: Sequence[tuple[str, str, int]] = ROUTE_COSTS) -> int:
+    """Return the rate-limit cost of a request."""
+    segments = path.split("/")
+    for route_method, prefix, cost in costs:
+        if route_method not in ("*", method):
+            continue
+        wanted = prefix.split("/")
+        if len(wanted) <= len(segments) and all(w in ("*", s) for w, s in zip(wanted, segments)):
+            return cost
+    return 1
+
+
+def client_key(scope: Scope) -> str:
+    """Identify the caller by client address; never by a header it chose itself."""
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the process-wide limiter to HTTP requests.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware`` so an allowed request only
+    pays for the check and one header append. Requests pass through
+    unchecked until :func:`init_rate_limiter` has run.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = _limiter
+        if scope["type"] != "http" or limiter is None:
+            await self.app(scope, receive, send)
+            return
+        cost = route_cost(scope["method"], scope["path"])
+        if cost == 0:
+            await self.app(scope, receive, send)
+            return
+        decision = limiter.check(client_key(scope), cost)
+        if not decision.allowed:
+            await _reject(send, limiter.limit, decision)
+            return
+        remaining = str(decision.remaining).encode()
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"ratelimit-remaining", remaining))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+async def _reject(send: Send, limit: int, decision: Decision) -> None:
+    body = b'{"detail":"Rate limit exceeded"}'
+    retry_after = str(max(1, int(decision.retry_after + 0.999))).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", retry_after),
+                (b"ratelimit-limit", str(limit).encode()),
+                (b"ratelimit-remaining", str(decision.remaining).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+_limiter: RateLimiter | None = None
+
+
+def init_rate_limiter(limit: int, redis: Any | None = None) -> RateLimiter:
+    """Create the process-wide limiter (called from the app lifespan)."""
+    global _limiter
+    _limiter = RateLimiter(limit, redis=redis)
+    _limiter.start()
+    return _limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    if _limiter is None:
+        raise RuntimeError("Rate limiter not initialised; call init_rate_limiter() first")
+    return _limiter
+
+
+async def close_rate_limiter() -> None:
+    global _limiter
+    if _limiter is not None:
+        await _limiter.close()
+        _limiter = None
@@ -0,0 +1,253 @@
+"""Stage latency against the NFR-1 budgets, with optional trace export (TR-4).
+
+Wrap each stage of a user interaction in :func:`span`::
+
+    with span("construction"):
+        realization = engine.construct(...)
+
+A span records its duration in the ``stage_latency_seconds`` HDR histogram
+(p50-p99.9 to within 1% at ``GET /metrics``) and counts towards the stage's
+SLO. Stages measured in the browser (page load, TTS start, on-device
+detection) are reported through ``POST /api/telemetry/timings`` and
+recorded with :func:`record`.
+
+A stage's SLO is that ``objective`` of its requests finish within the
+NFR-1 budget. The burn rate over a window is the share of slow or failed
+requests divided by the allowed share ``1 - objective``. At 1 the error
+budget is used up exactly at the end of the period. A 1-hour burn above
+14.4 with a 5-minute burn confirming it is the usual page-now condition.
+Burn rates are exported as ``slo_burn_rate{stage,window}`` and summarised
+at ``GET /metrics/slo``.
+
+When an OTLP endpoint or an Application Insights connection string is
+configured, spans are also exported as OpenTelemetry traces. The SDK and
+exporters are optional dependencies, imported only then.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any
+
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class Stage:
+    """A measured stage and its NFR-1 budget.
+
+    Attributes:
+        name: Stage name (the ``stage`` label)
+        budget: Seconds allowed by NFR-1, or ``None`` for untargeted stages
+        objective: Share of requests that must meet the budget
+        client: Measured in the browser and reported by beacon
+    """
+
+    name: str
+    budget: float | None = None
+    objective: float = 0.99
+    client: bool = False
+
+
+STAGES: dict[str, Stage] = {
+    stage.name: stage
+    for stage in (
+        Stage("page_load", 2.0, client=True),
+        Stage("upload"),
+        Stage("preprocess"),
+        Stage("detection_local", 1.0, client=True),
+        Stage("detection_cloud", 3.0),
+        Stage("suggestion"),
+        Stage("construction", 0.5),
+        # Server share of TTS; the browser reports time to first audio as tts_start
+        Stage("tts", 0.5),
+        Stage("tts_start", 0.5, client=True),
+    )
+}
+
+# (label, minutes); a fast window to page on and a slow one to confirm
+BURN_WINDOWS: tuple[tuple[str, int], ...] = (("5m", 5), ("1h", 60))
+
+STAGE_LATENCY = REGISTRY.hdr_histogram(
+    "stage_latency_seconds", "Latency of each NFR-1 stage", ["stage"], highest=600.0
+)
+STAGE_ERRORS = REGISTRY.counter("stage_errors_total", "Stages that raised", ["stage"])
+SLO_BURN = REGISTRY.gauge(
+    "slo_burn_rate", "Error-budget burn rate against the NFR-1 budget", ["stage", "window"]
+)
+
+
+class SloWindow:
+    """Per-minute good/bad counts for the last hour of one stage."""
+
+    def __init__(self, stage: Stage, minutes: int = 60) -> None:
+        self.stage = stage
+        # [minute, total, bad]
+        self._minutes: deque[list[int]] = deque(maxlen=minutes)
+
+    def add(self, bad: bool, now: float | None = None) -> None:
+        minute = int((time.time() if now is None else now) // 60)
+        if not self._minutes or self._minutes[-1][0] != minute:
+            self._minutes.append([minute, 0, 0])
+        current = self._minutes[-1]
+        current[1] += 1
+        current[2] += bad
+
+    def counts(self, minutes: int, now: float | None = None) -> tuple[int, int]:
+        """(total, bad) over the last ``minutes`` minutes, the current one included."""
+        first = int((time.time() if now is None else now) // 60) - minutes + 1
+        total = bad = 0
+        for minute, minute_total, minute_bad in reversed(self._minutes):
+            if minute < first:
+                break
+            total += minute_total
+            bad += minute_bad
+        return total, bad
+
+    def burn_rate(self, minutes: int, now: float | None = None) -> float:
+        total, bad = self.counts(minutes, now)
+        if not total:
+            return 0.0
+        return (bad / total) / (1 - self.stage.objective)
+
+
+_windows: dict[str, SloWindow] = {
+    name: SloWindow(stage) for name, stage in STAGES.items() if stage.budget is not None
+}
+
+
+def record(stage: str, seconds: float, failed: bool = False) -> None:
+    """Record one completed stage."""
+    STAGE_LATENCY.observe(seconds, stage)
+    if failed:
+        STAGE_ERRORS.inc(1.0, stage)
+    window = _windows.get(stage)
+    if window is not None:
+        window.add(failed or seconds > window.stage.budget)  # type: ignore[operator]
+
+
+# OpenTelemetry tracer once init_telemetry() configured an exporter
+_tracer: Any = None
+
+
+class span:  # noqa: N801 - used like a function: ``with span("tts"):``
+    """Time a block as ``stage``; also an OpenTelemetry span when exporting.
+
+    Args:
+        stage: Stage name, usually a key of :data:`STAGES`
+        attributes: Span attributes (exported traces only)
+    """
+
+    __slots__ = ("stage", "attributes", "_start", "_otel")
+
+    def __init__(self, stage: str, **attributes: Any) -> None:
+        self.stage = stage
+        self.attributes = attributes
+        self._otel: Any = None
+
+    def __enter__(self) -> span:
+        if _tracer is not None:
+            self._otel = _tracer.start_as_current_span(self.stage, attributes=self.attributes)
+            self._otel.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        record(self.stage, time.perf_counter() - self._start, exc_type is not None)
+        if self._otel is not None:
+            self._otel.__exit__(exc_type, exc, traceback)
+
+
+def _refresh_burn_rates() -> None:
+    now = time.time()
+    for name, window in _windows.items():
+        for label, minutes in BURN_WINDOWS:
+            SLO_BURN.set(window.burn_rate(minutes, now), name, label)
+
+
+REGISTRY.add_collector(_refresh_burn_rates)
+
+
+def slo_report() -> dict[str, dict[str, float | None]]:
+    """Per-stage latency quantiles, budget compliance and burn rates."""
+    now = time.time()
+    report: dict[str, dict[str, float | None]] = {}
+    for name, stage in STAGES.items():
+        p50, p95, p99 = STAGE_LATENCY.quantiles((0.5, 0.95, 0.99), name)
+        row: dict[str, float | None] = {
+            "budget": stage.budget,
+            "objective": stage.objective if stage.budget is not None else None,
+            "count": STAGE_LATENCY.count(name),
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+        }
+        window = _windows.get(name)
+        if window is not None:
+            total, bad = window.counts(60, now)
+            row["within_budget_1h"] = (total - bad) / total if total else None
+            for label, minutes in BURN_WINDOWS:
+                row[f"burn_{label}"] = window.burn_rate(minutes, now)
+        report[name] = row
+    return report
+
+
+_provider: Any = None
+
+
+def init_telemetry(
+    otlp_endpoint: str | None = None,
+    appinsights_connection_string: str | None = None,
+    service_name: str = "speakout-api",
+) -> None:
+    """Export spans as traces when an OTLP endpoint or App Insights is configured.
+
+    Raises:
+        ImportError: An exporter is configured but its package is missing
+    """
+    global _tracer, _provider
+    if not otlp_endpoint and not appinsights_connection_string:
+        return
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    if otlp_endpoint:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
+    if appinsights_connection_string:
+        from azure.monitor.opentelemetry.exporter import AzureMonitorTraceExporter
+
+        provider.add_span_processor(
+            BatchSpanProcessor(
+                AzureMonitorTraceExporter(connection_string=appinsights_connection_string)
+            )
+        )
+    _provider = provider
+    _tracer = provider.get_tracer("app")
+    logger.info(
+        "Exporting traces (otlp=%s, appinsights=%s)",
+        bool(otlp_endpoint),
+        bool(appinsights_connection_string),
+    )
+
+
+def close_telemetry() -> None:
+    """Flush and stop trace export."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
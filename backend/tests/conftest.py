@@ -0,0 +1,72 @@
+"""Shared fixtures.
+
+Unit tests need nothing running. Tests that take ``database`` run against
+the PostgreSQL at ``DATABASE_URL`` (migrated to head on first use) and are
+skipped when it cannot be reached; Redis is always ``fakeredis``.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import AsyncIterator
+
+import pytest
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.exc import OperationalError
+
+from app.config import Settings, get_settings
+from app.database import Database
+from app.models import User
+
+
+@pytest.fixture(scope="session")
+def database_url() -> str:
+    """``DATABASE_URL`` migrated to head, or skip the test."""
+    url = get_settings().database_url
+    engine = create_engine(url, connect_args={"connect_timeout": 3})
+    try:
+        with engine.connect():
+            pass
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable at DATABASE_URL")
+    finally:
+        engine.dispose()
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    command.upgrade(config, "head")
+    return url
+
+
+@pytest.fixture
+async def database(database_url: str) -> AsyncIterator[Database]:
+    db = Database(Settings(database_url=database_url, db_statement_cache_size=0))
+    yield db
+    await db.dispose()
+
+
+@pytest.fixture
+async def user_id(database: Database) -> AsyncIterator[int]:
+    """A fresh user, deleted (with everything it owns) afterwards."""
+    async with database.session() as session:
+        new_id = await session.scalar(
+            insert(User)
+            .values(email=f"{uuid.uuid4().hex}@test.invalid", hashed_password="x")
+            .returning(User.id)
+        )
+    yield new_id
+    async with database.session() as session:
+        await session.execute(delete(User).where(User.id == new_id))
+
+
+@pytest.fixture
+async def redis() -> AsyncIterator[object]:
+    import fakeredis
+
+    client = fakeredis.FakeAsyncRedis()
+    yield client
+    await client.flushall()
+    await client.aclose()
@@ -0,0 +1,91 @@
+"""Caregiver analytics (TODO 3.3)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as upsert
+
+from app.database import Database
+from app.models import ConstructedSentence, ObjectLibrary, UsageDailyItem, VerbLibrary
+from app.services.analytics_service import Window, timeline, top_items
+
+
+async def test_timeline_pages_through_shared_timestamps(database: Database, user_id: int) -> None:
+    stamp = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+    async with database.session() as session:
+        for minutes, n in ((0, 3), (-1, 2)):
+            await session.execute(
+                insert(ConstructedSentence),
+                [
+                    {
+                        "user_id": user_id,
+                        "sentence_text": f"{minutes}:{i}",
+                        "created_at": stamp + timedelta(minutes=minutes),
+                    }
+                    for i in range(n)
+                ],
+            )
+    seen: list[int] = []
+    before = before_id = None
+    async with database.session(read_only=True) as session:
+        while True:
+            page = await timeline(session, user_id, before, 2, before_id)
+            seen.extend(row.id for row in page)
+            if len(page) < 2:
+                break
+            before, before_id = page[-1].created_at, page[-1].id
+        # created_at alone still works, strictly before it
+        older = await timeline(session, user_id, stamp, 10)
+    assert len(seen) == len(set(seen)) == 5
+    assert len(older) == 2
+
+
+def test_windows_cover_whole_local_days() -> None:
+    tz = ZoneInfo("America/New_York")
+    window = Window.last_days(7, tz, datetime(2025, 3, 9, 15, tzinfo=timezone.utc))
+    assert (window.first_day.isoformat(), window.last_day.isoformat()) == (
+        "2025-03-03",
+        "2025-03-09",
+    )
+    with pytest.raises(ValueError):
+        Window.last_days(0, tz, datetime.now(timezone.utc))
+
+
+async def test_top_items_skip_deleted_objects(database: Database, user_id: int) -> None:
+    now = datetime.now(timezone.utc)
+    async with database.session() as session:
+        await session.execute(upsert(VerbLibrary).values(verb_text="want").on_conflict_do_nothing())
+        verb_id = await session.scalar(
+            select(VerbLibrary.id).where(VerbLibrary.verb_text == "want")
+        )
+        kept = await session.scalar(
+            insert(ObjectLibrary)
+            .values(name="quilt", category="food", user_id=user_id)
+            .returning(ObjectLibrary.id)
+        )
+        gone = await session.scalar(
+            insert(ObjectLibrary)
+            .values(name="kite", category="food", user_id=user_id)
+            .returning(ObjectLibrary.id)
+        )
+        await session.execute(
+            insert(UsageDailyItem),
+            [
+                {"user_id": user_id, "day": now.date(), "dimension": dimension, **counts}
+                for dimension, counts in (
+                    ("object", {"item_id": gone, "uses": 9, "spoken": 9}),
+                    ("object", {"item_id": kept, "uses": 2, "spoken": 1}),
+                    ("verb", {"item_id": verb_id, "uses": 4, "spoken": 4}),
+                )
+            ],
+        )
+        await session.execute(delete(ObjectLibrary).where(ObjectLibrary.id == gone))
+    window = Window.last_days(7, ZoneInfo("UTC"), now)
+    async with database.session(read_only=True) as session:
+        items = await top_items(session, user_id, window, 1)
+    assert [(r.id, r.name, r.uses) for r in items["object"]] == [(kept, "quilt", 2)]
+    assert [(r.name, r.spoken) for r in items["verb"]] == [("want", 4)]
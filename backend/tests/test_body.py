@@ -0,0 +1,79 @@
+"""Bounded request body reading."""
+
+from __future__ import annotations
+
+import gzip
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.utils.body import read_body
+
+CHUNK = 1024
+
+
+def _request(body: bytes, headers: dict[str, str]) -> tuple[Request, list[int]]:
+    """A request streaming ``body`` in CHUNK pieces, and the count of pieces read."""
+    pieces = [body[start:][:CHUNK] for start in range(0, len(body), CHUNK)] or [b""]
+    sent = [0]
+
+    async def receive() -> dict:
+        i = sent[0]
+        sent[0] += 1
+        return {"type": "http.request", "body": pieces[i], "more_body": i + 1 < len(pieces)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    return Request(scope, receive), sent
+
+
+async def test_reads_plain_and_gzipped_bodies() -> None:
+    body = b"x" * 5000
+    request, _sent = _request(body, {})
+    assert await read_body(request, 5000) == body
+    request, _sent = _request(gzip.compress(body), {"Content-Encoding": "gzip"})
+    assert await read_body(request, 5000) == body
+
+
+async def test_declared_length_over_the_limit_is_not_read() -> None:
+    request, sent = _request(b"x" * 10 * CHUNK, {"Content-Length": str(10 * CHUNK)})
+    with pytest.raises(HTTPException) as raised:
+        await read_body(request, 4 * CHUNK, "Update too large")
+    assert (raised.value.status_code, raised.value.detail) == (413, "Update too large")
+    assert sent[0] == 0
+
+
+@pytest.mark.parametrize(
+    "body, headers",
+    [
+        # Undeclared length: stops one chunk past the limit
+        (b"x" * 100 * CHUNK, {}),
+        # A small gzip body that inflates far past the limit
+        (gzip.compress(b"\0" * 100 * CHUNK), {"Content-Encoding": "gzip"}),
+    ],
+)
+async def test_stops_reading_past_the_limit(body: bytes, headers: dict[str, str]) -> None:
+    request, sent = _request(body, headers)
+    with pytest.raises(HTTPException) as raised:
+        await read_body(request, 4 * CHUNK)
+    assert raised.value.status_code == 413
+    assert sent[0] <= 5
+
+
+@pytest.mark.parametrize(
+    "body, headers, code",
+    [
+        (b"not gzip", {"Content-Encoding": "gzip"}, 400),
+        (gzip.compress(b"x" * 5000)[:-20], {"Content-Encoding": "gzip"}, 400),
+        (b"{}", {"Content-Encoding": "br"}, 415),
+    ],
+)
+async def test_rejects_bad_encodings(body: bytes, headers: dict[str, str], code: int) -> None:
+    request, _sent = _request(body, headers)
+    with pytest.raises(HTTPException) as raised:
+        await read_body(request, 10_000)
+    assert raised.value.status_code == code
@@ -0,0 +1,92 @@
+"""Tiered response cache (worker LRU + Redis)."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.utils import cache as cache_module
+from app.utils.cache import LRUCache, TieredCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+class Loader:
+    """Counts calls and returns ``b"v<call>"``."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f"v{self.calls}".encode()
+
+
+def test_lru_evicts_the_least_recently_used() -> None:
+    lru: LRUCache[str, int] = LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert "b" not in lru and lru.get("a") == 1 and lru.get("c") == 3
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+async def test_concurrent_misses_share_one_load() -> None:
+    cache = TieredCache()
+    loader = Loader(delay=0.01)
+    values = await asyncio.gather(*(cache.get_or_load("t", "k", loader) for _ in range(5)))
+    assert values == [b"v1"] * 5 and loader.calls == 1
+
+
+async def test_stale_values_are_served_while_one_refresh_runs(clock: Clock) -> None:
+    cache = TieredCache()
+    loader = Loader()
+    assert await cache.get_or_load("t", "k", loader, ttl=10, stale_ttl=60) == b"v1"
+    clock.now += 20
+    assert await cache.get_or_load("t", "k", loader, ttl=10, stale_ttl=60) == b"v1"
+    assert await cache.get_or_load("t", "k", loader, ttl=10, stale_ttl=60) == b"v1"
+    await asyncio.gather(*cache._refreshing)
+    assert loader.calls == 2
+    assert await cache.get_or_load("t", "k", loader, ttl=10, stale_ttl=60) == b"v2"
+    # Past the stale window the caller waits for a fresh load
+    clock.now += 100
+    assert await cache.get_or_load("t", "k", loader, ttl=10, stale_ttl=60) == b"v3"
+
+
+async def test_workers_share_the_redis_tier_and_invalidations(redis) -> None:
+    first, second = TieredCache(redis), TieredCache(redis)
+    dropped: list[list[str]] = []
+    second.add_listener(lambda tags: dropped.append(list(tags)))
+    await second.start()
+    try:
+        loader = Loader()
+        assert await first.get_or_load("t", "k", loader, tags=["verbs"]) == b"v1"
+        assert await second.get_or_load("t", "k", loader, tags=["verbs"]) == b"v1"
+        assert loader.calls == 1
+        await first.invalidate("verbs")
+        for _ in range(100):
+            if dropped:
+                break
+            await asyncio.sleep(0.01)
+        assert dropped == [["verbs"]] and "k" not in second.local
+        assert await second.get_or_load("t", "k", loader, tags=["verbs"]) == b"v2"
+    finally:
+        await second.close()
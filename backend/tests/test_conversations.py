@@ -0,0 +1,62 @@
+"""Family Communication Bridge rooms."""
+
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import delete, insert
+
+from app.database import Database
+from app.models import User
+from app.services.conversations import (
+    ROOM_MESSAGE,
+    add_member,
+    member_role,
+    post_message,
+    remove_member,
+    room_channel,
+    rooms_for,
+)
+from app.services.events import EventHub
+
+
+async def test_membership_roles(database: Database, user_id: int) -> None:
+    async with database.session() as session:
+        member = await session.scalar(
+            insert(User)
+            .values(email=f"{uuid.uuid4().hex}@test.invalid", hashed_password="x")
+            .returning(User.id)
+        )
+    try:
+        async with database.session() as session:
+            assert await member_role(session, user_id, user_id) == "owner"
+            assert await member_role(session, user_id, member) is None
+            await add_member(session, user_id, member, "family")
+            changed = await add_member(session, user_id, member, "therapist")
+            assert changed.role == "therapist"
+        async with database.session() as session:
+            assert await rooms_for(session, member) == [(member, "owner"), (user_id, "therapist")]
+            assert await remove_member(session, user_id, member)
+            assert not await remove_member(session, user_id, member)
+            assert await member_role(session, user_id, member) is None
+    finally:
+        async with database.session() as session:
+            await session.execute(delete(User).where(User.id == member))
+
+
+async def test_late_joiners_get_messages_but_not_typing() -> None:
+    hub = EventHub()
+    channel = room_channel(7)
+    async with hub.subscribe(channel) as live:
+        await post_message(hub, 7, 7, "owner", "sentence", "I want juice.")
+        for text in ("I", "I'm coming"):
+            await post_message(hub, 7, 8, "family", "typing", text)
+        await post_message(hub, 7, 8, "family", "message", "On my way")
+        batch = await live.get_batch(0.1)
+    # The typing indicator coalesced to its latest state
+    assert [(e.type, e.data["text"]) for e in batch] == [
+        (ROOM_MESSAGE, "I want juice."),
+        ("room.typing", "I'm coming"),
+        (ROOM_MESSAGE, "On my way"),
+    ]
+    assert [e.data["text"] for e in hub.replay(channel)] == ["I want juice.", "On my way"]
@@ -0,0 +1,56 @@
+"""Pooled engines, per-request sessions and replica routing."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import func, insert, select, text
+
+from app.config import Settings
+from app.database import Database, async_url
+from app.models import User
+
+APPLICATION = text("SELECT current_setting('application_name')")
+
+
+def test_async_url_converts_driver_and_sslmode() -> None:
+    url = async_url("postgresql+psycopg2://app:pw@db:5432/aac?sslmode=require")
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {"ssl": "require"}
+    assert (url.host, url.database) == ("db", "aac")
+
+
+@pytest.fixture
+async def routed(database_url: str):
+    # The same server twice; application_name tells the engines apart
+    db = Database(
+        Settings(
+            database_url=database_url,
+            database_replica_url=database_url,
+            db_statement_cache_size=0,
+        )
+    )
+    yield db
+    await db.dispose()
+
+
+async def test_read_only_sessions_read_from_the_replica_until_they_write(routed: Database) -> None:
+    async with routed.session(read_only=True) as session:
+        assert await session.scalar(APPLICATION) == "speakout-replica"
+        await session.execute(
+            insert(User).values(email="routing@test.invalid", hashed_password="x")
+        )
+        # Read your own writes from the primary
+        assert await session.scalar(APPLICATION) == "speakout-primary"
+        await session.rollback()
+    async with routed.session() as session:
+        assert await session.scalar(APPLICATION) == "speakout-primary"
+
+
+async def test_sessions_commit_on_success_and_roll_back_on_error(database: Database) -> None:
+    email = "rollback@test.invalid"
+    with pytest.raises(RuntimeError):
+        async with database.session() as session:
+            await session.execute(insert(User).values(email=email, hashed_password="x"))
+            raise RuntimeError("handler failed")
+    async with database.session() as session:
+        assert await session.scalar(select(func.count()).where(User.email == email)) == 0
@@ -0,0 +1,80 @@
+"""Event hub replay and delivery (FR-2, NFR-1)."""
+
+from __future__ import annotations
+
+import asyncio
+
+from app.services.events import Event, EventHub, Subscription
+
+CHANNEL = "user:1"
+
+
+def _event(event_id: int) -> Event:
+    return Event(event_id, CHANNEL, "export.progress", {"n": event_id})
+
+
+def test_replay_follows_delivery_order_not_ids() -> None:
+    hub = EventHub()
+    # The second worker's clock is behind the first's
+    for event_id in (100, 300, 200, 250):
+        hub._deliver(_event(event_id))
+    assert [e.id for e in hub.replay(CHANNEL, after=300)] == [200, 250]
+    assert [e.id for e in hub.replay(CHANNEL, after=0)] == [100, 300, 200, 250]
+    # Resume point no longer buffered: everything newer by id
+    assert [e.id for e in hub.replay(CHANNEL, after=220)] == [300, 250]
+
+
+async def test_stream_keeps_events_with_older_ids_after_the_backlog() -> None:
+    hub = EventHub()
+    hub._deliver(_event(200))
+    stream = hub.sse(CHANNEL, history=True)
+    assert (await anext(stream)).startswith(b"retry:")
+    # Queued while the backlog is read, so it arrives twice; sent once
+    hub._deliver(_event(300))
+    backlog = await anext(stream)
+    assert b"id: 200\n" in backlog and b"id: 300\n" in backlog
+    hub._deliver(_event(150))
+    assert (await anext(stream)).startswith(b"id: 150\n")
+    hub._deliver(_event(120))
+    assert (await anext(stream)).startswith(b"id: 120\n")
+    await stream.aclose()
+
+
+async def test_slow_subscribers_coalesce_keyed_events_and_drop_the_oldest() -> None:
+    subscription = Subscription(CHANNEL, size=3)
+    for event_id in (1, 2):
+        subscription.put(Event(event_id, CHANNEL, "export.progress", {"n": event_id}, key="job"))
+    for event_id in (3, 4, 5):
+        subscription.put(_event(event_id))
+    batch = await subscription.get_batch(0.1)
+    assert [e.id for e in batch] == [3, 4, 5]
+    subscription.put(_event(6))
+    subscription.put(Event(7, CHANNEL, "export.progress", {}, key="job"))
+    assert [e.id for e in await subscription.get_batch(0.1)] == [6, 7]
+    assert await subscription.get_batch(0.01) == []
+
+
+async def test_events_reach_subscribers_on_every_worker(redis) -> None:
+    first, second = EventHub(redis), EventHub(redis)
+    await first.start()
+    await second.start()
+    try:
+        async with second.subscribe(CHANNEL, tag="tablet") as subscription:
+            await asyncio.sleep(0.05)
+            sent = await first.publish(CHANNEL, "export.progress", {"rows": 10})
+            (received,) = await subscription.get_batch(1.0)
+            assert received == sent
+            await asyncio.sleep(0.05)
+            assert [e.id for e in first.replay(CHANNEL)] == [sent.id]
+            await first.disconnect(CHANNEL, "tablet")
+            assert await subscription.get_batch(1.0) == []
+            assert subscription.closed
+    finally:
+        await first.close()
+        await second.close()
+
+
+def test_events_survive_the_wire() -> None:
+    event = Event(5, CHANNEL, "export.progress", {"rows": 10}, key="k", replay=False)
+    assert Event.decode(event.encode()) == event
+    assert event.sse() == b'id: 5\nevent: export.progress\ndata: {"rows":10}\n\n'
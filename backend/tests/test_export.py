@@ -0,0 +1,119 @@
+"""Streamed CSV/JSON exports (TODO 2.4, 5.5)."""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+from starlette.requests import ClientDisconnect
+
+from app.database import Database
+from app.models import ConstructedSentence
+from app.routers import export
+from app.services import export_service
+from app.services.export_service import (
+    ExportBusyError,
+    StreamLimiter,
+    csv_chunks,
+    dataset_columns,
+    dataset_query,
+    json_chunks,
+    stream_rows,
+)
+from app.utils.pdf import MARGIN, PAGE_HEIGHT, PdfWriter
+
+STAMP = datetime(2025, 3, 1, 8, 0, tzinfo=timezone.utc)
+
+
+async def _rows(rows):
+    for row in rows:
+        yield row
+
+
+async def _collect(chunks) -> list[bytes]:
+    return [chunk async for chunk in chunks]
+
+
+async def test_csv_escapes_formulas_and_formats_dates() -> None:
+    body = b"".join(await _collect(csv_chunks(_rows([(STAMP, "=SUM(A1)"), (STAMP, "hi")]), "ab")))
+    assert list(csv.reader(io.StringIO(body.decode()))) == [
+        ["a", "b"],
+        [STAMP.isoformat(), "'=SUM(A1)"],
+        [STAMP.isoformat(), "hi"],
+    ]
+
+
+@pytest.mark.parametrize("lines", [False, True])
+async def test_json_is_valid_across_chunks(monkeypatch: pytest.MonkeyPatch, lines: bool) -> None:
+    monkeypatch.setattr(export_service, "CHUNK_BYTES", 64)
+    rows = [(STAMP + timedelta(minutes=i), f"sentence {i}") for i in range(20)]
+    chunks = await _collect(json_chunks(_rows(rows), ("created_at", "text"), lines=lines))
+    assert len(chunks) > 2
+    body = b"".join(chunks).decode()
+    records = [json.loads(line) for line in body.splitlines()] if lines else json.loads(body)
+    assert [r["text"] for r in records] == [f"sentence {i}" for i in range(20)]
+    assert records[0]["created_at"] == STAMP.isoformat()
+    empty = b"".join(await _collect(json_chunks(_rows([]), ("a",), lines=lines)))
+    assert empty == (b"" if lines else b"[]\n")
+
+
+def test_stream_limiter_rejects_when_every_slot_is_reserved() -> None:
+    limiter = StreamLimiter(slots=2)
+    limiter.reserve()
+    limiter.reserve()
+    with pytest.raises(ExportBusyError):
+        limiter.reserve()
+    limiter.release()
+    limiter.reserve()
+
+
+async def test_slot_is_released_when_the_client_leaves_before_the_body(monkeypatch) -> None:
+    limiter = StreamLimiter(slots=1)
+    monkeypatch.setattr(export, "STREAMS", limiter)
+    started = []
+
+    async def body():
+        started.append(True)
+        yield b"a"
+
+    response = export._stream(body(), "text/csv", "x.csv")
+    with pytest.raises(HTTPException) as busy:
+        export._stream(body(), "text/csv", "x.csv")
+    assert busy.value.status_code == 503
+
+    async def send(message: dict) -> None:
+        raise OSError("Connection reset")
+
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(ClientDisconnect):
+        await response(scope, None, send)
+    assert not started and limiter.in_use == 0
+
+
+def test_pdf_lines_after_a_long_gap_start_a_fresh_page() -> None:
+    writer = PdfWriter(io.BytesIO())
+    writer.space(PAGE_HEIGHT)
+    writer.line("After the gap")
+    assert writer.page_count == 1
+    assert MARGIN <= writer._y <= PAGE_HEIGHT - MARGIN
+    writer.close()
+
+
+async def test_streams_one_users_rows_in_order(database: Database, user_id: int) -> None:
+    async with database.session() as session:
+        await session.execute(
+            insert(ConstructedSentence),
+            [
+                {"user_id": user_id, "sentence_text": f"s{i}", "created_at": STAMP - timedelta(i)}
+                for i in range(5)
+            ],
+        )
+    query = dataset_query("sentences", user_id, since=STAMP - timedelta(3))
+    rows = await _collect(stream_rows(database, query))
+    columns = dataset_columns("sentences")
+    assert [row[columns.index("sentence_text")] for row in rows] == ["s3", "s2", "s1", "s0"]
@@ -0,0 +1,94 @@
+"""Known-person face matching (TODO 3.3)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import insert
+
+from app.database import Database
+from app.models import FaceEmbedding, Person
+from app.services.embeddings import Gallery, IvfIndex, normalize, vector_bytes
+from app.services.face_service import FaceIndex
+
+DIM = 32
+
+
+class StubEmbedder:
+    """Names an embedding space; these tests pass vectors, never images."""
+
+    name = "test-faces"
+    dim = DIM
+
+    def embed(self, images):
+        raise AssertionError("not used")
+
+
+def _vectors(count: int, seed: int = 0) -> np.ndarray:
+    return normalize(np.random.default_rng(seed).normal(size=(count, DIM)))
+
+
+def test_gallery_matches_best_label_and_zeroes_removed_rows() -> None:
+    vectors = _vectors(6)
+    gallery = Gallery(DIM)
+    gallery.add(range(6), [1, 1, 2, 2, 3, 3], vectors)
+    assert gallery.match(vectors[[2]], 0.99, limit=3)[0][0][0] == 2
+    assert gallery.match(vectors[[2]], 0.0, limit=3)[0][0] == (2, 1.0)
+    assert gallery.remove_labels([2]) == 2
+    assert gallery.size == 4 and not gallery.vectors[4:6].any()
+    assert all(label != 2 for label, _ in gallery.match(vectors[[2]], -1.0, limit=3)[0])
+    gallery.clear()
+    assert gallery.size == 0 and not gallery.vectors.any()
+
+
+def test_ivf_finds_what_exhaustive_search_finds() -> None:
+    rng = np.random.default_rng(1)
+    centres = _vectors(40, seed=2)
+    vectors = normalize(centres[rng.integers(0, 40, 4000)] + rng.normal(0, 0.1, (4000, DIM)))
+    index = IvfIndex(vectors)
+    queries = normalize(vectors[:200] + rng.normal(0, 0.02, (200, DIM)))
+    found = 0
+    for row, query in enumerate(queries):
+        rows, scores = index.search(query)
+        found += rows[np.argmax(scores)] == np.argmax(vectors @ query) == row
+    assert found >= 0.95 * len(queries)
+    index.clear()
+    assert not index.vectors.any()
+
+
+async def test_matches_enrolled_people_and_forgets_withdrawn_ones(
+    database: Database, user_id: int
+) -> None:
+    vectors = _vectors(4, seed=3)
+    async with database.session() as session:
+        people = []
+        for name in ("Ana", "Ben"):
+            people.append(
+                await session.scalar(
+                    insert(Person)
+                    .values(user_id=user_id, name=name, consent_at=datetime.now(timezone.utc))
+                    .returning(Person.id)
+                )
+            )
+        await session.execute(
+            insert(FaceEmbedding),
+            [
+                {
+                    "person_id": people[i // 2],
+                    "user_id": user_id,
+                    "model": StubEmbedder.name,
+                    "dim": DIM,
+                    "vector": vector_bytes(vectors[i]),
+                }
+                for i in range(4)
+            ],
+        )
+    index = FaceIndex(StubEmbedder(), threshold=0.9)
+    async with database.session(read_only=True) as session:
+        matches = await index.search(session, user_id, vectors[[1, 2]])
+        assert [match[0][0] for match in matches] == people
+        index.forget(user_id, [people[0]])
+        assert await index.search(session, user_id, vectors[[1]]) == [[]]
+        # Another user's gallery is empty
+        assert await index.search(session, user_id + 10_000, vectors[[1]]) == [[]]
@@ -0,0 +1,98 @@
+"""Federated aggregation of ranker updates."""
+
+from __future__ import annotations
+
+import math
+
+import pytest
+from sqlalchemy import delete
+
+from app.database import Database
+from app.models import FederatedModel
+from app.services.federated_service import (
+    RANKERS,
+    FederatedAggregator,
+    MemoryAccumulator,
+    RedisAccumulator,
+    UpdateConflictError,
+    aggregate,
+    clip_update,
+    decode_diff,
+    encode_diff,
+    parse_update,
+)
+from app.services.jobs import JobRunner, MemoryBroker
+from app.simulation.federated import simulate_federated
+
+
+def test_diff_round_trip() -> None:
+    entries = {(7, 2): (0.5, 3.0), (7, 9): (-1.25, 0.0), (1 << 31, 0): (2.0, 1.0)}
+    payload = encode_diff(3, 4, 2, entries)
+    diff = decode_diff(payload)
+    assert (diff.base_version, diff.version, diff.channels) == (3, 4, 2)
+    assert diff.entries == entries
+    assert decode_diff(encode_diff(0, 1, 1, {})).entries == {}
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00" * 32])
+def test_decode_rejects_garbage(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        decode_diff(data)
+
+
+def test_decode_rejects_a_truncated_body() -> None:
+    payload = encode_diff(0, 1, 1, {(1, 1): (1.0,), (2, 1): (2.0,)})
+    with pytest.raises(ValueError):
+        decode_diff(payload[:-3])
+
+
+def test_parse_and_clip_update() -> None:
+    entries = parse_update("qlearning", [[1, 2, 3.0], [1, 3, 4.0]])
+    assert entries == {(1, 2): (3.0,), (1, 3): (4.0,)}
+    clipped, scaled = clip_update(entries, 1.0)
+    assert scaled
+    assert math.hypot(*(v for values in clipped.values() for v in values)) == pytest.approx(1.0)
+    for rows in ([[1, 2]], [[1, 2, math.nan]], [[1.5, 2, 1.0]], [[1, 2, 1.0], [1, 2, 2.0]]):
+        with pytest.raises(ValueError):
+            parse_update("qlearning", rows)
+
+
+async def test_rounds_sum_weighted_updates_once_per_contributor(redis) -> None:
+    for accumulator in (MemoryAccumulator(), RedisAccumulator(redis)):
+        assert await accumulator.add("qlearning", "a", 2.0, {(1, 1): (1.0,)}) == 1
+        assert await accumulator.add("qlearning", "a", 2.0, {(1, 1): (1.0,)}) == 0
+        assert await accumulator.add("qlearning", "b", 1.0, {(1, 1): (4.0,), (2, 1): (1.0,)}) == 2
+        assert await accumulator.take("qlearning", 3) is None
+        round_sum = await accumulator.take("qlearning", 2)
+        assert (round_sum.updates, round_sum.weight) == (2, 3.0)
+        changed = aggregate({}, round_sum, RANKERS["qlearning"])
+        assert changed[1, 1] == pytest.approx((2.0,))
+        assert (await accumulator.pending("qlearning")).updates == 0
+
+
+async def test_one_update_per_user_per_round(database: Database) -> None:
+    aggregator = FederatedAggregator(
+        database, MemoryAccumulator(), JobRunner(MemoryBroker()), min_updates=1
+    )
+    ranker = "bandit"
+    try:
+        base = (await aggregator.model(ranker)).version
+        _version, updates = await aggregator.submit(ranker, 5, base, 10, [[1, 1, 1.0, 1.0]])
+        assert updates == 1
+        # Any number of devices of one user count once
+        with pytest.raises(UpdateConflictError):
+            await aggregator.submit(ranker, 5, base, 10, [[1, 1, 1.0, 1.0]])
+        _version, updates = await aggregator.submit(ranker, 6, base, 10, [[1, 1, 0.0, 1.0]])
+        assert updates == 2
+        assert await aggregator.publish(ranker) == base + 1
+        model = await aggregator.model(ranker)
+        assert model.table[1, 1] == pytest.approx((0.5, 1.0))
+    finally:
+        async with database.session() as session:
+            await session.execute(delete(FederatedModel).where(FederatedModel.ranker == ranker))
+
+
+def test_simulated_devices_improve_cold_start_hits() -> None:
+    report = simulate_federated(devices=300, rounds=15, cohort=40, seed=1)
+    assert report.rounds == 15 and report.updates + report.dropped == 15 * 40
+    assert report.final_hit_rate > report.initial_hit_rate + 0.3
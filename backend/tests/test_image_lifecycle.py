@@ -0,0 +1,81 @@
+"""24-hour image deletion (NFR-5, TODO 1.6)."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+from app.database import Database
+from app.models import UploadedImage
+from app.services.blob_store import FilesystemBlobStore
+from app.services.image_lifecycle import (
+    RETRY_BASE,
+    RETRY_MAX,
+    ImageExpiryScheduler,
+    register_image,
+    retry_delay,
+)
+
+
+class FlakyBlobStore(FilesystemBlobStore):
+    """Filesystem store whose deletes of ``stuck`` blobs always fail."""
+
+    def __init__(self, root) -> None:
+        super().__init__(root)
+        self.stuck: set[str] = set()
+
+    async def delete_many(self, names: Sequence[str]) -> list[str]:
+        failed = [name for name in names if name in self.stuck]
+        await super().delete_many([name for name in names if name not in self.stuck])
+        return failed
+
+
+def test_retry_delay_doubles_up_to_the_cap() -> None:
+    assert retry_delay(1) == RETRY_BASE
+    assert retry_delay(3) == 4 * RETRY_BASE
+    assert retry_delay(1000) == RETRY_MAX
+
+
+async def test_failing_blobs_back_off_behind_newer_expirations(
+    database: Database, user_id: int, tmp_path
+) -> None:
+    store = FlakyBlobStore(tmp_path)
+    async with database.session() as session:
+        stuck = await register_image(
+            session, store, user_id, b"old", "image/png", retention=timedelta(hours=-3)
+        )
+        newer = [
+            await register_image(
+                session, store, user_id, b"new", "image/png", retention=timedelta(hours=-1)
+            )
+            for _ in range(2)
+        ]
+    store.stuck.add(stuck.blob_name)
+    scheduler = ImageExpiryScheduler(database, store, batch_size=1)
+    try:
+        now = datetime.now(timezone.utc)
+        # The stuck row heads the expiry order but does not block the rest
+        assert await scheduler.run_once(now) == 2
+        for image in newer:
+            assert await store.get(image.blob_name) is None
+        assert await scheduler.report_backlog(now) == (1, (now - stuck.expires_at).total_seconds())
+        async with database.session() as session:
+            attempts, retry_at = (
+                await session.execute(
+                    select(UploadedImage.delete_attempts, UploadedImage.retry_at).where(
+                        UploadedImage.id == stuck.id
+                    )
+                )
+            ).one()
+        assert (attempts, retry_at) == (1, now + RETRY_BASE)
+        # Not retried until the backoff has passed, then retried and backed off further
+        assert await scheduler.run_once(now) == 0
+        store.stuck.clear()
+        assert await scheduler.run_once(now + RETRY_BASE / 2) == 0
+        assert await scheduler.run_once(now + RETRY_BASE) == 1
+        assert await scheduler.report_backlog(now + RETRY_BASE) == (0, 0.0)
+    finally:
+        async with database.session() as session:
+            await session.execute(delete(UploadedImage).where(UploadedImage.user_id == user_id))
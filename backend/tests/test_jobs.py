@@ -0,0 +1,102 @@
+"""Background jobs (TODO 3.1)."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.services import jobs
+from app.services.jobs import Job, JobRunner, JobType, MemoryBroker, Priority, RedisBroker
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(jobs.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "redis"])
+def broker(request: pytest.FixtureRequest, redis, clock: Clock):
+    return MemoryBroker() if request.param == "memory" else RedisBroker(redis)
+
+
+def _job(job_id: str, priority: Priority = Priority.NORMAL, key: str | None = None) -> Job:
+    return Job(job_id, "report", {"n": job_id}, priority, idempotency_key=key)
+
+
+async def test_claims_by_priority_then_age(broker, clock: Clock) -> None:
+    for job_id, priority in (("a", Priority.LOW), ("b", Priority.NORMAL), ("c", Priority.HIGH)):
+        await broker.enqueue(_job(job_id, priority))
+        clock.now += 1
+    await broker.enqueue(_job("d", Priority.HIGH))
+    claimed = [(await broker.claim("report", 60)).id for _ in range(4)]
+    assert claimed == ["c", "d", "b", "a"]
+    assert await broker.claim("report", 60) is None
+    assert await broker.claim("export", 60) is None
+
+
+async def test_idempotency_key_returns_the_first_job(broker) -> None:
+    first = await broker.enqueue(_job("a", key="upload:1"))
+    again = await broker.enqueue(_job("b", key="upload:1"))
+    assert (first.id, again.id) == ("a", "a")
+    assert await broker.depth("report") == 1
+
+
+async def test_expired_leases_return_jobs_to_the_queue(broker, clock: Clock) -> None:
+    await broker.enqueue(_job("a"))
+    job = await broker.claim("report", 30)
+    assert (job.status, job.attempts) == ("running", 1)
+    clock.now += 20
+    await broker.touch(job, 30)
+    clock.now += 20
+    assert await broker.recover() == 0
+    clock.now += 20
+    assert await broker.recover() == 1
+    again = await broker.claim("report", 30)
+    assert (again.id, again.attempts) == ("a", 2)
+    await broker.complete(again)
+    assert (await broker.get("a")).status == "done"
+
+
+async def test_retries_wait_for_their_delay(broker, clock: Clock) -> None:
+    await broker.enqueue(_job("a"))
+    job = await broker.claim("report", 30)
+    await broker.retry(job, 10, "boom")
+    assert await broker.claim("report", 30) is None
+    assert await broker.depth("report") == 1
+    clock.now += 10
+    again = await broker.claim("report", 30)
+    assert (again.id, again.attempts, again.error) == ("a", 2, "boom")
+
+
+async def test_runner_retries_then_fails_after_max_attempts() -> None:
+    runner = JobRunner(MemoryBroker())
+    calls: list[str] = []
+
+    async def handler(job: Job) -> None:
+        calls.append(job.id)
+        if job.payload["fail"]:
+            raise RuntimeError("render failed")
+
+    runner.register(JobType("report", handler, max_attempts=2, retry_delay=0.0))
+    ok = await runner.enqueue("report", {"fail": False})
+    bad = await runner.enqueue("report", {"fail": True})
+    with pytest.raises(KeyError):
+        await runner.enqueue("unknown")
+    for _ in range(4):
+        await runner.run_once()
+        await asyncio.gather(*runner._tasks)
+    assert (await runner.get(ok.id)).status == "done"
+    failed = await runner.get(bad.id)
+    assert (failed.status, failed.attempts, failed.error) == ("failed", 2, "render failed")
+    assert calls.count(bad.id) == 2
@@ -0,0 +1,71 @@
+"""Per-locale lexicons and morphology tables."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.lexicon import es
+from app.lexicon.lexicon import Lexicon, ObjectWord
+from app.lexicon.table import LexiconError, MorphologyTable, write_table
+
+
+def test_table_round_trip(tmp_path) -> None:
+    records = {f"n:word{i}": (f"palabra{i}", "m") for i in range(500)}
+    records["w:now"] = ("ahora",)
+    path = tmp_path / "es.lex"
+    write_table(path, records)
+    table = MorphologyTable(path)
+    try:
+        assert len(table) == 501
+        assert all(table.get(key) == fields for key, fields in records.items())
+        assert table.get("n:missing") is None
+    finally:
+        table.close()
+    with pytest.raises(LexiconError):
+        write_table(path, {"n:bad\x1fkey": ()})
+    (tmp_path / "junk.lex").write_bytes(b"not a table at all")
+    with pytest.raises(LexiconError):
+        MorphologyTable(tmp_path / "junk.lex")
+
+
+@pytest.mark.parametrize(
+    "word, plural",
+    [("manzana", "manzanas"), ("camión", "camiones"), ("lápiz", "lápices"), ("lunes", "lunes")],
+)
+def test_spanish_plurals(word: str, plural: str) -> None:
+    assert es.pluralize(word) == plural
+
+
+def test_spanish_inflection() -> None:
+    assert es.adjective_forms("rojo") == ("rojo", "roja", "rojos", "rojas")
+    assert es.adjective_forms("mejor") == ("mejor", "mejor", "mejores", "mejores")
+    assert es.conjugate("comer")[0] == "como"
+    assert es.conjugate("sentirse")[0] == "me siento"
+    assert es.with_preposition("a", "el parque") == "al parque"
+    with pytest.raises(ValueError):
+        es.conjugate("run")
+
+
+@pytest.mark.parametrize(
+    "verb, word, modifier, expected",
+    [
+        ("want", ObjectWord("apple", "food"), None, ("quiero", "una manzana", "")),
+        ("like", ObjectWord("water", "drink"), None, ("me gusta", "el agua", "")),
+        ("go", ObjectWord("park", "place"), None, ("voy", "al parque", "")),
+        ("want", ObjectWord("shoes", "clothing"), "big", ("quiero", "zapatos", "grandes")),
+        ("want", ObjectWord("quilt", "toy", custom=True), None, ("quiero", "mi quilt", "")),
+    ],
+)
+def test_realizes_spanish_clauses(tmp_path, verb, word, modifier, expected) -> None:
+    lexicon = Lexicon.open("es", tmp_path)
+    try:
+        clause = lexicon.realize(verb, word, modifier)
+        assert (clause.verb, clause.object, clause.modifier) == expected
+        assert lexicon.template("I [verb] [object]") == "[verb] [object]"
+    finally:
+        lexicon.close()
+
+
+def test_unsupported_locale(tmp_path) -> None:
+    with pytest.raises(LexiconError, match="Unsupported locale"):
+        Lexicon.open("xx", tmp_path)
@@ -0,0 +1,67 @@
+"""In-memory object library index (FR-8)."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.services.object_service import LabelTrie, ObjectEntry, ObjectLibraryIndex
+
+OWNER = 5
+
+
+@pytest.fixture
+def index() -> ObjectLibraryIndex:
+    return ObjectLibraryIndex.from_entries(
+        [
+            ObjectEntry(1, "Apple", "food", usage_count=3),
+            ObjectEntry(2, "apple juice", "drink", usage_count=9),
+            ObjectEntry(3, "Dining Table", "furniture"),
+            ObjectEntry(4, "strawberry", "food", usage_count=7),
+            ObjectEntry(10, "grandma's quilt", "toy", user_id=OWNER),
+        ]
+    )
+
+
+def test_trie_matches_any_word_and_forgets_removed_labels() -> None:
+    trie = LabelTrie()
+    trie.add("dining table", 3)
+    trie.add("table", 7)
+    assert trie.lookup("ta") == {3, 7}
+    assert trie.lookup("din") == {3}
+    trie.remove("dining table", 3)
+    assert trie.lookup("ta") == {7} and trie.lookup("d") == set()
+
+
+def test_categories_and_search_rank_most_used_first(index: ObjectLibraryIndex) -> None:
+    assert [e.id for e in index.objects(category="food")] == [4, 1]
+    assert [e.id for e in index.search("app")] == [2, 1]
+    assert [e.id for e in index.search("juice", category="food")] == []
+    # Custom objects come first, and only for their owner
+    assert [e.id for e in index.search("q", user_id=OWNER)] == [10]
+    assert index.search("q", user_id=9) == []
+    assert index.objects(user_id=OWNER)[0].id == 10
+
+
+def test_resolves_detector_labels(index: ObjectLibraryIndex) -> None:
+    assert index.resolve_label("Apples") == 1
+    assert index.resolve_label("dining  table!") == 3
+    assert index.resolve_label("strawberries") == 4
+    assert index.resolve_label("Grandma's quilt", OWNER) == 10
+    assert index.resolve_label("Grandma's quilt") is None
+
+
+def test_versions_change_only_with_the_visible_library(index: ObjectLibraryIndex) -> None:
+    shared, owner, other = index.version(), index.version(OWNER), index.version(9)
+    assert other == shared and owner.startswith(shared) and owner != shared
+    index.add_custom(ObjectEntry(11, "red ball", "toy", user_id=OWNER))
+    assert index.version() == shared and index.version(OWNER) != owner
+    assert index.visible(11, OWNER) is not None and index.visible(11, 9) is None
+    assert index.remove_custom(11).name == "red ball"
+    assert index.version(OWNER) == owner
+    # Identical content gives an identical version in another worker
+    again = ObjectLibraryIndex.from_entries(
+        [*index.objects(), ObjectEntry(10, "grandma's quilt", "toy", user_id=OWNER)]
+    )
+    assert again.version(OWNER) == owner
+    with pytest.raises(ValueError):
+        index.add_custom(ObjectEntry(12, "cup", "drink"))
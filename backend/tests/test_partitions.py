@@ -0,0 +1,64 @@
+"""Monthly history partitions (TODO 1.3)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+
+from sqlalchemy import insert, text
+
+from app.database import Database
+from app.models import ConstructedSentence
+from app.models.partitions import PARTITIONED_TABLES, add_months, partition_name
+from app.services.jobs import JobRunner, MemoryBroker
+from app.services.partition_service import PROVISION_JOB, PartitionProvisioner
+
+
+def test_add_months_crosses_years() -> None:
+    assert add_months(date(2031, 12, 31), 1) == date(2032, 1, 1)
+    assert add_months(date(2032, 1, 15), -1) == date(2031, 12, 1)
+    assert add_months(date(2031, 5, 9), 0) == date(2031, 5, 1)
+
+
+async def test_default_partition_stays_empty_across_a_month_boundary(
+    database: Database, user_id: int
+) -> None:
+    runner = JobRunner(MemoryBroker())
+    provisioner = PartitionProvisioner(database, runner, months_ahead=1)
+    assert PROVISION_JOB in runner.types
+    months = [date(2031, 12, 1), date(2032, 1, 1)]
+    names = [partition_name(table, month) for table in PARTITIONED_TABLES for month in months]
+    try:
+        created = await provisioner.run_once(date(2031, 12, 31))
+        assert sorted(created) == sorted(names)
+        assert await provisioner.run_once(date(2031, 12, 31)) == []
+        async with database.session() as session:
+            for stamp in (
+                datetime(2031, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+                datetime(2032, 1, 1, tzinfo=timezone.utc),
+            ):
+                await session.execute(
+                    insert(ConstructedSentence).values(
+                        user_id=user_id, sentence_text="Later", created_at=stamp
+                    )
+                )
+            placed = await session.execute(
+                text(
+                    "SELECT tableoid::regclass::text FROM constructed_sentences "
+                    "WHERE user_id = :user_id ORDER BY created_at"
+                ),
+                {"user_id": user_id},
+            )
+            assert placed.scalars().all() == names[:2]
+            stray = await session.scalar(
+                text("SELECT count(*) FROM constructed_sentences_default WHERE user_id = :user_id"),
+                {"user_id": user_id},
+            )
+            assert stray == 0
+    finally:
+        async with database.session() as session:
+            await session.execute(
+                text("DELETE FROM constructed_sentences WHERE user_id = :user_id"),
+                {"user_id": user_id},
+            )
+            for name in names:
+                await session.execute(text(f"DROP TABLE IF EXISTS {name}"))
@@ -0,0 +1,99 @@
+"""Next-selection prediction (Kneser-Ney n-grams over sentence history)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sqlalchemy import insert, select
+
+from app.database import Database
+from app.models import ConstructedSentence
+from app.services.prediction_service import (
+    NGramModel,
+    PredictionIndex,
+    TokenKind,
+    token,
+    unpack,
+)
+
+APPLE, JUICE = token(TokenKind.OBJECT, 1), token(TokenKind.OBJECT, 2)
+EAT, DRINK = token(TokenKind.VERB, 1), token(TokenKind.VERB, 2)
+
+
+def _history() -> list[list[int]]:
+    return [[APPLE, EAT], [JUICE, DRINK]] * 20 + [[APPLE, EAT]]
+
+
+def test_probabilities_are_a_distribution() -> None:
+    model = NGramModel()
+    model.extend(_history())
+    for selected in ([], [APPLE], [JUICE], [token(TokenKind.OBJECT, 99)]):
+        probs = model.probabilities(selected)
+        assert probs.min() >= 0
+        assert probs.sum() == pytest.approx(1.0)
+
+
+def test_predicts_from_the_last_two_selections() -> None:
+    model = NGramModel()
+    model.extend(_history())
+    assert model.predict([APPLE], 1)[0][0] == EAT
+    assert model.predict([JUICE], 1)[0][0] == DRINK
+    # "eat apple" is followed by "juice"
+    assert model.predict([], 1, [TokenKind.OBJECT])[0][0] == JUICE
+    verbs = model.predict([], 5, [TokenKind.VERB])
+    assert verbs and all(unpack(packed)[0] is TokenKind.VERB for packed, _ in verbs)
+
+
+def test_adding_in_place_matches_a_bulk_build() -> None:
+    bulk = NGramModel()
+    bulk.extend(_history())
+    incremental = NGramModel()
+    for sentence in _history():
+        incremental.add(sentence)
+    assert np.array_equal(bulk.trigrams, incremental.trigrams)
+    assert np.array_equal(bulk.trigram_counts, incremental.trigram_counts)
+    assert np.array_equal(bulk.continuations, incremental.continuations)
+    assert np.allclose(bulk.probabilities([APPLE]), incremental.probabilities([APPLE]))
+
+
+async def test_catch_up_reads_sentences_committed_late(database: Database, user_id: int) -> None:
+    now = datetime.now(timezone.utc)
+    async with database.session() as session:
+        first = await session.scalar(
+            insert(ConstructedSentence)
+            .values(user_id=user_id, sentence_text="Later id", created_at=now)
+            .returning(ConstructedSentence.id)
+        )
+    index = PredictionIndex()
+    async with database.session(read_only=True) as session:
+        model = await index.model(session, user_id)
+    assert model.sentences == 1
+    # Another worker's sentence: allocated a smaller id and an earlier
+    # created_at, but committed after this worker read the history
+    async with database.session() as session:
+        await session.execute(
+            insert(ConstructedSentence).values(
+                id=first - 1,
+                user_id=user_id,
+                sentence_text="Committed late",
+                created_at=now - timedelta(seconds=30),
+            )
+        )
+    index.mark_stale(user_id)
+    async with database.session(read_only=True) as session:
+        model = await index.model(session, user_id)
+        ids = (
+            await session.scalars(
+                select(ConstructedSentence.id).where(ConstructedSentence.user_id == user_id)
+            )
+        ).all()
+    assert model.sentences == 2
+    # Recording either sentence again changes nothing
+    for sentence_id in ids:
+        index.record(user_id, sentence_id, now, *[None] * 3)
+    index.mark_stale(user_id)
+    async with database.session(read_only=True) as session:
+        await index.model(session, user_id)
+    assert model.sentences == 2
@@ -0,0 +1,42 @@
+"""Hot query plan checks (TODO 2.3)."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from app.benchmarks.query_plans import hot_queries, run, seed
+
+
+@pytest.fixture(scope="module")
+def seeded(database_url: str):
+    engine = create_engine(database_url)
+    seed(engine, 20_000, 60, force=True)
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE users RESTART IDENTITY CASCADE"))
+    engine.dispose()
+
+
+def _sql(statement) -> str:
+    return str(
+        statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def test_hot_queries_use_their_indexes_and_prune(seeded) -> None:
+    results = run(seeded, repeat=1)
+    assert [(r.name, r.problems) for r in results if not r.passed] == []
+
+
+def test_history_window_ends_at_the_newest_row_of_the_table(seeded) -> None:
+    with seeded.connect() as connection:
+        queries = {q.name: q.statement for q in hot_queries(connection)}
+        newest = connection.execute(
+            text("SELECT max(created_at) FROM constructed_sentences")
+        ).scalar_one()
+        again = {q.name: _sql(q.statement) for q in hot_queries(connection)}
+    history = _sql(queries["history_by_user_time"])
+    assert newest.isoformat(sep=" ") in history
+    assert again["history_by_user_time"] == history
@@ -0,0 +1,79 @@
+"""GCRA rate limiting (NFR-4)."""
+
+from __future__ import annotations
+
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import RateLimiter, client_key, route_cost
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_burst_up_to_the_limit_then_smooth_refill(clock: Clock) -> None:
+    limiter = RateLimiter(10, period=60.0)
+    decisions = [limiter.check("ip:a") for _ in range(11)]
+    assert [d.allowed for d in decisions] == [True] * 10 + [False]
+    assert decisions[9].remaining == 0
+    assert decisions[10].retry_after == pytest.approx(6.0)
+    # One interval later exactly one unit is back, not a whole new window
+    clock.now += 6.0
+    assert limiter.check("ip:a").allowed
+    assert not limiter.check("ip:a").allowed
+    assert limiter.check("ip:b").allowed
+
+
+def test_costly_routes_use_more_of_the_budget(clock: Clock) -> None:
+    limiter = RateLimiter(10, period=60.0)
+    cost = route_cost("POST", "/api/export/pdf")
+    assert (cost, route_cost("GET", "/health"), route_cost("GET", "/api/objects")) == (5, 0, 1)
+    assert limiter.check("ip:a", cost).allowed
+    assert limiter.check("ip:a", cost).allowed
+    assert not limiter.check("ip:a", 1).allowed
+
+
+@pytest.mark.parametrize(
+    "method, path, cost",
+    [
+        ("POST", "/api/objects/custom", 2),
+        ("POST", "/api/objects/custom/7/photos", 3),
+        ("DELETE", "/api/objects/custom/7/photos", 1),
+        ("POST", "/api/people/7/faces", 3),
+        ("POST", "/api/people", 1),
+        ("GET", "/metrics/slo", 0),
+        ("GET", "/healthz", 1),
+    ],
+)
+def test_inference_routes_cost_more_than_their_prefixes(method: str, path: str, cost: int) -> None:
+    assert route_cost(method, path) == cost
+
+
+def test_client_key_ignores_the_user_header() -> None:
+    scope = {"headers": [(b"x-user-id", b"42")], "client": ("203.0.113.9", 5000)}
+    assert client_key(scope) == "ip:203.0.113.9"
+    assert client_key({**scope, "headers": [(b"x-user-id", b"43")]}) == "ip:203.0.113.9"
+    assert client_key({"headers": [], "client": None}) == "ip:unknown"
+
+
+async def test_workers_share_the_budget_through_redis(redis) -> None:
+    first = RateLimiter(10, period=60.0, redis=redis)
+    second = RateLimiter(10, period=60.0, redis=redis)
+    assert all(first.check("ip:a").allowed for _ in range(8))
+    await first.sync()
+    await second.sync()
+    assert second.check("ip:a").allowed
+    await second.sync()
+    assert [second.check("ip:a").allowed for _ in range(3)] == [True, False, False]
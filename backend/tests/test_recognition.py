@@ -0,0 +1,77 @@
+"""Custom object recognition by embedding nearest neighbour (TODO 3.4)."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from app.database import Database
+from app.models import ObjectEmbedding, ObjectLibrary
+from app.services.embeddings import normalize, vector_bytes
+from app.services.recognition_service import Box, ObjectRecognizer, crop_box
+
+DIM = 16
+
+
+class StubEmbedder:
+    """Names an embedding space; these tests pass vectors, never images."""
+
+    name = "test-objects"
+    dim = DIM
+
+    def embed(self, images):
+        raise AssertionError("not used")
+
+
+@pytest.mark.parametrize(
+    "box, crop",
+    [
+        (Box(0.25, 0.25, 0.5, 0.5), (45, 45, 155, 155)),
+        # Widened past the edge and clamped to the image
+        (Box(0.0, 0.9, 1.0, 0.1), (0, 179, 200, 200)),
+        # A degenerate box still crops one pixel
+        (Box(0.5, 0.5, 0.0, 0.0), (100, 100, 101, 101)),
+    ],
+)
+def test_crop_box_widens_and_clamps(box: Box, crop: tuple[int, int, int, int]) -> None:
+    assert crop_box(box, 200, 200) == crop
+
+
+async def test_recognizes_only_the_users_objects_in_the_same_model(
+    database: Database, user_id: int
+) -> None:
+    vectors = normalize(np.random.default_rng(0).normal(size=(3, DIM)))
+    recognizer = ObjectRecognizer(StubEmbedder(), threshold=0.9)
+    async with database.session(read_only=True) as session:
+        # Nothing enrolled: every box is a generic detection, without running the model
+        assert await recognizer.recognize(session, user_id, b"", [Box(0, 0, 1, 1)] * 2) == [
+            None,
+            None,
+        ]
+    recognizer.evict(user_id)
+    async with database.session() as session:
+        object_id = await session.scalar(
+            insert(ObjectLibrary)
+            .values(name="blue cup", category="food", user_id=user_id)
+            .returning(ObjectLibrary.id)
+        )
+        await session.execute(
+            insert(ObjectEmbedding),
+            [
+                {
+                    "object_id": object_id,
+                    "user_id": user_id,
+                    "model": model,
+                    "dim": DIM,
+                    "vector": vector_bytes(vector),
+                }
+                for model, vector in (("test-objects", vectors[0]), ("older-model", vectors[1]))
+            ],
+        )
+    async with database.session(read_only=True) as session:
+        matches = await recognizer.search(session, user_id, vectors, 1)
+    assert matches[0] == [(object_id, pytest.approx(1.0))]
+    # The other model's vector is not comparable and is not loaded
+    assert matches[1] == [] and matches[2] == []
+    assert recognizer.loaded(user_id).size == 1
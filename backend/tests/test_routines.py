@@ -0,0 +1,98 @@
+"""Routine recurrence and windows (TODO 5.3)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.routine_service import RoutineScheduler, Schedule
+
+UTC = timezone.utc
+BREAKFAST = "FREQ=DAILY;BYHOUR=7;BYMINUTE=30"
+
+
+def _breakfast(**kwargs) -> Schedule:
+    options = {"routine_id": 1, "user_id": 5, "categories": ("food",)}
+    options.update(kwargs)
+    return Schedule.parse(BREAKFAST, datetime(2025, 1, 1, 0, 0), "Europe/London", 45, **options)
+
+
+def test_windows_keep_local_time_across_dst() -> None:
+    schedule = _breakfast()
+    # 07:30 London is 07:30 UTC in winter and 06:30 UTC in summer
+    assert schedule.next_window(datetime(2025, 3, 1, 12, tzinfo=UTC)) == datetime(
+        2025, 3, 2, 7, 30, tzinfo=UTC
+    )
+    assert schedule.next_window(datetime(2025, 4, 1, 12, tzinfo=UTC)) == datetime(
+        2025, 4, 2, 6, 30, tzinfo=UTC
+    )
+
+
+def test_open_window_covers_the_duration() -> None:
+    schedule = _breakfast()
+    opened = datetime(2025, 1, 10, 7, 30, tzinfo=UTC)
+    assert schedule.open_window(opened) == opened
+    assert schedule.open_window(opened + timedelta(minutes=44)) == opened
+    assert schedule.open_window(opened + timedelta(minutes=45)) is None
+    assert schedule.open_window(opened - timedelta(minutes=1)) is None
+
+
+def test_old_routines_expand_like_new_ones() -> None:
+    old = Schedule.parse(
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO", datetime(2015, 1, 5, 9, tzinfo=UTC), "UTC", 30
+    )
+    fresh = Schedule.parse(
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO", datetime(2015, 1, 5, 9, tzinfo=UTC), "UTC", 30
+    )
+    moment = datetime(2025, 6, 1, tzinfo=UTC)
+    expected = fresh.rule.after(moment.replace(tzinfo=None))
+    assert old.next_window(moment) == expected.replace(tzinfo=UTC)
+    assert old.anchor > datetime(2025, 1, 1)
+    # Same fortnightly phase as the 2015 start
+    assert (old.anchor - datetime(2015, 1, 5, 9)).days % 14 == 0
+
+
+def test_count_and_utc_until_end_the_rule() -> None:
+    counted = Schedule.parse("FREQ=DAILY;COUNT=2", datetime(2025, 1, 1, 8, tzinfo=UTC), "UTC", 10)
+    assert counted.next_window(datetime(2025, 1, 2, 9, tzinfo=UTC)) is None
+    until = Schedule.parse(
+        "FREQ=DAILY;UNTIL=20250103T090000Z",
+        datetime(2025, 1, 1, 9, tzinfo=UTC),
+        "Europe/Berlin",
+        10,
+    )
+    # 10:00 Berlin daily, up to and including 09:00 UTC (10:00 local) on the 3rd
+    assert until.next_window(datetime(2025, 1, 2, 9, tzinfo=UTC)) == datetime(
+        2025, 1, 3, 9, tzinfo=UTC
+    )
+    assert until.next_window(datetime(2025, 1, 3, 9, tzinfo=UTC)) is None
+
+
+@pytest.mark.parametrize(
+    "rule, zone",
+    [
+        ("FREQ=SECONDLY", "UTC"),
+        ("FREQ=DAILY;DTSTART=20250101T000000", "UTC"),
+        ("FREQ=DAILY;BYHOUR=25", "UTC"),
+        (BREAKFAST, "Mars/Olympus"),
+    ],
+)
+def test_rejects_bad_rules(rule: str, zone: str) -> None:
+    with pytest.raises(ValueError):
+        Schedule.parse(rule, datetime(2025, 1, 1, tzinfo=UTC), zone, 30)
+
+
+def test_scheduler_lists_open_windows_and_warms_mid_window_loads() -> None:
+    scheduler = RoutineScheduler(None, None, None, None, None, lead=60.0)
+    now = datetime(2025, 1, 10, 7, 40, tzinfo=UTC)
+    scheduler._add(_breakfast(), now)
+    scheduler._add(_breakfast(routine_id=2, name="snack"), now - timedelta(hours=3))
+    windows = scheduler.open_windows(5, now)
+    assert [w.schedule.id for w in windows] == [1, 2]
+    assert windows[0].end == datetime(2025, 1, 10, 8, 15, tzinfo=UTC)
+    assert scheduler.open_windows(6, now) == []
+    # Routine 1 loaded mid-window is due now; routine 2 a minute before 07:30
+    prewarm = datetime(2025, 1, 10, 7, 29, tzinfo=UTC).timestamp()
+    start = windows[0].start.timestamp()
+    assert sorted(scheduler._heap) == [(prewarm, 2, start), (now.timestamp(), 1, start)]
@@ -0,0 +1,114 @@
+"""Switch-scanning and gaze layouts (create_future_md, "Switch Access")."""
+
+from __future__ import annotations
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers.scanning import scan_layout
+from app.services.object_service import ObjectEntry, ObjectLibraryIndex
+from app.services.prediction_service import NGramModel, PredictionIndex
+from app.services.scanning_service import (
+    ScanItem,
+    Timing,
+    build_layout,
+    evaluate,
+    huffman_layout,
+    row_column_layout,
+    screen_items,
+    uniform,
+)
+from app.services.sentence_service import DEFAULT_TEMPLATES, SentenceEngine, compile_template
+from app.simulation import simulate
+from app.utils.cache import TieredCache
+
+
+def _items(*probabilities: float) -> list[ScanItem]:
+    return [ScanItem("object", i, f"item {i}", p) for i, p in enumerate(probabilities)]
+
+
+def _ids(root) -> list[int]:
+    return sorted(item.id for item, _path in root.leaves())
+
+
+def test_huffman_depths_are_optimal() -> None:
+    root = huffman_layout(_items(0.1, 0.4, 0.2, 0.3), 2)
+    depths = {item.id: len(path) for item, path in root.leaves()}
+    assert depths == {1: 1, 3: 2, 2: 3, 0: 3}
+    layout = evaluate("huffman", root, Timing(miss_rate=0.0))
+    assert layout.expected_presses == pytest.approx(1.9)
+
+
+@pytest.mark.parametrize("count, fanout", [(4, 3), (10, 4), (17, 8), (3, 5)])
+def test_huffman_keeps_every_item_once(count: int, fanout: int) -> None:
+    root = huffman_layout(uniform(_items(*[1.0] * count)), fanout)
+    assert _ids(root) == list(range(count))
+    assert all(size <= fanout for _item, path in root.leaves() for _p, size in path)
+
+
+def test_row_column_puts_likely_items_in_cheap_cells() -> None:
+    items = _items(0.05, 0.3, 0.1, 0.2, 0.15, 0.2)
+    root = row_column_layout(items, 3)
+    cells = {item.id: tuple(p for p, _size in path) for item, path in root.leaves()}
+    assert cells[1] == (0, 0)
+    assert {cells[3], cells[5]} == {(0, 1), (1, 0)}
+    assert _ids(root) == list(range(6))
+    # A single row needs no row level
+    assert all(len(path) == 1 for _item, path in row_column_layout(items[:3], 3).leaves())
+
+
+def test_best_is_no_slower_than_any_method() -> None:
+    items = _items(*[1.0 / (rank + 1) for rank in range(20)])
+    timing = Timing("step")
+    best = build_layout(items, timing)
+    for method in ("linear", "row-column", "huffman"):
+        assert best.expected_seconds <= build_layout(items, timing, method).expected_seconds
+    with pytest.raises(ValueError):
+        build_layout(items, timing, "spiral")
+    with pytest.raises(ValueError):
+        build_layout([], timing)
+
+
+def test_gaze_gives_likely_items_shorter_dwells() -> None:
+    timing = Timing("gaze", dwell=2.0, min_dwell=0.5)
+    layout = build_layout(_items(0.6, 0.3, 0.1), timing)
+    assert layout.dwell[("object", 0)] == pytest.approx(0.5)
+    assert layout.dwell[("object", 2)] == pytest.approx(2.0)
+    flat = build_layout(uniform(_items(0.6, 0.3, 0.1)), timing)
+    assert set(flat.dwell.values()) == {2.0}
+    with pytest.raises(ValueError):
+        Timing("gaze", dwell=0.5, min_dwell=1.0)
+
+
+def test_predicted_layouts_beat_fixed_ones_in_simulation() -> None:
+    report = simulate(screens=20, items=30, columns=5, selections=200, seed=3)
+    spm = {name: stats.selections_per_minute for name, stats in report.layouts.items()}
+    assert spm["row-column"] > spm["fixed-row-column"]
+    assert spm["best"] > spm["fixed-linear"]
+
+
+async def test_verbs_screen_hides_other_users_custom_objects() -> None:
+    objects = ObjectLibraryIndex.from_entries(
+        [ObjectEntry(1, "apple", "food"), ObjectEntry(2, "quilt", "toy", user_id=5)]
+    )
+    templates = [compile_template(i, s) for i, s in enumerate(DEFAULT_TEMPLATES, start=1)]
+    engine = SentenceEngine(templates, {1: "want", 2: "eat"}, {1: "now"}, objects)
+    assert screen_items(NGramModel(), engine, objects, 5, "verbs", 2)
+    with pytest.raises(ValueError, match="Unknown object"):
+        screen_items(NGramModel(), engine, objects, 9, "verbs", 2)
+    for screen in ("verbs", "modifiers"):
+        with pytest.raises(HTTPException) as raised:
+            await scan_layout(
+                screen,
+                2,
+                None,
+                None,
+                "best",
+                4,
+                Timing(),
+                9,
+                engine,
+                PredictionIndex(),
+                TieredCache(),
+            )
+        assert raised.value.status_code == 404
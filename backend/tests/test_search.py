@@ -0,0 +1,115 @@
+"""Fuzzy full-text search (TODO 3.4 / 5.1)."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from app.database import Database
+from app.models import ConstructedSentence
+from app.services.object_service import ObjectEntry, ObjectLibraryIndex
+from app.services.search_service import SearchIndex
+from app.services.sentence_service import DEFAULT_TEMPLATES, SentenceEngine, compile_template
+
+
+@pytest.fixture
+def index() -> SearchIndex:
+    objects = ObjectLibraryIndex.from_entries(
+        [
+            ObjectEntry(1, "banana", "food"),
+            ObjectEntry(2, "orange juice", "drink"),
+            ObjectEntry(3, "bandage", "health"),
+        ]
+    )
+    templates = [compile_template(i, s) for i, s in enumerate(DEFAULT_TEMPLATES, start=1)]
+    engine = SentenceEngine(templates, {1: "want", 2: "drink"}, {1: "now"}, objects)
+    return SearchIndex(objects, engine)
+
+
+def test_exact_prefix_and_misspelled_words_match(index: SearchIndex) -> None:
+    assert [hit.text for hit in index.search(None, "banana")][0] == "banana"
+    assert {hit.text for hit in index.search(None, "ban")} == {"banana", "bandage"}
+    assert [hit.text for hit in index.search(None, "bananna")][0] == "banana"
+    assert [hit.kind for hit in index.search(None, "drink", kinds=["verb"])] == ["verb"]
+    assert index.search(None, "") == []
+
+
+async def test_catch_up_reads_phrases_committed_late(
+    index: SearchIndex, database: Database, user_id: int
+) -> None:
+    now = datetime.now(timezone.utc)
+    async with database.session() as session:
+        first = await session.scalar(
+            insert(ConstructedSentence)
+            .values(user_id=user_id, sentence_text="I want a banana.", created_at=now)
+            .returning(ConstructedSentence.id)
+        )
+    async with database.session(read_only=True) as session:
+        user = await index.user_index(session, user_id)
+    assert [hit.text for hit in index.search(user, "banana", kinds=["phrase"])] == [
+        "I want a banana."
+    ]
+    # Smaller id and earlier created_at, committed after the index was read
+    async with database.session() as session:
+        await session.execute(
+            insert(ConstructedSentence).values(
+                id=first - 1,
+                user_id=user_id,
+                sentence_text="I want a bandage.",
+                created_at=now - timedelta(seconds=30),
+            )
+        )
+    for _ in range(2):
+        index.mark_stale(user_id)
+        async with database.session(read_only=True) as session:
+            user = await index.user_index(session, user_id)
+    hits = index.search(user, "bandage", kinds=["phrase"])
+    assert [(hit.text, hit.usage) for hit in hits] == [("I want a bandage.", 1)]
+    assert user.usage["phrase", "I want a banana."] == 1
+
+
+class SlowSession:
+    """Stands in for a session whose history queries wait on ``gate``."""
+
+    def __init__(self, gate: asyncio.Event, fail: bool = False) -> None:
+        self.gate = gate
+        self.fail = fail
+        self.queries = 0
+
+    async def scalar(self, statement: object) -> datetime:
+        self.queries += 1
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError("Connection lost")
+        return datetime.now(timezone.utc)
+
+    async def execute(self, statement: object) -> list[tuple]:
+        self.queries += 1
+        # The grouped history, then an empty slack window
+        return [("I want a banana.", 1, None, None, 3)] if self.queries == 2 else []
+
+
+async def test_first_searches_share_one_complete_load(index: SearchIndex) -> None:
+    gate = asyncio.Event()
+    first, second = SlowSession(gate), SlowSession(gate)
+    loads = [asyncio.create_task(index.user_index(s, 9)) for s in (first, second)]  # type: ignore
+    await asyncio.sleep(0.01)
+    assert not any(load.done() for load in loads)
+    gate.set()
+    users = await asyncio.gather(*loads)
+    assert users[0] is users[1] and second.queries == 0
+    assert [hit.text for hit in index.search(users[1], "banana", kinds=["phrase"])] == [
+        "I want a banana."
+    ]
+
+
+async def test_failed_load_is_not_cached(index: SearchIndex) -> None:
+    gate = asyncio.Event()
+    gate.set()
+    with pytest.raises(ConnectionError):
+        await index.user_index(SlowSession(gate, fail=True), 9)  # type: ignore[arg-type]
+    user = await index.user_index(SlowSession(gate), 9)  # type: ignore[arg-type]
+    assert user.usage["phrase", "I want a banana."] == 3
@@ -0,0 +1,153 @@
+"""Sentence construction (FR-5) and composition."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database import Database
+from app.models import ConstructedSentence, ModifierLibrary, VerbLibrary
+from app.routers.sentences import speak_sentence
+from app.schemas.sentence import SentenceConstructRequest
+from app.services.llm_service import (
+    CONTEXTS_PER_WORD_SET,
+    SemanticCache,
+    SentenceComposer,
+    WordSet,
+)
+from app.services.object_service import ObjectEntry, ObjectLibraryIndex
+from app.services.prediction_service import PredictionIndex
+from app.services.sentence_service import (
+    DEFAULT_TEMPLATES,
+    SentenceEngine,
+    TemplateError,
+    compile_template,
+)
+from app.utils.cache import TieredCache
+
+SHARED = 1
+CUSTOM = 20129
+OWNER = 5
+
+
+@pytest.fixture
+def engine() -> SentenceEngine:
+    objects = ObjectLibraryIndex.from_entries(
+        [
+            ObjectEntry(SHARED, "apple", "food"),
+            ObjectEntry(CUSTOM, "quilt", "toy", user_id=OWNER),
+        ]
+    )
+    templates = [compile_template(i, s) for i, s in enumerate(DEFAULT_TEMPLATES, start=1)]
+    return SentenceEngine(templates, {1: "want"}, {1: "now"}, objects)
+
+
+def test_construct_realizes_shared_and_own_objects(engine: SentenceEngine) -> None:
+    assert engine.construct(1, SHARED, user_id=9).text == "I want an apple."
+    assert engine.construct(1, CUSTOM, user_id=OWNER).text == "I want my quilt."
+
+
+@pytest.mark.parametrize("caller", [9, None])
+def test_construct_rejects_other_users_custom_objects(
+    engine: SentenceEngine, caller: int | None
+) -> None:
+    # Memoized for the owner first, so the check must run before the memo
+    engine.construct(1, CUSTOM, user_id=OWNER)
+    with pytest.raises(TemplateError, match="Unknown object"):
+        engine.construct(1, CUSTOM, user_id=caller)
+    assert engine.construct_batch(CUSTOM, [1], user_id=caller) == []
+
+
+async def test_compose_rejects_other_users_custom_objects(engine: SentenceEngine) -> None:
+    composer = SentenceComposer(None, SemanticCache())
+    composition = await composer.compose(engine, [CUSTOM], 1, user_id=OWNER)
+    assert composition.text == "I want my quilt."
+    with pytest.raises(TemplateError, match="Unknown object"):
+        await composer.compose(engine, [CUSTOM], 1, user_id=9)
+
+
+class EchoBackend:
+    """Model backend that echoes the prompt's context and counts calls."""
+
+    name = "echo"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def complete(self, system: str, prompt: str, max_tokens: int) -> str:
+        self.calls += 1
+        return prompt.splitlines()[-1]
+
+    async def close(self) -> None:
+        pass
+
+
+async def test_context_sentences_are_cached_per_user(engine: SentenceEngine, redis) -> None:
+    backend = EchoBackend()
+    # One composer per user, as on two workers sharing Redis
+    owner = SentenceComposer(backend, SemanticCache(redis), timeout=5.0)
+    other = SentenceComposer(backend, SemanticCache(redis), timeout=5.0)
+    context = "for my sister Ana's surgery"
+    first = await owner.compose(engine, [SHARED, SHARED], 1, context=context, user_id=OWNER)
+    assert (first.source, first.text) == ("llm", f"Context: {context}.")
+    assert (
+        await owner.compose(engine, [SHARED, SHARED], 1, context=context, user_id=OWNER)
+    ).source == "cache"
+    leaked = await other.compose(engine, [SHARED, SHARED], 1, context=context, user_id=9)
+    assert leaked.source == "llm" and backend.calls == 2
+    # Without a context the sentence is shared
+    await owner.compose(engine, [SHARED, SHARED], 1, user_id=OWNER)
+    assert (await other.compose(engine, [SHARED, SHARED], 1, user_id=9)).source == "cache"
+    assert backend.calls == 3
+    words = WordSet.of(["apple"], "want", [])
+    assert words.digest() != WordSet.of(["apple"], "want", [], OWNER).digest()
+
+
+async def test_shared_contexts_are_capped_to_the_newest(redis) -> None:
+    words = WordSet.of(["apple"], "want", [], OWNER)
+    cache = SemanticCache(redis)
+    extra = 4
+    for i in range(CONTEXTS_PER_WORD_SET + extra):
+        await cache.put(words, f"context {i}", f"Sentence {i}.")
+    # Rewriting an old context makes it the newest
+    await cache.put(words, f"context {extra}", "Rewritten.")
+    key = f"llm:sentences:{words.digest()}"
+    assert await redis.hlen(key) == await redis.llen(f"{key}:order") == CONTEXTS_PER_WORD_SET
+    expected = [f"context {i}" for i in range(extra + 1, CONTEXTS_PER_WORD_SET + extra)]
+    expected.append(f"context {extra}")
+    # Another worker reads the same newest contexts, oldest first
+    other = SemanticCache(redis)
+    assert await other.get(words, f"context {extra}") == "Rewritten."
+    assert (await other._contexts(words)).texts == expected
+    assert (await cache._contexts(words)).texts == expected
+
+
+async def test_speak_realizes_in_the_requested_locale(database: Database, user_id: int) -> None:
+    async with database.session() as session:
+        for table, column, text in (
+            (VerbLibrary, "verb_text", "want"),
+            (ModifierLibrary, "modifier_text", "now"),
+        ):
+            values = {column: text}
+            if table is ModifierLibrary:
+                values["modifier_type"] = "time"
+            await session.execute(insert(table).values(values).on_conflict_do_nothing())
+        verb_id = await session.scalar(
+            select(VerbLibrary.id).where(VerbLibrary.verb_text == "want")
+        )
+        modifier_id = await session.scalar(
+            select(ModifierLibrary.id).where(ModifierLibrary.modifier_text == "now")
+        )
+    payload = SentenceConstructRequest(verb_id=verb_id, modifier_id=modifier_id, locale="es")
+    async with database.session() as session:
+        engine = await SentenceEngine.load(session, ObjectLibraryIndex())
+        out = await speak_sentence(
+            payload, user_id, session, engine, PredictionIndex(), TieredCache()
+        )
+    assert out.text == "Quiero ahora."
+    async with database.session() as session:
+        spoken = await session.scalar(
+            select(ConstructedSentence.sentence_text).where(ConstructedSentence.user_id == user_id)
+        )
+    assert spoken == "Quiero ahora."
@@ -0,0 +1,81 @@
+"""Offline replay harness (TODO 3.6)."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from app.simulation import EngineStats, convert_ndjson, generate_feedback_log, replay
+from app.simulation.replay import ReplayTask, replay_shard
+
+
+@pytest.fixture(scope="module")
+def log(tmp_path_factory: pytest.TempPathFactory):
+    return generate_feedback_log(tmp_path_factory.mktemp("log"), 20_000, 40, seed=1)
+
+
+def test_log_is_sorted_by_user_then_time(log) -> None:
+    users = log.column("user_id")
+    stamps = log.column("timestamp")
+    assert len(log) == 20_000
+    order = np.lexsort((stamps, users))
+    assert (order == np.arange(len(log))).all()
+
+
+def test_shards_cover_the_log_on_user_boundaries(log) -> None:
+    users = log.column("user_id")
+    shards = log.shards(7)
+    assert shards[0][0] == 0 and shards[-1][1] == len(log)
+    for (_, stop), (start, _) in zip(shards, shards[1:]):
+        assert stop == start
+        assert users[start - 1] != users[start]
+
+
+def test_learning_rankers_beat_the_rule_order(log) -> None:
+    report = replay(log, workers=1)
+    rule = report.engines["rule"]
+    assert rule.events == len(log)
+    for name in ("qlearning", "bandit"):
+        assert report.engines[name].acceptance_rate > rule.acceptance_rate + 0.2
+        assert report.engines[name].taps_per_sentence < rule.taps_per_sentence
+
+
+def test_sharding_does_not_change_results(log) -> None:
+    whole = replay_shard(ReplayTask(str(log.path), "qlearning", 0, len(log)))
+    merged = EngineStats("qlearning")
+    for start, stop in log.shards(3):
+        merged.merge(replay_shard(ReplayTask(str(log.path), "qlearning", start, stop)))
+    assert (merged.events, merged.intents, merged.accepted, merged.taps) == (
+        whole.events,
+        whole.intents,
+        whole.accepted,
+        whole.taps,
+    )
+
+
+def test_unknown_engine_is_rejected(log) -> None:
+    with pytest.raises(ValueError, match="Unknown engines"):
+        replay(log, engines=["oracle"], workers=1)
+
+
+def test_convert_ndjson_maps_string_sessions_to_users(tmp_path) -> None:
+    records = [
+        {"session_id": "tablet-a", "object_id": 3, "object_category": "food", "verb_id": "want"},
+        {"session_id": "tablet-b", "object_id": 4, "object_category": "place", "verb_id": 1},
+        {"session_id": "tablet-a", "object_id": 3, "object_category": "food", "verb_id": "eat"},
+    ]
+    lines = []
+    for minute, record in enumerate(records):
+        stamp = f"2025-03-01T08:{minute:02d}:00Z"
+        lines.append(json.dumps({**record, "feedback_type": "spoken", "created_at": stamp}))
+    source = tmp_path / "feedback.ndjson"
+    source.write_text("\n".join(lines))
+
+    log = convert_ndjson(source, tmp_path / "log")
+
+    assert log.column("user_id").tolist() == [0, 0, 1]
+    assert log.column("session_id").tolist() == [0, 0, 1]
+    assert log.column("object_id").tolist() == [3, 3, 4]
+    assert log.column("time_of_day").tolist() == [0, 0, 0]
@@ -0,0 +1,108 @@
+"""Offline delta sync (TODO 4.2 / 4.5)."""
+
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select
+
+from app.database import Database
+from app.models import ObjectLibrary, SyncItem, User
+from app.schemas.sync import SyncChangeIn
+from app.services.sync_service import (
+    MAX_USAGE_GROWTH,
+    Change,
+    apply_changes,
+    changes_since,
+    collapse,
+    supersedes,
+)
+
+
+def test_last_writer_wins_on_stamp_then_node() -> None:
+    assert supersedes(2, "a", 1, "z")
+    assert supersedes(1, "b", 1, "a")
+    assert not supersedes(1, "a", 1, "a")
+
+
+def test_collapse_keeps_the_winning_write_and_highest_total() -> None:
+    merged = collapse(
+        [
+            Change("settings", "voice", "a", stamp=5),
+            Change("settings", "voice", "b", stamp=5),
+            Change("settings", "voice", "c", stamp=4),
+            Change("usage", "object:1", count=7),
+            Change("usage", "object:1", count=3),
+        ]
+    )
+    assert merged[("settings", "voice")].value == "b"
+    assert merged[("usage", "object:1")].count == 7
+
+
+def test_push_schema_rejects_huge_counts() -> None:
+    with pytest.raises(ValidationError):
+        SyncChangeIn(collection="usage", key="object:1", count=3_000_000_000)
+
+
+async def test_registers_converge_and_replays_change_nothing(
+    database: Database, user_id: int
+) -> None:
+    changes = [Change("settings", "voice", "en-GB", stamp=10)]
+    async with database.session() as session:
+        assert await apply_changes(session, user_id, "tablet", changes) == 1
+    async with database.session() as session:
+        assert await apply_changes(session, user_id, "tablet", changes) == 0
+        # Older write from another device loses
+        older = [Change("settings", "voice", "en-US", stamp=9)]
+        assert await apply_changes(session, user_id, "phone", older) == 0
+    async with database.session() as session:
+        items, cursor, more = await changes_since(session, user_id)
+        settings = await session.scalar(select(User.settings).where(User.id == user_id))
+    assert [(i.key, i.value) for i in items] == [("voice", "en-GB")]
+    assert (cursor, more) == (items[0].seq, False)
+    assert settings["voice"] == "en-GB"
+
+
+async def test_usage_growth_is_capped_and_shared_counts_untouched(
+    database: Database, user_id: int
+) -> None:
+    async with database.session() as session:
+        shared = await session.scalar(
+            insert(ObjectLibrary)
+            .values(name=f"test-{uuid.uuid4().hex[:8]}", category="food")
+            .returning(ObjectLibrary.id)
+        )
+        custom = await session.scalar(
+            insert(ObjectLibrary)
+            .values(name="quilt", category="food", user_id=user_id)
+            .returning(ObjectLibrary.id)
+        )
+    try:
+        changes = [
+            Change("usage", f"object:{shared}", count=50, stamp=1),
+            Change("usage", f"object:{custom}", count=5000, stamp=1),
+        ]
+        async with database.session() as session:
+            assert await apply_changes(session, user_id, "tablet", changes) == 2
+        # The shared total is unchanged; the custom one grows another step
+        async with database.session() as session:
+            assert await apply_changes(session, user_id, "tablet", changes) == 1
+            counts = dict(
+                (await session.execute(select(ObjectLibrary.id, ObjectLibrary.usage_count))).all()
+            )
+            usage = await session.scalar(
+                select(SyncItem.value).where(
+                    SyncItem.user_id == user_id, SyncItem.key == f"object:{custom}"
+                )
+            )
+        assert counts[shared] == 0
+        assert counts[custom] == usage == 2 * MAX_USAGE_GROWTH
+        with pytest.raises(ValueError, match="out of range"):
+            async with database.session() as session:
+                huge = [Change("usage", f"object:{custom}", count=3_000_000_000)]
+                await apply_changes(session, user_id, "tablet", huge)
+    finally:
+        async with database.session() as session:
+            await session.execute(delete(ObjectLibrary).where(ObjectLibrary.id == shared))
@@ -0,0 +1,50 @@
+"""Stage latency and SLO burn rates against NFR-1 (TR-4)."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.utils.metrics import HdrHistogram
+from app.utils.telemetry import STAGE_ERRORS, STAGE_LATENCY, STAGES, SloWindow, span
+
+
+def test_hdr_quantiles_are_within_one_percent() -> None:
+    histogram = HdrHistogram("test_latency_seconds", "Test", ["stage"], highest=60.0)
+    values = np.random.default_rng(0).lognormal(-3.0, 1.0, 50_000)
+    for value in values:
+        histogram.observe(float(value), "a")
+    qs = (0.5, 0.95, 0.99, 0.999)
+    for q, measured in zip(qs, histogram.quantiles(qs, "a")):
+        assert measured == pytest.approx(np.quantile(values, q), rel=0.01)
+    assert histogram.count("a") == len(values)
+    assert histogram.quantiles(qs, "b") == [0.0] * len(qs)
+    # Out-of-range values are clamped, not dropped
+    histogram.observe(1e6, "c")
+    assert histogram.quantile(0.5, "c") == pytest.approx(60.0, rel=0.01)
+
+
+def test_burn_rate_over_fast_and_slow_windows() -> None:
+    window = SloWindow(STAGES["construction"])
+    start = 1_700_000_000.0
+    for minute in range(60):
+        for request in range(100):
+            # 1% bad for the first 55 minutes, then 20%
+            bad = request < (20 if minute >= 55 else 1)
+            window.add(bad, start + minute * 60)
+    now = start + 59 * 60
+    assert window.counts(5, now) == (500, 100)
+    assert window.burn_rate(5, now) == pytest.approx(20.0)
+    assert window.burn_rate(60, now) == pytest.approx((55 + 100) / 6000 / 0.01)
+    assert window.burn_rate(5, now + 3600) == 0.0
+
+
+def test_span_records_failures() -> None:
+    before = STAGE_LATENCY.count("test_stage"), STAGE_ERRORS.value("test_stage")
+    with span("test_stage"):
+        pass
+    with pytest.raises(KeyError):
+        with span("test_stage"):
+            raise KeyError("boom")
+    assert STAGE_LATENCY.count("test_stage") == before[0] + 2
+    assert STAGE_ERRORS.value("test_stage") == before[1] + 1
@@ -0,0 +1,82 @@
+"""Server-side TTS settings and pre-synthesis."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import update
+
+from app.database import Database
+from app.models import User
+from app.services.tts_service import AudioCache, TTSError, user_voice
+
+
+class FakeEngine:
+    """Writes the request as the "audio"; fails on the text ``"fail"``."""
+
+    name = "fake"
+    extension = "wav"
+    media_type = "audio/wav"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def synthesize(self, text: str, voice: str, rate: float, path) -> None:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if text == "fail":
+            raise TTSError("engine crashed")
+        path.write_bytes(f"{voice}|{rate}|{text}".encode())
+
+
+async def test_audio_is_cached_by_content_and_shared_between_requests(tmp_path) -> None:
+    engine = FakeEngine()
+    cache = AudioCache(tmp_path, engine, "en")
+    first, second = await asyncio.gather(
+        cache.get_or_synthesize("I want  juice."), cache.get_or_synthesize(" I want juice. ")
+    )
+    assert engine.calls == 1 and first.key == second.key
+    assert {first.cached, second.cached} == {False, True}
+    assert first.path.read_bytes() == b"en|1.0|I want juice."
+    again = await cache.get_or_synthesize("I want juice.", "en", 1.001)
+    assert again.cached and engine.calls == 1
+    assert (await cache.get_or_synthesize("I want juice.", "es")).key != first.key
+    with pytest.raises(TTSError):
+        await cache.get_or_synthesize("fail")
+    # A failed synthesis leaves nothing behind
+    assert [p.name for p in tmp_path.glob("*/.*")] == []
+    for text, rate in (("", 1.0), ("x" * 10_000, 1.0), ("hi", 5.0)):
+        with pytest.raises(ValueError):
+            await cache.get_or_synthesize(text, rate=rate)
+
+
+async def test_prune_evicts_least_recently_used_audio(tmp_path) -> None:
+    cache = AudioCache(tmp_path, FakeEngine(), "en", max_bytes=20)
+    audio = [await cache.get_or_synthesize(f"sentence {i}") for i in range(3)]
+    for age, item in enumerate(audio):
+        os.utime(item.path, (1000 + age, 1000 + age))
+    # A hit refreshes the mtime
+    await cache.get_or_synthesize("sentence 0")
+    assert cache.prune() == 2
+    assert audio[0].path.exists() and not audio[1].path.exists()
+
+
+@pytest.mark.parametrize(
+    ("settings", "expected"),
+    [
+        ({}, (None, 1.0)),
+        ({"tts_voice": "en_GB-alba", "tts_rate": 1.5}, ("en_GB-alba", 1.5)),
+        ({"tts_voice": ["en"], "tts_rate": "fast"}, (None, 1.0)),
+        ({"tts_voice": "../../voices/x", "tts_rate": 9}, (None, 2.0)),
+        ({"tts_voice": "en\n", "tts_rate": None}, (None, 1.0)),
+    ],
+)
+async def test_user_voice_falls_back_on_unusable_settings(
+    database: Database, user_id: int, settings: dict, expected: tuple
+) -> None:
+    async with database.session() as session:
+        await session.execute(update(User).where(User.id == user_id).values(settings=settings))
+    async with database.session() as session:
+        assert await user_voice(session, user_id) == expected